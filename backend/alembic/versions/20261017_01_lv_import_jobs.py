@@ -0,0 +1,43 @@
+"""LV-Import als Hintergrundjob: Verarbeitungsstufe und Zeitstempel.
+
+Revision ID: 20261017_01
+Revises: 20260808_01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_01"
+down_revision = "20260808_01"
+branch_labels = None
+depends_on = None
+
+_COLUMNS = (
+    ("processing_stage", sa.String()),
+    ("processing_started_at", sa.DateTime()),
+    ("processing_finished_at", sa.DateTime()),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("lv_imports"):
+        return
+    columns = {column["name"] for column in inspector.get_columns("lv_imports")}
+    with op.batch_alter_table("lv_imports") as batch:
+        for name, typ in _COLUMNS:
+            if name not in columns:
+                batch.add_column(sa.Column(name, typ, nullable=True))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("lv_imports"):
+        return
+    columns = {column["name"] for column in inspector.get_columns("lv_imports")}
+    with op.batch_alter_table("lv_imports") as batch:
+        for name, _ in reversed(_COLUMNS):
+            if name in columns:
+                batch.drop_column(name)
@@ -0,0 +1,44 @@
+"""LV-Import: inhaltsadressierter Extraktions-Cache.
+
+Revision ID: 20261017_02
+Revises: 20261017_01
+
+Rein additiv: eine neue Tabelle. Mehrfach ausführbar — sie prüft zuerst, ob
+die Tabelle schon da ist.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_02"
+down_revision = "20261017_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table("lv_extraction_cache"):
+        return
+    op.create_table(
+        "lv_extraction_cache",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cache_key", sa.String(64), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("file_hash", sa.String(), nullable=False),
+        sa.Column("payload_json", sa.Text(), nullable=False),
+        sa.Column("hits", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=True,
+                  server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("last_used_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_lv_extraction_cache_cache_key", "lv_extraction_cache",
+                    ["cache_key"], unique=True)
+    op.create_index("ix_lv_extraction_cache_file_hash", "lv_extraction_cache",
+                    ["file_hash"])
+
+
+def downgrade() -> None:
+    # Reiner Cache — darf jederzeit verworfen werden.
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table("lv_extraction_cache"):
+        op.drop_table("lv_extraction_cache")
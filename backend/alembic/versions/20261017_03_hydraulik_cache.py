@@ -0,0 +1,41 @@
+"""Hydraulik: inhaltsadressierter Ergebnis-Cache.
+
+Revision ID: 20261017_03
+Revises: 20261017_02
+
+Rein additiv: eine neue Tabelle. Mehrfach ausführbar — sie prüft zuerst, ob
+die Tabelle schon da ist.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_03"
+down_revision = "20261017_02"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table("hc_hydraulik_cache"):
+        return
+    op.create_table(
+        "hc_hydraulik_cache",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cache_key", sa.String(64), nullable=False),
+        sa.Column("engine_version", sa.String(), nullable=False),
+        sa.Column("ergebnis_json", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True,
+                  server_default=sa.text("CURRENT_TIMESTAMP")),
+    )
+    op.create_index("ix_hc_hydraulik_cache_cache_key", "hc_hydraulik_cache",
+                    ["cache_key"], unique=True)
+    op.create_index("ix_hc_hydraulik_cache_created_at", "hc_hydraulik_cache",
+                    ["created_at"])
+
+
+def downgrade() -> None:
+    # Reiner Cache — darf jederzeit verworfen werden.
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table("hc_hydraulik_cache"):
+        op.drop_table("hc_hydraulik_cache")
@@ -0,0 +1,35 @@
+"""LV-Import: Index für die seitenweise Importliste.
+
+Revision ID: 20261017_04
+Revises: 20261017_03
+
+Rein additiv: ein zusammengesetzter Index (tenant_id, created_at, id) für die
+Keyset-Pagination von `GET /lv-imports`. Mehrfach ausführbar — er prüft
+zuerst, ob der Index schon da ist.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_04"
+down_revision = "20261017_03"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_lv_imports_tenant_created_id"
+
+
+def _index_da(bind) -> bool:
+    return any(ix["name"] == INDEX for ix in sa.inspect(bind).get_indexes("lv_imports"))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("lv_imports") or _index_da(bind):
+        return
+    op.create_index(INDEX, "lv_imports", ["tenant_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table("lv_imports") and _index_da(bind):
+        op.drop_index(INDEX, table_name="lv_imports")
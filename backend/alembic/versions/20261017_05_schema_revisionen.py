@@ -0,0 +1,65 @@
+"""Schema-Stände: komprimierte Vollstände/Deltas und geteilte Berechnungen.
+
+Revision ID: 20261017_05
+Revises: 20261017_04
+
+Rein additiv: vier Spalten auf `hc_schema_revisions` und die Tabelle
+`hc_revision_berechnungen`. Bestehende Stände bleiben im Klartext lesbar;
+verdichtet werden sie mit `python -m app.services.schema_revisionen`.
+Mehrfach ausführbar — jede Spalte, Tabelle und jeder Index wird zuerst geprüft.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_05"
+down_revision = "20261017_04"
+branch_labels = None
+depends_on = None
+
+SPALTEN = (
+    ("graph_art", sa.String()),
+    ("graph_basis_nr", sa.Integer()),
+    ("graph_daten", sa.LargeBinary()),
+    ("calculation_sha256", sa.String(64)),
+)
+INDEX = "ix_hc_schema_revisions_calculation_sha256"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("hc_schema_revisions"):
+        vorhanden = {c["name"] for c in inspector.get_columns("hc_schema_revisions")}
+        for name, typ in SPALTEN:
+            if name not in vorhanden:
+                op.add_column("hc_schema_revisions", sa.Column(name, typ, nullable=True))
+        if not any(ix["name"] == INDEX for ix in inspector.get_indexes("hc_schema_revisions")):
+            op.create_index(INDEX, "hc_schema_revisions", ["calculation_sha256"])
+    if not inspector.has_table("hc_revision_berechnungen"):
+        op.create_table(
+            "hc_revision_berechnungen",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("sha256", sa.String(64), nullable=False),
+            sa.Column("daten", sa.LargeBinary(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True,
+                      server_default=sa.text("CURRENT_TIMESTAMP")),
+        )
+        op.create_index("ix_hc_revision_berechnungen_sha256", "hc_revision_berechnungen",
+                        ["sha256"], unique=True)
+
+
+def downgrade() -> None:
+    # Nur umkehrbar, solange keine Stände verdichtet wurden: deren Graph liegt
+    # ausschliesslich in `graph_daten`.
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("hc_revision_berechnungen"):
+        op.drop_table("hc_revision_berechnungen")
+    if inspector.has_table("hc_schema_revisions"):
+        if any(ix["name"] == INDEX for ix in inspector.get_indexes("hc_schema_revisions")):
+            op.drop_index(INDEX, table_name="hc_schema_revisions")
+        vorhanden = {c["name"] for c in inspector.get_columns("hc_schema_revisions")}
+        with op.batch_alter_table("hc_schema_revisions") as batch:
+            for name, _ in SPALTEN:
+                if name in vorhanden:
+                    batch.drop_column(name)
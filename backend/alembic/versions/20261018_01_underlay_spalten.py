@@ -0,0 +1,110 @@
+"""Underlay: Bild und Hash in eigenen Spalten.
+
+Revision ID: 20261018_01
+Revises: 20261017_05
+
+Ohne Blob-Speicher lag die Data-URL (bis ~12 MB) in `hc_schemas.underlay_json`;
+jeder Kachelabruf lud und parste sie nur, um an Hash und Manifest zu kommen.
+Jetzt:
+
+    underlay_json    – Lage, Manifest, Hash(es) — klein
+    underlay_bild    – die Data-URL (nur ohne Blob-Speicher), deferred geladen
+    underlay_sha256  – SHA-256 des Bilds; mehr lesen Kachelabrufe nicht
+
+Bestehende Zeilen werden in kleinen Schritten umgeschrieben. Mehrfach
+ausführbar: Spalten werden zuerst geprüft, umgeschrieben wird nur, was noch
+keinen Hash hat.
+"""
+import base64
+import binascii
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_01"
+down_revision = "20261017_05"
+branch_labels = None
+depends_on = None
+
+BATCH = 20
+
+
+def _hash(underlay: dict, data: str | None) -> str | None:
+    if underlay.get("blob") or underlay.get("sha256"):
+        return underlay.get("blob") or underlay.get("sha256")
+    kopf, _, nutzlast = (data or "").partition(",")
+    if not kopf.startswith("data:") or not kopf.endswith(";base64"):
+        return None
+    try:
+        return hashlib.sha256(base64.b64decode(nutzlast, validate=True)).hexdigest()
+    except (binascii.Error, ValueError):
+        return None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("hc_schemas"):
+        return
+    vorhanden = {c["name"] for c in inspector.get_columns("hc_schemas")}
+    if "underlay_bild" not in vorhanden:
+        op.add_column("hc_schemas", sa.Column("underlay_bild", sa.Text(), nullable=True))
+    if "underlay_sha256" not in vorhanden:
+        op.add_column("hc_schemas", sa.Column("underlay_sha256", sa.String(64), nullable=True))
+
+    letzte_id = 0
+    while True:
+        zeilen = bind.execute(sa.text(
+            "SELECT id, underlay_json FROM hc_schemas WHERE underlay_json IS NOT NULL "
+            "AND underlay_sha256 IS NULL AND id > :id ORDER BY id LIMIT :n"),
+            {"id": letzte_id, "n": BATCH}).fetchall()
+        if not zeilen:
+            return
+        for schema_id, text in zeilen:
+            try:
+                underlay = json.loads(text)
+            except (TypeError, ValueError):
+                continue
+            if not isinstance(underlay, dict):
+                continue
+            data = underlay.pop("data", None)
+            sha256 = _hash(underlay, data)
+            if data and sha256:
+                underlay["sha256"] = sha256
+            werte = {"id": schema_id, "sha": sha256,
+                     "json": json.dumps(underlay, separators=(",", ":"), ensure_ascii=False)}
+            if data:
+                bind.execute(sa.text(
+                    "UPDATE hc_schemas SET underlay_json = :json, underlay_bild = :bild, "
+                    "underlay_sha256 = :sha WHERE id = :id"), {**werte, "bild": data})
+            else:
+                bind.execute(sa.text(
+                    "UPDATE hc_schemas SET underlay_sha256 = :sha WHERE id = :id"), werte)
+        letzte_id = zeilen[-1][0]
+
+
+def downgrade() -> None:
+    # Data-URL zurück in underlay_json, dann die Spalten entfernen.
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("hc_schemas"):
+        return
+    vorhanden = {c["name"] for c in inspector.get_columns("hc_schemas")}
+    if "underlay_bild" in vorhanden:
+        zeilen = bind.execute(sa.text(
+            "SELECT id, underlay_json, underlay_bild FROM hc_schemas "
+            "WHERE underlay_bild IS NOT NULL")).fetchall()
+        for schema_id, text, data in zeilen:
+            try:
+                underlay = json.loads(text) if text else {}
+            except (TypeError, ValueError):
+                continue
+            underlay["data"] = data
+            bind.execute(sa.text("UPDATE hc_schemas SET underlay_json = :json WHERE id = :id"),
+                         {"id": schema_id,
+                          "json": json.dumps(underlay, separators=(",", ":"), ensure_ascii=False)})
+        op.drop_column("hc_schemas", "underlay_bild")
+    if "underlay_sha256" in vorhanden:
+        op.drop_column("hc_schemas", "underlay_sha256")
@@ -0,0 +1,88 @@
+"""Prozesslokaler LRU, begrenzt in Bytes statt in Einträgen.
+
+Hydraulik-Ergebnisse, PDF-Abschnitte, zusammengesetzte Schema-Stände und
+Underlay-Pyramiden sind unterschiedlich gross — ein Eintrag kann KB oder
+zweistellige MB belegen. Eine Anzahlgrenze wie bei `functools.lru_cache`
+schützt den Speicher darum nicht. Hier liegt die gemeinsame Mechanik:
+
+- Grenze als feste Zahl oder als Funktion (liest die Umgebung bei jedem
+  Ablegen, damit eine geänderte Variable ohne Neustart gilt)
+- Grösse je Eintrag über `groesse` (Standard `len`)
+- Einträge über der Grenze werden nicht abgelegt — ausser mit
+  `behalte_neuesten`, dann bleibt der zuletzt abgelegte allein stehen
+- Treffer-/Fehlschlagzähler
+
+Getrennte Schicht: kein DB-, kein Web-Bezug.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Union
+
+
+def mb_aus_umgebung(variable: str, standard: float) -> int:
+    """Grenze in Bytes aus einer MB-Umgebungsvariable; unlesbar = Standard."""
+    try:
+        mb = float(os.getenv(variable, str(standard)))
+    except ValueError:
+        mb = standard
+    return int(max(0.0, mb) * 1024 * 1024)
+
+
+class ByteLRU:
+    """Thread-sicherer LRU mit Byte-Grenze."""
+
+    def __init__(self, max_bytes: Union[int, Callable[[], int]], *,
+                 groesse: Callable[[Any], int] = len, behalte_neuesten: bool = False):
+        self._grenze = max_bytes
+        self._groesse = groesse
+        self._behalte_neuesten = behalte_neuesten
+        self._eintraege: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.treffer = 0
+        self.fehlschlaege = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._grenze() if callable(self._grenze) else self._grenze
+
+    @property
+    def belegt_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._eintraege)
+
+    def hole(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            wert = self._eintraege.get(key)
+            if wert is None:
+                self.fehlschlaege += 1
+                return None
+            self._eintraege.move_to_end(key)
+            self.treffer += 1
+            return wert
+
+    def lege_ab(self, key: Hashable, wert: Any) -> None:
+        grenze = self.max_bytes
+        groesse = self._groesse(wert)
+        if grenze <= 0 or (groesse > grenze and not self._behalte_neuesten):
+            return
+        with self._lock:
+            alt = self._eintraege.pop(key, None)
+            if alt is not None:
+                self._bytes -= self._groesse(alt)
+            self._eintraege[key] = wert
+            self._bytes += groesse
+            while self._bytes > grenze and len(self._eintraege) > 1:
+                _, weg = self._eintraege.popitem(last=False)
+                self._bytes -= self._groesse(weg)
+
+    def leeren(self) -> None:
+        with self._lock:
+            self._eintraege.clear()
+            self._bytes = 0
+            self.treffer = self.fehlschlaege = 0
@@ -14,6 +14,10 @@ Ablauf:
 2. Je Position: gewichteter Kennwert (Betrag ÷ Bezugsgrösse) nur über
    Referenzen mit einer positiven Kostenangabe → × Bezugsgrösse des Zielprojekts.
 3. Korrekturfaktoren (Sanierung/Weiterbetrieb/Etappierung) und Baupreisindex.
+
+`berechne_grobkostenschaetzung` rechnet Schritt 1 und 2 über die Kostenmatrix
+in grobkostenschaetzung_matrix.py; die Einzelfunktionen hier bleiben die
+fachliche Referenz mit identischem Ergebnis.
 """
 import math
 from datetime import date
@@ -259,26 +263,30 @@ def finde_referenzen(kandidaten: list, ziel: dict, top_n: Optional[int] = 5, heu
     abzustürzen."""
     ziel_klassen = _ziel_abgabe_klassen(ziel)
     gefiltert = [k for k in kandidaten if hard_filter(k, ziel)]
-    angereichert = []
-    for k in gefiltert:
-        score = aehnlichkeits_score(k, ziel)
-        datum = k.get("datum_abrechnung")
-        gewicht = zeitgewicht(alter_in_jahren(datum, heute)) if datum else 1.0
-        rang = score * gewicht
-        ref_klassen = set(k.get("abgabe_klassen") or [])
-        # Flags für die UI-Hinweise an der Referenz (Dominic 2026-07-19):
-        abgabe_gleich = ref_klassen == ziel_klassen
-        abgabe_mischsystem = bool(ziel_klassen) and ziel_klassen <= ref_klassen and ref_klassen != ziel_klassen
-        abgabe_abweichend = bool(ziel_klassen) and not (ziel_klassen <= ref_klassen)
-        angereichert.append({
-            **k, "score": round(score, 4), "zeitgewicht": round(gewicht, 4), "rang": round(rang, 4),
-            "abgabe_gleich": abgabe_gleich, "abgabe_mischsystem": abgabe_mischsystem,
-            "abgabe_abweichend": abgabe_abweichend,
-        })
+    angereichert = [
+        _angereichert(k, aehnlichkeits_score(k, ziel), ziel_klassen, heute) for k in gefiltert
+    ]
     angereichert.sort(key=lambda r: r["rang"], reverse=True)
     return angereichert[:top_n] if top_n else angereichert
 
 
+def _angereichert(k: dict, score: float, ziel_klassen: set, heute: Optional[date]) -> dict:
+    """Segment-Eintrag einer Referenz: Score, Zeitgewicht, Rang und Abgabe-Flags."""
+    datum = k.get("datum_abrechnung")
+    gewicht = zeitgewicht(alter_in_jahren(datum, heute)) if datum else 1.0
+    rang = score * gewicht
+    ref_klassen = set(k.get("abgabe_klassen") or [])
+    # Flags für die UI-Hinweise an der Referenz (Dominic 2026-07-19):
+    abgabe_gleich = ref_klassen == ziel_klassen
+    abgabe_mischsystem = bool(ziel_klassen) and ziel_klassen <= ref_klassen and ref_klassen != ziel_klassen
+    abgabe_abweichend = bool(ziel_klassen) and not (ziel_klassen <= ref_klassen)
+    return {
+        **k, "score": round(score, 4), "zeitgewicht": round(gewicht, 4), "rang": round(rang, 4),
+        "abgabe_gleich": abgabe_gleich, "abgabe_mischsystem": abgabe_mischsystem,
+        "abgabe_abweichend": abgabe_abweichend,
+    }
+
+
 def perzentil(werte: list, q: float) -> float:
     """Linear interpoliertes Perzentil (für die Bandbreite P25–P75)."""
     v = sorted(werte)
@@ -384,64 +392,77 @@ def schaetze_position(pos: dict, segment: list, ziel: dict) -> dict:
     ziel_treiber = ziel.get(feld)
 
     kennwerte, gewichte = [], []
-    herkunft = []
-    abdeckung = 0  # Referenzen, die diese Position tatsächlich hatten (>0)
-    grundsegment = len(segment)
+    herkunft = []  # Referenzen, die diese Position tatsächlich hatten (>0)
     passende_abgabe = 0  # Referenzen mit passender Abgabe (für diese Position)
     for r in segment:
         if pos_abgabe is not None and pos_abgabe not in (r.get("abgabe_klassen") or set()):
             continue  # Abgabe-Position: nur Referenzen mit genau dieser Wärmeabgabe
         passende_abgabe += 1
         drv = r.get(feld)
+        if not drv or drv <= 0:
+            continue  # Referenz ohne diese Bezugsgrösse — nicht normierbar
         betrag = (r.get("positionen") or {}).get(bkp_nr)
+        if betrag is None or betrag <= 0:
+            continue
         zeit = r.get("zeitgewicht", 1.0) or 0.0
         positionsgewicht = aehnlichkeits_score(
             r, ziel, waermeabgabe_beruecksichtigen=pos_abgabe is not None
         ) * zeit
-        detail = {
-            "id": r.get("id"), "name": r.get("name"),
-            "datum_abrechnung": r.get("datum_abrechnung"),
-            "ebf_m2": r.get("ebf_m2"), "leistung_kw": r.get("leistung_kw"),
-            "anzahl_ne": r.get("anzahl_ne"),
-            "waermeerzeuger": list(r.get("waermeerzeuger") or []),
-            "erzeuger_signatur": r.get("erzeuger_signatur"),
-            "abgabe_klassen": sorted(r.get("abgabe_klassen") or []),
-            "treiber_wert": drv, "kosten": betrag,
-            "kennwert": None, "gewicht": round(positionsgewicht, 4),
-            "verwendet": False, "ausschlussgrund": None,
-        }
-        if not drv or drv <= 0:
-            continue  # Referenz ohne diese Bezugsgrösse — nicht normierbar
-        if betrag is None or betrag <= 0:
-            continue
         kennwerte.append(betrag / drv)
         gewichte.append(positionsgewicht)
-        abdeckung += 1
-        detail.update({"kennwert": betrag / drv, "verwendet": True})
-        herkunft.append(detail)
+        herkunft.append(_herkunft_detail(r, drv, betrag, betrag / drv, positionsgewicht))
+
+    basis = _positions_basis(pos, treiber, ziel_treiber, len(segment), passende_abgabe, herkunft)
+    sw = sum(gewichte)
+    if not kennwerte or sw <= 0 or not ziel_treiber or ziel_treiber <= 0:
+        return basis
+
+    kennwert = sum(k * g for k, g in zip(kennwerte, gewichte)) / sw
+    return _mit_kennwert(basis, kennwert, perzentil(kennwerte, 0.25), perzentil(kennwerte, 0.75))
 
-    basis = {
-        "bkp_nr": bkp_nr, "bezeichnung": pos["bezeichnung"], "gruppe_nr": pos["gruppe_nr"],
+
+def _herkunft_detail(r: dict, drv, betrag, kennwert: float, positionsgewicht: float) -> dict:
+    """Nachvollziehbarkeit: eine verwendete Referenz einer Position."""
+    return {
+        "id": r.get("id"), "name": r.get("name"),
+        "datum_abrechnung": r.get("datum_abrechnung"),
+        "ebf_m2": r.get("ebf_m2"), "leistung_kw": r.get("leistung_kw"),
+        "anzahl_ne": r.get("anzahl_ne"),
+        "waermeerzeuger": list(r.get("waermeerzeuger") or []),
+        "erzeuger_signatur": r.get("erzeuger_signatur"),
+        "abgabe_klassen": sorted(r.get("abgabe_klassen") or []),
+        "treiber_wert": drv, "kosten": betrag,
+        "kennwert": kennwert, "gewicht": round(positionsgewicht, 4),
+        "verwendet": True, "ausschlussgrund": None,
+    }
+
+
+def _positions_basis(pos: dict, treiber: str, ziel_treiber, segment_groesse: int,
+                     passende_abgabe: int, herkunft: list) -> dict:
+    """Ergebnis einer Position ohne Kennwert (Abdeckung = verwendete Referenzen)."""
+    abdeckung = len(herkunft)
+    return {
+        "bkp_nr": pos["bkp_nr"], "bezeichnung": pos["bezeichnung"], "gruppe_nr": pos["gruppe_nr"],
         "einheit": _TREIBER_EINHEIT[treiber], "kennwert": None, "betrag": None,
         "berechneter_betrag": None, "manueller_betrag": None, "quelle": "keine_angaben",
-        "abdeckung": abdeckung, "n_referenzen": len(kennwerte),
-        "segment_groesse": len(segment),  # Gesamtzahl passender Referenzen (Nenner für «X von Y»)
+        "abdeckung": abdeckung, "n_referenzen": abdeckung,
+        "segment_groesse": segment_groesse,  # Gesamtzahl passender Referenzen (Nenner für «X von Y»)
         # Transparenz: wie zuverlässig ist diese Position? (Dominic 2026-07-20)
-        "grundsegment": grundsegment,
+        "grundsegment": segment_groesse,
         "passende_abgabe": passende_abgabe,
         "mit_kostenangabe": abdeckung,
         "status_datenbasis": _status_datenbasis(abdeckung),
         "vertrauen": _vertrauen_aus_abdeckung(abdeckung), "ziel_treiber": ziel_treiber,
         "bandbreite": None, "herkunft": herkunft,
     }
-    sw = sum(gewichte)
-    if not kennwerte or sw <= 0 or not ziel_treiber or ziel_treiber <= 0:
-        return basis
 
-    kennwert = sum(k * g for k, g in zip(kennwerte, gewichte)) / sw
+
+def _mit_kennwert(basis: dict, kennwert: float, p25: float, p75: float) -> dict:
+    """Kennwert × Bezugsgrösse des Ziels, Bandbreite P25–P75 (umfasst den Betrag)."""
+    ziel_treiber = basis["ziel_treiber"]
     betrag = kennwert * ziel_treiber
-    lo = perzentil(kennwerte, 0.25) * ziel_treiber
-    hi = perzentil(kennwerte, 0.75) * ziel_treiber
+    lo = p25 * ziel_treiber
+    hi = p75 * ziel_treiber
     basis.update({
         "kennwert": kennwert, "betrag": betrag, "berechneter_betrag": betrag,
         "quelle": "referenzen",
@@ -461,14 +482,8 @@ def quercheck_chf_pro_einheit(positionen_der_gruppe: list, segment: list, ziel:
 
     faktor: derselbe Korrekturfaktor-Multiplikator wie auf der m²-Schätzung, damit
     beide Wege vergleichbar sind (kürzt sich in der relativen Abweichung eh weg)."""
-    ziel_ne = ziel.get("anzahl_ne")
-    if not ziel_ne or ziel_ne <= 0:
-        return None  # ohne Anzahl Einheiten kein Quercheck
-    # Ein Quercheck mit einer unvollständigen Zielsumme wäre irreführend.
-    if any(p.get("betrag") is None for p in positionen_der_gruppe):
-        return None
-    betrag_flaeche = sum(p["betrag"] for p in positionen_der_gruppe)
-    if betrag_flaeche <= 0:
+    betrag_flaeche = _quercheck_zielsumme(positionen_der_gruppe, ziel)
+    if betrag_flaeche is None:
         return None
     nrs = [p["bkp_nr"] for p in positionen_der_gruppe]
     kennwerte, gewichte = [], []
@@ -483,6 +498,25 @@ def quercheck_chf_pro_einheit(positionen_der_gruppe: list, segment: list, ziel:
         summe = sum(werte)
         kennwerte.append(summe / ne)
         gewichte.append(r.get("rang", 1.0) or 0.0)
+    return _quercheck_ergebnis(kennwerte, gewichte, ziel["anzahl_ne"], betrag_flaeche, faktor, schwelle)
+
+
+def _quercheck_zielsumme(positionen_der_gruppe: list, ziel: dict) -> Optional[float]:
+    """Flächen-basierte Zielsumme der Gruppe — None, wenn kein Quercheck möglich ist."""
+    ziel_ne = ziel.get("anzahl_ne")
+    if not ziel_ne or ziel_ne <= 0:
+        return None  # ohne Anzahl Einheiten kein Quercheck
+    # Ein Quercheck mit einer unvollständigen Zielsumme wäre irreführend.
+    if any(p.get("betrag") is None for p in positionen_der_gruppe):
+        return None
+    betrag_flaeche = sum(p["betrag"] for p in positionen_der_gruppe)
+    if betrag_flaeche <= 0:
+        return None
+    return betrag_flaeche
+
+
+def _quercheck_ergebnis(kennwerte: list, gewichte: list, ziel_ne, betrag_flaeche: float,
+                        faktor: float, schwelle: float) -> Optional[dict]:
     sw = sum(gewichte)
     if not kennwerte or sw <= 0:
         return None
@@ -516,7 +550,11 @@ def berechne_grobkostenschaetzung(ziel: dict, referenzen_roh: list, faktoren: li
     if baupreisindex_aktiv:
         referenzen_roh = skaliere_auf_baupreisindex(referenzen_roh, bauindex_eintraege, heute)
 
-    segment = finde_referenzen(referenzen_roh, ziel, top_n=None, heute=heute)
+    # Score je Referenz einmal, alle Positionen über die Kostenmatrix — gleiches
+    # Ergebnis wie finde_referenzen/schaetze_position/quercheck_chf_pro_einheit.
+    from app.calculations.grobkostenschaetzung_matrix import segment_und_matrix
+
+    segment, matrix = segment_und_matrix(referenzen_roh, ziel, heute)
     top = segment[:5]
 
     korr = wende_korrekturfaktoren_an(1.0, ziel, faktoren)
@@ -533,8 +571,7 @@ def berechne_grobkostenschaetzung(ziel: dict, referenzen_roh: list, faktoren: li
     gruppen_map = {}
     manuelle_betraege = manuelle_betraege or {}
     ausgeschlossene_positionen = set(ausgeschlossene_positionen or set())
-    for pos in positionen:
-        e = schaetze_position(pos, segment, ziel)
+    for e in matrix.schaetze(positionen):
         if faktor != 1.0 and e["betrag"]:
             e["betrag"] *= faktor
             e["berechneter_betrag"] = e["betrag"]
@@ -576,7 +613,7 @@ def berechne_grobkostenschaetzung(ziel: dict, referenzen_roh: list, faktoren: li
     for g in gruppen:
         if g["gruppe_nr"] == "243":
             aktive_positionen = [p for p in g["positionen"] if p.get("quelle") != "ausgeschlossen"]
-            g["quercheck_einheit"] = quercheck_chf_pro_einheit(aktive_positionen, segment, ziel, faktor)
+            g["quercheck_einheit"] = matrix.quercheck(aktive_positionen, faktor)
 
     return {
         "gesamt_betrag": gesamt_betrag,
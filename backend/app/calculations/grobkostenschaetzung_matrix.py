@@ -0,0 +1,213 @@
+"""Grobkostenschätzung — Matrix-Rechenweg (NumPy).
+
+`schaetze_position` rechnet den Ähnlichkeits-Score für jedes Paar (Position,
+Referenz) neu, obwohl er nur von der Referenz abhängt und davon, ob die
+Position eine Wärmeabgabe-Position ist. `finde_referenzen` und
+`quercheck_chf_pro_einheit` bewerten dieselben Referenzen ein weiteres Mal. Bei
+Hunderten Referenzen und ~100 Norm-Positionen war diese Doppelschleife der
+Engpass von `berechne_grobkostenschaetzung`.
+
+Hier wird der Score je Referenz einmal als Vektor gerechnet (mit und ohne
+Wärmeabgabe). Danach laufen alle Positionen gemeinsam über die Matrix
+Referenzen × Positionen:
+
+    B  Beträge (NaN = keine Angabe)      D  Bezugsgrösse je Position
+    M  verwendbar: Abgabe passt, D > 0 und B > 0
+    K  Kennwerte B ÷ D                   G  Gewichte Score × Zeitgewicht
+
+P25/P75 kommen spaltenweise aus der sortierten Kennwertmatrix.
+
+Die skalaren Funktionen in grobkostenschaetzung.py bleiben die fachliche
+Referenz. Ergebnis-Dicts, `herkunft` und Rundung sind bitgleich. Summen, die ins
+Ergebnis eingehen, laufen darum weiterhin über das eingebaute `sum` in
+Segment-Reihenfolge, denn NumPy summiert paarweise und wiche in der letzten
+Stelle ab.
+"""
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from app.calculations.grobkostenschaetzung import (
+    _TREIBER_ZIEL_FELD,
+    _angereichert,
+    _effektiver_treiber,
+    _herkunft_detail,
+    _mit_kennwert,
+    _positions_basis,
+    _quercheck_ergebnis,
+    _quercheck_zielsumme,
+    _ziel_abgabe_klassen,
+    abgabe_naehe,
+    bww_naehe,
+    einheiten_naehe,
+    hard_filter,
+    zertifizierungs_naehe,
+)
+
+
+def _zahl(wert) -> float:
+    return float(wert) if wert is not None else np.nan
+
+
+def _spalte(refs: list, feld: str) -> np.ndarray:
+    return np.fromiter((_zahl(r.get(feld)) for r in refs), dtype=np.float64, count=len(refs))
+
+
+def _je_referenz(funktion, refs: list, feld: str, zielwert) -> np.ndarray:
+    return np.fromiter(
+        (funktion(r.get(feld), zielwert) for r in refs), dtype=np.float64, count=len(refs))
+
+
+def _groessennaehe(werte: np.ndarray, ziel) -> np.ndarray:
+    """`groessennaehe` elementweise; NaN (unbekannt) ergibt 0."""
+    if not ziel or ziel <= 0:
+        return np.zeros(len(werte))
+    return np.where(werte > 0, np.minimum(werte, ziel) / np.maximum(werte, ziel), 0.0)
+
+
+def score_vektoren(refs: list, ziel: dict) -> tuple:
+    """`aehnlichkeits_score` für alle Referenzen: (mit, ohne Wärmeabgabe)."""
+    basis = (
+        0.25 * _groessennaehe(_spalte(refs, "ebf_m2"), ziel.get("ebf_m2"))
+        + 0.22 * _groessennaehe(_spalte(refs, "leistung_kw"), ziel.get("leistung_kw"))
+        + 0.13 * _je_referenz(zertifizierungs_naehe, refs, "zertifizierung", ziel.get("zertifizierung"))
+        + 0.12 * _je_referenz(einheiten_naehe, refs, "anzahl_ne", ziel.get("anzahl_ne"))
+        + 0.08 * _je_referenz(bww_naehe, refs, "bww_bei_heizung", ziel.get("bww_bei_heizung"))
+    )
+    abgabe = _je_referenz(abgabe_naehe, refs, "abgabe_klassen", _ziel_abgabe_klassen(ziel))
+    return basis + 0.20 * abgabe, basis / 0.80
+
+
+def segment_und_matrix(kandidaten: list, ziel: dict, heute: Optional[date] = None) -> tuple:
+    """`finde_referenzen(..., top_n=None)` samt fertiger `Segmentmatrix` —
+    die Scores werden dabei nur einmal gerechnet."""
+    ziel_klassen = _ziel_abgabe_klassen(ziel)
+    gefiltert = [k for k in kandidaten if hard_filter(k, ziel)]
+    mit, ohne = score_vektoren(gefiltert, ziel)
+    angereichert = [
+        _angereichert(k, score, ziel_klassen, heute) for k, score in zip(gefiltert, mit.tolist())
+    ]
+    reihenfolge = sorted(range(len(angereichert)), key=lambda i: angereichert[i]["rang"], reverse=True)
+    segment = [angereichert[i] for i in reihenfolge]
+    index = np.array(reihenfolge, dtype=np.intp)
+    return segment, Segmentmatrix(segment, ziel, scores=(mit[index], ohne[index]))
+
+
+def _perzentil_spalten(sortiert: np.ndarray, anzahl: np.ndarray, q: float) -> np.ndarray:
+    """`perzentil` je Spalte; `sortiert` hat die gültigen Werte oben (NaN unten)."""
+    if sortiert.shape[0] == 0:
+        return np.zeros(sortiert.shape[1])
+    pos = (anzahl - 1) * q
+    lo = np.floor(pos).astype(np.intp)
+    rest = pos - lo
+    lo = np.clip(lo, 0, sortiert.shape[0] - 1)
+    hi = np.minimum(lo + 1, sortiert.shape[0] - 1)
+    spalten = np.arange(sortiert.shape[1])
+    unten, oben = sortiert[lo, spalten], sortiert[hi, spalten]
+    return np.where(lo + 1 < anzahl, unten + rest * (oben - unten), unten)
+
+
+class Segmentmatrix:
+    """Segment (nach Rang sortiert) als Spalten für die Positionsschätzung."""
+
+    def __init__(self, segment: list, ziel: dict, *, scores: Optional[tuple] = None):
+        self.segment = segment
+        self.ziel = ziel
+        mit, ohne = scores if scores is not None else score_vektoren(segment, ziel)
+        zeit = np.fromiter(
+            (r.get("zeitgewicht", 1.0) or 0.0 for r in segment), dtype=np.float64, count=len(segment))
+        self._gewicht = {True: mit * zeit, False: ohne * zeit}
+        self._treiber: dict = {}
+        self._abgabe: dict = {}
+
+    def _treiber_spalte(self, feld: str) -> np.ndarray:
+        if feld not in self._treiber:
+            self._treiber[feld] = _spalte(self.segment, feld)
+        return self._treiber[feld]
+
+    def _abgabe_maske(self, abgabe) -> np.ndarray:
+        if abgabe not in self._abgabe:
+            self._abgabe[abgabe] = np.fromiter(
+                (abgabe is None or abgabe in (r.get("abgabe_klassen") or set()) for r in self.segment),
+                dtype=bool, count=len(self.segment))
+        return self._abgabe[abgabe]
+
+    def betraege(self, nrs: list) -> np.ndarray:
+        """Kostenmatrix Referenzen × `nrs`, NaN = keine Angabe."""
+        eindeutig = {nr: j for j, nr in enumerate(dict.fromkeys(nrs))}
+        matrix = np.full((len(self.segment), len(eindeutig)), np.nan)
+        for i, r in enumerate(self.segment):
+            for nr, betrag in (r.get("positionen") or {}).items():
+                j = eindeutig.get(nr)
+                if j is not None and betrag is not None:
+                    matrix[i, j] = betrag
+        return matrix[:, [eindeutig[nr] for nr in nrs]]
+
+    def schaetze(self, positionen: list) -> list:
+        """`[schaetze_position(pos, segment, ziel) for pos in positionen]`."""
+        if not positionen:
+            return []
+        n = len(self.segment)
+        nrs = [p["bkp_nr"] for p in positionen]
+        treiber = [_effektiver_treiber(nr, self.ziel) for nr in nrs]
+        felder = [_TREIBER_ZIEL_FELD[t] for t in treiber]
+        abgaben = [p.get("abgabe") for p in positionen]
+
+        betraege = self.betraege(nrs)
+        bezug = np.column_stack([self._treiber_spalte(f) for f in felder]) if n else betraege
+        passend = (np.column_stack([self._abgabe_maske(a) for a in abgaben]) if n
+                   else np.zeros(betraege.shape, dtype=bool))
+        verwendet = passend & (bezug > 0) & (betraege > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            kennwerte = np.where(verwendet, betraege / bezug, np.nan)
+        mit_abgabe = np.array([a is not None for a in abgaben])
+        gewichte = np.where(
+            mit_abgabe, self._gewicht[True][:, None], self._gewicht[False][:, None])
+        produkte = np.where(verwendet, kennwerte * gewichte, 0.0)
+
+        anzahl = verwendet.sum(axis=0)
+        sortiert = np.sort(kennwerte, axis=0)
+        p25 = _perzentil_spalten(sortiert, anzahl, 0.25).tolist()
+        p75 = _perzentil_spalten(sortiert, anzahl, 0.75).tolist()
+        passende_abgabe = passend.sum(axis=0).tolist()
+
+        ergebnisse = []
+        for j, pos in enumerate(positionen):
+            zeilen = np.flatnonzero(verwendet[:, j])
+            kw = kennwerte[zeilen, j].tolist()
+            gw = gewichte[zeilen, j].tolist()
+            feld, nr = felder[j], nrs[j]
+            herkunft = [
+                _herkunft_detail(
+                    self.segment[i], self.segment[i].get(feld),
+                    (self.segment[i].get("positionen") or {}).get(nr), k, g,
+                )
+                for i, k, g in zip(zeilen.tolist(), kw, gw)
+            ]
+            ziel_treiber = self.ziel.get(feld)
+            basis = _positions_basis(pos, treiber[j], ziel_treiber, n, passende_abgabe[j], herkunft)
+            sw = sum(gw)
+            if not kw or sw <= 0 or not ziel_treiber or ziel_treiber <= 0:
+                ergebnisse.append(basis)
+                continue
+            kennwert = sum(produkte[zeilen, j].tolist()) / sw
+            ergebnisse.append(_mit_kennwert(basis, kennwert, p25[j], p75[j]))
+        return ergebnisse
+
+    def quercheck(self, positionen_der_gruppe: list, faktor: float = 1.0,
+                  schwelle: float = 0.35) -> Optional[dict]:
+        """`quercheck_chf_pro_einheit(positionen_der_gruppe, segment, ziel, ...)`."""
+        betrag_flaeche = _quercheck_zielsumme(positionen_der_gruppe, self.ziel)
+        if betrag_flaeche is None:
+            return None
+        nrs = [p["bkp_nr"] for p in positionen_der_gruppe]
+        vollstaendig = (self._treiber_spalte("anzahl_ne") > 0) & (self.betraege(nrs) > 0).all(axis=1)
+        kennwerte, gewichte = [], []
+        for i in np.flatnonzero(vollstaendig).tolist():
+            r = self.segment[i]
+            positionen = r.get("positionen") or {}
+            kennwerte.append(sum(positionen[nr] for nr in nrs) / r["anzahl_ne"])
+            gewichte.append(r.get("rang", 1.0) or 0.0)
+        return _quercheck_ergebnis(
+            kennwerte, gewichte, self.ziel["anzahl_ne"], betrag_flaeche, faktor, schwelle)
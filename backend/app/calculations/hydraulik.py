@@ -11,6 +11,7 @@ Konventionen aus dem Editor:
   oder 'heizkreis' (einfacher Kreis), mit data: q_kw, vl_temp, rl_temp, dp_kpa.
 """
 import re
+from collections import deque
 from typing import List, Optional
 
 from app.calculations.betriebsfaelle import betriebsfaelle, ist_umschaltventil
@@ -23,11 +24,15 @@ from app.calculations.sole_druckverlust import (
     ZETA_VERTEILER_STD,
     sole_druckverlust,
 )
+from app.calculations.sole_kennlinie import Solekreis, betriebspunkt
 from app.calculations.sole_rohre import ROHRE, WAERMETRAEGER
 from app.calculations.ventil import berechne_kvs
 from app.calculations.waermepumpe import berechne_waermepumpe, ist_waermepumpe
 from app.data.generator_types import SOURCE_CIRCUIT_TYPES
 
+# Rechenstand des Kerns: steht in jedem Schema-Stand und im Schlüssel des
+# Ergebnis-Caches. Bei jeder fachlichen Änderung der Resultate erhöhen.
+HYDRAULIK_ENGINE_VERSION = "hydraulik-v1"
 VL_FARBE = "#ef4444"
 RL_FARBE = "#3b82f6"
 # 1 mWs = 9.80665 kPa. Der Solekreis rechnet in mWs (so stehen die
@@ -117,7 +122,180 @@ def _sole_druckverlust(d: dict, quellenleistung_kw, auto_volumenstrom_m3h=None):
     return ergebnis
 
 
-def _bauteil_auslegungen(nodes, verteiler_results, heatpump_results):
+def _sole_betriebspunkt(kennlinie, dv: dict):
+    """Betriebspunkt der Solepumpe aus ihrer Datenblatt-Kennlinie.
+
+    Liefert (Betriebspunkt oder None, Warnungen). Ohne Volumenstrom im
+    Solekreis gibt es keine Anlagenkennlinie und damit keinen Schnitt.
+    """
+    try:
+        kreis = Solekreis.aus_ergebnis(dv)
+        bp = betriebspunkt(kreis, kennlinie)
+    except ValueError as exc:
+        return None, [str(exc)]
+    v_bp = float(bp["v_m3h"])
+    if v_bp != v_bp:    # NaN
+        return None, ["Pumpenkennlinie schneidet die Anlagenkennlinie im Datenblattbereich "
+                      "nicht — Kennlinie und Solekreis prüfen."]
+    punkt = {"v_m3h": round(v_bp, 3), "h_mws": round(float(bp["h_mws"]), 2)}
+    if punkt["v_m3h"] < kreis.volumenstrom_m3_h:
+        return punkt, [f"Solepumpe erreicht nur {punkt['v_m3h']:.2f} m³/h statt "
+                       f"{kreis.volumenstrom_m3_h:.2f} m³/h — grössere Pumpe oder "
+                       "kleineren Solekreis-Widerstand wählen."]
+    return punkt, []
+
+
+class _OhneZwischenspeicher:
+    """Jede Bauteil-Auslegung wird gerechnet (Standard von `berechne_schema`).
+
+    `hydraulik_kreise.Auslegungen` bietet dieselbe Methode und liefert
+    Auslegungen unveränderter Kreise aus dem Kreis-Cache.
+    """
+
+    def auslegung(self, art: str, nid, funktion, *args):
+        return funktion(*args)
+
+
+_DIREKT = _OhneZwischenspeicher()
+
+# Kennwerte der Wärmepumpen, die das Erdsondenfeld übernimmt
+_WP_KENNWERTE_EWS = ("q_source_kw", "source_flow_m3h", "q_heat_kw", "p_el_kw", "cop", "p_el_quelle")
+
+
+def _speicher_auslegung(d, erzeuger_werte, verbraucher_leistung, gruppen_vl, auto_rl) -> dict:
+    """Technischer Speicher aus seinen Eingaben, sonst aus dem Schema."""
+    erzeuger_leistung = erzeuger_werte[0] if len(erzeuger_werte) == 1 else None
+    leistung = _zahl(d.get("auslegung_leistung_kw"))
+    leistungsquelle = "manuell"
+    if leistung is None:
+        leistung = erzeuger_leistung or verbraucher_leistung or None
+        leistungsquelle = "Erzeuger" if erzeuger_leistung else "Verbrauchergruppen"
+    vl = _zahl(d.get("auslegung_vorlauf_c"))
+    if vl is None and gruppen_vl:
+        vl = max(gruppen_vl)
+    rl = _zahl(d.get("auslegung_ruecklauf_c"))
+    if rl is None:
+        rl = auto_rl
+    if leistung is None or vl is None or rl is None:
+        return {
+            "warnings": ["Für die automatische Auslegung fehlen Leistung oder Gruppen-Temperaturen."],
+        }
+    try:
+        r = technischer_speicher(
+            leistung, vl, rl,
+            ueberbrueckung_min=_zahl(d.get("ueberbrueckung_min")) or 15,
+            ueberdeckung_k=(
+                _zahl(d.get("speicher_ueberdeckung_k"))
+                if _zahl(d.get("speicher_ueberdeckung_k")) is not None else 2
+            ),
+        )
+        r["leistungsquelle"] = leistungsquelle
+        r["gewaehlt_l"] = _zahl(d.get("speicher_liter"))
+        r["warnings"] = []
+        if len(erzeuger_werte) > 1 and _zahl(d.get("auslegung_leistung_kw")) is None:
+            r["warnings"].append(
+                "Mehrere Erzeuger erkannt; Auslegung nutzt bis zur Betriebszustandslogik die Verbraucherleistung."
+            )
+        return r
+    except ValueError as exc:
+        return {"warnings": [str(exc)]}
+
+
+def _erdsonden_auslegung(d, wp_kennwerte) -> dict:
+    """Erdsondenfeld samt Solekreis-Druckverlust; `wp_kennwerte` je Wärmepumpe."""
+    q0 = _zahl(d.get("quellenleistung_kw"))
+    leistungsquelle = "manuell"
+    mehrere_wp = False
+    if q0 is None:
+        wp_ergebnisse = [
+            r for r in wp_kennwerte
+            if _zahl(r.get("q_source_kw")) is not None
+        ]
+        wp_quellen = [_zahl(r.get("q_source_kw")) for r in wp_ergebnisse]
+        q0 = wp_quellen[0] if len(wp_quellen) == 1 else None
+        mehrere_wp = len(wp_quellen) > 1
+        # Nur etikettieren, wenn wirklich ein Wert übernommen wurde.
+        leistungsquelle = "Wärmepumpe" if q0 is not None else None
+    wp_flows = [
+        _zahl(res.get("source_flow_m3h")) for res in wp_kennwerte
+        if _zahl(res.get("source_flow_m3h")) is not None
+    ]
+    auto_sole_flow = wp_flows[0] if len(wp_flows) == 1 else None
+    try:
+        r = erdsondenfeld(
+            quellenleistung_kw=q0,
+            sonden_anzahl=int(_zahl(d.get("sonden_anzahl")) or 5),
+            sonden_laenge_m=_zahl(d.get("sonden_laenge_m")),
+            spezifische_entzugsleistung_w_m=_zahl(d.get("entzugsleistung_w_m")),
+            sicherheitsfaktor=_zahl(d.get("sonden_sicherheitsfaktor")) or 1.10,
+            sonden_aussendurchmesser_mm=int(_zahl(d.get("sonden_rohr_mm")) or 32),
+            straenge_je_sonde=2 if d.get("sonden_bauart") == "einfach" else 4,
+            glykol_konzentration_pct=(
+                _zahl(d.get("glykol_pct"))
+                if _zahl(d.get("glykol_pct")) is not None else 30
+            ),
+            zusaetzlicher_inhalt_l=_zahl(d.get("sole_zusatzinhalt_l")) or 0,
+        )
+        r["leistungsquelle"] = leistungsquelle
+        if leistungsquelle == "Wärmepumpe" and len(wp_ergebnisse) == 1:
+            wp = wp_ergebnisse[0]
+            q_heat = _zahl(wp.get("q_heat_kw"))
+            p_el = _zahl(wp.get("p_el_kw"))
+            cop = _zahl(wp.get("cop"))
+            herleitung = []
+            if wp.get("p_el_quelle") == "cop" and q_heat and cop and p_el:
+                herleitung.append({
+                    "groesse": "P_el",
+                    "formel": "P_el = Q_Heizung / COP",
+                    "formel_latex": (
+                        r"P_{\mathrm{el}} = \frac{Q_{\mathrm{Heizung}}}{COP}"
+                    ),
+                    "eingesetzt": f"{q_heat:g} / {cop:g}",
+                    "eingesetzt_latex": rf"\frac{{{q_heat:g}}}{{{cop:g}}}",
+                    "ergebnis": f"{p_el:g} kW",
+                })
+            if q_heat and p_el and q0:
+                herleitung.append({
+                    "groesse": "Q0",
+                    "formel": "Q0 = Q_Heizung - P_el",
+                    "formel_latex": (
+                        r"Q_0 = Q_{\mathrm{Heizung}} - P_{\mathrm{el}}"
+                    ),
+                    "eingesetzt": f"{q_heat:g} - {p_el:g}",
+                    "eingesetzt_latex": rf"{q_heat:g} - {p_el:g}",
+                    "ergebnis": f"{q0:g} kW",
+                })
+            r["rechenweg"] = herleitung + r.get("rechenweg", [])
+        r["warnings"] = []
+        if r.get("ausreichend") is False:
+            r["warnings"].append(
+                f"Gewähltes Feld ist {abs(r['reserve_m']):.0f} m kürzer als der Rechenwert."
+            )
+        if q0 is None:
+            r["warnings"].append("Quellenleistung fehlt; Wärmepumpe mit COP oder elektrische Leistung ergänzen.")
+        if mehrere_wp:
+            r["warnings"].append("Mehrere Wärmepumpen erkannt; Quellenleistung am Erdsondenfeld manuell festlegen.")
+        if len(wp_flows) > 1 and _zahl(d.get("sole_volumenstrom_m3h")) is None:
+            r["warnings"].append("Mehrere Wärmepumpen erkannt; Solevolumenstrom am Erdsondenfeld manuell festlegen.")
+        if _zahl(d.get("entzugsleistung_w_m")) is None:
+            r["warnings"].append("Spezifische Entzugsleistung fehlt; keine Bohrmeterempfehlung möglich.")
+        r["druckverlust"] = _sole_druckverlust(d, q0, auto_sole_flow)
+        r["warnings"] += (r["druckverlust"] or {}).get("warnungen", [])
+        # Der Solekreis rechnet den Inhalt aus der echten Geometrie inkl.
+        # Zuleitungen. Sobald er vorliegt, gilt er auch für die
+        # Feldübersicht — sonst stünden zwei Soleinhalte im selben Export.
+        detail = r["druckverlust"] or {}
+        if detail.get("inhalt_total_l") is not None:
+            r["sondeninhalt_l"] = detail["inhalt_sonden_l"]
+            r["gesamtinhalt_l"] = detail["inhalt_total_l"]
+            r["glykolbedarf_kg"] = detail["konzentrat_volumetrisch_kg"]
+            r["inhalt_quelle"] = "Solekreis-Geometrie"
+        return r
+    except ValueError as exc:
+        return {"warnings": [str(exc)]}
+
+
+def _bauteil_auslegungen(nodes, verteiler_results, heatpump_results, auslegungen=_DIREKT):
     """Automatische Eingaben aus dem Schema in Speicher/Erdsonden überführen."""
     speicher_results, erdsonden_results = {}, {}
     verbraucher = [n for n in nodes if n.get("type") in VERBRAUCHER_TYPEN]
@@ -127,8 +305,7 @@ def _bauteil_auslegungen(nodes, verteiler_results, heatpump_results):
         and _zahl((n.get("data") or {}).get("leistung_kw")) is not None
     ]
     # Bivalente/mehrere Erzeuger brauchen Betriebszustände. Bis diese explizit
-    # modelliert sind, werden Leistungen nicht still addiert.
-    erzeuger_leistung = erzeuger_werte[0] if len(erzeuger_werte) == 1 else None
+    # modelliert sind, werden Leistungen nicht still addiert (_speicher_auslegung).
     verbraucher_leistung = sum(
         _zahl((n.get("data") or {}).get("q_kw")) or 0 for n in verbraucher
     )
@@ -145,138 +322,18 @@ def _bauteil_auslegungen(nodes, verteiler_results, heatpump_results):
         max(verteiler_mit_rl, key=lambda v: v.get("q_total") or 0).get("rl_misch")
         if verteiler_mit_rl else (min(gruppen_rl) if gruppen_rl else None)
     )
+    wp_kennwerte = [{k: r.get(k) for k in _WP_KENNWERTE_EWS} for r in heatpump_results.values()]
 
     for n in nodes:
         typ = n.get("type")
         d = n.get("data") or {}
         if typ == "speicher":
-            leistung = _zahl(d.get("auslegung_leistung_kw"))
-            leistungsquelle = "manuell"
-            if leistung is None:
-                leistung = erzeuger_leistung or verbraucher_leistung or None
-                leistungsquelle = "Erzeuger" if erzeuger_leistung else "Verbrauchergruppen"
-            vl = _zahl(d.get("auslegung_vorlauf_c"))
-            if vl is None and gruppen_vl:
-                vl = max(gruppen_vl)
-            rl = _zahl(d.get("auslegung_ruecklauf_c"))
-            if rl is None:
-                rl = auto_rl
-            if leistung is None or vl is None or rl is None:
-                speicher_results[n["id"]] = {
-                    "warnings": ["Für die automatische Auslegung fehlen Leistung oder Gruppen-Temperaturen."],
-                }
-                continue
-            try:
-                r = technischer_speicher(
-                    leistung, vl, rl,
-                    ueberbrueckung_min=_zahl(d.get("ueberbrueckung_min")) or 15,
-                    ueberdeckung_k=(
-                        _zahl(d.get("speicher_ueberdeckung_k"))
-                        if _zahl(d.get("speicher_ueberdeckung_k")) is not None else 2
-                    ),
-                )
-                r["leistungsquelle"] = leistungsquelle
-                r["gewaehlt_l"] = _zahl(d.get("speicher_liter"))
-                r["warnings"] = []
-                if len(erzeuger_werte) > 1 and _zahl(d.get("auslegung_leistung_kw")) is None:
-                    r["warnings"].append(
-                        "Mehrere Erzeuger erkannt; Auslegung nutzt bis zur Betriebszustandslogik die Verbraucherleistung."
-                    )
-                speicher_results[n["id"]] = r
-            except ValueError as exc:
-                speicher_results[n["id"]] = {"warnings": [str(exc)]}
-
+            speicher_results[n["id"]] = auslegungen.auslegung(
+                "speicher", n["id"], _speicher_auslegung,
+                d, erzeuger_werte, verbraucher_leistung, gruppen_vl, auto_rl)
         elif typ == "erdsonden":
-            q0 = _zahl(d.get("quellenleistung_kw"))
-            leistungsquelle = "manuell"
-            mehrere_wp = False
-            if q0 is None:
-                wp_ergebnisse = [
-                    r for r in heatpump_results.values()
-                    if _zahl(r.get("q_source_kw")) is not None
-                ]
-                wp_quellen = [_zahl(r.get("q_source_kw")) for r in wp_ergebnisse]
-                q0 = wp_quellen[0] if len(wp_quellen) == 1 else None
-                mehrere_wp = len(wp_quellen) > 1
-                # Nur etikettieren, wenn wirklich ein Wert übernommen wurde.
-                leistungsquelle = "Wärmepumpe" if q0 is not None else None
-            wp_flows = [
-                _zahl(res.get("source_flow_m3h")) for res in heatpump_results.values()
-                if _zahl(res.get("source_flow_m3h")) is not None
-            ]
-            auto_sole_flow = wp_flows[0] if len(wp_flows) == 1 else None
-            try:
-                r = erdsondenfeld(
-                    quellenleistung_kw=q0,
-                    sonden_anzahl=int(_zahl(d.get("sonden_anzahl")) or 5),
-                    sonden_laenge_m=_zahl(d.get("sonden_laenge_m")),
-                    spezifische_entzugsleistung_w_m=_zahl(d.get("entzugsleistung_w_m")),
-                    sicherheitsfaktor=_zahl(d.get("sonden_sicherheitsfaktor")) or 1.10,
-                    sonden_aussendurchmesser_mm=int(_zahl(d.get("sonden_rohr_mm")) or 32),
-                    straenge_je_sonde=2 if d.get("sonden_bauart") == "einfach" else 4,
-                    glykol_konzentration_pct=(
-                        _zahl(d.get("glykol_pct"))
-                        if _zahl(d.get("glykol_pct")) is not None else 30
-                    ),
-                    zusaetzlicher_inhalt_l=_zahl(d.get("sole_zusatzinhalt_l")) or 0,
-                )
-                r["leistungsquelle"] = leistungsquelle
-                if leistungsquelle == "Wärmepumpe" and len(wp_ergebnisse) == 1:
-                    wp = wp_ergebnisse[0]
-                    q_heat = _zahl(wp.get("q_heat_kw"))
-                    p_el = _zahl(wp.get("p_el_kw"))
-                    cop = _zahl(wp.get("cop"))
-                    herleitung = []
-                    if wp.get("p_el_quelle") == "cop" and q_heat and cop and p_el:
-                        herleitung.append({
-                            "groesse": "P_el",
-                            "formel": "P_el = Q_Heizung / COP",
-                            "formel_latex": (
-                                r"P_{\mathrm{el}} = \frac{Q_{\mathrm{Heizung}}}{COP}"
-                            ),
-                            "eingesetzt": f"{q_heat:g} / {cop:g}",
-                            "eingesetzt_latex": rf"\frac{{{q_heat:g}}}{{{cop:g}}}",
-                            "ergebnis": f"{p_el:g} kW",
-                        })
-                    if q_heat and p_el and q0:
-                        herleitung.append({
-                            "groesse": "Q0",
-                            "formel": "Q0 = Q_Heizung - P_el",
-                            "formel_latex": (
-                                r"Q_0 = Q_{\mathrm{Heizung}} - P_{\mathrm{el}}"
-                            ),
-                            "eingesetzt": f"{q_heat:g} - {p_el:g}",
-                            "eingesetzt_latex": rf"{q_heat:g} - {p_el:g}",
-                            "ergebnis": f"{q0:g} kW",
-                        })
-                    r["rechenweg"] = herleitung + r.get("rechenweg", [])
-                r["warnings"] = []
-                if r.get("ausreichend") is False:
-                    r["warnings"].append(
-                        f"Gewähltes Feld ist {abs(r['reserve_m']):.0f} m kürzer als der Rechenwert."
-                    )
-                if q0 is None:
-                    r["warnings"].append("Quellenleistung fehlt; Wärmepumpe mit COP oder elektrische Leistung ergänzen.")
-                if mehrere_wp:
-                    r["warnings"].append("Mehrere Wärmepumpen erkannt; Quellenleistung am Erdsondenfeld manuell festlegen.")
-                if len(wp_flows) > 1 and _zahl(d.get("sole_volumenstrom_m3h")) is None:
-                    r["warnings"].append("Mehrere Wärmepumpen erkannt; Solevolumenstrom am Erdsondenfeld manuell festlegen.")
-                if _zahl(d.get("entzugsleistung_w_m")) is None:
-                    r["warnings"].append("Spezifische Entzugsleistung fehlt; keine Bohrmeterempfehlung möglich.")
-                r["druckverlust"] = _sole_druckverlust(d, q0, auto_sole_flow)
-                r["warnings"] += (r["druckverlust"] or {}).get("warnungen", [])
-                # Der Solekreis rechnet den Inhalt aus der echten Geometrie inkl.
-                # Zuleitungen. Sobald er vorliegt, gilt er auch für die
-                # Feldübersicht — sonst stünden zwei Soleinhalte im selben Export.
-                detail = r["druckverlust"] or {}
-                if detail.get("inhalt_total_l") is not None:
-                    r["sondeninhalt_l"] = detail["inhalt_sonden_l"]
-                    r["gesamtinhalt_l"] = detail["inhalt_total_l"]
-                    r["glykolbedarf_kg"] = detail["konzentrat_volumetrisch_kg"]
-                    r["inhalt_quelle"] = "Solekreis-Geometrie"
-                erdsonden_results[n["id"]] = r
-            except ValueError as exc:
-                erdsonden_results[n["id"]] = {"warnings": [str(exc)]}
+            erdsonden_results[n["id"]] = auslegungen.auslegung(
+                "erdsonden", n["id"], _erdsonden_auslegung, d, wp_kennwerte)
     return speicher_results, erdsonden_results
 
 
@@ -416,6 +473,65 @@ def _stroke(e: dict) -> Optional[str]:
     return e.get("stroke") or (e.get("style") or {}).get("stroke")
 
 
+def _ist_virtuell(e: dict) -> bool:
+    return str(e.get("id", "")).startswith("virt_")
+
+
+class _Schemagraph:
+    """Adjazenz-Index des Schemas, einmal je Berechnung aufgebaut.
+
+    Bisher lief jede Traversierung für jeden besuchten Knoten über ALLE
+    Leitungen (O(V·E)). Bei Spital- und Fernwärmeschemata mit einigen hundert
+    Leitungen wurde `/hydraulik/berechnen` im Editor dadurch spürbar träge.
+
+    Je Knoten stehen hier seine Leitungen als (edge, anderes Ende, Handle am
+    Knoten), und zwar in der Reihenfolge der Leitungsliste. Die Traversierungen
+    besuchen Nachbarn deshalb genau so wie der frühere Vollscan. Resultate und
+    Einfügereihenfolge der Fluss-Dicts bleiben gleich. Eine Schlaufe (Quelle =
+    Ziel) steht nur einmal am Knoten; am Handle zählt dann die Quellseite.
+    """
+
+    def __init__(self, edges: List[dict], node_by_id: dict):
+        self.edges = edges
+        self.node_by_id = node_by_id
+        # Leitungsart aus der Strichfarbe bzw. dem Layer: 'vl' | 'rl' | None
+        self.arten = []
+        self._leitungen: dict = {}
+        self._gefiltert: dict = {}
+        for e in edges:
+            s = _stroke(e)
+            art = "rl" if s == RL_FARBE else "vl" if s == VL_FARBE else None
+            self.arten.append(art)
+            virtuell = _ist_virtuell(e)
+            quelle, ziel = e["source"], e["target"]
+            self._leitungen.setdefault(quelle, []).append(
+                (e, ziel, e.get("sourceHandle"), art, virtuell))
+            if ziel != quelle:
+                self._leitungen.setdefault(ziel, []).append(
+                    (e, quelle, e.get("targetHandle"), art, virtuell))
+
+    def nachbarn(self, nid, rl: Optional[bool] = None, echt: bool = False) -> list:
+        """Leitungen am Knoten als (edge, anderes Ende, Handle am Knoten).
+
+        rl=True nur RL-Leitungen, rl=False nur VL/neutrale, None alle;
+        echt=True ohne virtuelle Anschluss-Kanten.
+        """
+        schluessel = (nid, rl, echt)
+        liste = self._gefiltert.get(schluessel)
+        if liste is None:
+            liste = [
+                (e, other, handle)
+                for e, other, handle, art, virtuell in self._leitungen.get(nid, ())
+                if (rl is None or (art == "rl") == rl) and not (echt and virtuell)
+            ]
+            self._gefiltert[schluessel] = liste
+        return liste
+
+    def am_handle(self, nid, handles: tuple, **filter) -> list:
+        """Leitungen, die am Knoten an einem der `handles` angeschlossen sind."""
+        return [a for a in self.nachbarn(nid, **filter) if a[2] in handles]
+
+
 # ── Semantische Anschlüsse der Wärmepumpe ───────────────────────────────────
 # Eine Wärmepumpe hat vier fachlich unterscheidbare Anschlüsse. Die Bedeutung
 # hängt am ANSCHLUSS, nicht an der Strichfarbe. Die alten, generischen Handle-IDs
@@ -471,54 +587,48 @@ def _wp_port_system(e, wp_id) -> tuple:
     return None, None
 
 
-def _wp_kreis(wp_id: str, system: str, edges: List[dict], node_by_id: dict) -> tuple:
+def _wp_kreis(wp_id: str, system: str, edges: List[dict], node_by_id: dict,
+              graph: Optional[_Schemagraph] = None) -> tuple:
     """Leitungen EINES Kreises ab der Wärmepumpe bis zur Kreisgrenze.
 
     Rückgabe: (edge_ids, quellen der Portzuordnung, erreichte Grenz-Typen).
     Die Grenzleitung selbst gehört noch zum Kreis — was hinter Speicher,
     Verteiler oder Erdsondenfeld liegt, gehört zu einem anderen Kreis (§6).
+    Ohne `graph` wird der Index aus `edges` aufgebaut.
     """
+    if graph is None:
+        graph = _Schemagraph(edges, node_by_id)
     treffer, quellen, grenzen = set(), set(), set()
     besucht = {wp_id}
-    queue = []
-    for e in edges:
-        if str(e.get("id", "")).startswith("virt_"):
-            continue
-        if e["source"] != wp_id and e["target"] != wp_id:
-            continue
+    queue = deque()
+    for e, other, _ in graph.nachbarn(wp_id, echt=True):
         sys_e, quelle = _wp_port_system(e, wp_id)
         if sys_e != system:
             continue
         treffer.add(e["id"])
         quellen.add(quelle)
-        other = e["target"] if e["source"] == wp_id else e["source"]
         if other not in besucht:
             besucht.add(other)
             queue.append(other)
 
     while queue:
-        cur = queue.pop(0)
-        typ = node_by_id.get(cur, {}).get("type")
+        cur = queue.popleft()
+        typ = graph.node_by_id.get(cur, {}).get("type")
         if typ in WP_KREIS_GRENZEN:
             grenzen.add(typ)
             continue
-        for e in edges:
-            if str(e.get("id", "")).startswith("virt_"):
-                continue
-            if e["source"] != cur and e["target"] != cur:
-                continue
+        for e, other, _ in graph.nachbarn(cur, echt=True):
             sys_e = _system_von_edge(e)
             if sys_e is not None and sys_e != system:
                 continue
             treffer.add(e["id"])
-            other = e["target"] if e["source"] == cur else e["source"]
             if other not in besucht:
                 besucht.add(other)
                 queue.append(other)
     return treffer, quellen, grenzen
 
 
-def _umschaltventil_im_erzeugerkreis(heiz_edges, edges, node_by_id):
+def _umschaltventil_im_erzeugerkreis(heiz_edges, graph):
     """Umschaltventil an der Grenze des Erzeugerkreises finden.
 
     `_wp_kreis` endet an `valve3`; das Ventil hängt also an einer Kante des
@@ -526,11 +636,11 @@ def _umschaltventil_im_erzeugerkreis(heiz_edges, edges, node_by_id):
     erzeugt Betriebsfälle — ein mischendes Ventil regelt eine Temperatur und
     schaltet nichts um.
     """
-    for e in edges:
+    for e in graph.edges:
         if e["id"] not in heiz_edges:
             continue
         for seite in ("source", "target"):
-            knoten = node_by_id.get(e[seite])
+            knoten = graph.node_by_id.get(e[seite])
             if not knoten or knoten.get("type") != "valve3":
                 continue
             if ist_umschaltventil(knoten.get("data") or {}):
@@ -582,21 +692,21 @@ def _bww_sia385(d: dict) -> Optional[dict]:
         return {"warnungen": [str(exc)]}
 
 
-def _bww_ergebnisse(nodes) -> dict:
+def _bww_ergebnisse(nodes, auslegungen=_DIREKT) -> dict:
     """SIA-385-Auslegung je BWW-Speicher."""
     ergebnisse = {}
     for n in nodes:
         if n.get("type") != "bww":
             continue
-        r = _bww_sia385(n.get("data") or {})
+        r = auslegungen.auslegung("bww", n["id"], _bww_sia385, n.get("data") or {})
         if r is not None:
             ergebnisse[n["id"]] = r
     return ergebnisse
 
 
-def _bww_mit_leistungsabgleich(nodes) -> dict:
+def _bww_mit_leistungsabgleich(nodes, auslegungen=_DIREKT) -> dict:
     """BWW auslegen und bei genau einer Wärmepumpe deren Leistung prüfen."""
-    ergebnisse = _bww_ergebnisse(nodes)
+    ergebnisse = _bww_ergebnisse(nodes, auslegungen)
     waermepumpen = [n for n in nodes if n.get("type") == "erzeuger"
                     and ist_waermepumpe(n.get("data") or {})]
     if len(waermepumpen) != 1:
@@ -634,7 +744,7 @@ def _bww_ladeleistung(nodes, bww_results: dict) -> Optional[float]:
     return werte[0] if len(werte) == 1 else None
 
 
-def _solekreis_bauteile(nodes, edges, node_by_id) -> dict:
+def _solekreis_bauteile(nodes, graph: _Schemagraph) -> dict:
     """Welche Pumpe und welches Erdsondenfeld hängen am Quellenkreis welcher WP?
 
     Der Quellenkreis ist bereits über `_wp_kreis(..., "source", ...)` definiert.
@@ -643,13 +753,14 @@ def _solekreis_bauteile(nodes, edges, node_by_id) -> dict:
     Unterscheidung würde die Suche nach dem Verteiler quer durch den Solekreis
     laufen und der Solepumpe den Druckverlust der Heizseite zuordnen.
     """
+    node_by_id = graph.node_by_id
     zuordnung = {"pumpen": {}, "wp_ews": {}}
     for wp in [n for n in nodes if n.get("type") == "erzeuger"]:
-        sole_edges, _, _ = _wp_kreis(wp["id"], "source", edges, node_by_id)
+        sole_edges, _, _ = _wp_kreis(wp["id"], "source", graph.edges, node_by_id, graph)
         if not sole_edges:
             continue
         beteiligt = set()
-        for e in edges:
+        for e in graph.edges:
             if e["id"] in sole_edges:
                 beteiligt.update((e["source"], e["target"]))
         felder = [i for i in beteiligt if node_by_id.get(i, {}).get("type") == "erdsonden"]
@@ -682,22 +793,28 @@ def _sole_ce(ews_node) -> Optional[float]:
     return cp * dichte / 3600
 
 
-def _waermepumpen_kreise(nodes, edges, edge_flows, node_flows, calc_edges) -> dict:
+def _betriebsfaelle(d, bww_ladeleistung_kw, hat_quellenseite, sole_ce_auto) -> dict:
+    return betriebsfaelle(d, bww_ladeleistung_kw=bww_ladeleistung_kw,
+                          hat_quellenseite=hat_quellenseite, sole_ce_auto=sole_ce_auto)
+
+
+def _waermepumpen_kreise(nodes, graph: _Schemagraph, edge_flows, node_flows, calc_edges,
+                         auslegungen=_DIREKT) -> dict:
     """Erzeuger- und Quellenkreis jeder Wärmepumpe rechnen und propagieren.
 
     Läuft NACH den Verteiler-/Verbraucherkreisen und VOR der freien Topologie:
     so überschreibt kein Kreis die Leitungen eines anderen (§2 — jede Leitung
     genau einmal). Bereits belegte Leitungen bleiben unangetastet.
     """
-    node_by_id = {n["id"]: n for n in nodes}
-    solekreis = _solekreis_bauteile(nodes, edges, node_by_id)
-    bww_results = _bww_ergebnisse(nodes)
+    node_by_id = graph.node_by_id
+    solekreis = _solekreis_bauteile(nodes, graph)
+    bww_results = _bww_ergebnisse(nodes, auslegungen)
     results = {}
     for wp in [n for n in nodes if n.get("type") == "erzeuger"]:
         wid = wp["id"]
         d = wp.get("data") or {}
-        heiz_edges, heiz_quellen, heiz_grenzen = _wp_kreis(wid, "heating", edges, node_by_id)
-        sole_edges, sole_quellen, _ = _wp_kreis(wid, "source", edges, node_by_id)
+        heiz_edges, heiz_quellen, heiz_grenzen = _wp_kreis(wid, "heating", graph.edges, node_by_id, graph)
+        sole_edges, sole_quellen, _ = _wp_kreis(wid, "source", graph.edges, node_by_id, graph)
         # Luft/Wasser-WP: Umweltleistung ja, aber kein hydraulischer
         # Quellenkreis. Eine Sole-/Wasser-Seite wird nur für die dafür
         # vorgesehenen Typen oder für eine tatsächlich gezeichnete
@@ -710,21 +827,15 @@ def _waermepumpen_kreise(nodes, edges, edge_flows, node_flows, calc_edges) -> di
         # Verdampfer — sonst rechnete der Solevolumenstrom mit Wasser.
         ews_id = (solekreis["wp_ews"].get(wid) or {}).get("ews_id")
         sole_ce = _sole_ce(node_by_id.get(ews_id))
-        res = berechne_waermepumpe(
-            d,
-            hat_quellenseite=hat_hydraulischen_quellenkreis,
-            sole_ce_auto=sole_ce,
-        )
+        res = auslegungen.auslegung(
+            "waermepumpe", wid, berechne_waermepumpe, d, hat_hydraulischen_quellenkreis, sole_ce)
 
         # Umschaltventil im Erzeugerkreis: entweder BWW oder Heizung, nie beides.
-        ventil_id = _umschaltventil_im_erzeugerkreis(heiz_edges, edges, node_by_id)
+        ventil_id = _umschaltventil_im_erzeugerkreis(heiz_edges, graph)
         if ventil_id:
-            res["betriebsfaelle"] = betriebsfaelle(
-                d,
-                bww_ladeleistung_kw=_bww_ladeleistung(nodes, bww_results),
-                hat_quellenseite=hat_hydraulischen_quellenkreis,
-                sole_ce_auto=sole_ce,
-            )
+            res["betriebsfaelle"] = auslegungen.auslegung(
+                "betriebsfaelle", wid, _betriebsfaelle, d,
+                _bww_ladeleistung(nodes, bww_results), hat_hydraulischen_quellenkreis, sole_ce)
             res["betriebsfaelle"]["umschaltventil_id"] = ventil_id
             res["warnings"] += res["betriebsfaelle"]["warnungen"]
         res["heating_port_quelle"] = "port" if "port" in heiz_quellen else ("layer" if heiz_quellen else None)
@@ -823,7 +934,7 @@ def _mit_virtuellen_anschluss_kanten(nodes: List[dict], edges: List[dict]) -> Li
     return ergaenzt
 
 
-def _uebertrage_gruppen_anschluss(nodes, gruppe_results, edges, node_flows, edge_flows):
+def _uebertrage_gruppen_anschluss(nodes, gruppe_results, graph, node_flows, edge_flows):
     """«Anschluss für separate Gruppe» (serielle Untergruppe): eine Verbraucher-
     gruppe reicht Fluss + Leistung + VL/RL an den gleichnamigen Anschluss-Marker
     weiter. Die Leitung, die von dort z.B. auf einen Lufterhitzer gezeichnet wird,
@@ -852,15 +963,13 @@ def _uebertrage_gruppen_anschluss(nodes, gruppe_results, edges, node_flows, edge
             continue
         node_flows[n["id"]] = q["m"]
         anschluss_results[n["id"]] = dict(q)
-        for e in edges:
-            if str(e.get("id", "")).startswith("virt_"):
-                continue
-            if (e["source"] == n["id"] or e["target"] == n["id"]) and not edge_flows.get(e["id"]):
+        for e, _, _ in graph.nachbarn(n["id"], echt=True):
+            if not edge_flows.get(e["id"]):
                 edge_flows[e["id"]] = q["m"]
     return anschluss_results
 
 
-def _lufterhitzer_summen_nach_anschluss(nodes, edges) -> dict:
+def _lufterhitzer_summen_nach_anschluss(nodes, graph) -> dict:
     """Leistung der Lufterhitzer-Untergruppen je Anschlussbuchstabe.
 
     Die Haupt-Verbrauchergruppe ist der hydraulische Sammelkreis. Sobald an
@@ -868,14 +977,7 @@ def _lufterhitzer_summen_nach_anschluss(nodes, edges) -> dict:
     bestimmt deren Summe die Leistung des Sammelkreises. Ohne Untergruppen
     bleibt die manuelle Leistung der Hauptgruppe massgebend.
     """
-    node_by_id = {n["id"]: n for n in nodes}
-    nachbarn: dict = {}
-    for e in edges:
-        if str(e.get("id", "")).startswith("virt_"):
-            continue
-        nachbarn.setdefault(e["source"], set()).add(e["target"])
-        nachbarn.setdefault(e["target"], set()).add(e["source"])
-
+    node_by_id = graph.node_by_id
     gruppen: dict = {}
     marker = [n for n in nodes if n.get("type") == "anschluss"]
     for start in marker:
@@ -883,10 +985,10 @@ def _lufterhitzer_summen_nach_anschluss(nodes, edges) -> dict:
         if not buchstabe:
             continue
         besucht = {start["id"]}
-        queue = [start["id"]]
+        queue = deque([start["id"]])
         gefunden = set()
         while queue:
-            for other in nachbarn.get(queue.pop(0), ()):
+            for _, other, _ in graph.nachbarn(queue.popleft(), echt=True):
                 if other in besucht:
                     continue
                 besucht.add(other)
@@ -943,7 +1045,7 @@ def _lufterhitzer_kennwerte(node, quelle, gruppe_results, node_flows) -> None:
     gruppe_results[node["id"]] = res
 
 
-def _lufterhitzer_gruppen(nodes, edges, anschluss_results, gruppe_results, node_flows) -> None:
+def _lufterhitzer_gruppen(nodes, graph, anschluss_results, gruppe_results, node_flows) -> None:
     """Serielle Lufterhitzer-Untergruppen hinter einem Anschlussmarker.
 
     Aufbau (Dominic 2026-08-05): eine Verbrauchergruppe «Lufterhitzer» reicht
@@ -956,19 +1058,12 @@ def _lufterhitzer_gruppen(nodes, edges, anschluss_results, gruppe_results, node_
         return
     if not any(n.get("type") == "lufterhitzer_gruppe" for n in nodes):
         return
-    node_by_id = {n["id"]: n for n in nodes}
-    nachbarn: dict = {}
-    for e in edges:
-        if str(e.get("id", "")).startswith("virt_"):
-            continue
-        nachbarn.setdefault(e["source"], set()).add(e["target"])
-        nachbarn.setdefault(e["target"], set()).add(e["source"])
-
+    node_by_id = graph.node_by_id
     for marker_id, kennwerte in anschluss_results.items():
         besucht = {marker_id}
-        queue = [marker_id]
+        queue = deque([marker_id])
         while queue:
-            for other in nachbarn.get(queue.pop(0), ()):
+            for _, other, _ in graph.nachbarn(queue.popleft(), echt=True):
                 if other in besucht:
                     continue
                 besucht.add(other)
@@ -1062,21 +1157,19 @@ def _expansion_auto(nodes, gruppen_q: Optional[dict] = None):
     return auto_vl, auto_leistung
 
 
-def _pwt_primaer_gruppe(pid, edges, node_by_id, strict):
+def _pwt_primaer_gruppe(pid, graph, strict):
     """Speisende Verbrauchergruppe eines PWT über VL/neutrale Kanten suchen.
     strict=True: nur über die Primärseite (Anschlüsse left/bottom); sonst überall
     (Fallback, falls der Anwender die Gruppe an einen anderen Anschluss gehängt hat)."""
-    besucht, queue = {pid}, [pid]
+    node_by_id = graph.node_by_id
+    besucht, queue = {pid}, deque([pid])
     while queue:
-        cur = queue.pop(0)
-        for e in edges:
-            if _stroke(e) == RL_FARBE or str(e.get("id", "")).startswith("virt_"):
-                continue
-            if strict and cur == pid:
-                h = e.get("sourceHandle") if e["source"] == pid else e.get("targetHandle") if e["target"] == pid else None
-                if h not in ("left", "bottom"):
-                    continue
-            other = e["target"] if e["source"] == cur else e["source"] if e["target"] == cur else None
+        cur = queue.popleft()
+        if strict and cur == pid:
+            leitungen = graph.am_handle(pid, ("left", "bottom"), rl=False, echt=True)
+        else:
+            leitungen = graph.nachbarn(cur, rl=False, echt=True)
+        for _, other, _ in leitungen:
             if other and other not in besucht:
                 besucht.add(other)
                 if node_by_id.get(other, {}).get("type") in VERBRAUCHER_TYPEN:
@@ -1085,20 +1178,19 @@ def _pwt_primaer_gruppe(pid, edges, node_by_id, strict):
     return None
 
 
-def _pwt_transfer(nodes, edges, gruppe_results, node_flows, edge_flows):
+def _pwt_transfer(nodes, graph, gruppe_results, node_flows, edge_flows):
     """Plattentauscher (Systemtrennung, Gegenstrom): Primärseite (links) kommt von
     einer Verbrauchergruppe — Leistung + VL/RL werden übernommen. Sekundärseite
     (rechts) mit selbst gewählten Temperaturen; Q bleibt gleich →
     m_sek = Q / (1.163 · ΔT_sek). Warnung, wenn Sekundär-VL > Primär-VL.
     Gibt pwt_results {id: {q_kw, vl_prim, rl_prim, vl_sek, rl_sek, m_prim, m_sek, dt_sek, warnung}}."""
     results = {}
-    node_by_id = {n["id"]: n for n in nodes}
     for pwt in [n for n in nodes if n.get("type") == "pwt"]:
         d = pwt.get("data") or {}
         pid = pwt["id"]
         # Primär-Gruppe: über VL/neutrale Kanten zur nächsten Verbrauchergruppe
-        gruppe = (_pwt_primaer_gruppe(pid, edges, node_by_id, True)
-                  or _pwt_primaer_gruppe(pid, edges, node_by_id, False))
+        gruppe = (_pwt_primaer_gruppe(pid, graph, True)
+                  or _pwt_primaer_gruppe(pid, graph, False))
         vl_sek, rl_sek = _zahl(d.get("vl_sek")), _zahl(d.get("rl_sek"))
         res = {"vl_sek": vl_sek, "rl_sek": rl_sek}
         if gruppe:
@@ -1114,15 +1206,14 @@ def _pwt_transfer(nodes, edges, gruppe_results, node_flows, edge_flows):
                 m_sek = q / (1.163 * (vl_sek - rl_sek))
                 res.update({"dt_sek": round(vl_sek - rl_sek, 1), "m_sek": round(m_sek, 4)})
                 node_flows[pid] = round(m_sek, 4)
-                for e in edges:  # Sekundär-Leitungen (rechte Anschlüsse) tragen m_sek
-                    h = e.get("sourceHandle") if e["source"] == pid else e.get("targetHandle") if e["target"] == pid else None
-                    if h in ("top", "right"):
-                        edge_flows[e["id"]] = round(m_sek, 4)
+                # Sekundär-Leitungen (rechte Anschlüsse) tragen m_sek
+                for e, _, _ in graph.am_handle(pid, ("top", "right")):
+                    edge_flows[e["id"]] = round(m_sek, 4)
         results[pid] = res
     return results
 
 
-def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
+def berechne_schema(nodes: List[dict], edges: List[dict], auslegungen=None) -> dict:
     """Kompletter Graph: Flüsse je Leitung/Knoten + Verteiler-/Gruppen-Resultate.
 
     1. Sekundär-Fluss je Verbraucher (§1).
@@ -1130,11 +1221,16 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
        Δp = ungünstigster Ast). Jede Ast-Leitung trägt den Fluss IHRES Kreises (§2).
     3. Freie Topologie (ohne Verteiler): Rückwärts-Propagierung, jede Kante
        nur einmal zählen (§2 — Doppelzählungs-Bug-Historie).
+
+    `auslegungen` (siehe hydraulik_kreise) liefert Bauteil-Auslegungen
+    unveränderter Kreise aus einem Cache; ohne wird alles gerechnet.
     """
+    auslegungen = auslegungen or _DIREKT
     edges = _mit_virtuellen_anschluss_kanten(nodes, edges)
     anschluss_warnungen = _anschluss_warnungen(nodes)
     node_by_id = {n["id"]: n for n in nodes}
-    lufterhitzer_summen = _lufterhitzer_summen_nach_anschluss(nodes, edges)
+    graph = _Schemagraph(edges, node_by_id)
+    lufterhitzer_summen = _lufterhitzer_summen_nach_anschluss(nodes, graph)
 
     gruppen_q = {}
     for n in nodes:
@@ -1177,10 +1273,10 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
         # und Expansionsgefässe rechnen trotzdem: ein Schema aus WP, Puffer und
         # Erdsonden ist hydraulisch vollständig bestimmt.
         leer["heatpump_results"] = _waermepumpen_kreise(
-            nodes, edges, leer["edge_flows"], leer["node_flows"], set())
+            nodes, graph, leer["edge_flows"], leer["node_flows"], set(), auslegungen)
         leer["speicher_results"], leer["erdsonden_results"] = _bauteil_auslegungen(
-            nodes, {}, leer["heatpump_results"])
-        leer["bww_results"] = _bww_mit_leistungsabgleich(nodes)
+            nodes, {}, leer["heatpump_results"], auslegungen)
+        leer["bww_results"] = _bww_mit_leistungsabgleich(nodes, auslegungen)
         ews_inhalte = [
             r.get("gesamtinhalt_l") for r in leer["erdsonden_results"].values()
             if r.get("gesamtinhalt_l") is not None
@@ -1188,17 +1284,16 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
         auto_ews_inhalt = ews_inhalte[0] if len(ews_inhalte) == 1 else None
         for n in nodes:
             if n.get("type") == "expansion":
-                r = berechne_expansion(
-                    n.get("data") or {}, *_expansion_auto(nodes, gruppen_q), auto_ews_inhalt
-                )
+                r = auslegungen.auslegung(
+                    "expansion", n["id"], berechne_expansion,
+                    n.get("data") or {}, *_expansion_auto(nodes, gruppen_q), auto_ews_inhalt)
                 if r is not None:
                     leer["expansion_results"][n["id"]] = r
         for n in nodes:  # Knoten ohne eigenen Wert: grösster Fluss ihrer Leitungen
             nid = n["id"]
             if nid in leer["node_flows"]:
                 continue
-            werte = [leer["edge_flows"].get(e["id"], 0.0) for e in edges
-                     if e["source"] == nid or e["target"] == nid]
+            werte = [leer["edge_flows"].get(e["id"], 0.0) for e, _, _ in graph.nachbarn(nid)]
             leer["node_flows"][nid] = round(max(werte), 4) if werte else 0.0
         leer["leitung_results"] = _leitungsdimensionen(edges, leer["edge_flows"])
         leer["warnungen"] = (_sammle_warnungen(nodes, {}, anschluss_warnungen, {}, leer["expansion_results"])
@@ -1230,16 +1325,13 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
         Kanten, RL-Suche nur über RL-Kanten. Stoppt an Verteiler/Erzeuger,
         damit sie nicht zu einer fremden Gruppe überläuft (§2)."""
         besucht = {start_id} | block_ids
-        queue = [start_id]
+        queue = deque([start_id])
         gefunden = []
         if node_by_id.get(start_id, {}).get("type") in VERBRAUCHER_TYPEN:
             gefunden.append(start_id)
         while queue:
-            cur = queue.pop(0)
-            for e in edges:
-                if (_stroke(e) == RL_FARBE) != rl_only:
-                    continue
-                other = e["target"] if e["source"] == cur else e["source"] if e["target"] == cur else None
+            cur = queue.popleft()
+            for _, other, _ in graph.nachbarn(cur, rl=rl_only):
                 if other and other not in besucht:
                     besucht.add(other)
                     if node_by_id.get(other, {}).get("type") in VERBRAUCHER_TYPEN:
@@ -1250,11 +1342,8 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
     # ── 2. Verteiler-zentriert (§4) ──
     for vn in [n for n in nodes if n.get("type") == "verteiler"]:
         vid = vn["id"]
-        vn_edges = [e for e in edges if e["source"] == vid or e["target"] == vid]
-
         branches = {}
-        for e in vn_edges:
-            h = e.get("sourceHandle") if e["source"] == vid else e.get("targetHandle")
+        for e, _, h in graph.nachbarn(vid):
             typ, num = _parse_handle(h)
             if not typ or not num:
                 continue
@@ -1361,18 +1450,15 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
         # Jede Leitung nur einmal (§2); stoppt an Erzeuger/Verteiler/Verbrauchern.
         def trunk_propagieren(start_id, rl_seite):
             besucht = {start_id, vid}
-            queue = [start_id]
+            queue = deque([start_id])
             while queue:
-                cur = queue.pop(0)
+                cur = queue.popleft()
                 # Stopp an Erzeuger/Verteiler, Verbrauchern UND am Speicher: hinter
                 # dem Speicher liegt der Erzeugerkreis mit eigenem Volumenstrom (§6).
                 if (node_by_id.get(cur, {}).get("type") in BLOCK_TYPEN + SPEICHER_TYPEN
                         or cur in sek):
                     continue
-                for e in edges:
-                    if (_stroke(e) == RL_FARBE) != rl_seite:
-                        continue
-                    other = e["target"] if e["source"] == cur else e["source"] if e["target"] == cur else None
+                for e, other, _ in graph.nachbarn(cur, rl=rl_seite):
                     if other and other not in besucht:
                         if e["id"] not in calc_edges:
                             edge_flows[e["id"]] = round(m_prim_total, 4)
@@ -1402,11 +1488,12 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
     # Reihenfolge bewusst zwischen Verteiler und freier Topologie: die
     # Verbraucherkreise stehen bereits fest, die freie Rückwärts-Propagierung
     # darf die WP-Leitungen danach nicht mehr überschreiben (§2/§6).
-    heatpump_results = _waermepumpen_kreise(nodes, edges, edge_flows, node_flows, calc_edges)
+    heatpump_results = _waermepumpen_kreise(
+        nodes, graph, edge_flows, node_flows, calc_edges, auslegungen)
     speicher_results, erdsonden_results = _bauteil_auslegungen(
-        nodes, verteiler_results, heatpump_results)
-    solekreis_pumpen = _solekreis_bauteile(nodes, edges, node_by_id)["pumpen"]
-    bww_results = _bww_mit_leistungsabgleich(nodes)
+        nodes, verteiler_results, heatpump_results, auslegungen)
+    solekreis_pumpen = _solekreis_bauteile(nodes, graph)["pumpen"]
+    bww_results = _bww_mit_leistungsabgleich(nodes, auslegungen)
     ews_inhalte = [
         r.get("gesamtinhalt_l") for r in erdsonden_results.values()
         if r.get("gesamtinhalt_l") is not None
@@ -1415,13 +1502,10 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
 
     # ── 3. Freie Topologie: Rückwärts-Propagierung VL/neutral ──
     rev_adj = {n["id"]: [] for n in nodes}
-    for e in edges:
-        if e["id"] in calc_edges:
+    for e, art in zip(graph.edges, graph.arten):
+        if e["id"] in calc_edges or art == "rl":
             continue
-        s = _stroke(e)
-        if s == RL_FARBE:
-            continue
-        if s == VL_FARBE:
+        if art == "vl":
             rev_adj.setdefault(e["target"], []).append((e["source"], e["id"]))
         else:
             rev_adj.setdefault(e["source"], []).append((e["target"], e["id"]))
@@ -1429,9 +1513,9 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
 
     for cid, fluss in sek.items():
         besucht = {cid}
-        queue = [cid]
+        queue = deque([cid])
         while queue:
-            cur = queue.pop(0)
+            cur = queue.popleft()
             for to, eid in rev_adj.get(cur, []):
                 # Fluss nur beim Entdecken eines NEUEN Knotens gutschreiben —
                 # sonst zählt dieselbe Kante doppelt (§2, Bug-Historie).
@@ -1443,17 +1527,17 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
 
     # ── 4. RL-Kanten ohne Wert (gleiche Einmal-Zähl-Regel) ──
     rl_adj = {n["id"]: [] for n in nodes}
-    for e in edges:
-        if _stroke(e) != RL_FARBE or e["id"] in calc_edges:
+    for e, art in zip(graph.edges, graph.arten):
+        if art != "rl" or e["id"] in calc_edges:
             continue
         rl_adj.setdefault(e["source"], []).append((e["target"], e["id"]))
         rl_adj.setdefault(e["target"], []).append((e["source"], e["id"]))
 
     for cid, fluss in sek.items():
         besucht = {cid}
-        queue = [cid]
+        queue = deque([cid])
         while queue:
-            cur = queue.pop(0)
+            cur = queue.popleft()
             for to, eid in rl_adj.get(cur, []):
                 if to not in besucht:
                     if eid not in calc_edges:
@@ -1481,11 +1565,11 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
             })
         else:
             res["q_kw_quelle"] = "manuell"
-    anschluss_results = _uebertrage_gruppen_anschluss(nodes, gruppe_results, edges, node_flows, edge_flows)
+    anschluss_results = _uebertrage_gruppen_anschluss(nodes, gruppe_results, graph, node_flows, edge_flows)
     # Serielle Lufterhitzeranlagen ab dem Marker: eigene Leistung, VL/RL von
     # der Hauptgruppe. Muss vor der Knoten-Fluss-Verdichtung laufen.
-    _lufterhitzer_gruppen(nodes, edges, anschluss_results, gruppe_results, node_flows)
-    pwt_results = _pwt_transfer(nodes, edges, gruppe_results, node_flows, edge_flows)
+    _lufterhitzer_gruppen(nodes, graph, anschluss_results, gruppe_results, node_flows)
+    pwt_results = _pwt_transfer(nodes, graph, gruppe_results, node_flows, edge_flows)
 
     # ── 5. Knoten-Flüsse ──
     for n in nodes:
@@ -1495,7 +1579,7 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
         if nid in sek:
             node_flows[nid] = round(sek[nid], 4)
         else:
-            werte = [edge_flows.get(e["id"], 0.0) for e in edges if e["source"] == nid or e["target"] == nid]
+            werte = [edge_flows.get(e["id"], 0.0) for e, _, _ in graph.nachbarn(nid)]
             node_flows[nid] = round(max(werte), 4) if werte else 0.0
 
     # Pumpe/Ventil im Strang auslegen (nur zusätzlich, ändert keine Flüsse)
@@ -1553,6 +1637,10 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
                     "Erdsondenfeld liefert noch keine Förderhöhe — Rohre, Längen und "
                     "Solevolumenstrom dort vervollständigen."
                 )
+            bp = None
+            if d.get("kennlinie") and h_mws is not None:
+                bp, hinweise = _sole_betriebspunkt(d["kennlinie"], dv)
+                warnungen_pumpe += hinweise
             pumpen_results[n["id"]] = {
                 "v": node_flows.get(n["id"]),
                 "ist_solepumpe": True,
@@ -1563,6 +1651,8 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
                 "dp_leitungen_mws": dv.get("druckverlust_leitungen_mws"),
                 "dp_verteiler_mws": dv.get("druckverlust_verteiler_mws"),
                 "dp_wp_mws": dv.get("druckverlust_wp_mws"),
+                # Schnitt mit der Datenblatt-Kennlinie (`kennlinie` am Bauteil).
+                **({"betriebspunkt": bp} if d.get("kennlinie") else {}),
                 "warnings": warnungen_pumpe,
             }
         elif t == "pump":
@@ -1575,13 +1665,10 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
             # Verteiler über VL-/neutrale Leitungen suchen (nicht durch Gruppen)
             vt_id = None
             besucht = {n["id"]}
-            queue = [n["id"]]
+            queue = deque([n["id"]])
             while queue and vt_id is None:
-                cur = queue.pop(0)
-                for e in edges:
-                    if _stroke(e) == RL_FARBE:
-                        continue
-                    other = e["target"] if e["source"] == cur else e["source"] if e["target"] == cur else None
+                cur = queue.popleft()
+                for _, other, _ in graph.nachbarn(cur, rl=False):
                     if other and other not in besucht:
                         besucht.add(other)
                         typ_o = node_by_id.get(other, {}).get("type")
@@ -1601,7 +1688,9 @@ def berechne_schema(nodes: List[dict], edges: List[dict]) -> dict:
                 "mws": round(gesamt / 10, 2) if gesamt > 0 else None,
             }
         elif t == "expansion":
-            r = berechne_expansion(d, *_expansion_auto(nodes, gruppen_q), auto_ews_inhalt)
+            r = auslegungen.auslegung(
+                "expansion", n["id"], berechne_expansion,
+                d, *_expansion_auto(nodes, gruppen_q), auto_ews_inhalt)
             if r is not None:
                 expansion_results[n["id"]] = r
         # Wärmezähler braucht keine eigene Rechnung: er übernimmt den
@@ -0,0 +1,264 @@
+"""Hydraulik — inkrementelle Neuberechnung je Kreis.
+
+Der Editor schickt nach jeder Änderung den ganzen Graphen. `berechne_schema`
+legte dabei jedes Mal alle Bauteile neu aus: SIA-385-BWW, Erdsondenfeld mit
+Solekreis-Druckverlust, technischer Speicher, Wärmepumpe, Expansionsgefäss.
+Das geschah auch dann, wenn nur ein einzelner Heizkreis geändert wurde.
+
+Hier wird der Graph in hydraulische Kreise zerlegt. Trennstellen sind Speicher,
+BWW, Plattentauscher und Verteiler (PHYSIK §4/§6). Jede Trennstelle ist ein
+eigener Kreis. Die Leitungen daran gehören zum Kreis auf der anderen Seite.
+Anschluss-Marker mit gleichem Buchstaben verbinden ihre Kreise wie eine
+Leitung. Jeder Kreis hat einen Hash über seine Bauteile, Leitungen und
+angrenzenden Trennstellen.
+
+Die Auslegungen liegen im `KreisCache` unter dem Hash ihres Kreises:
+
+- Ein Kreis mit neuem Hash ist schmutzig. Alles darin wird neu gerechnet.
+- Die übrigen Kreise liefern ihre Auslegungen aus dem Cache.
+- Manche Auslegungen lesen Werte von ausserhalb des Kreises, z.B. die
+  Quellenleistung der WP am Erdsondenfeld oder die Verbraucherleistung am
+  Speicher. Diese Eingaben stehen zusätzlich im Schlüssel. Das Resultat ist
+  deshalb immer dasselbe wie bei `berechne_schema` ohne Cache.
+
+Flüsse, Verteiler- und Gruppenresultate rechnet `berechne_schema` weiterhin für
+das ganze Schema. Seit dem Graph-Index ist das linear. Die Kreise koppeln dort
+über Hauptstrang, Anschluss-Marker und die freie Rückwärts-Propagierung.
+
+Der Cache ist inhaltsadressiert und darum prozessweit teilbar: gleicher Kreis
+mit gleichen Eingaben ergibt dieselbe Auslegung, egal aus welchem Schema.
+"""
+from __future__ import annotations
+
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.calculations.hydraulik import (
+    SPEICHER_TYPEN,
+    _anschluss_gruppen,
+    _mit_virtuellen_anschluss_kanten,
+    berechne_schema,
+)
+
+TRENNSTELLEN = SPEICHER_TYPEN + ("pwt", "verteiler")
+DEFAULT_MAX_KREISE = 4096
+
+
+def _hash(*teile: str) -> str:
+    return hashlib.blake2b("\x00".join(teile).encode(), digest_size=20).hexdigest()
+
+
+def eingaben_schluessel(args: tuple) -> str:
+    """Schlüssel der Eingaben einer Auslegung.
+
+    `repr` ist für die JSON-artigen Editor-Daten eindeutig: gleicher Text heisst
+    gleicher Wert. Zwei gleiche Werte mit anderer Schlüsselreihenfolge ergeben
+    höchstens einen Fehltreffer, nie ein falsches Resultat.
+    """
+    return _hash(repr(args))
+
+
+@dataclass(frozen=True)
+class Kreis:
+    """Ein hydraulischer Kreis: Bauteile, Leitungen, angrenzende Trennstellen."""
+
+    knoten: tuple
+    leitungen: tuple
+    grenzen: tuple
+
+
+def zerlege_in_kreise(nodes: List[dict], edges: List[dict]) -> List[Kreis]:
+    """Schema an den Trennstellen in Kreise zerlegen (Reihenfolge stabil).
+
+    `Kreis.leitungen` enthält die Leitungs-Dicts, auch die virtuellen der
+    Anschluss-Marker.
+    """
+    node_by_id = {n["id"]: n for n in nodes}
+    trennstelle = {nid for nid, n in node_by_id.items() if n.get("type") in TRENNSTELLEN}
+    alle_edges = _mit_virtuellen_anschluss_kanten(nodes, edges)
+    eltern = {nid: nid for nid in node_by_id}
+
+    def wurzel(x):
+        while (p := eltern.setdefault(x, x)) != x:
+            eltern[x] = x = eltern[p]
+        return x
+
+    def verbinde(a, b):
+        eltern[wurzel(b)] = wurzel(a)
+
+    for e in alle_edges:
+        s, t = e["source"], e["target"]
+        if s not in trennstelle and t not in trennstelle:
+            verbinde(s, t)
+    # «Anschluss für separate Gruppe»: Gruppe und Marker tauschen Fluss und
+    # Leistung aus, ohne dass eine Leitung gezeichnet ist.
+    for ids in _anschluss_gruppen(nodes).values():
+        offen = [i for i in ids if i not in trennstelle]
+        for a, b in zip(offen, offen[1:]):
+            verbinde(a, b)
+
+    knoten_je: dict = {}
+    for nid in node_by_id:
+        knoten_je.setdefault(nid if nid in trennstelle else wurzel(nid), []).append(nid)
+    leitungen_je: dict = {}
+    for e in alle_edges:
+        s, t = e["source"], e["target"]
+        if s in trennstelle and t in trennstelle:
+            schluessel = ("leitung", e["id"])
+        else:
+            schluessel = wurzel(t if s in trennstelle else s)
+        leitungen_je.setdefault(schluessel, []).append(e)
+
+    kreise = []
+    for schluessel in {**knoten_je, **leitungen_je}:
+        knoten = knoten_je.get(schluessel, [])
+        leitungen = leitungen_je.get(schluessel, [])
+        grenzen = sorted({x for e in leitungen for x in (e["source"], e["target"])
+                          if x in trennstelle}.difference(knoten))
+        kreise.append(Kreis(knoten=tuple(knoten), leitungen=tuple(leitungen),
+                            grenzen=tuple(grenzen)))
+    return kreise
+
+
+class KreisCache:
+    """Auslegungen je Kreis-Hash, LRU über die Anzahl Kreise.
+
+    Je Kreis bleibt pro Bauteil und Auslegungsart nur der letzte Stand liegen.
+    Ändern sich nur die Eingaben von ausserhalb, wird er ersetzt statt ergänzt.
+    Die Resultate liegen gepickelt vor. Jede Entnahme ist eine eigene Kopie, denn
+    `berechne_schema` ergänzt Resultate nachträglich (Warnungen, Leistungsabgleich).
+    """
+
+    def __init__(self, max_kreise: int = DEFAULT_MAX_KREISE):
+        self.max_kreise = max_kreise
+        self._kreise: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._kreise)
+
+    def registriere(self, kreis_schluessel: str) -> bool:
+        """Kreis vormerken; True, wenn der Hash neu (der Kreis schmutzig) ist."""
+        with self._lock:
+            neu = kreis_schluessel not in self._kreise
+            if neu:
+                self._kreise[kreis_schluessel] = {}
+                self._kuerzen()
+            else:
+                self._kreise.move_to_end(kreis_schluessel)
+        return neu
+
+    def _kuerzen(self) -> None:
+        while len(self._kreise) > self.max_kreise:
+            self._kreise.popitem(last=False)
+
+    def hole(self, kreis_schluessel: str, eintrag: tuple, eingaben: str) -> Optional[bytes]:
+        with self._lock:
+            kreis = self._kreise.get(kreis_schluessel)
+            if kreis is None:
+                return None
+            self._kreise.move_to_end(kreis_schluessel)
+            gespeichert = kreis.get(eintrag)
+        if gespeichert is None or gespeichert[0] != eingaben:
+            return None
+        return gespeichert[1]
+
+    def lege_ab(self, kreis_schluessel: str, eintrag: tuple, eingaben: str, daten: bytes) -> None:
+        with self._lock:
+            kreis = self._kreise.setdefault(kreis_schluessel, {})
+            kreis[eintrag] = (eingaben, daten)
+            self._kreise.move_to_end(kreis_schluessel)
+            self._kuerzen()
+
+    def auslegungen(self, nodes: List[dict], edges: List[dict]) -> "Auslegungen":
+        """Zerlegung des Schemas für eine Berechnung mit diesem Cache."""
+        return Auslegungen(self, nodes, zerlege_in_kreise(nodes, edges))
+
+    def leeren(self) -> None:
+        with self._lock:
+            self._kreise.clear()
+
+
+class Auslegungen:
+    """Bauteil-Auslegungen EINER Berechnung — für `berechne_schema(auslegungen=…)`.
+
+    Kreise werden erst gehasht, wenn eine Auslegung darin nachgeschlagen wird
+    oder `schmutzig` gefragt ist. Die meisten Kreise (Heizgruppen) haben keine
+    Bauteil-Auslegung und kosten so nur die Zerlegung.
+    """
+
+    def __init__(self, cache: KreisCache, nodes: List[dict], kreise: List[Kreis]):
+        self.cache = cache
+        self.kreise = kreise
+        self._node_by_id = {n["id"]: n for n in nodes}
+        self._kreis_von = {nid: k for k in kreise for nid in k.knoten}
+        self._fingerabdruck: dict = {}
+        self._schluessel: dict = {}
+        self._neu: set = set()
+        self.gerechnet: list = []
+        self.wiederverwendet: list = []
+
+    def kreis_von(self, nid) -> Optional[Kreis]:
+        return self._kreis_von.get(nid)
+
+    def _bauteil(self, nid) -> str:
+        """Nur, was rechnet — Position und Auswahl im Editor ändern keinen Kreis."""
+        text = self._fingerabdruck.get(nid)
+        if text is None:
+            n = self._node_by_id[nid]
+            text = self._fingerabdruck[nid] = repr((nid, n.get("type"), n.get("data") or {}))
+        return text
+
+    def schluessel(self, kreis: Kreis) -> str:
+        """Inhalts-Hash des Kreises; beim ersten Mal im Cache vorgemerkt."""
+        wert = self._schluessel.get(id(kreis))
+        if wert is None:
+            wert = _hash(
+                *[self._bauteil(nid) for nid in sorted(kreis.knoten)], "|",
+                *[repr(e) for e in kreis.leitungen], "|",
+                *[self._bauteil(nid) for nid in kreis.grenzen if nid in self._node_by_id],
+            )
+            self._schluessel[id(kreis)] = wert
+            if self.cache.registriere(wert):
+                self._neu.add(id(kreis))
+        return wert
+
+    @property
+    def schmutzig(self) -> List[Kreis]:
+        """Kreise, deren Hash der Cache vor dieser Berechnung nicht kannte."""
+        return [k for k in self.kreise if self.schluessel(k) and id(k) in self._neu]
+
+    def auslegung(self, art: str, nid, funktion, *args):
+        kreis = self._kreis_von.get(nid)
+        if kreis is None:
+            return funktion(*args)
+        kreis_schluessel = self.schluessel(kreis)
+        eintrag, eingaben = (art, nid), eingaben_schluessel(args)
+        gespeichert = self.cache.hole(kreis_schluessel, eintrag, eingaben)
+        if gespeichert is not None:
+            self.wiederverwendet.append(eintrag)
+            return pickle.loads(gespeichert)
+        ergebnis = funktion(*args)
+        self.cache.lege_ab(kreis_schluessel, eintrag, eingaben,
+                           pickle.dumps(ergebnis, protocol=pickle.HIGHEST_PROTOCOL))
+        self.gerechnet.append(eintrag)
+        return ergebnis
+
+
+_standard_cache = KreisCache()
+
+
+def standard_cache() -> KreisCache:
+    """Prozessweiter Kreis-Cache des Backends."""
+    return _standard_cache
+
+
+def berechne_inkrementell(nodes: List[dict], edges: List[dict],
+                          cache: Optional[KreisCache] = None) -> dict:
+    """`berechne_schema` mit Auslegungen unveränderter Kreise aus dem Cache."""
+    cache = cache if cache is not None else _standard_cache
+    return berechne_schema(nodes, edges, auslegungen=cache.auslegungen(nodes, edges))
@@ -0,0 +1,174 @@
+"""Hydraulik — Variantenvergleich über Parameter-Überschreibungen.
+
+Planer vergleichen Varianten (andere VL/RL, mehr oder weniger Sonden, andere
+Solekonzentration, andere Überbrückungszeit) bisher, indem sie das Schema von
+Hand ändern. Hier wird ein Basisgraph mit einer Liste von Überschreibungen je
+Bauteil gerechnet:
+
+    [{"g1": {"vl_temp": 40, "rl_temp": 32}}, {"ews": {"sonden_anzahl": 6}}, …]
+
+Jede Variante liefert eine kompakte Vergleichszeile: Flüsse, DN und Δp je
+Leitung, Pumpen-Betriebspunkte (V̇, Förderhöhe), Gruppen, Erdsonden, Speicher
+und Warnungen. Gegenüber der Basis steht je Abschnitt nur, was abweicht.
+
+Geteilte Vorarbeit:
+
+- Identische Varianten werden einmal gerechnet.
+- Jede Rechnung läuft über `hydraulik_kreise`. Kreise, die eine Variante nicht
+  berührt (z.B. BWW und Erdsondenfeld bei geänderten Gruppentemperaturen),
+  kommen aus dem Kreis-Cache des jeweiligen Prozesses.
+- Der Pool bleibt zwischen Anfragen bestehen; die Worker behalten ihren
+  Kreis-Cache. Der Basisgraph geht je Block einmal hinüber, nicht je Variante.
+
+Parallel wird nur, wenn die geschätzte Rechenzeit (Basisrechnung × Anzahl
+Varianten) den Poolbetrieb lohnt. Kann kein Pool gestartet werden, läuft
+derselbe Code sequenziell; das Ergebnis ist identisch.
+
+Worker-Anzahl: `HYDRAULIK_VARIANTEN_WORKERS` (Standard bis 4, höchstens 8;
+`1` schaltet die Parallelisierung ab).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from app import prozesspools
+from app.calculations.hydraulik_kreise import berechne_inkrementell
+
+logger = logging.getLogger(__name__)
+
+MAX_VARIANTEN = 200
+# Unterhalb dieser geschätzten Rechenzeit lohnt sich der Pool nicht: typische
+# Schemas rechnen in wenigen ms, dann kosten Start und Pickling mehr als sie sparen.
+MIN_SEKUNDEN_PARALLEL = 2.0
+BLOECKE_JE_WORKER = 2
+
+_pool = prozesspools.Prozesspool("hydraulik-varianten")
+
+
+def varianten_workers(workers: Optional[int] = None) -> int:
+    """Effektive Worker-Anzahl (Argument > Umgebung > Standard), gedeckelt."""
+    return prozesspools.workers_aus_umgebung("HYDRAULIK_VARIANTEN_WORKERS", workers)
+
+
+def mit_aenderungen(nodes: List[dict], aenderungen: dict) -> List[dict]:
+    """Knoten mit überschriebenen Datenfeldern; unberührte Knoten werden geteilt."""
+    unbekannt = set(aenderungen) - {n.get("id") for n in nodes}
+    if unbekannt:
+        raise ValueError(f"Unbekannte Bauteile: {', '.join(sorted(map(str, unbekannt)))}")
+    return [
+        {**n, "data": {**(n.get("data") or {}), **aenderungen[n["id"]]}}
+        if n.get("id") in aenderungen else n
+        for n in nodes
+    ]
+
+
+def _felder(quelle: Optional[dict], felder: tuple) -> dict:
+    quelle = quelle or {}
+    return {f: quelle.get(f) for f in felder}
+
+
+def vergleichszeile(ergebnis: dict) -> dict:
+    """Die Kennwerte einer Rechnung, die Varianten unterscheiden."""
+    pumpen = {
+        pid: _felder(r, ("v", "foerderhoehe_kpa"))
+        for pid, r in (ergebnis.get("pumpen_results") or {}).items()
+    }
+    gruppen = {}
+    for gid, g in (ergebnis.get("gruppe_results") or {}).items():
+        gruppen[gid] = {
+            **_felder(g, ("m_prim", "m_sek", "q_kw")),
+            "kvs_vorschlag": (g.get("ventil") or {}).get("kvs_vorschlag"),
+        }
+        if g.get("pumpe"):
+            pumpen[gid] = {"v": g["pumpe"].get("v"), "foerderhoehe_kpa": g["pumpe"].get("dp_kpa")}
+    return {
+        "leitungen": {
+            eid: _felder(r, ("v", "dn", "dp_kpa"))
+            for eid, r in (ergebnis.get("leitung_results") or {}).items()
+        },
+        "pumpen": pumpen,
+        "gruppen": gruppen,
+        "verteiler": {
+            vid: _felder(r, ("m_prim_total", "dp_max_ast", "rl_misch"))
+            for vid, r in (ergebnis.get("verteiler_results") or {}).items()
+        },
+        "erdsonden": {
+            eid: _felder(r, ("erforderlich_gesamt_m", "reserve_m", "ausreichend", "gesamtinhalt_l"))
+            for eid, r in (ergebnis.get("erdsonden_results") or {}).items()
+        },
+        "speicher": {
+            sid: _felder(r, ("speichervolumen_l",))
+            for sid, r in (ergebnis.get("speicher_results") or {}).items()
+        },
+        "warnungen": list(ergebnis.get("warnungen") or []),
+    }
+
+
+def nur_abweichungen(zeile: dict, basis: dict) -> dict:
+    """Je Abschnitt nur die Einträge, die von der Basis abweichen."""
+    return {
+        abschnitt: (werte if not isinstance(werte, dict) else {
+            k: v for k, v in werte.items() if basis.get(abschnitt, {}).get(k) != v
+        })
+        for abschnitt, werte in zeile.items()
+    }
+
+
+def _rechne(nodes: List[dict], edges: List[dict], aenderungen: dict) -> dict:
+    return vergleichszeile(berechne_inkrementell(mit_aenderungen(nodes, aenderungen), edges))
+
+
+def _rechne_block(nodes: List[dict], edges: List[dict], block: List[dict]) -> list:
+    """Worker: ein Block Varianten auf demselben Basisgraphen."""
+    return [_rechne(nodes, edges, aenderungen) for aenderungen in block]
+
+
+def _parallel(nodes, edges, varianten: list, workers: int) -> Optional[list]:
+    bloecke = prozesspools.aufteilen(varianten, min(len(varianten), workers * BLOECKE_JE_WORKER))
+    try:
+        pool = _pool.hole(workers)
+        futures = [pool.submit(_rechne_block, nodes, edges, block) for block in bloecke]
+        return [zeile for f in futures for zeile in f.result()]
+    except (BrokenProcessPool, OSError) as exc:
+        logger.warning("Variantenrechnung parallel nicht möglich (%s) — sequenziell", exc)
+        _pool.verwerfen()
+        return None
+
+
+def vergleiche_varianten(nodes: List[dict], edges: List[dict], varianten: List[dict],
+                         *, workers: Optional[int] = None) -> dict:
+    """Basis und alle Varianten rechnen; Varianten nur mit Abweichungen zur Basis.
+
+    `varianten`: je Variante `{bauteil_id: {feld: wert}}`. Ein unbekanntes
+    Bauteil ergibt ValueError, bevor gerechnet wird.
+    """
+    if len(varianten) > MAX_VARIANTEN:
+        raise ValueError(f"Höchstens {MAX_VARIANTEN} Varianten je Anfrage")
+    for aenderungen in varianten:
+        mit_aenderungen(nodes, aenderungen)
+
+    start = time.perf_counter()
+    basis = _rechne(nodes, edges, {})
+    dauer_basis = time.perf_counter() - start
+
+    schluessel = [json.dumps(v, sort_keys=True, default=str) for v in varianten]
+    eindeutig = list(dict.fromkeys(schluessel))
+    zu_rechnen = [json.loads(k) for k in eindeutig]
+    n = varianten_workers(workers)
+    zeilen = None
+    if n > 1 and len(zu_rechnen) > 1 and dauer_basis * len(zu_rechnen) >= MIN_SEKUNDEN_PARALLEL:
+        zeilen = _parallel(nodes, edges, zu_rechnen, n)
+    prozesse = n if zeilen is not None else 1
+    if zeilen is None:
+        zeilen = _rechne_block(nodes, edges, zu_rechnen)
+    je_schluessel = dict(zip(eindeutig, zeilen))
+    return {
+        "basis": basis,
+        "varianten": [nur_abweichungen(je_schluessel[k], basis) for k in schluessel],
+        "gerechnet": len(eindeutig),
+        "prozesse": prozesse,
+    }
@@ -0,0 +1,236 @@
+"""Solekreis — Anlagenkennlinie, Pumpenbetriebspunkt und Sondenfeld-Raster (NumPy).
+
+`sole_druckverlust` rechnet genau einen Volumenstrom: je Teilstück eine
+Reynoldszahl, ein λ, ein Δp. Für die Anlagenkennlinie und für die Auslegung
+des Sondenfelds (welche Kombination aus Sondenanzahl und -tiefe passt zur
+Pumpe?) braucht es tausende solcher Auswertungen. Hier laufen sie als Arrays:
+
+    V   Volumenströme (letzte Achse)        n, L  Sondenanzahl und -tiefe
+    H   Förderhöhe = H_Leitungen + H_Verteiler + H_Wärmepumpe
+
+Alle Grössen broadcasten gegeneinander. Ein Raster aus 40 Anzahlen × 40
+Tiefen × 400 Volumenströmen ist eine einzige Rechnung.
+
+Der Rechenweg ist derselbe wie in `sole_druckverlust`, das die fachliche
+Referenz bleibt. Zwei Unterschiede, beide nur abseits des Auslegungspunkts:
+
+- Der Druckverlust der Wärmepumpe ist ein Datenblattwert beim
+  Auslegungsvolumenstrom. Auf der Kennlinie wächst er quadratisch mit V̇.
+- Im Übergangsgebiet ist λ nicht definiert. Der skalare Rechenweg zählt das
+  Teilstück dort mit 0 und warnt; die Kennlinie ist dort NaN.
+
+Pumpenkennlinien sind Punkttabellen aus dem Datenblatt,
+`[{"v_m3h": …, "h_mws": …}, …]`, zwischen den Punkten linear interpoliert.
+Der Betriebspunkt ist der erste Schnitt von Pumpen- und Anlagenkennlinie.
+"""
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import numpy as np
+
+from app.calculations.sole_druckverlust import ERDBESCHLEUNIGUNG_M_S2
+
+# Stützstellen je Kennlinie: von 0 bis zum grössten Volumenstrom der Pumpe.
+KENNLINIE_PUNKTE = 400
+MAX_RASTER = 10_000
+
+
+def _lambda(reynolds: np.ndarray, dk: np.ndarray) -> np.ndarray:
+    """Rohrreibungszahl wie `sole_druckverlust._lambda`; Übergangsgebiet NaN."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.select(
+            [reynolds < 2340,
+             (reynolds < 65 * dk) & (reynolds < 100_000),
+             reynolds < 65 * dk,
+             reynolds > 1300 * dk],
+            [64 / reynolds,                                      # Hagen-Poiseuille
+             0.3164 / reynolds ** 0.25,                          # Blasius
+             0.0032 + 0.221 / reynolds ** 0.237,                 # Nikuradse
+             1 / (2 * np.log10(3.715 * dk)) ** 2],               # Prandtl-Kármán
+            default=np.nan,
+        )
+
+
+def _teilstueck_pa(v_m3_s, innen_d_mm, laenge_m, dichte, viskositaet, rauheit):
+    """Δp eines Teilstücks (Hin- und Rückleitung) in Pa, dazu Re und p_dyn."""
+    d_m = innen_d_mm / 1000
+    w = v_m3_s / (np.pi * d_m * d_m / 4)
+    reynolds = w * d_m / (viskositaet / 1_000_000)
+    p_dyn = dichte * w * w / 2
+    with np.errstate(invalid="ignore"):
+        dp = _lambda(reynolds, innen_d_mm / rauheit) * p_dyn / d_m * laenge_m * 2
+    return np.where(laenge_m > 0, dp, 0.0), reynolds, p_dyn
+
+
+@dataclass(frozen=True)
+class Solekreis:
+    """Geometrie und Wärmeträger eines Solekreises; Felder dürfen Arrays sein."""
+
+    sonden_anzahl: object
+    sonden_tiefe_m: object
+    sonden_innen_d_mm: float
+    sonden_straenge: int = 4
+    zuleitung_verteiler_m: float = 0.0
+    zuleitung_verteiler_innen_d_mm: Optional[float] = None
+    zuleitung_wp_m: float = 0.0
+    zuleitung_wp_innen_d_mm: Optional[float] = None
+    dichte_kg_m3: float = 1050.0
+    viskositaet_mm2_s: float = 4.15
+    rauheit_mm: float = 0.015
+    zeta_verteiler: float = 12.0
+    verteiler_anzahl: float = 1.0
+    druckverlust_wp_mws: float = 0.0
+    volumenstrom_m3_h: Optional[float] = None   # Auslegungspunkt
+
+    @classmethod
+    def aus_ergebnis(cls, dv: dict) -> "Solekreis":
+        """Aus einem Ergebnis von `sole_druckverlust` (mit Teilstücken)."""
+        teile = {t["name"]: t for t in dv.get("teilstuecke") or []}
+        if "Erdwärmesonde" not in teile:
+            raise ValueError("Solekreis ohne Volumenstrom — keine Kennlinie möglich")
+        verteiler = teile.get("Zuleitung Sonde–Verteiler") or {}
+        wp = teile.get("Zuleitung Verteiler–WP") or {}
+        return cls(
+            sonden_anzahl=dv["sonden_anzahl"],
+            sonden_tiefe_m=teile["Erdwärmesonde"]["laenge_m"],
+            sonden_innen_d_mm=teile["Erdwärmesonde"]["innen_d_mm"],
+            sonden_straenge=dv["sonden_straenge"],
+            zuleitung_verteiler_m=verteiler.get("laenge_m", 0.0),
+            zuleitung_verteiler_innen_d_mm=verteiler.get("innen_d_mm"),
+            zuleitung_wp_m=wp.get("laenge_m", 0.0),
+            zuleitung_wp_innen_d_mm=wp.get("innen_d_mm"),
+            dichte_kg_m3=dv["dichte_kg_m3"],
+            viskositaet_mm2_s=dv["viskositaet_mm2_s"],
+            rauheit_mm=dv["rauheit_mm"],
+            zeta_verteiler=dv["zeta_verteiler"],
+            verteiler_anzahl=dv["verteiler_anzahl"],
+            druckverlust_wp_mws=dv.get("druckverlust_wp_mws") or 0.0,
+            volumenstrom_m3_h=dv.get("volumenstrom_m3_h"),
+        )
+
+    def foerderhoehe(self, volumenstrom_m3_h) -> dict:
+        """Förderhöhe und Sonden-Reynoldszahl über beliebige Volumenströme.
+
+        Ergebnis-Arrays haben die Broadcast-Form aus Volumenströmen und Feldern.
+        """
+        v = np.asarray(volumenstrom_m3_h, dtype=np.float64)
+        anzahl = np.asarray(self.sonden_anzahl, dtype=np.float64)
+        tiefe = np.asarray(self.sonden_tiefe_m, dtype=np.float64)
+        d_sonde = float(self.sonden_innen_d_mm)
+        d_verteiler = float(self.zuleitung_verteiler_innen_d_mm or 0) or d_sonde
+        d_wp = float(self.zuleitung_wp_innen_d_mm or 0) or d_verteiler
+        stoff = (float(self.dichte_kg_m3), float(self.viskositaet_mm2_s), float(self.rauheit_mm))
+        rho_g = stoff[0] * ERDBESCHLEUNIGUNG_M_S2
+
+        v_s = v / 3600
+        v_kreis = v_s / (anzahl * (int(self.sonden_straenge) // 2))
+        dp_sonde, re_sonde, p_dyn_sonde = _teilstueck_pa(v_kreis, d_sonde, tiefe, *stoff)
+        dp_verteiler, _, _ = _teilstueck_pa(
+            v_kreis, d_verteiler, np.float64(self.zuleitung_verteiler_m or 0), *stoff)
+        dp_wp, _, _ = _teilstueck_pa(v_s, d_wp, np.float64(self.zuleitung_wp_m or 0), *stoff)
+
+        h_leitungen = (dp_sonde + dp_verteiler + dp_wp) / rho_g
+        h_verteiler = (float(self.zeta_verteiler) * p_dyn_sonde / rho_g
+                       * float(self.verteiler_anzahl or 0))
+        h_wp = float(self.druckverlust_wp_mws or 0)
+        if h_wp and self.volumenstrom_m3_h:
+            h_wp = h_wp * (v / float(self.volumenstrom_m3_h)) ** 2
+        h = np.where(v > 0, h_leitungen + h_verteiler + h_wp, 0.0)
+        return {
+            "foerderhoehe_mws": h,
+            "leitungen_mws": np.where(v > 0, h_leitungen, 0.0),
+            "verteiler_mws": h_verteiler,
+            "sonde_reynolds": re_sonde,
+            "sonde_turbulent": (re_sonde >= 2340)
+            & ((re_sonde < 65 * d_sonde / stoff[2]) | (re_sonde > 1300 * d_sonde / stoff[2])),
+        }
+
+
+def pumpenkennlinie(punkte) -> tuple:
+    """Datenblattpunkte prüfen und als (V̇, H)-Arrays liefern, V̇ aufsteigend."""
+    try:
+        paare = sorted((float(p["v_m3h"]), float(p["h_mws"])) for p in punkte or [])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Pumpenkennlinie: je Punkt v_m3h und h_mws angeben")
+    if len(paare) < 2:
+        raise ValueError("Pumpenkennlinie braucht mindestens zwei Punkte")
+    v, h = (np.array(spalte) for spalte in zip(*paare))
+    if v[0] < 0 or np.any(np.diff(v) <= 0) or np.any(h < 0):
+        raise ValueError("Pumpenkennlinie: Volumenströme verschieden und ≥ 0, Förderhöhen ≥ 0")
+    return v, h
+
+
+def betriebspunkt(kreis: Solekreis, punkte, *, stuetzstellen: int = KENNLINIE_PUNKTE) -> dict:
+    """Schnitt von Pumpen- und Anlagenkennlinie, je Feldkombination.
+
+    Liefert Arrays `v_m3h`/`h_mws` in der Form der Felder; NaN, wo die Pumpe
+    die Anlage im Datenblattbereich nicht schneidet (Pumpe zu stark für den
+    angegebenen Bereich oder Kennlinie im Übergangsgebiet).
+    """
+    v_pumpe, h_pumpe = pumpenkennlinie(punkte)
+    v = np.linspace(0.0, v_pumpe[-1], stuetzstellen)
+    felder = np.broadcast(np.asarray(kreis.sonden_anzahl), np.asarray(kreis.sonden_tiefe_m)).shape
+    raster = replace(kreis, sonden_anzahl=np.expand_dims(kreis.sonden_anzahl, -1),
+                     sonden_tiefe_m=np.expand_dims(kreis.sonden_tiefe_m, -1))
+    h_anlage = np.broadcast_to(raster.foerderhoehe(v)["foerderhoehe_mws"], felder + v.shape)
+    abstand = np.interp(v, v_pumpe, h_pumpe, left=np.nan) - h_anlage
+
+    unter = abstand < 0
+    i = np.clip(np.argmax(unter, axis=-1), 1, len(v) - 1)
+    a0 = np.take_along_axis(abstand, (i - 1)[..., None], -1)[..., 0]
+    a1 = np.take_along_axis(abstand, i[..., None], -1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        anteil = a0 / (a0 - a1)
+    gefunden = unter.any(axis=-1) & (a0 >= 0)
+    v_bp = np.where(gefunden, v[i - 1] + anteil * (v[i] - v[i - 1]), np.nan)
+    return {"v_m3h": v_bp, "h_mws": np.interp(v_bp, v_pumpe, h_pumpe)}
+
+
+def _gerundet(x, stellen: int) -> Optional[float]:
+    x = float(x)
+    return round(x, stellen) if np.isfinite(x) else None
+
+
+def sondenfeld_raster(kreis: Solekreis, anzahlen, tiefen_m, punkte=None) -> list:
+    """Alle Kombinationen Sondenanzahl × Sondentiefe beim Auslegungsvolumenstrom.
+
+    Je Kombination: Bohrmeter, Förderhöhe, ob die Sonde turbulent durchströmt
+    ist, und mit Pumpenkennlinie der Betriebspunkt samt der Aussage, ob die
+    Pumpe den Auslegungsvolumenstrom erreicht.
+    """
+    if not kreis.volumenstrom_m3_h:
+        raise ValueError("Sondenfeld-Raster braucht den Auslegungsvolumenstrom")
+    anzahl = np.asarray(anzahlen, dtype=np.float64)
+    tiefe = np.asarray(tiefen_m, dtype=np.float64)
+    if anzahl.ndim != 1 or tiefe.ndim != 1 or not anzahl.size or not tiefe.size:
+        raise ValueError("Sondenanzahlen und -tiefen als nicht leere Listen angeben")
+    if anzahl.size * tiefe.size > MAX_RASTER:
+        raise ValueError(f"Höchstens {MAX_RASTER} Kombinationen je Raster")
+    if np.any(anzahl < 1) or np.any(anzahl != np.round(anzahl)) or np.any(tiefe <= 0):
+        raise ValueError("Sondenanzahl ganzzahlig ≥ 1, Sondentiefe > 0")
+
+    raster = replace(kreis, sonden_anzahl=anzahl[:, None], sonden_tiefe_m=tiefe[None, :])
+    punkt = raster.foerderhoehe(float(kreis.volumenstrom_m3_h))
+    h = np.broadcast_to(punkt["foerderhoehe_mws"], (anzahl.size, tiefe.size))
+    turbulent = np.broadcast_to(punkt["sonde_turbulent"], h.shape)
+    bp = betriebspunkt(raster, punkte) if punkte is not None else None
+
+    zeilen = []
+    for a in range(anzahl.size):
+        for t in range(tiefe.size):
+            zeile = {
+                "sonden_anzahl": int(anzahl[a]),
+                "sonden_tiefe_m": float(tiefe[t]),
+                "bohrmeter_m": round(float(anzahl[a] * tiefe[t]), 1),
+                "foerderhoehe_mws": _gerundet(h[a, t], 2),
+                "sonde_turbulent": bool(turbulent[a, t]),
+            }
+            if bp is not None:
+                v_bp = _gerundet(bp["v_m3h"][a, t], 3)
+                zeile["betriebspunkt"] = (
+                    {"v_m3h": v_bp, "h_mws": _gerundet(bp["h_mws"][a, t], 2)}
+                    if v_bp is not None else None)
+                zeile["pumpe_reicht"] = (
+                    v_bp >= kreis.volumenstrom_m3_h if v_bp is not None else None)
+            zeilen.append(zeile)
+    return zeilen
@@ -13,8 +13,15 @@ Ausdrücke direkt auf den ReportLab-Canvas:
 Unterstützt wird genau das, was die Rechenkerne erzeugen. Unbekannte Befehle
 werden als aufrechter Text gesetzt und eine unlesbare Eingabe fällt auf den
 Klartext zurück: im Export darf nie eine Formel verschwinden.
+
+Gesetzte Formeln werden je Prozess gemerkt (Quelltext, Grösse, Spaltenbreite):
+der Berechnungsteil setzt bei jedem Bauteil gleichen Typs dieselben Formeln,
+und ein Worker exportiert viele Schemas. Gezeichnet wird jedes Mal neu, die
+Kästen selbst ändern sich nach dem Aufbau nicht mehr.
 """
 
+from functools import lru_cache
+
 from reportlab.pdfbase import pdfmetrics
 
 # Formelschrift wie im Formeleditor von Word: Serifen, Formelzeichen kursiv.
@@ -60,6 +67,11 @@ OPERATOREN = set("=+-<>≤≥≈")
 STANDARDFARBE = (0.1, 0.12, 0.2)
 
 
+@lru_cache(maxsize=8192)
+def _textbreite(text: str, font: str, groesse: float) -> float:
+    return pdfmetrics.stringWidth(text, font, groesse)
+
+
 # ── Kästen: messen und zeichnen ─────────────────────────────────────────────
 class _Kasten:
     """Ein gesetzter Teilausdruck mit Breite, Ober- und Unterlänge."""
@@ -75,7 +87,7 @@ class _Kasten:
 class _Text(_Kasten):
     def __init__(self, text: str, font: str, groesse: float):
         self.text, self.font, self.groesse = text, font, groesse
-        self.breite = pdfmetrics.stringWidth(text, font, groesse)
+        self.breite = _textbreite(text, font, groesse)
         self.ueber = UEBER * groesse
         self.unter = UNTER * groesse
 
@@ -171,8 +183,8 @@ class _Klammer(_Kasten):
         self.inhalt, self.links, self.rechts = inhalt, links, rechts
         hoehe = max(inhalt.ueber + inhalt.unter, groesse)
         self.fs = min(6 * groesse, max(groesse, hoehe * 1.16))
-        self.links_b = pdfmetrics.stringWidth(links, GERADE, self.fs) if links else 0.0
-        self.rechts_b = pdfmetrics.stringWidth(rechts, GERADE, self.fs) if rechts else 0.0
+        self.links_b = _textbreite(links, GERADE, self.fs) if links else 0.0
+        self.rechts_b = _textbreite(rechts, GERADE, self.fs) if rechts else 0.0
         self.breite = inhalt.breite + self.links_b + self.rechts_b
         mitte = (inhalt.ueber - inhalt.unter) / 2
         halb = hoehe * 0.58
@@ -353,16 +365,22 @@ def formel(latex, *, groesse: float = 8.0, fallback=None,
     """LaTeX setzen; ohne LaTeX oder bei Fehlern den Klartext verwenden.
 
     `max_breite` verkleinert die Formel so weit, dass sie in die Spalte passt.
+    Die Formel ist geteilt und darf nicht verändert werden.
     """
+    klartext = str(fallback if fallback not in (None, "") else latex or "")
+    return _gesetzt(str(latex) if latex else None, klartext, groesse, max_breite)
+
+
+@lru_cache(maxsize=4096)
+def _gesetzt(latex, klartext: str, groesse: float, max_breite) -> Formel:
     kasten = None
     if latex:
         try:
-            kasten = _kaesten(_zerlege(str(latex)), 0, groesse, False)[0]
+            kasten = _kaesten(_zerlege(latex), 0, groesse, False)[0]
         except Exception:
             kasten = None
     if kasten is None or not kasten.breite:
-        kasten = _Text(str(fallback if fallback not in (None, "") else latex or ""),
-                       GERADE, groesse)
+        kasten = _Text(klartext, GERADE, groesse)
     skala = 1.0
     if max_breite and kasten.breite > max_breite > 0:
         skala = max_breite / kasten.breite
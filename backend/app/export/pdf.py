@@ -1,31 +1,48 @@
-"""PDF-Export (Auftrag F4): Deckblatt + Schema (SVG→PDF, A3 quer) + Legende
+"""PDF-Export (Auftrag F4): Deckblatt + Schema (Vektor, A3 quer) + Legende
 + Berechnungen pro Bauteil (Eingaben + Resultat + Einheit, A4 hoch).
 
 3 Optionen: inhalt = "schema" | "berechnungen" | "beides".
+
+Auf Wunsch (`PDF_BERECHNUNGEN_BLOECKE`, Standard aus) werden grosse
+Berechnungsteile (ab `MIN_ABSCHNITTE_PARALLEL` Bauteilen) in Blöcken zu je
+`ABSCHNITTE_JE_BLOCK` Bauteilen in einem Prozesspool gerendert und in
+Reihenfolge zusammengesetzt; jeder Block beginnt auf einer neuen Seite, die
+Seitenzahlen kommen danach über alle Blöcke. Der Umbruch hängt nur von dieser
+Einstellung ab, nie von der Worker-Anzahl (`PDF_BERECHNUNGEN_WORKERS`,
+Standard bis 4, höchstens 8) — die bestimmt nur das Tempo.
 """
 import base64
+import hashlib
 import io
+import json
+import logging
+import os
+from concurrent.futures.process import BrokenProcessPool
 from datetime import date
 
+from pypdf import PdfReader, PdfWriter
 from reportlab.graphics import renderPDF
 from reportlab.lib.pagesizes import A3, A4, landscape
 from reportlab.pdfgen import canvas as pdfcanvas
 from reportlab.lib.utils import ImageReader
 from svglib.svglib import svg2rlg
 
+from app import prozesspools
 from app.calculations.bww_sia385 import CP_WASSER_KJ_KGK
 from app.calculations.grundlagen import grundlage_zeile
 from app.export.design import STANDARD, Marke, logo_klein, wasserzeichen
 from app.export import diagramme as diagramm
 from app.export.diagramme import FARBEN
 from app.export.formelsatz import formel
-from app.export.schema_svg import erzeuge_svg
+from app.export.schema_svg import erzeuge_zeichnung
 from app.data.generator_types import (
     HEAT_PUMP_TYPES,
     SOURCE_CIRCUIT_TYPES,
     generator_type_label,
 )
 
+logger = logging.getLogger(__name__)
+
 PLANER = "SIREGO GmbH · Dominic Goulon · Winterthur"
 
 TITEL = {
@@ -746,22 +763,27 @@ def _plankopf(c, seite, projekt_name, schema_name, plankopf=None):
         c.drawString(x + 454, ly - 2.5, label)
 
 
-def _schema_seite(c, svg_string, projekt_name, schema_name, plankopf=None):
+def _schema_plan(c, zeichnung):
+    """Nur der Plan, zentriert in der Nutzfläche über dem Plankopf."""
     seite = landscape(A3)
     c.setPageSize(seite)
     rand = 30
     plankopf_hoehe = 122
     nutz_b, nutz_h = seite[0] - 2 * rand, seite[1] - 2 * rand - plankopf_hoehe
     # Ausschliesslich serverseitiger Vektorpfad: unabhängig von Browserzoom,
-    # Auswahlzustand, Raster und sichtbarem Canvas-Ausschnitt.
-    zeichnung = svg2rlg(io.StringIO(svg_string))
+    # Auswahlzustand, Raster und sichtbarem Canvas-Ausschnitt. Die Zeichnung
+    # kommt direkt aus den Bauteil-Zeichnern, ohne SVG-Text und svglib-Parser.
     skala = min(nutz_b / zeichnung.width, nutz_h / zeichnung.height, 1.5)
     zeichnung.scale(skala, skala)
     zeichnung.width *= skala
     zeichnung.height *= skala
     renderPDF.draw(zeichnung, c, rand + (nutz_b - zeichnung.width) / 2,
                    rand + plankopf_hoehe + (nutz_h - zeichnung.height) / 2)
-    _plankopf(c, seite, projekt_name, schema_name, plankopf)
+
+
+def _schema_seite(c, zeichnung, projekt_name, schema_name, plankopf=None):
+    _schema_plan(c, zeichnung)
+    _plankopf(c, landscape(A3), projekt_name, schema_name, plankopf)
     c.showPage()
 
 
@@ -900,11 +922,42 @@ def _diagramm_block(c, diagramme: list, y: float, kopf) -> float:
     return y
 
 
-def _berechnungs_seiten(c, abschnitte, projekt_name, marke: Marke = STANDARD):
+SEITENZAHL_FORM = "berechnungen_seitenzahl"
+
+
+def _seitenzahl(c, nr: int) -> None:
+    """«Seite n von …» links unten; die Gesamtzahl ist eine Form, die erst
+    `_seitenzahl_gesamt` am Ende des Abschnitts füllt."""
+    text = f"Seite {nr} von "
+    c.saveState()
+    c.setFont("Helvetica", 7.5)
+    c.setFillColorRGB(*GRAUFARBE)
+    c.drawString(50, 28, text)
+    c.translate(50 + c.stringWidth(text, "Helvetica", 7.5), 28)
+    c.doForm(SEITENZAHL_FORM)
+    c.restoreState()
+
+
+def _seitenzahl_gesamt(c, anzahl: int) -> None:
+    c.beginForm(SEITENZAHL_FORM)
+    c.setFont("Helvetica", 7.5)
+    c.setFillColorRGB(*GRAUFARBE)
+    c.drawString(0, 0, str(anzahl))
+    c.endForm()
+
+
+def _berechnungs_seiten(c, abschnitte, projekt_name, marke: Marke = STANDARD,
+                        seitenzahlen: bool = True):
     w, h = A4
+    seiten = 0
+
     def kopf():
+        nonlocal seiten
+        seiten += 1
         c.setPageSize(A4)
         wasserzeichen(c, w, h, marke)
+        if seitenzahlen:
+            _seitenzahl(c, seiten)
         c.setFont("Helvetica-Bold", 14)
         c.setFillColorRGB(0.1, 0.12, 0.2)
         c.drawString(50, h - 50, f"Berechnungen — {projekt_name}")
@@ -975,6 +1028,82 @@ def _berechnungs_seiten(c, abschnitte, projekt_name, marke: Marke = STANDARD):
         c.setFillColorRGB(0.1, 0.12, 0.2)
         y -= 10
     c.showPage()
+    if seitenzahlen:
+        _seitenzahl_gesamt(c, seiten)
+
+
+# ── Berechnungen parallel ───────────────────────────────────────────────────
+# Die Abschnitte der Bauteile hängen nicht voneinander ab, nur vom Seitenfluss.
+# Im Blockmodus rendert darum jeder Worker einen Block auf eine eigene
+# Leinwand. Blockmodus und Blockgrösse sind fest eingestellt, damit das
+# Dokument nicht vom Host abhängt: ohne Pool oder mit einem Worker werden
+# dieselben Blöcke der Reihe nach gerendert, und das PDF sieht gleich aus.
+MIN_ABSCHNITTE_PARALLEL = 24
+ABSCHNITTE_JE_BLOCK = 8
+
+_pool = prozesspools.Prozesspool("pdf-berechnungen")
+
+
+def berechnungs_workers(workers: int | None = None) -> int:
+    return prozesspools.workers_aus_umgebung("PDF_BERECHNUNGEN_WORKERS", workers)
+
+
+def berechnungs_bloecke(bloecke: bool | None = None) -> bool:
+    """Blockmodus für grosse Berechnungsteile (Argument > Umgebung, Standard aus)."""
+    if bloecke is None:
+        return os.getenv("PDF_BERECHNUNGEN_BLOECKE", "").strip().lower() in ("1", "true", "yes", "on")
+    return bool(bloecke)
+
+
+def _berechnungs_block(abschnitte, projekt_name, marke: Marke) -> bytes:
+    """Ein Block Berechnungen als eigenes PDF, noch ohne Seitenzahlen."""
+    buf = io.BytesIO()
+    # Unkomprimiert: die Seitenzahlen werden danach hineingemischt, und pypdf
+    # müsste sonst jede Seite erst aus ASCII85 zurückholen (in Python, langsam).
+    # Komprimiert wird beim Zusammensetzen.
+    c = pdfcanvas.Canvas(buf, pagesize=A4, pageCompression=0)
+    _berechnungs_seiten(c, abschnitte, projekt_name, marke, seitenzahlen=False)
+    c.save()
+    return buf.getvalue()
+
+
+def _berechnungs_bloecke(abschnitte, projekt_name, marke: Marke, workers: int) -> list:
+    bloecke = [abschnitte[i:i + ABSCHNITTE_JE_BLOCK]
+               for i in range(0, len(abschnitte), ABSCHNITTE_JE_BLOCK)]
+    if workers > 1:
+        try:
+            pool = _pool.hole(workers)
+            futures = [pool.submit(_berechnungs_block, block, projekt_name, marke)
+                       for block in bloecke]
+            return [f.result() for f in futures]
+        except (BrokenProcessPool, OSError) as exc:
+            logger.warning("Berechnungen parallel nicht möglich (%s) — sequenziell", exc)
+            _pool.verwerfen()
+    return [_berechnungs_block(block, projekt_name, marke) for block in bloecke]
+
+
+def _berechnungen_parallel(abschnitte, projekt_name, marke: Marke, workers: int) -> bytes:
+    """Blöcke parallel rendern, in Reihenfolge zusammensetzen, dann nummerieren."""
+    writer = PdfWriter()
+    for block in _berechnungs_bloecke(abschnitte, projekt_name, marke, workers):
+        for seite in _seiten(block):
+            writer.add_page(seite)
+    # Erst jetzt steht fest, auf welcher Seite jeder Block beginnt.
+    anzahl = len(writer.pages)
+    buf = io.BytesIO()
+    c = pdfcanvas.Canvas(buf, pagesize=A4)
+    for nr in range(1, anzahl + 1):
+        _seitenzahl(c, nr)
+        c.showPage()
+    _seitenzahl_gesamt(c, anzahl)
+    c.save()
+    for seite, zahl in zip(writer.pages, _seiten(buf.getvalue())):
+        seite.merge_page(zahl)
+        seite.compress_content_streams()
+    writer.compress_identical_objects()
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
 
 
 def _umbruch(text: str, breite: int) -> list:
@@ -995,17 +1124,137 @@ def _umbruch(text: str, breite: int) -> list:
 def erzeuge_pdf(projekt_name: str, schema_name: str, inhalt: str,
                 nodes: list, edges: list, results: dict,
                 plankopf: dict | None = None,
-                marke: Marke = STANDARD) -> bytes:
-    """Komplettes PDF gemäss gewähltem Inhalt (Deckblatt immer dabei)."""
+                marke: Marke = STANDARD, cache=None,
+                workers: int | None = None, bloecke: bool | None = None) -> bytes:
+    """Komplettes PDF gemäss gewähltem Inhalt (Deckblatt immer dabei).
+
+    Mit `cache` (siehe `app.services.pdf_export_cache`) wird jeder Abschnitt
+    als eigenes PDF gerendert, abgelegt und das Dokument aus den Seiten
+    zusammengesetzt — ein unverändertes Schema rendert nichts neu.
+
+    `bloecke`: grosse Berechnungsteile in Blöcken (Standard aus
+    `PDF_BERECHNUNGEN_BLOECKE`). `workers`: Prozesse dafür (Standard aus
+    `PDF_BERECHNUNGEN_WORKERS`); wer selbst schon in einem Pool läuft, gibt 1
+    und bekommt dieselben Seiten.
+    """
+    abschnitte = None
+    in_bloecken = False
+    if inhalt in ("berechnungen", "beides"):
+        abschnitte = berechnungs_abschnitte(nodes, results)
+        in_bloecken = len(abschnitte) >= MIN_ABSCHNITTE_PARALLEL and berechnungs_bloecke(bloecke)
+    if cache is not None or in_bloecken:
+        return _erzeuge_pdf_aus_abschnitten(projekt_name, schema_name, inhalt, nodes, edges,
+                                            results, plankopf, marke, cache, abschnitte,
+                                            in_bloecken=in_bloecken,
+                                            workers=berechnungs_workers(workers))
     buf = io.BytesIO()
     c = pdfcanvas.Canvas(buf, pagesize=A4)
-    c.setTitle(f"{projekt_name} — {schema_name}")
+    c.setTitle(_titel(projekt_name, schema_name))
     _deckblatt(c, projekt_name, schema_name, inhalt, plankopf, marke)
     if inhalt in ("schema", "beides"):
-        svg = erzeuge_svg(nodes, edges, results)
-        _schema_seite(c, svg, projekt_name, schema_name, plankopf)
+        _schema_seite(c, erzeuge_zeichnung(nodes, edges, results), projekt_name, schema_name, plankopf)
         _legende_seiten(c, legende_zeilen(nodes, results), projekt_name, results.get("warnungen"), marke)
     if inhalt in ("berechnungen", "beides"):
-        _berechnungs_seiten(c, berechnungs_abschnitte(nodes, results), projekt_name, marke)
+        _berechnungs_seiten(c, abschnitte, projekt_name, marke)
     c.save()
     return buf.getvalue()
+
+
+def _titel(projekt_name, schema_name) -> str:
+    return f"{projekt_name} — {schema_name}"
+
+
+# ── Abschnittweise mit Cache ────────────────────────────────────────────────
+# Jeder Abschnitt hängt nur an dem, was er zeichnet. Der Plan auf der A3-Seite
+# liegt getrennt vom Plankopf: eine neue Revision rendert Deckblatt und
+# Plankopf, der Plan selbst kommt aus dem Cache und wird unterlegt.
+def inhalts_hash(*teile) -> str:
+    material = json.dumps(teile, sort_keys=True, separators=(",", ":"),
+                          ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _leinwand(zeichnen) -> bytes:
+    buf = io.BytesIO()
+    c = pdfcanvas.Canvas(buf, pagesize=A4)
+    zeichnen(c)
+    c.save()
+    return buf.getvalue()
+
+
+def _abschnitt(cache, key: str, erzeugen) -> bytes:
+    """Abschnitt aus dem Cache oder neu erzeugen; ohne Cache immer neu."""
+    daten = cache.hole(key) if cache is not None else None
+    if daten is None:
+        daten = erzeugen()
+        if cache is not None:
+            cache.lege_ab(key, daten)
+    return daten
+
+
+def _seiten(daten: bytes) -> list:
+    return list(PdfReader(io.BytesIO(daten)).pages)
+
+
+def _plankopf_ebene(c, projekt_name, schema_name, plankopf):
+    seite = landscape(A3)
+    c.setPageSize(seite)
+    _plankopf(c, seite, projekt_name, schema_name, plankopf)
+    c.showPage()
+
+
+def _plan_ebene(c, nodes, edges, results):
+    _schema_plan(c, erzeuge_zeichnung(nodes, edges, results))
+    c.showPage()
+
+
+def _erzeuge_pdf_aus_abschnitten(projekt_name, schema_name, inhalt, nodes, edges, results,
+                                 plankopf, marke, cache, abschnitte=None, *,
+                                 in_bloecken: bool = False, workers: int = 1) -> bytes:
+    heute = date.today().isoformat()   # Deckblatt und Plankopf tragen das Datum
+    graph = inhalts_hash(nodes, edges)
+    ergebnis = inhalts_hash(results)
+    kopf = inhalts_hash(projekt_name, schema_name, plankopf, heute)
+    auftritt = repr(marke)
+
+    writer = PdfWriter()
+    for seite in _seiten(_abschnitt(
+            cache, "deckblatt:" + inhalts_hash(kopf, inhalt, auftritt),
+            lambda: _leinwand(lambda c: _deckblatt(c, projekt_name, schema_name, inhalt,
+                                                   plankopf, marke)))):
+        writer.add_page(seite)
+    if inhalt in ("schema", "beides"):
+        plan = writer.add_page(_seiten(_abschnitt(
+            cache, f"plan:{graph}:{ergebnis}",
+            lambda: _leinwand(lambda c: _plan_ebene(c, nodes, edges, results))))[0])
+        plan.merge_page(_seiten(_abschnitt(
+            cache, f"plankopf:{kopf}",
+            lambda: _leinwand(lambda c: _plankopf_ebene(c, projekt_name, schema_name,
+                                                        plankopf))))[0])
+        plan.compress_content_streams()   # merge_page schreibt den Inhalt entpackt
+        for seite in _seiten(_abschnitt(
+                cache, "legende:" + inhalts_hash(graph, ergebnis, projekt_name, auftritt),
+                lambda: _leinwand(lambda c: _legende_seiten(
+                    c, legende_zeilen(nodes, results), projekt_name,
+                    results.get("warnungen"), marke)))):
+            writer.add_page(seite)
+    if inhalt in ("berechnungen", "beides"):
+        if abschnitte is None:
+            abschnitte = berechnungs_abschnitte(nodes, results)
+        if in_bloecken:
+            def berechnungen():
+                return _berechnungen_parallel(abschnitte, projekt_name, marke, workers)
+        else:
+            def berechnungen():
+                return _leinwand(lambda c: _berechnungs_seiten(c, abschnitte, projekt_name, marke))
+        for seite in _seiten(_abschnitt(
+                # Blöcke brechen anders um als ein durchgehender Fluss.
+                cache, "berechnungen:" + inhalts_hash(graph, ergebnis, projekt_name, auftritt,
+                                                      "bloecke" if in_bloecken else "fluss"),
+                berechnungen)):
+            writer.add_page(seite)
+    writer.compress_identical_objects()   # Schriften stehen sonst je Abschnitt einmal drin
+    writer.add_metadata({"/Title": _titel(projekt_name, schema_name)})
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
@@ -1,24 +1,29 @@
 """Schema → SVG (synoptischer CAD-Look) — fürs PDF, kein Screenshot.
 
-Zeichnet den gespeicherten Graphen (Nodes + Edges) als Vektor-SVG:
+Zeichnet den gespeicherten Graphen (Nodes + Edges) als Vektorplan:
 VL-Balken oben / RL-Balken unten, Verbrauchergruppen als vertikale Stränge
 (Pumpe, rotes Rechteck mit gedrehtem Text, STAD, Mischventil, Bypass).
 
+Die Zeichner schreiben in ein Zeichenziel (`app.export.zeichenziele`):
+`erzeuge_svg` liefert SVG-Text, `erzeuge_zeichnung` dieselbe Zeichnung direkt
+als ReportLab-Objekt für das PDF.
+
 WICHTIG: Die Geometrie-Konstanten müssen mit dem Editor übereinstimmen
 (frontend/src/components/hc/nodes/HydraulikNodes.jsx).
 """
-import html
 import math
 import re
 from typing import Optional
 
 from app.data.generator_types import generator_type_label
 from app.export.bauteil_infos import bauteil_kennwerte
+from app.export.zeichenziele import SvgZiel, ZeichnungsZiel, svg_zahl as _svg_num
 
 VL_FARBE = "#ef4444"
 RL_FARBE = "#3b82f6"
 SOLE_VL_FARBE = "#eab308"
 SOLE_RL_FARBE = "#16a34a"
+SCHRIFT = "Helvetica, Arial, sans-serif"
 
 # Verteiler-Rahmen (VL-Balken oben, RL-Balken unten, Stränge dazwischen)
 VT_S = 170          # Abstand zwischen den Abgängen
@@ -73,8 +78,9 @@ def _f(x) -> Optional[float]:
         return None
 
 
-def _esc(s) -> str:
-    return html.escape(str(s if s is not None else ""))
+def _txt(s) -> str:
+    """Anzeigetext; None bleibt leer. Das Escapen übernimmt das Zeichenziel."""
+    return str(s if s is not None else "")
 
 
 def _kg_h(m3h) -> str:
@@ -358,7 +364,7 @@ def datenkasten_masse(titel: str, abschnitte: list) -> tuple:
     return (min(DATENBLOCK_MAX_BREITE, breite), hoehe)
 
 
-def zeichne_datenkasten(parts: list, mitte_x: float, oben_y: float,
+def zeichne_datenkasten(ziel, mitte_x: float, oben_y: float,
                         titel: str, abschnitte: list) -> None:
     """Bauteilname und Kennwerte als Datenblock unter dem Bauteil.
 
@@ -373,33 +379,23 @@ def zeichne_datenkasten(parts: list, mitte_x: float, oben_y: float,
     x = mitte_x - breite / 2
     name_x = x + KASTEN_RAND
     wert_x = x + breite - KASTEN_RAND
-    parts.append(
-        f'<rect x="{_svg_num(x)}" y="{_svg_num(oben_y)}" width="{_svg_num(breite)}" '
-        f'height="{_svg_num(hoehe)}" fill="white" fill-opacity="0.82" stroke="none"/>'
-    )
-    parts.append(
-        f'<text x="{_svg_num(mitte_x)}" y="{_svg_num(oben_y + 8.5)}" font-size="8.5" '
-        f'text-anchor="middle" font-weight="700" fill="#0f172a">{_esc(titel)}</text>'
-    )
+    ziel.element("rect", x=_svg_num(x), y=_svg_num(oben_y), width=_svg_num(breite),
+                 height=_svg_num(hoehe), fill="white", fill_opacity="0.82", stroke="none")
+    ziel.element("text", _txt(titel), x=_svg_num(mitte_x), y=_svg_num(oben_y + 8.5), font_size="8.5",
+                 text_anchor="middle", font_weight="700", fill="#0f172a")
     zeile_y = oben_y + KASTEN_KOPF
     for art, name, wert in kasten_zeilen(abschnitte):
         if art == "luft":
             zeile_y += KASTEN_LUFT
             continue
         if art == "titel":
-            parts.append(
-                f'<text x="{_svg_num(name_x)}" y="{_svg_num(zeile_y)}" font-size="8" '
-                f'font-weight="700" fill="#0f172a">{_esc(name)}</text>'
-            )
+            ziel.element("text", _txt(name), x=_svg_num(name_x), y=_svg_num(zeile_y), font_size="8",
+                         font_weight="700", fill="#0f172a")
         else:
-            parts.append(
-                f'<text x="{_svg_num(name_x)}" y="{_svg_num(zeile_y)}" font-size="8" '
-                f'fill="#334155">{_esc(name)}:</text>'
-            )
-            parts.append(
-                f'<text x="{_svg_num(wert_x)}" y="{_svg_num(zeile_y)}" font-size="8" '
-                f'text-anchor="end" fill="#0f172a">{_esc(wert)}</text>'
-            )
+            ziel.element("text", f"{_txt(name)}:", x=_svg_num(name_x), y=_svg_num(zeile_y),
+                         font_size="8", fill="#334155")
+            ziel.element("text", _txt(wert), x=_svg_num(wert_x), y=_svg_num(zeile_y), font_size="8",
+                         text_anchor="end", fill="#0f172a")
         zeile_y += KASTEN_ZEILE
 
 
@@ -459,14 +455,14 @@ def datenblock_anker(node) -> tuple:
             y + h + 10 + (_f(d.get("caption_offset_y")) or 0))
 
 
-def zeichne_datenblock(parts: list, node, results) -> None:
+def zeichne_datenblock(ziel, node, results) -> None:
     """Datenblock unter dem Bauteil — für Einzelteile wie für Gruppen gleich."""
     if (node.get("data") or {}).get("nr") is None:
         return
     if not datenblock_sichtbar(node):
         return
     mitte_x, oben_y = datenblock_anker(node)
-    zeichne_datenkasten(parts, mitte_x, oben_y, caption_titel(node),
+    zeichne_datenkasten(ziel, mitte_x, oben_y, caption_titel(node),
                         bauteil_kennwerte(node, results))
 
 
@@ -512,60 +508,39 @@ def bauteil_transform(d: dict, cx: float, cy: float) -> str:
     return " ".join(teile)
 
 
-_TEXT_OHNE_TRANSFORM = re.compile(
-    r'<text\b(?![^>]*\btransform=)([^>]*?)\bx="(-?\d+(?:\.\d+)?)"([^>]*)>',
-)
-
-
-def _text_gegen_spiegeln(fragment: str) -> str:
-    """Text innerhalb eines gespiegelten Symbols seitenrichtig halten.
-
-    Die Position wird mit dem Symbol gespiegelt, die Glyphe selbst erhält um
-    ihre x-Ankerachse eine zweite Spiegelung. Zwei Spiegelungen heben sich für
-    die Schrift auf; die Geometrie bleibt unverändert gespiegelt.
-    """
-    def ersetzen(treffer):
-        x = float(treffer.group(2))
-        gegen = _svg_num(2 * x)
-        return (f'<text transform="translate({gegen},0) scale(-1,1)"'
-                f'{treffer.group(1)}x="{treffer.group(2)}"{treffer.group(3)}>')
-
-    return _TEXT_OHNE_TRANSFORM.sub(ersetzen, fragment)
-
-
 # ── Bauteil-Zeichner (liefern SVG-Fragmente, Koordinaten absolut) ───────────
-def _nr_badge(parts, x, y, nr):
+def _nr_badge(ziel, x, y, nr):
     if nr is None:
         return
-    parts.append(f'<rect x="{x - 11}" y="{y - 8}" width="22" height="16" rx="8" fill="white" stroke="#dc2626" stroke-width="1.4"/>')
-    parts.append(f'<text x="{x}" y="{y + 3.5}" text-anchor="middle" font-size="9" font-weight="700" fill="#dc2626">{_esc(nr)}</text>')
+    ziel.element("rect", x=x - 11, y=y - 8, width="22", height="16", rx="8", fill="white", stroke="#dc2626", stroke_width="1.4")
+    ziel.element("text", _txt(nr), x=x, y=y + 3.5, text_anchor="middle", font_size="9", font_weight="700", fill="#dc2626")
 
 
-def _absperr(parts, cx, cy, farbe="#1e293b"):
+def _absperr(ziel, cx, cy, farbe="#1e293b"):
     """Absperrventil / Kugelhahn: weiss gefüllte Dreiecke + Kreis am Treffpunkt
     (Vorlage «Kugelhahn.svg», Dominic-Feedback — nicht mehr schwarz gefüllt)."""
-    parts.append(f'<polygon points="{cx - 6.3},{cy - 10.1} {cx + 6.3},{cy - 10.1} {cx},{cy}" fill="white" stroke="{farbe}" stroke-width="1.2"/>')
-    parts.append(f'<polygon points="{cx - 6.3},{cy + 10.1} {cx + 6.3},{cy + 10.1} {cx},{cy}" fill="white" stroke="{farbe}" stroke-width="1.2"/>')
-    parts.append(f'<circle cx="{cx}" cy="{cy}" r="1.9" fill="{farbe}"/>')
+    ziel.element("polygon", points=f"{cx - 6.3},{cy - 10.1} {cx + 6.3},{cy - 10.1} {cx},{cy}", fill="white", stroke=farbe, stroke_width="1.2")
+    ziel.element("polygon", points=f"{cx - 6.3},{cy + 10.1} {cx + 6.3},{cy + 10.1} {cx},{cy}", fill="white", stroke=farbe, stroke_width="1.2")
+    ziel.element("circle", cx=cx, cy=cy, r="1.9", fill=farbe)
 
 
-def _pumpe(parts, cx, cy, r=15, nach_unten=False):
+def _pumpe(ziel, cx, cy, r=15, nach_unten=False):
     """Kreis + Durchmesserlinie + gefülltes Dreieck (Vorlage «pumpe_genau.svg»).
     Ohne Motor-Kasten (Dominic-Feedback: brauchen wir nicht)."""
-    parts.append(f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="white" stroke="#1e293b" stroke-width="2.2"/>')
-    parts.append(f'<line x1="{cx - r}" y1="{cy}" x2="{cx + r}" y2="{cy}" stroke="#1e293b" stroke-width="1.8"/>')
+    ziel.element("circle", cx=cx, cy=cy, r=r, fill="white", stroke="#1e293b", stroke_width="2.2")
+    ziel.element("line", x1=cx - r, y1=cy, x2=cx + r, y2=cy, stroke="#1e293b", stroke_width="1.8")
     if nach_unten:  # Dreieck zeigt in Flussrichtung nach unten (zum Verbraucher)
-        parts.append(f'<polygon points="{cx - r},{cy} {cx + r},{cy} {cx},{cy + r}" fill="#1e293b"/>')
+        ziel.element("polygon", points=f"{cx - r},{cy} {cx + r},{cy} {cx},{cy + r}", fill="#1e293b")
     else:
-        parts.append(f'<polygon points="{cx - r},{cy} {cx + r},{cy} {cx},{cy - r}" fill="#1e293b"/>')
+        ziel.element("polygon", points=f"{cx - r},{cy} {cx + r},{cy} {cx},{cy - r}", fill="#1e293b")
 
 
-def _thermometer(parts, cx, cy):
-    _sym(parts, cx - 8.1, cy - 8.6, 26, "temperatur", SYM_INNER["temperatur"])
+def _thermometer(ziel, cx, cy):
+    _sym(ziel, cx - 8.1, cy - 8.6, 26, "temperatur", SYM_INNER["temperatur"])
 
 
-def _waermepumpen_symbol(parts, code):
-    parts.extend([
+def _waermepumpen_symbol(ziel, code):
+    ziel.fragmente([
         '<g fill="none" stroke="#111827" stroke-width="2.5" stroke-linejoin="round">',
         '<rect x="8" y="8" width="184" height="204" fill="#e5e7eb" stroke-width="3"/>',
         '<rect x="20" y="20" width="60" height="180" fill="#f3f4f6"/><line x1="20" y1="20" x2="80" y2="200"/>',
@@ -578,7 +553,7 @@ def _waermepumpen_symbol(parts, code):
     ])
 
 
-def _zeichne_erzeuger(parts, node):
+def _zeichne_erzeuger(ziel, node):
     """Typabhängiges Erzeugersymbol, geometrisch identisch zum Editor."""
     d = node.get("data") or {}
     x = (node.get("position") or {}).get("x", 0)
@@ -586,12 +561,12 @@ def _zeichne_erzeuger(parts, node):
     w, _ = node_groesse(node)
     s = w / 200
     gt = str(d.get("generator_type") or "")
-    parts.append(f'<g transform="translate({x},{y}) scale({s:.4f})">')
+    ziel.gruppe_auf(transform=f"translate({x},{y}) scale({s:.4f})")
 
     if gt == "lwwp":
         bauart = d.get("lwwp_bauart") or "aussenaufstellung"
         if bauart == "split":
-            parts.extend([
+            ziel.fragmente([
                 '<rect x="8" y="30" width="78" height="142" fill="#e5e7eb" stroke="#111827" stroke-width="3"/>',
                 '<rect x="114" y="30" width="78" height="142" fill="#e5e7eb" stroke="#111827" stroke-width="3"/>',
                 '<circle cx="47" cy="77" r="23" fill="white" stroke="#111827" stroke-width="2"/>',
@@ -603,9 +578,9 @@ def _zeichne_erzeuger(parts, node):
                 '<text x="100" y="202" text-anchor="middle" font-family="Arial" font-size="14" font-weight="700">L/W-WP SPLIT</text>',
             ])
         else:
-            _waermepumpen_symbol(parts, "L/W-WP")
+            _waermepumpen_symbol(ziel, "L/W-WP")
     elif gt == "fernwaerme":
-        parts.extend([
+        ziel.fragmente([
             '<rect x="12" y="12" width="176" height="196" rx="4" fill="#f8fafc" stroke="#111827" stroke-width="3"/>',
             '<path d="M100 42 L155 103 L100 164 L45 103 Z" fill="white" stroke="#111827" stroke-width="3"/>',
             '<path d="M100 42 V164" stroke="#111827" stroke-width="2.5"/>',
@@ -614,26 +589,28 @@ def _zeichne_erzeuger(parts, node):
             '<text x="100" y="191" text-anchor="middle" font-family="Arial" font-size="14" font-weight="700" fill="#111827">FERNWÄRME</text>',
         ])
     elif gt == "holz":
-        parts.extend([
+        ziel.fragmente([
             '<rect x="8" y="8" width="184" height="204" fill="white" stroke="#111827" stroke-width="3"/>',
             '<rect x="84" y="164" width="32" height="32" fill="#111827"/>',
         ])
     elif gt in {"gas", "oel"}:
         fuel = {"gas": "GAS", "oel": "ÖL"}[gt]
-        parts.extend([
+        ziel.fragmente([
             '<rect x="22" y="14" width="156" height="192" rx="8" fill="#fff7ed" stroke="#111827" stroke-width="3"/>',
             '<rect x="39" y="32" width="122" height="34" rx="3" fill="#f8fafc" stroke="#111827" stroke-width="2"/>',
-            f'<text x="100" y="55" text-anchor="middle" font-family="Arial" font-size="16" font-weight="700" fill="#111827">{fuel}</text>',
+        ])
+        ziel.element("text", fuel, x="100", y="55", text_anchor="middle", font_family="Arial", font_size="16", font_weight="700", fill="#111827")
+        ziel.fragmente([
             '<path d="M101 177 C67 164 65 134 89 111 C88 130 101 130 107 103 C135 127 143 158 119 177 C114 160 101 151 92 164 C90 170 94 175 101 177Z" fill="#fb923c" stroke="#9a3412" stroke-width="2.5"/>',
         ])
     elif gt == "elektro":
-        parts.extend([
+        ziel.fragmente([
             '<rect x="22" y="14" width="156" height="192" rx="8" fill="#fefce8" stroke="#111827" stroke-width="3"/>',
             '<path d="M111 37 L67 118 H99 L87 183 L139 91 H106 Z" fill="#facc15" stroke="#854d0e" stroke-width="3" stroke-linejoin="round"/>',
             '<text x="100" y="196" text-anchor="middle" font-family="Arial" font-size="14" font-weight="700" fill="#111827">ELEKTRO</text>',
         ])
     elif gt == "hybrid":
-        parts.extend([
+        ziel.fragmente([
             '<rect x="10" y="12" width="180" height="196" rx="6" fill="#f8fafc" stroke="#111827" stroke-width="3"/>',
             '<line x1="100" y1="27" x2="100" y2="180" stroke="#64748b" stroke-width="2" stroke-dasharray="7 5"/>',
             '<circle cx="57" cy="87" r="30" fill="#e0f2fe" stroke="#111827" stroke-width="2.5"/>',
@@ -643,16 +620,16 @@ def _zeichne_erzeuger(parts, node):
         ])
     elif gt in {"", "ews_wp", "wasser_wp", "co2_wp"}:
         code = {"ews_wp": "S/W-WP", "wasser_wp": "W/W-WP", "co2_wp": "CO₂-WP"}.get(gt, "WP")
-        _waermepumpen_symbol(parts, code)
+        _waermepumpen_symbol(ziel, code)
     else:
-        label = _esc(generator_type_label(gt) or "ERZEUGER")
-        parts.extend([
+        label = _txt(generator_type_label(gt) or "ERZEUGER")
+        ziel.fragmente([
             '<rect x="15" y="15" width="170" height="190" rx="7" fill="#f8fafc" stroke="#111827" stroke-width="3"/>',
             '<circle cx="100" cy="91" r="41" fill="white" stroke="#64748b" stroke-width="2.5"/>',
             '<text x="100" y="101" text-anchor="middle" font-family="Arial" font-size="27" font-weight="700" fill="#334155">WE</text>',
-            f'<text x="100" y="181" text-anchor="middle" font-family="Arial" font-size="11" font-weight="700" fill="#64748b">{label}</text>',
         ])
-    parts.append("</g>")
+        ziel.element("text", label, x="100", y="181", text_anchor="middle", font_family="Arial", font_size="11", font_weight="700", fill="#64748b")
+    ziel.gruppe_zu()
 
 
 # ── SVG-Bauteil-Symbole 1:1 aus Dominics Vorlagen (in Node-Box skaliert) ────
@@ -668,23 +645,23 @@ SYM_VIEWBOX = {
 }
 
 
-def _sym(parts, x, y, w, typ, inner):
+def _sym(ziel, x, y, w, typ, inner):
     """Bettet ein Vorlage-SVG (Original-Koordinaten) in die Node-Box ein."""
     minx, miny, vbw = SYM_VIEWBOX[typ]
     s = w / vbw
-    parts.append(f'<g transform="translate({x - minx * s:.3f},{y - miny * s:.3f}) scale({s:.4f})">')
-    parts.extend(inner)
-    parts.append("</g>")
+    ziel.gruppe_auf(transform=f"translate({x - minx * s:.3f},{y - miny * s:.3f}) scale({s:.4f})")
+    ziel.fragmente(inner)
+    ziel.gruppe_zu()
 
 
-def _sym_wh(parts, x, y, w, h, typ, inner):
+def _sym_wh(ziel, x, y, w, h, typ, inner):
     """Bettet kompakte Ventilsymbole mit derselben Breite/Höhe wie React ein."""
     minx, miny, vbw = SYM_VIEWBOX[typ]
     vbh = 100
     sx, sy = w / vbw, h / vbh
-    parts.append(f'<g transform="translate({x - minx * sx:.3f},{y - miny * sy:.3f}) scale({sx:.4f},{sy:.4f})">')
-    parts.extend(inner)
-    parts.append("</g>")
+    ziel.gruppe_auf(transform=f"translate({x - minx * sx:.3f},{y - miny * sy:.3f}) scale({sx:.4f},{sy:.4f})")
+    ziel.fragmente(inner)
+    ziel.gruppe_zu()
 
 
 SYM_INNER = {
@@ -800,7 +777,7 @@ SYM_INNER = {
 }
 
 
-def zeichne_verteiler(parts, node, results):
+def zeichne_verteiler(ziel, node, results):
     x = (node.get("position") or {}).get("x", 0)
     y = (node.get("position") or {}).get("y", 0)
     n = vt_abgaenge(node)
@@ -810,24 +787,21 @@ def zeichne_verteiler(parts, node, results):
     fmt = lambda v, d=1: ("—" if v is None else f"{v:.{d}f}")
 
     # VL-Balken oben / RL-Balken unten
-    parts.append(f'<rect x="{x}" y="{y}" width="{w}" height="{VT_BAR}" rx="4" fill="{VL_FARBE}"/>')
-    parts.append(f'<rect x="{x}" y="{y + vh - VT_BAR}" width="{w}" height="{VT_BAR}" rx="4" fill="{RL_FARBE}"/>')
-    parts.append(f'<text x="{x + 8}" y="{y + 17}" font-size="11" font-weight="700" fill="white" font-family="monospace">'
-                 f'VL {fmt(c.get("vl_vt"))} °C · Σ {fmt(c.get("q_total"), 2)} kW · {fmt(c.get("m_prim_total"), 3)} m³/h</text>')
-    parts.append(f'<text x="{x + 8}" y="{y + vh - 9}" font-size="11" font-weight="700" fill="white" font-family="monospace">'
-                 f'RL {fmt(c.get("rl_misch"))} °C · {fmt(c.get("m_prim_total"), 3)} m³/h</text>')
+    ziel.element("rect", x=x, y=y, width=w, height=VT_BAR, rx="4", fill=VL_FARBE)
+    ziel.element("rect", x=x, y=y + vh - VT_BAR, width=w, height=VT_BAR, rx="4", fill=RL_FARBE)
+    ziel.element("text", f'VL {fmt(c.get("vl_vt"))} °C · Σ {fmt(c.get("q_total"), 2)} kW · {fmt(c.get("m_prim_total"), 3)} m³/h', x=x + 8, y=y + 17, font_size="11", font_weight="700", fill="white", font_family="monospace")
+    ziel.element("text", f'RL {fmt(c.get("rl_misch"))} °C · {fmt(c.get("m_prim_total"), 3)} m³/h', x=x + 8, y=y + vh - 9, font_size="11", font_weight="700", fill="white", font_family="monospace")
     if c.get("dp_max_ast") is not None:
-        parts.append(f'<text x="{x + w - 8}" y="{y + vh - 9}" text-anchor="end" font-size="10" font-weight="700" fill="white" font-family="monospace">'
-                     f'Δp Ast {_esc(c.get("dp_max_ast_nr"))}: {fmt(c.get("dp_max_ast"))} kPa</text>')
+        ziel.element("text", f'Δp Ast {_txt(c.get("dp_max_ast_nr"))}: {fmt(c.get("dp_max_ast"))} kPa', x=x + w - 8, y=y + vh - 9, text_anchor="end", font_size="10", font_weight="700", fill="white", font_family="monospace")
     # Stutzen-Nummern
     for i in range(1, n + 1):
         sx = x + vt_stutzen_x(i)
-        parts.append(f'<text x="{sx + 6}" y="{y + 17}" font-size="9" font-weight="700" fill="white" font-family="monospace">{i}</text>')
-    _nr_badge(parts, x + w - 14, y - 2, (node.get("data") or {}).get("nr"))
-    zeichne_datenblock(parts, node, results)
+        ziel.element("text", i, x=sx + 6, y=y + 17, font_size="9", font_weight="700", fill="white", font_family="monospace")
+    _nr_badge(ziel, x + w - 14, y - 2, (node.get("data") or {}).get("nr"))
+    zeichne_datenblock(ziel, node, results)
 
 
-def zeichne_gruppe(parts, node, results):
+def zeichne_gruppe(ziel, node, results):
     x = (node.get("position") or {}).get("x", 0)
     y = (node.get("position") or {}).get("y", 0)
     d = node.get("data") or {}
@@ -843,61 +817,60 @@ def zeichne_gruppe(parts, node, results):
     hat_ventil = d.get("hat_ventil") is not False
 
     # Strangleitung: oben VL (primär), unten RL
-    parts.append(f'<line x1="{cx}" y1="{y}" x2="{cx}" y2="{y + _gy(145)}" stroke="{VL_FARBE}" stroke-width="2"/>')
-    parts.append(f'<line x1="{cx}" y1="{y + _gy(255)}" x2="{cx}" y2="{y + GR_H}" stroke="{RL_FARBE}" stroke-width="2"/>')
+    ziel.element("line", x1=cx, y1=y, x2=cx, y2=y + _gy(145), stroke=VL_FARBE, stroke_width="2")
+    ziel.element("line", x1=cx, y1=y + _gy(255), x2=cx, y2=y + GR_H, stroke=RL_FARBE, stroke_width="2")
     # Primär-Fluss oben
     if c.get("m_prim") is not None:
-        parts.append(f'<text x="{cx + 8}" y="{y + 12}" font-size="9" fill="#1e293b" font-family="monospace">m\': {_kg_h(c.get("m_prim"))} kg/h</text>')
+        ziel.element("text", f'm\': {_kg_h(c.get("m_prim"))} kg/h', x=cx + 8, y=y + 12, font_size="9", fill="#1e293b", font_family="monospace")
     # Anschluss-Marker für separate Gruppe — koppelt über den Buchstaben (PHYSIK §9)
     if d.get("hat_anschluss"):
-        buchstabe = _esc(d.get("anschluss_buchstabe") or "A")
+        buchstabe = _txt(d.get("anschluss_buchstabe") or "A")
         my = y + _gy(200)  # Mitte des Markers; die Glyphe selbst bleibt gleich gross
-        parts.append(f'<line x1="{x + 104}" y1="{my - 8}" x2="{x + 132}" y2="{my - 8}" stroke="{VL_FARBE}" stroke-width="2.2"/>')
-        parts.append(f'<polygon points="{x + 132},{my - 12} {x + 139},{my - 8} {x + 132},{my - 4}" fill="{VL_FARBE}"/>')
-        parts.append(f'<line x1="{x + 132}" y1="{my + 8}" x2="{x + 104}" y2="{my + 8}" stroke="{RL_FARBE}" stroke-width="2.2"/>')
-        parts.append(f'<polygon points="{x + 104},{my + 4} {x + 97},{my + 8} {x + 104},{my + 12}" fill="{RL_FARBE}"/>')
-        parts.append(f'<circle cx="{x + 122}" cy="{my}" r="11" fill="white" stroke="#1e293b" stroke-width="1.6"/>')
-        parts.append(f'<text x="{x + 122}" y="{my + 4}" text-anchor="middle" font-size="12" font-weight="700" fill="#1e293b">{buchstabe}</text>')
-    _absperr(parts, cx, y + _gy(30))
+        ziel.element("line", x1=x + 104, y1=my - 8, x2=x + 132, y2=my - 8, stroke=VL_FARBE, stroke_width="2.2")
+        ziel.element("polygon", points=f"{x + 132},{my - 12} {x + 139},{my - 8} {x + 132},{my - 4}", fill=VL_FARBE)
+        ziel.element("line", x1=x + 132, y1=my + 8, x2=x + 104, y2=my + 8, stroke=RL_FARBE, stroke_width="2.2")
+        ziel.element("polygon", points=f"{x + 104},{my + 4} {x + 97},{my + 8} {x + 104},{my + 12}", fill=RL_FARBE)
+        ziel.element("circle", cx=x + 122, cy=my, r="11", fill="white", stroke="#1e293b", stroke_width="1.6")
+        ziel.element("text", buchstabe, x=x + 122, y=my + 4, text_anchor="middle", font_size="12", font_weight="700", fill="#1e293b")
+    _absperr(ziel, cx, y + _gy(30))
     if hat_pumpe:
-        _pumpe(parts, cx, y + _gy(64), nach_unten=True)  # Dreieck zeigt zum roten Rechteck
-    _thermometer(parts, cx, y + _gy(98))
+        _pumpe(ziel, cx, y + _gy(64), nach_unten=True)  # Dreieck zeigt zum roten Rechteck
+    _thermometer(ziel, cx, y + _gy(98))
     # Wärmezähler (SIA 410): Rechteck mit Diagonale, halb schwarz — plus je ein
     # Fühler im VL und RL, ausserhalb der Bypass-Schleife
     if d.get("hat_wz"):
         wy = y + _gy(110)
-        parts.append(f'<rect x="{cx - 8}" y="{wy - 6}" width="16" height="12" fill="white" stroke="#1e293b" stroke-width="1.6"/>')
-        parts.append(f'<polygon points="{cx - 8},{wy + 6} {cx + 8},{wy + 6} {cx + 8},{wy - 6}" fill="#1e293b"/>')
+        ziel.element("rect", x=cx - 8, y=wy - 6, width="16", height="12", fill="white", stroke="#1e293b", stroke_width="1.6")
+        ziel.element("polygon", points=f"{cx - 8},{wy + 6} {cx + 8},{wy + 6} {cx + 8},{wy - 6}", fill="#1e293b")
         for fy in (y + _gy(16), y + _gy(352)):  # VL-Fühler oben, RL-Fühler unten
-            parts.append(f'<line x1="{cx}" y1="{fy}" x2="{cx + 9}" y2="{fy}" stroke="#1e293b" stroke-width="1.4"/>')
-            parts.append(f'<circle cx="{cx + 12.5}" cy="{fy}" r="3.5" fill="white" stroke="#1e293b" stroke-width="1.4"/>')
+            ziel.element("line", x1=cx, y1=fy, x2=cx + 9, y2=fy, stroke="#1e293b", stroke_width="1.4")
+            ziel.element("circle", cx=cx + 12.5, cy=fy, r="3.5", fill="white", stroke="#1e293b", stroke_width="1.4")
     # Rotes Rechteck mit gedrehtem Text
-    parts.append(f'<rect x="{x + 55}" y="{y + _gy(145)}" width="40" height="{_gy(255) - _gy(145)}" fill="white" stroke="{VL_FARBE}" stroke-width="1.8"/>')
+    ziel.element("rect", x=x + 55, y=y + _gy(145), width="40", height=_gy(255) - _gy(145), fill="white", stroke=VL_FARBE, stroke_width="1.8")
     q_anzeige = c.get("q_kw") if c.get("q_kw") is not None else d.get("q_kw")
     zeilen = [
         d.get("label") or "Verbrauchergruppe",
-        f'{_esc(q_anzeige if q_anzeige is not None else "—")} kW · VL/RL {_esc(d.get("vl_temp") or "—")}/{_esc(d.get("rl_temp") or "—")} °C',
+        f'{_txt(q_anzeige if q_anzeige is not None else "—")} kW · VL/RL {_txt(d.get("vl_temp") or "—")}/{_txt(d.get("rl_temp") or "—")} °C',
         f'm\': {_kg_h(c.get("m_sek"))} kg/h',
     ]
     for i, z in enumerate(zeilen):
-        parts.append(f'<text transform="translate({x + 63 + i * 12} {y + _gy(202)}) rotate(-90)" text-anchor="middle" '
-                     f'font-size="9" font-weight="{700 if i == 0 else 400}" fill="{VL_FARBE}" font-family="monospace">{_esc(z)}</text>')
+        ziel.element("text", _txt(z), transform=f"translate({x + 63 + i * 12} {y + _gy(202)}) rotate(-90)", text_anchor="middle", font_size="9", font_weight=700 if i == 0 else 400, fill=VL_FARBE, font_family="monospace")
     # STAD + Thermometer + Mischventil + Absperr
-    _absperr(parts, cx, y + _gy(303), "#1e293b")
-    parts.append(f'<line x1="{cx + 9}" y1="{y + _gy(303) - 9}" x2="{cx + 20}" y2="{y + _gy(303) - 15}" stroke="#1e293b" stroke-width="1.6"/>')  # STAD-Griff
-    _thermometer(parts, cx, y + _gy(320))
+    _absperr(ziel, cx, y + _gy(303), "#1e293b")
+    ziel.element("line", x1=cx + 9, y1=y + _gy(303) - 9, x2=cx + 20, y2=y + _gy(303) - 15, stroke="#1e293b", stroke_width="1.6")  # STAD-Griff
+    _thermometer(ziel, cx, y + _gy(320))
     # Ventil unten: 2-Weg (Einspritz/Drossel) oder 3-Weg (Beimisch)
     mv_y = y + _gy(338)
     if hat_ventil:
         if schaltung == "beimisch":
-            parts.append(f'<g transform="translate({2 * cx},0) scale(-1,1)">')
-            _sym_wh(parts, cx - 19, mv_y - 14, 38, 28, "valve3", SYM_INNER["valve3"])
-            parts.append('</g>')
+            ziel.gruppe_auf(transform=f"translate({2 * cx},0) scale(-1,1)")
+            _sym_wh(ziel, cx - 19, mv_y - 14, 38, 28, "valve3", SYM_INNER["valve3"])
+            ziel.gruppe_zu()
         else:
-            _sym_wh(parts, cx - 17.5, mv_y - 14, 35, 28, "valve2", SYM_INNER["valve2"])
+            _sym_wh(ziel, cx - 17.5, mv_y - 14, 35, 28, "valve2", SYM_INNER["valve2"])
         if c.get("ventil"):
-            parts.append(f'<text x="{cx + 30}" y="{mv_y + 3.5}" font-size="8" fill="#1e293b" font-family="monospace">kvs {c["ventil"].get("kvs_eff")}</text>')
-    _absperr(parts, cx, y + _gy(368))
+            ziel.element("text", f'kvs {c["ventil"].get("kvs_eff")}', x=cx + 30, y=mv_y + 3.5, font_size="8", fill="#1e293b", font_family="monospace")
+    _absperr(ziel, cx, y + _gy(368))
     # Bypass gehört zur Schaltung (immer sichtbar, ausser bei Drossel):
     # Einspritz → mündet ÜBER dem Ventil in die Strangleitung,
     # Beimisch → mündet direkt in den dritten Anschluss des 3WV.
@@ -905,20 +878,19 @@ def zeichne_gruppe(parts, node, results):
         bx = x + 22
         muendung_y = mv_y - 18 if schaltung == "einspritz" else mv_y
         muendung_x = cx if schaltung == "einspritz" else cx - 19
-        parts.append(f'<path d="M {cx} {y + _gy(44)} H {bx} V {muendung_y} H {muendung_x}" fill="none" stroke="{RL_FARBE}" stroke-width="1.8" stroke-dasharray="6,4"/>')
-        parts.append(f'<circle cx="{cx}" cy="{y + _gy(44)}" r="3.5" fill="{RL_FARBE}"/>')
+        ziel.element("path", d=f"M {cx} {y + _gy(44)} H {bx} V {muendung_y} H {muendung_x}", fill="none", stroke=RL_FARBE, stroke_width="1.8", stroke_dasharray="6,4")
+        ziel.element("circle", cx=cx, cy=y + _gy(44), r="3.5", fill=RL_FARBE)
         if schaltung == "einspritz":
-            parts.append(f'<circle cx="{cx}" cy="{muendung_y}" r="3.5" fill="{RL_FARBE}"/>')
+            ziel.element("circle", cx=cx, cy=muendung_y, r="3.5", fill=RL_FARBE)
         if c.get("m_bypass"):
-            parts.append(f'<text x="{bx - 4}" y="{y + _gy(210)}" transform="rotate(-90 {bx - 4} {y + _gy(210)})" text-anchor="middle" '
-                         f'font-size="8" fill="{RL_FARBE}" font-family="monospace">Bypass {c.get("m_bypass", 0):.3f} m³/h</text>')
-    _nr_badge(parts, x + GR_W - 14, y + _gy(64), d.get("nr"))
+            ziel.element("text", f'Bypass {c.get("m_bypass", 0):.3f} m³/h', x=bx - 4, y=y + _gy(210), transform=f"rotate(-90 {bx - 4} {y + _gy(210)})", text_anchor="middle", font_size="8", fill=RL_FARBE, font_family="monospace")
+    _nr_badge(ziel, x + GR_W - 14, y + _gy(64), d.get("nr"))
     # Eine Gruppe ist kein Einzelbauteil: ihr Block führt Pumpe, Regelventil
     # und Wärmezähler in eigenen Abschnitten (Vorlage Dominic 2026-08-05).
-    zeichne_datenblock(parts, node, results)
+    zeichne_datenblock(ziel, node, results)
 
 
-def zeichne_lufterhitzer_gruppe(parts, node, results):
+def zeichne_lufterhitzer_gruppe(ziel, node, results):
     """Drossel-, Einspritz- oder Beimischstrang eines Lufterhitzers."""
     d = node.get("data") or {}
     x = (node.get("position") or {}).get("x", 0)
@@ -934,109 +906,101 @@ def zeichne_lufterhitzer_gruppe(parts, node, results):
 
     # Dünne Signal- und Bypasslinien zuerst: Vordergrundelemente decken sie ab.
     if d.get("hat_wz"):
-        parts.append(f'<path d="M {cx + 12} {y + 54} H {x + 116} V {y + wz_y + 21} H {cx + 23}" '
-                     'fill="none" stroke="#f08c2e" stroke-width="0.85" '
-                     'stroke-dasharray="4 2 1 2" stroke-linecap="round"/>')
+        ziel.element("path", d=f"M {cx + 12} {y + 54} H {x + 116} V {y + wz_y + 21} H {cx + 23}", fill="none", stroke="#f08c2e", stroke_width="0.85", stroke_dasharray="4 2 1 2", stroke_linecap="round")
     if schaltung != "drossel":
         start_x = cx - 17 if schaltung == "beimisch" else cx
-        parts.append(f'<path d="M {start_x} {y + bypass_oben} H {x + 24} V {y + bypass_unten} H {cx}" '
-                     f'fill="none" stroke="{RL_FARBE}" stroke-width="1.2" stroke-dasharray="6,4"/>')
-        parts.append(f'<circle cx="{start_x}" cy="{y + bypass_oben}" r="2.8" fill="{RL_FARBE}"/>')
-        parts.append(f'<circle cx="{cx}" cy="{y + bypass_unten}" r="2.8" fill="{RL_FARBE}"/>')
+        ziel.element("path", d=f"M {start_x} {y + bypass_oben} H {x + 24} V {y + bypass_unten} H {cx}", fill="none", stroke=RL_FARBE, stroke_width="1.2", stroke_dasharray="6,4")
+        ziel.element("circle", cx=start_x, cy=y + bypass_oben, r="2.8", fill=RL_FARBE)
+        ziel.element("circle", cx=cx, cy=y + bypass_unten, r="2.8", fill=RL_FARBE)
         if res.get("m_bypass"):
             my = y + (bypass_oben + bypass_unten) / 2
-            parts.append(f'<text x="{x + 18}" y="{my}" transform="rotate(-90 {x + 18} {my})" '
-                         f'text-anchor="middle" font-size="7.5" fill="{RL_FARBE}" font-family="monospace">'
-                         f'Bypass {res["m_bypass"]:.3f} m³/h</text>')
+            ziel.element("text", f'Bypass {res["m_bypass"]:.3f} m³/h', x=x + 18, y=my, transform=f"rotate(-90 {x + 18} {my})", text_anchor="middle", font_size="7.5", fill=RL_FARBE, font_family="monospace")
 
     # Dünne hydraulische Strangleitung.
-    parts.append(f'<line x1="{cx}" y1="{y}" x2="{cx}" y2="{y + LH_REG_OBEN}" '
-                 f'stroke="#ef4444" stroke-width="1.8"/>')
-    parts.append(f'<line x1="{cx}" y1="{y + LH_REG_UNTEN}" x2="{cx}" y2="{y + LH_H}" '
-                 f'stroke="#3b82f6" stroke-width="1.8" stroke-dasharray="8,5"/>')
+    ziel.element("line", x1=cx, y1=y, x2=cx, y2=y + LH_REG_OBEN, stroke="#ef4444", stroke_width="1.8")
+    ziel.element("line", x1=cx, y1=y + LH_REG_UNTEN, x2=cx, y2=y + LH_H, stroke="#3b82f6", stroke_width="1.8", stroke_dasharray="8,5")
 
     # Anlagennummer und Kennwerte — rechts oben, wo der Strang frei ist.
     zeilen = [t for t in (
-        _esc(d.get("anlage_nr") or "") or None,
-        f'{_esc(d.get("q_kw"))} kW' if d.get("q_kw") not in (None, "") else None,
+        _txt(d.get("anlage_nr") or "") or None,
+        f'{_txt(d.get("q_kw"))} kW' if d.get("q_kw") not in (None, "") else None,
         f'V\' {res["m_sek"]:.3f} m³/h' if res.get("m_sek") is not None else None,
         f'kvs {res["ventil"]["kvs_eff"]}' if (res.get("ventil") or {}).get("kvs_eff") is not None else None,
     ) if t]
     for i, text in enumerate(zeilen):
-        parts.append(f'<text x="{x + 98}" y="{y + 12 + i * 12}" font-size="8.5" '
-                     f'fill="#1e293b" font-family="monospace">{text}</text>')
+        ziel.element("text", text, x=x + 98, y=y + 12 + i * 12, font_size="8.5", fill="#1e293b", font_family="monospace")
 
     def thermometer(cy):
-        _sym(parts, cx - 8.1, y + cy - 8.6, 26, "temperatur", SYM_INNER["temperatur"])
+        _sym(ziel, cx - 8.1, y + cy - 8.6, 26, "temperatur", SYM_INNER["temperatur"])
 
     def entleerung(cy):
-        _sym(parts, cx - 1.2, y + cy - 4.8, 16, "entleerung", SYM_INNER["entleerung"])
+        _sym(ziel, cx - 1.2, y + cy - 4.8, 16, "entleerung", SYM_INNER["entleerung"])
 
     def entleerhahn(cy):
-        _sym(parts, cx - 1.2, y + cy - 4.5, 19, "entleerhahn", SYM_INNER["entleerhahn"])
+        _sym(ziel, cx - 1.2, y + cy - 4.5, 19, "entleerhahn", SYM_INNER["entleerhahn"])
 
     def ventil2(cy):
-        parts.append(f'<g transform="translate({2 * cx},0) scale(-1,1)">')
-        _sym_wh(parts, cx - 17.5, y + cy - 14, 35, 28, "valve2", SYM_INNER["valve2"])
-        parts.append('</g>')
+        ziel.gruppe_auf(transform=f"translate({2 * cx},0) scale(-1,1)")
+        _sym_wh(ziel, cx - 17.5, y + cy - 14, 35, 28, "valve2", SYM_INNER["valve2"])
+        ziel.gruppe_zu()
 
     def ventil3(cy):
-        parts.append(f'<g transform="translate({2 * cx},0) scale(-1,1)">')
-        _sym_wh(parts, cx - 19, y + cy - 14, 38, 28, "valve3", SYM_INNER["valve3"])
-        parts.append('</g>')
+        ziel.gruppe_auf(transform=f"translate({2 * cx},0) scale(-1,1)")
+        _sym_wh(ziel, cx - 19, y + cy - 14, 38, 28, "valve3", SYM_INNER["valve3"])
+        ziel.gruppe_zu()
 
-    _sym(parts, cx - 8, y + 14, 16, "absperrklappe", SYM_INNER["absperrklappe"])
+    _sym(ziel, cx - 8, y + 14, 16, "absperrklappe", SYM_INNER["absperrklappe"])
     if schaltung == "drossel":
         entleerhahn(58)
         ventil2(92)
         thermometer(145)
-        _absperr(parts, cx, y + 184)
+        _absperr(ziel, cx, y + 184)
     elif schaltung == "einspritz":
-        _pumpe(parts, cx, y + 112, r=17, nach_unten=True)
+        _pumpe(ziel, cx, y + 112, r=17, nach_unten=True)
         thermometer(157)
-        _absperr(parts, cx, y + 184)
+        _absperr(ziel, cx, y + 184)
     else:
         ventil3(72)
-        _pumpe(parts, cx, y + 116, r=17, nach_unten=True)
+        _pumpe(ziel, cx, y + 116, r=17, nach_unten=True)
         thermometer(154)
-        _absperr(parts, cx, y + 184)
+        _absperr(ziel, cx, y + 184)
 
-    _sym(parts, x + LH_REG_X, y + LH_REG_OBEN, LH_REG_W, "lufterhitzer",
+    _sym(ziel, x + LH_REG_X, y + LH_REG_OBEN, LH_REG_W, "lufterhitzer",
          SYM_INNER["lufterhitzer"])
 
     # Direkt nach dem Register: Absperrung, kleiner MSR-Fühler, Thermometer.
-    _absperr(parts, cx, y + 292)
-    parts.append(f'<g stroke="#f08c2e" stroke-width="1" stroke-linecap="round" fill="none">'
-                 f'<line x1="{cx - 5}" y1="{y + 318}" x2="{cx + 10}" y2="{y + 318}"/>'
-                 f'<circle cx="{cx + 14}" cy="{y + 318}" r="4" fill="white"/></g>')
-    parts.append(f'<text x="{cx + 14}" y="{y + 320.5}" text-anchor="middle" font-size="6" '
-                 f'fill="#f08c2e" font-family="Arial">T</text>')
+    _absperr(ziel, cx, y + 292)
+    ziel.gruppe_auf(stroke="#f08c2e", stroke_width="1", stroke_linecap="round", fill="none")
+    ziel.element("line", x1=cx - 5, y1=y + 318, x2=cx + 10, y2=y + 318)
+    ziel.element("circle", cx=cx + 14, cy=y + 318, r="4", fill="white")
+    ziel.gruppe_zu()
+    ziel.element("text", "T", x=cx + 14, y=y + 320.5, text_anchor="middle", font_size="6", fill="#f08c2e", font_family="Arial")
     thermometer(342)
 
     if schaltung == "drossel":
         entleerung(380)
     elif schaltung == "einspritz":
         entleerung(bypass_unten)
-        _absperr(parts, cx, y + 395)
+        _absperr(ziel, cx, y + 395)
         ventil2(430)
     else:
         entleerung(bypass_unten)
-        _absperr(parts, cx, y + 400)
+        _absperr(ziel, cx, y + 400)
 
     if d.get("hat_wz"):
-        parts.append(f'<line x1="{cx}" y1="{y + 54}" x2="{cx + 8}" y2="{y + 54}" stroke="#1e293b" stroke-width="1"/>')
-        parts.append(f'<circle cx="{cx + 12}" cy="{y + 54}" r="3" fill="white" stroke="#1e293b" stroke-width="1"/>')
-        _sym(parts, cx - 9.6, y + wz_y, 32, "waermezaehler_cad", SYM_INNER["waermezaehler_cad"])
+        ziel.element("line", x1=cx, y1=y + 54, x2=cx + 8, y2=y + 54, stroke="#1e293b", stroke_width="1")
+        ziel.element("circle", cx=cx + 12, cy=y + 54, r="3", fill="white", stroke="#1e293b", stroke_width="1")
+        _sym(ziel, cx - 9.6, y + wz_y, 32, "waermezaehler_cad", SYM_INNER["waermezaehler_cad"])
 
     stad_y = 500 if schaltung == "drossel" else 510 if schaltung == "beimisch" else 520
-    _sym(parts, cx - 6, y + stad_y, 12, "stad", SYM_INNER["stad"])
+    _sym(ziel, cx - 6, y + stad_y, 12, "stad", SYM_INNER["stad"])
     if schaltung == "drossel":
         entleerhahn(540)
-    _nr_badge(parts, x + LH_W, y, d.get("nr"))
-    zeichne_datenblock(parts, node, results)
+    _nr_badge(ziel, x + LH_W, y, d.get("nr"))
+    zeichne_datenblock(ziel, node, results)
 
 
-def zeichne_erdsonden(parts, node, results):
+def zeichne_erdsonden(ziel, node, results):
     """Schlichter Soleverteiler mit zwei U-Rohren je Duplexsonde."""
     d = node.get("data") or {}
     x = (node.get("position") or {}).get("x", 0)
@@ -1046,59 +1010,26 @@ def zeichne_erdsonden(parts, node, results):
     laenge = _f(d.get("sonden_laenge_m"))
     laenge_text = f" à {laenge:g} m" if laenge and laenge > 0 else ""
 
-    parts.append(
-        f'<rect x="{x + w / 2 - 82}" y="{y + 2}" width="164" height="24" rx="2" '
-        f'fill="white" stroke="{SOLE_VL_FARBE}" stroke-width="1.5"/>'
-    )
-    parts.append(
-        f'<text x="{x + w / 2}" y="{y + 18}" text-anchor="middle" font-size="11" '
-        f'fill="#3730a3">{n} Duplex-Erdsonden{laenge_text}</text>'
-    )
-    parts.append(
-        f'<rect x="{x + 8}" y="{y + 34}" width="{w - 16}" height="78" fill="white" '
-        'stroke="#1f2937" stroke-width="1.4"/>'
-    )
-    parts.append(
-        f'<rect x="{x + 22}" y="{y + 48}" width="{w - 44}" height="14" fill="white" '
-        f'stroke="{SOLE_VL_FARBE}" stroke-width="1.8"/>'
-    )
-    parts.append(
-        f'<rect x="{x + 34}" y="{y + 78}" width="{w - 68}" height="14" fill="white" '
-        f'stroke="{SOLE_RL_FARBE}" stroke-width="1.7" stroke-dasharray="7,4"/>'
-    )
+    ziel.element("rect", x=x + w / 2 - 82, y=y + 2, width="164", height="24", rx="2", fill="white", stroke=SOLE_VL_FARBE, stroke_width="1.5")
+    ziel.element("text", f"{n} Duplex-Erdsonden{laenge_text}", x=x + w / 2, y=y + 18, text_anchor="middle", font_size="11", fill="#3730a3")
+    ziel.element("rect", x=x + 8, y=y + 34, width=w - 16, height="78", fill="white", stroke="#1f2937", stroke_width="1.4")
+    ziel.element("rect", x=x + 22, y=y + 48, width=w - 44, height="14", fill="white", stroke=SOLE_VL_FARBE, stroke_width="1.8")
+    ziel.element("rect", x=x + 34, y=y + 78, width=w - 68, height="14", fill="white", stroke=SOLE_RL_FARBE, stroke_width="1.7", stroke_dasharray="7,4")
     c = (results.get("erdsonden_results") or {}).get(node["id"], {})
     if c.get("erforderlich_gesamt_m") is not None:
         farbe = "#dc2626" if c.get("ausreichend") is False else "#15803d"
         suffix = " — zu kurz" if c.get("ausreichend") is False else ""
-        parts.append(
-            f'<text x="{x + w / 2}" y="{y + 106}" text-anchor="middle" font-size="9" '
-            f'font-weight="700" fill="{farbe}">erf. {c["erforderlich_gesamt_m"]:.0f} m{suffix}</text>'
-        )
+        ziel.element("text", f'erf. {c["erforderlich_gesamt_m"]:.0f} m{suffix}', x=x + w / 2, y=y + 106, text_anchor="middle", font_size="9", font_weight="700", fill=farbe)
 
     for index in range(n):
         sx = x + EWS_X0 + index * EWS_S
-        parts.append(
-            f'<path d="M {sx - 9} {y + 38} l 6 6 m 0 -6 l -6 6 '
-            f'M {sx + 9} {y + 68} l 6 6 m 0 -6 l -6 6" fill="none" '
-            'stroke="#312e81" stroke-width="1.1" stroke-linecap="round"/>'
-        )
-        parts.append(
-            f'<path d="M {sx - 9} {y + 62} V {y + 118} H {sx - 17} V {y + 258} '
-            f'Q {sx - 17} {y + 274} {sx - 11} {y + 274} '
-            f'Q {sx - 5} {y + 274} {sx - 5} {y + 258} V {y + 118} H {sx - 9}" '
-            f'fill="none" stroke="{SOLE_VL_FARBE}" stroke-width="1.9" stroke-linejoin="round"/>'
-        )
-        parts.append(
-            f'<path d="M {sx + 9} {y + 92} V {y + 122} H {sx + 3} V {y + 258} '
-            f'Q {sx + 3} {y + 274} {sx + 9} {y + 274} '
-            f'Q {sx + 15} {y + 274} {sx + 15} {y + 258} V {y + 122} H {sx + 9}" '
-            f'fill="none" stroke="{SOLE_RL_FARBE}" stroke-width="1.9" '
-            'stroke-dasharray="7,4" stroke-linejoin="round"/>'
-        )
-    _nr_badge(parts, x + w, y, d.get("nr"))
+        ziel.element("path", d=f"M {sx - 9} {y + 38} l 6 6 m 0 -6 l -6 6 M {sx + 9} {y + 68} l 6 6 m 0 -6 l -6 6", fill="none", stroke="#312e81", stroke_width="1.1", stroke_linecap="round")
+        ziel.element("path", d=f"M {sx - 9} {y + 62} V {y + 118} H {sx - 17} V {y + 258} Q {sx - 17} {y + 274} {sx - 11} {y + 274} Q {sx - 5} {y + 274} {sx - 5} {y + 258} V {y + 118} H {sx - 9}", fill="none", stroke=SOLE_VL_FARBE, stroke_width="1.9", stroke_linejoin="round")
+        ziel.element("path", d=f"M {sx + 9} {y + 92} V {y + 122} H {sx + 3} V {y + 258} Q {sx + 3} {y + 274} {sx + 9} {y + 274} Q {sx + 15} {y + 274} {sx + 15} {y + 258} V {y + 122} H {sx + 9}", fill="none", stroke=SOLE_RL_FARBE, stroke_width="1.9", stroke_dasharray="7,4", stroke_linejoin="round")
+    _nr_badge(ziel, x + w, y, d.get("nr"))
 
 
-def zeichne_standard(parts, node, results):
+def zeichne_standard(ziel, node, results):
     """Vereinfachte Symbole für die übrigen Bauteile."""
     t = node.get("type")
     d = node.get("data") or {}
@@ -1107,110 +1038,107 @@ def zeichne_standard(parts, node, results):
     w, h = node_groesse(node)
     cx, cy = x + w / 2, y + h / 2
     label = d.get("label")
-    sym_start = len(parts)  # Merker für die optionale Drehung (nur das Symbol)
+    sym_start = ziel.marke()  # Merker für die optionale Drehung (nur das Symbol)
 
     if t == "erdsonden":
-        zeichne_erdsonden(parts, node, results)
-        zeichne_datenblock(parts, node, results)
+        zeichne_erdsonden(ziel, node, results)
+        zeichne_datenblock(ziel, node, results)
         return
     if t == "heizkreis":
-        parts.append(f'<circle cx="{cx}" cy="{cy}" r="{w / 2}" fill="#f0fdf4" stroke="#16a34a" stroke-width="2.5"/>')
+        ziel.element("circle", cx=cx, cy=cy, r=w / 2, fill="#f0fdf4", stroke="#16a34a", stroke_width="2.5")
         v = (results.get("node_flows") or {}).get(node["id"])
-        parts.append(f'<text x="{cx}" y="{cy - 2}" text-anchor="middle" font-size="10" font-weight="700" fill="#15803d">{_esc(label or "HK")}</text>')
+        ziel.element("text", _txt(label or "HK"), x=cx, y=cy - 2, text_anchor="middle", font_size="10", font_weight="700", fill="#15803d")
         if v:
-            parts.append(f'<text x="{cx}" y="{cy + 12}" text-anchor="middle" font-size="8" fill="#166534" font-family="monospace">{v:.3f} m³/h</text>')
+            ziel.element("text", f"{v:.3f} m³/h", x=cx, y=cy + 12, text_anchor="middle", font_size="8", fill="#166534", font_family="monospace")
     elif t == "heizkoerper":
         schema = d.get("darstellung") == "schema"
-        parts.append(f'<rect x="{x}" y="{y}" width="{w}" height="{h}" rx="2" '
-                     f'fill="{"white" if schema else "#dcfce7"}" fill-opacity="{1 if schema else 0.7}" '
-                     'stroke="#15803d" stroke-width="2"/>')
+        ziel.element("rect", x=x, y=y, width=w, height=h, rx="2", fill="white" if schema else "#dcfce7", fill_opacity=1 if schema else 0.7, stroke="#15803d", stroke_width="2")
         if schema:
             for faktor in (0.40, 0.50, 0.60, 0.70, 0.80):
                 lx = x + w * faktor
-                parts.append(f'<line x1="{lx}" y1="{y + 7}" x2="{lx}" y2="{y + h - 7}" stroke="#15803d" stroke-width="1.4"/>')
-            parts.append(f'<line x1="{x}" y1="{y + h * .34}" x2="{x + w * .24}" y2="{y + h * .34}" stroke="{VL_FARBE}" stroke-width="2"/>')
-            parts.append(f'<line x1="{x}" y1="{y + h * .66}" x2="{x + w * .24}" y2="{y + h * .66}" stroke="{RL_FARBE}" stroke-width="2"/>')
+                ziel.element("line", x1=lx, y1=y + 7, x2=lx, y2=y + h - 7, stroke="#15803d", stroke_width="1.4")
+            ziel.element("line", x1=x, y1=y + h * .34, x2=x + w * .24, y2=y + h * .34, stroke=VL_FARBE, stroke_width="2")
+            ziel.element("line", x1=x, y1=y + h * .66, x2=x + w * .24, y2=y + h * .66, stroke=RL_FARBE, stroke_width="2")
         else:
-            parts.append(f'<text x="{cx}" y="{cy + 4}" text-anchor="middle" font-size="10" font-weight="700" fill="#166534">{_esc(label or "Heizkörper")}</text>')
+            ziel.element("text", _txt(label or "Heizkörper"), x=cx, y=cy + 4, text_anchor="middle", font_size="10", font_weight="700", fill="#166534")
     elif t == "luftheizapparat":
-        parts.append(f'<rect x="{x}" y="{y}" width="{w}" height="{h}" rx="2" fill="white" stroke="#111827" stroke-width="2"/>')
-        parts.append(f'<path d="M {x + 3} {y + 3} L {x + w - 3} {y + h - 3} M {x + w - 3} {y + 3} L {x + 3} {y + h - 3}" fill="none" stroke="#111827" stroke-width="1.5"/>')
+        ziel.element("rect", x=x, y=y, width=w, height=h, rx="2", fill="white", stroke="#111827", stroke_width="2")
+        ziel.element("path", d=f"M {x + 3} {y + 3} L {x + w - 3} {y + h - 3} M {x + w - 3} {y + 3} L {x + 3} {y + h - 3}", fill="none", stroke="#111827", stroke_width="1.5")
         # Kleine, zurückhaltende Kennzeichnung wie im Editor — der Ventilator
         # bezeichnet das Gerät, ist aber nicht das Hauptsymbol.
         r = min(w, h) * .13
-        parts.append(f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="white" stroke="#111827" stroke-width="1.7"/>')
-        parts.append(f'<circle cx="{cx}" cy="{cy}" r="2" fill="#111827"/>')
+        ziel.element("circle", cx=cx, cy=cy, r=r, fill="white", stroke="#111827", stroke_width="1.7")
+        ziel.element("circle", cx=cx, cy=cy, r="2", fill="#111827")
         for winkel in (0, 120, 240):
-            parts.append(f'<path d="M {cx} {cy - 3} C {cx - 5} {cy - r + 5} {cx + 2} {cy - r} {cx + 7} {cy - r + 3} Z" fill="#d1fae5" stroke="#15803d" stroke-width="1" transform="rotate({winkel} {cx} {cy})"/>')
+            ziel.element("path", d=f"M {cx} {cy - 3} C {cx - 5} {cy - r + 5} {cx + 2} {cy - r} {cx + 7} {cy - r + 3} Z", fill="#d1fae5", stroke="#15803d", stroke_width="1", transform=f"rotate({winkel} {cx} {cy})")
     elif t == "pump":
-        _pumpe(parts, cx, cy, 17, nach_unten=True)  # gleiche Flussrichtung wie im Editor (Dreieck nach unten)
+        _pumpe(ziel, cx, cy, 17, nach_unten=True)  # gleiche Flussrichtung wie im Editor (Dreieck nach unten)
     elif t in ("valve2", "valve3", "shutoff", "stad", "temperatur", "sicherheitsventil",
                "pwt", "lufterhitzer", "waermezaehler_cad"):
-        _sym(parts, x, y, w, t, SYM_INNER[t])
+        _sym(ziel, x, y, w, t, SYM_INNER[t])
     elif t == "checkvalve":
-        _absperr(parts, cx, cy)
+        _absperr(ziel, cx, cy)
     elif t == "erzeuger":
-        _zeichne_erzeuger(parts, node)
+        _zeichne_erzeuger(ziel, node)
     elif t == "verbraucher":
-        parts.append(f'<rect x="{x}" y="{y}" width="{w}" height="{h}" rx="3" fill="white" stroke="#f97316" stroke-width="2"/>')
-        parts.append(f'<text x="{cx}" y="{cy + 5}" text-anchor="middle" font-size="13" font-weight="700" fill="#f97316">{_esc(label or "")}</text>')
+        ziel.element("rect", x=x, y=y, width=w, height=h, rx="3", fill="white", stroke="#f97316", stroke_width="2")
+        ziel.element("text", _txt(label or ""), x=cx, y=cy + 5, text_anchor="middle", font_size="13", font_weight="700", fill="#f97316")
     elif t in ("speicher", "bww"):
         sx, sy = w / 140, h / 290
-        parts.append(f'<g transform="translate({x},{y}) scale({sx:.4f},{sy:.4f})">')
-        parts.append('<path d="M65 4 L75 14 M75 4 L65 14" fill="none" stroke="#111827" stroke-width="2"/>')
-        parts.append('<path d="M20 45 A50 25 0 0 1 120 45 L120 245 A50 25 0 0 1 20 245 Z" fill="#e5e7eb" stroke="#111827" stroke-width="3"/>')
-        parts.append('<line x1="20" y1="45" x2="120" y2="45" stroke="#111827" stroke-width="3"/>')
+        ziel.gruppe_auf(transform=f"translate({x},{y}) scale({sx:.4f},{sy:.4f})")
+        ziel.element("path", d="M65 4 L75 14 M75 4 L65 14", fill="none", stroke="#111827", stroke_width="2")
+        ziel.element("path", d="M20 45 A50 25 0 0 1 120 45 L120 245 A50 25 0 0 1 20 245 Z", fill="#e5e7eb", stroke="#111827", stroke_width="3")
+        ziel.element("line", x1="20", y1="45", x2="120", y2="45", stroke="#111827", stroke_width="3")
         c = ((results.get("speicher_results") or {}).get(node["id"], {}) if t == "speicher"
              else (results.get("bww_results") or {}).get(node["id"], {}))
         liter = _f(d.get("speicher_liter")) or _f(c.get("speichervolumen_l"))
         liter_text = f"{liter:.0f} L" if liter and liter > 0 else "… L"
-        parts.append(f'<text x="70" y="78" text-anchor="middle" font-size="16" font-weight="700">{liter_text}</text>')
+        ziel.element("text", liter_text, x="70", y="78", text_anchor="middle", font_size="16", font_weight="700")
         if c.get("speicher_oben_c") is not None:
-            parts.append(f'<text x="92" y="119" font-size="12" font-weight="700" fill="#dc2626">{c["speicher_oben_c"]:.1f} °C</text>')
+            ziel.element("text", f'{c["speicher_oben_c"]:.1f} °C', x="92", y="119", font_size="12", font_weight="700", fill="#dc2626")
         if c.get("speicher_unten_c") is not None:
-            parts.append(f'<text x="92" y="199" font-size="12" font-weight="700" fill="#2563eb">{c["speicher_unten_c"]:.1f} °C</text>')
+            ziel.element("text", f'{c["speicher_unten_c"]:.1f} °C', x="92", y="199", font_size="12", font_weight="700", fill="#2563eb")
         if t == "bww":
-            parts.append('<text x="70" y="151" text-anchor="middle" font-size="15" font-weight="700">BWW</text>')
-            parts.append('<path d="M70 45 V2 M65 9 L70 2 L75 9" fill="none" stroke="#ef4444" stroke-width="3"/>')
-            parts.append('<path d="M70 245 V288 M65 281 L70 288 L75 281" fill="none" stroke="#16a34a" stroke-width="3" stroke-dasharray="7 5"/>')
-        parts.append("</g>")
+            ziel.element("text", "BWW", x="70", y="151", text_anchor="middle", font_size="15", font_weight="700")
+            ziel.element("path", d="M70 45 V2 M65 9 L70 2 L75 9", fill="none", stroke="#ef4444", stroke_width="3")
+            ziel.element("path", d="M70 245 V288 M65 281 L70 288 L75 281", fill="none", stroke="#16a34a", stroke_width="3", stroke_dasharray="7 5")
+        ziel.gruppe_zu()
         if t == "bww" and (c.get("register_bauart") or d.get("bww_speicherkonfiguration") or "aussen") == "aussen":
             # Aussenliegendes Register: PWT direkt am BWW-Speicher sichtbar,
             # ohne einen zusätzlichen topologischen Knoten vorzutäuschen.
-            _sym(parts, x - 47, y + 51, 40, "pwt", SYM_INNER["pwt"])
-            parts.append(f'<line x1="{x - 7}" y1="{y + 60}" x2="{x + 10}" y2="{y + 60}" stroke="{VL_FARBE}" stroke-width="2"/>')
-            parts.append(f'<line x1="{x - 7}" y1="{y + 80}" x2="{x + 10}" y2="{y + 80}" stroke="{RL_FARBE}" stroke-width="2" stroke-dasharray="6,4"/>')
-            parts.append(f'<text x="{x - 38}" y="{y + 94}" font-size="7" font-weight="700" fill="#475569">PWT</text>')
+            _sym(ziel, x - 47, y + 51, 40, "pwt", SYM_INNER["pwt"])
+            ziel.element("line", x1=x - 7, y1=y + 60, x2=x + 10, y2=y + 60, stroke=VL_FARBE, stroke_width="2")
+            ziel.element("line", x1=x - 7, y1=y + 80, x2=x + 10, y2=y + 80, stroke=RL_FARBE, stroke_width="2", stroke_dasharray="6,4")
+            ziel.element("text", "PWT", x=x - 38, y=y + 94, font_size="7", font_weight="700", fill="#475569")
     elif t == "waermezaehler":
-        parts.append(f'<circle cx="{cx}" cy="{cy}" r="16" fill="white" stroke="#0f766e" stroke-width="2.5"/>')
-        parts.append(f'<text x="{cx}" y="{cy + 3.5}" text-anchor="middle" font-size="10" font-weight="700" fill="#0f766e">WZ</text>')
+        ziel.element("circle", cx=cx, cy=cy, r="16", fill="white", stroke="#0f766e", stroke_width="2.5")
+        ziel.element("text", "WZ", x=cx, y=cy + 3.5, text_anchor="middle", font_size="10", font_weight="700", fill="#0f766e")
     elif t == "expansion":
         # Exakte Dominic-Vorlage («ohne Beschriftung, ohne Füsse, unten rund»):
         # Kapsel-Körper mit zwei Bund-Linien + mittigem Höcker. Anschluss unten.
         scale = w / 248
-        parts.append(f'<g transform="translate({x},{y}) scale({scale})">')
-        parts.append('<g fill="none" stroke="#1e293b" stroke-width="2.2" stroke-linecap="round" stroke-linejoin="round">')
-        parts.append('<path fill="#d9d9d9" d="M54 33 C54 15 84 1 121 1 C158 1 188 15 188 33 L188 297 '
-                     'C188 315 158 329 121 329 C84 329 54 315 54 297 Z"/>')
-        parts.append('<line x1="54" y1="33" x2="188" y2="33"/>')
-        parts.append('<path d="M54 166 H102 C103 155 109 148 121 148 C133 148 139 155 140 166 H188"/>')
-        parts.append('<line x1="115" y1="158" x2="127" y2="158"/>')
-        parts.append('<line x1="54" y1="300" x2="188" y2="300"/>')
-        parts.append('</g>')
+        ziel.gruppe_auf(transform=f"translate({x},{y}) scale({scale})")
+        ziel.gruppe_auf(fill="none", stroke="#1e293b", stroke_width="2.2", stroke_linecap="round", stroke_linejoin="round")
+        ziel.element("path", fill="#d9d9d9", d="M54 33 C54 15 84 1 121 1 C158 1 188 15 188 33 L188 297 C188 315 158 329 121 329 C84 329 54 315 54 297 Z")
+        ziel.element("line", x1="54", y1="33", x2="188", y2="33")
+        ziel.element("path", d="M54 166 H102 C103 155 109 148 121 148 C133 148 139 155 140 166 H188")
+        ziel.element("line", x1="115", y1="158", x2="127", y2="158")
+        ziel.element("line", x1="54", y1="300", x2="188", y2="300")
+        ziel.gruppe_zu()
         # Kurzer runder Anschlussstutzen genau am Handle — keine dekorative
         # blaue Leitung mehr, die wie eine gezeichnete Leitung aussah.
-        parts.append('<line x1="121" y1="329" x2="121" y2="341" stroke="#1e293b" stroke-width="7" stroke-linecap="round"/>')
-        parts.append('</g>')
+        ziel.element("line", x1="121", y1="329", x2="121", y2="341", stroke="#1e293b", stroke_width="7", stroke_linecap="round")
+        ziel.gruppe_zu()
     elif t == "anschluss":
         # Anschluss-Marker (PHYSIK §9): roter Pfeil VL raus, blauer Pfeil RL rein,
         # gemeinsamer Buchstabe — ersetzt eine lang gezeichnete Leitung
-        buchstabe = _esc(d.get("buchstabe") or "?")
-        parts.append(f'<circle cx="{x + 12}" cy="{y + 20}" r="11" fill="white" stroke="#1e293b" stroke-width="1.6"/>')
-        parts.append(f'<text x="{x + 12}" y="{y + 24}" text-anchor="middle" font-size="11" font-weight="700" fill="#1e293b">{buchstabe}</text>')
-        parts.append(f'<line x1="{x + 26}" y1="{y + 11}" x2="{x + 52}" y2="{y + 11}" stroke="{VL_FARBE}" stroke-width="2.5"/>')
-        parts.append(f'<polygon points="{x + 52},{y + 7} {x + 59},{y + 11} {x + 52},{y + 15}" fill="{VL_FARBE}"/>')
-        parts.append(f'<line x1="{x + 52}" y1="{y + 29}" x2="{x + 26}" y2="{y + 29}" stroke="{RL_FARBE}" stroke-width="2.5"/>')
-        parts.append(f'<polygon points="{x + 26},{y + 25} {x + 19},{y + 29} {x + 26},{y + 33}" fill="{RL_FARBE}"/>')
+        buchstabe = _txt(d.get("buchstabe") or "?")
+        ziel.element("circle", cx=x + 12, cy=y + 20, r="11", fill="white", stroke="#1e293b", stroke_width="1.6")
+        ziel.element("text", buchstabe, x=x + 12, y=y + 24, text_anchor="middle", font_size="11", font_weight="700", fill="#1e293b")
+        ziel.element("line", x1=x + 26, y1=y + 11, x2=x + 52, y2=y + 11, stroke=VL_FARBE, stroke_width="2.5")
+        ziel.element("polygon", points=f"{x + 52},{y + 7} {x + 59},{y + 11} {x + 52},{y + 15}", fill=VL_FARBE)
+        ziel.element("line", x1=x + 52, y1=y + 29, x2=x + 26, y2=y + 29, stroke=RL_FARBE, stroke_width="2.5")
+        ziel.element("polygon", points=f"{x + 26},{y + 25} {x + 19},{y + 29} {x + 26},{y + 33}", fill=RL_FARBE)
         return
     elif t == "junction":
         # Leitungsknoten sind reine Fangpunkte und im Editor unsichtbar; alte
@@ -1218,53 +1146,30 @@ def zeichne_standard(parts, node, results):
         # hätte auf dem Bildschirm keine Entsprechung.
         return
     elif t == "label":
-        parts.append(f'<text x="{x}" y="{y + 11}" font-size="10" fill="#64748b">{_esc(label)}</text>')
+        ziel.element("text", _txt(label), x=x, y=y + 11, font_size="10", fill="#64748b")
         return
     elif t == "concrete_area":
         scale = max(3, min(60, _f(d.get("hatch_scale")) or 8))
-        parts.append(
-            f'<rect x="{x}" y="{y}" width="{w}" height="{h}" '
-            'fill="none" stroke="#94a3b8" stroke-width="1" stroke-dasharray="4,3"/>'
-        )
+        ziel.element("rect", x=x, y=y, width=w, height=h, fill="none", stroke="#94a3b8", stroke_width="1", stroke_dasharray="4,3")
         for x1, y1, x2, y2 in _schraffur(x, y, w, h, scale):
-            parts.append(
-                f'<line x1="{_svg_num(x1)}" y1="{_svg_num(y1)}" '
-                f'x2="{_svg_num(x2)}" y2="{_svg_num(y2)}" '
-                'stroke="#94a3b8" stroke-width="0.6" opacity="0.55"/>'
-            )
+            ziel.element("line", x1=_svg_num(x1), y1=_svg_num(y1), x2=_svg_num(x2), y2=_svg_num(y2), stroke="#94a3b8", stroke_width="0.6", opacity="0.55")
         return
     elif t == "interface_line":
-        dash = ' stroke-dasharray="8,5"' if d.get("dashed") else ""
+        dash = {"stroke_dasharray": "8,5"} if d.get("dashed") else {}
         line_y = y + h / 2
         if label:
-            parts.append(
-                f'<text x="{cx}" y="{line_y - 7}" text-anchor="middle" font-size="10" '
-                f'font-weight="700" letter-spacing="0.8" fill="#0f172a">{_esc(label).upper()}</text>'
-            )
-        parts.append(
-            f'<line x1="{x}" y1="{line_y}" x2="{x + w}" y2="{line_y}" '
-            f'stroke="#0f172a" stroke-width="2"{dash}/>'
-        )
+            ziel.element("text", _txt(label).upper(), x=cx, y=line_y - 7, text_anchor="middle", font_size="10", font_weight="700", letter_spacing="0.8", fill="#0f172a")
+        ziel.element("line", x1=x, y1=line_y, x2=x + w, y2=line_y,
+                     stroke="#0f172a", stroke_width="2", **dash)
         return
     # Drehung und Spiegelung wie im Editor: nur das Symbol wird transformiert,
     # Nummer und Beschriftung bleiben aufrecht und seitenrichtig.
-    if d.get("mirrored"):
-        for index in range(sym_start, len(parts)):
-            parts[index] = _text_gegen_spiegeln(parts[index])
-    transform = bauteil_transform(d, cx, cy)
-    if transform:
-        parts.insert(sym_start, f'<g transform="{transform}">')
-        parts.append("</g>")
+    ziel.umhuellen(sym_start, bauteil_transform(d, cx, cy), gegen_spiegeln=bool(d.get("mirrored")))
     # Nummer und Beschriftung drehen NICHT mit: sie sollen bei jeder
     # Bauteillage an derselben Stelle und lesbar bleiben (Dominic 2026-08-05).
     # Der Editor rendert sie aus demselben Grund ausserhalb der Drehung.
-    _nr_badge(parts, x + w, y, d.get("nr"))
-    zeichne_datenblock(parts, node, results)
-
-
-def _svg_num(value):
-    """Kompakte, stabile Zahlendarstellung für SVG-Pfade."""
-    return f"{float(value):.6f}".rstrip("0").rstrip(".") or "0"
+    _nr_badge(ziel, x + w, y, d.get("nr"))
+    zeichne_datenblock(ziel, node, results)
 
 
 def _gerundeter_polylinien_pfad(punkte, radius=8):
@@ -1305,17 +1210,17 @@ def _gerundeter_polylinien_pfad(punkte, radius=8):
     return f"{pfad} L {_svg_num(ende[0])} {_svg_num(ende[1])}"
 
 
-def zeichne_edge(parts, edge, nodes_by_id, results):
+def zeichne_edge(ziel, edge, nodes_by_id, results):
     quelle = nodes_by_id.get(edge.get("source"))
-    ziel = nodes_by_id.get(edge.get("target"))
-    if not quelle or not ziel:
+    senke = nodes_by_id.get(edge.get("target"))
+    if not quelle or not senke:
         return
     x1, y1 = handle_pos(quelle, edge.get("sourceHandle"))
-    x2, y2 = handle_pos(ziel, edge.get("targetHandle"))
+    x2, y2 = handle_pos(senke, edge.get("targetHandle"))
     stroke = edge.get("stroke") or (edge.get("style") or {}).get("stroke") or "#1e293b"
     layer_id = str((edge.get("data") or {}).get("layer_id") or "")
     ist_rl = stroke == RL_FARBE or layer_id.endswith("_rl") or layer_id == "trinkkaltwasser"
-    dash = ' stroke-dasharray="10,7"' if ist_rl else ""
+    dash = {"stroke_dasharray": "10,7"} if ist_rl else {}
     # CAD-Leitung wie FlowEdge.jsx: echte Polylinie; klassische React-Flow-
     # Kanten ohne cad_polyline behalten ihre automatische Winkelroute.
     dx, dy = x2 - x1, y2 - y1
@@ -1372,7 +1277,7 @@ def zeichne_edge(parts, edge, nodes_by_id, results):
     if not ist_cad_polyline:
         lx, ly = (x1 + x2) / 2 + 6, (y1 + y2) / 2
     sw = 4.5
-    parts.append(f'<path d="{pfad}" fill="none" stroke="{stroke}" stroke-width="{sw}" stroke-linecap="round" stroke-linejoin="round"{dash}/>')
+    ziel.element("path", d=pfad, fill="none", stroke=stroke, stroke_width=sw, stroke_linecap="round", stroke_linejoin="round", **dash)
     fluss = (results.get("edge_flows") or {}).get(edge.get("id"))
     # Beschriftung wie im Editor: eine ausgeblendete Beschriftung wird auch im
     # PDF nicht gezeichnet, ein Versatz wird übernommen (Editor und Export
@@ -1385,11 +1290,7 @@ def zeichne_edge(parts, edge, nodes_by_id, results):
     if fluss and (versatz_x or versatz_y):
         # Hinweisstrich wie im Editor — sonst gehört die versetzte Zahl im Plan
         # zu keiner erkennbaren Leitung.
-        parts.append(
-            f'<line x1="{_svg_num(lx)}" y1="{_svg_num(ly)}" '
-            f'x2="{_svg_num(lx + versatz_x)}" y2="{_svg_num(ly + versatz_y)}" '
-            f'stroke="{stroke}" stroke-width="1" stroke-dasharray="4,3" opacity="0.55"/>'
-        )
+        ziel.element("line", x1=_svg_num(lx), y1=_svg_num(ly), x2=_svg_num(lx + versatz_x), y2=_svg_num(ly + versatz_y), stroke=stroke, stroke_width="1", stroke_dasharray="4,3", opacity="0.55")
     lx += versatz_x
     ly += versatz_y
     if fluss:
@@ -1398,16 +1299,17 @@ def zeichne_edge(parts, edge, nodes_by_id, results):
         lg = (results.get("leitung_results") or {}).get(edge.get("id"))
         dn = str(lg["dn"]).split(" ")[0] if lg else None  # nur der DN-Token, z.B. «DN32»
         if dn:
-            parts.append(f'<text x="{lx}" y="{ly}" font-size="12" font-weight="800" fill="#1e293b" font-family="monospace">{dn}</text>')
-            parts.append(f'<text x="{lx}" y="{ly + 10}" font-size="8" font-weight="600" fill="#475569" font-family="monospace">m\' {_kg_h(fluss)} kg/h</text>')
+            ziel.element("text", dn, x=lx, y=ly, font_size="12", font_weight="800", fill="#1e293b", font_family="monospace")
+            ziel.element("text", f"m' {_kg_h(fluss)} kg/h", x=lx, y=ly + 10, font_size="8", font_weight="600", fill="#475569", font_family="monospace")
         else:
-            parts.append(f'<text x="{lx}" y="{ly}" font-size="9" font-weight="600" fill="#1e293b" font-family="monospace">m\' {_kg_h(fluss)} kg/h</text>')
+            ziel.element("text", f"m' {_kg_h(fluss)} kg/h", x=lx, y=ly, font_size="9", font_weight="600", fill="#1e293b", font_family="monospace")
 
 
-def erzeuge_svg(nodes: list, edges: list, results: dict) -> str:
-    """Der komplette Graph als eigenständiges SVG-Dokument."""
+def zeichne_plan(ziel, nodes: list, edges: list, results: dict) -> tuple:
+    """Den kompletten Graph auf `ziel` zeichnen; liefert den Ausschnitt (x0, y0, b, h)."""
     if not nodes:
-        return '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 400 200"><text x="20" y="100" font-size="14" fill="#94a3b8">Leeres Schema</text></svg>'
+        ziel.element("text", "Leeres Schema", x="20", y="100", font_size="14", fill="#94a3b8")
+        return (0, 0, 400, 200)
 
     nodes_by_id = {n["id"]: n for n in nodes}
     xs, ys = [], []
@@ -1441,20 +1343,29 @@ def erzeuge_svg(nodes: list, edges: list, results: dict) -> str:
     x0, y0 = min(xs) - rand, min(ys) - rand
     breite, hoehe = max(xs) - min(xs) + 2 * rand, max(ys) - min(ys) + 2 * rand
 
-    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{x0} {y0} {breite} {hoehe}" '
-             f'font-family="Helvetica, Arial, sans-serif">',
-             f'<rect x="{x0}" y="{y0}" width="{breite}" height="{hoehe}" fill="white"/>']
+    ziel.element("rect", x=x0, y=y0, width=breite, height=hoehe, fill="white")
     # Leitungen zuerst (liegen unter den Bauteilen)
     for e in edges:
-        zeichne_edge(parts, e, nodes_by_id, results)
+        zeichne_edge(ziel, e, nodes_by_id, results)
     for n in nodes:
         if n.get("type") == "verteiler":
-            zeichne_verteiler(parts, n, results)
+            zeichne_verteiler(ziel, n, results)
         elif n.get("type") == "gruppe":
-            zeichne_gruppe(parts, n, results)
+            zeichne_gruppe(ziel, n, results)
         elif n.get("type") == "lufterhitzer_gruppe":
-            zeichne_lufterhitzer_gruppe(parts, n, results)
+            zeichne_lufterhitzer_gruppe(ziel, n, results)
         else:
-            zeichne_standard(parts, n, results)
-    parts.append("</svg>")
-    return "\n".join(parts)
+            zeichne_standard(ziel, n, results)
+    return (x0, y0, breite, hoehe)
+
+
+def erzeuge_svg(nodes: list, edges: list, results: dict) -> str:
+    """Der komplette Graph als eigenständiges SVG-Dokument."""
+    ziel = SvgZiel(font_family=SCHRIFT)
+    return ziel.svg(zeichne_plan(ziel, nodes, edges, results))
+
+
+def erzeuge_zeichnung(nodes: list, edges: list, results: dict):
+    """Der komplette Graph direkt als ReportLab-Zeichnung (Punkte, ohne SVG-Umweg)."""
+    ziel = ZeichnungsZiel(font_family=SCHRIFT)
+    return ziel.zeichnung(zeichne_plan(ziel, nodes, edges, results))
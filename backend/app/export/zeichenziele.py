@@ -0,0 +1,552 @@
+"""Zeichenziele des Schemaplans: dieselben Zeichner, zwei Ausgaben.
+
+Die Zeichner in `schema_svg` beschreiben den Plan als Folge von
+SVG-Elementen — `element`, `gruppe_auf`/`gruppe_zu` und feste
+Vorlage-`fragmente`. Wohin das geht, entscheidet das Ziel:
+
+* `SvgZiel` schreibt SVG-Text für den Editor, Zeile für Zeile wie bisher.
+* `ZeichnungsZiel` baut direkt ReportLab-Grafikobjekte fürs PDF. Der Umweg
+  SVG-Text → svglib → Zeichnung, der bei grossen Schemata Zeit und Speicher
+  des Exports bestimmte, fällt weg.
+
+Das ReportLab-Ziel bildet nach, was svglib aus demselben SVG gemacht hat:
+Darstellungsattribute erben über Gruppen, Füllung ist ohne Angabe schwarz,
+Strich keiner, Schrift 16 px; Text steht als `String` in einer um y
+gespiegelten Gruppe; 1 px = 0.75 pt. Auch die Schriftwahl folgt svglib —
+numerische Schriftgewichte («700») fanden dort keine Standardschrift und
+fielen auf Helvetica zurück. So bleibt der Plan im PDF unverändert.
+"""
+import html
+import math
+import re
+from functools import lru_cache
+
+from reportlab.graphics.shapes import (
+    FILL_EVEN_ODD,
+    FILL_NON_ZERO,
+    Circle,
+    Drawing,
+    Group,
+    Line,
+    Path,
+    Polygon,
+    Rect,
+    String,
+    mmult,
+    rotate,
+    scale,
+    translate,
+)
+from reportlab.lib import colors
+
+PX_TO_PT = 0.75
+SCHRIFTGROESSE = 16.0      # SVG-Vorgabe 12 pt in Benutzereinheiten
+EINHEIT = (1, 0, 0, 1, 0, 0)
+
+# Darstellungsattribute, die über Gruppen erben.
+STIL = frozenset((
+    "fill", "fill-opacity", "fill-rule", "stroke", "stroke-width", "stroke-opacity",
+    "stroke-linejoin", "stroke-linecap", "stroke-dasharray",
+    "font-family", "font-weight", "font-style", "font-size", "text-anchor",
+))
+FUGEN = {"miter": 0, "round": 1, "bevel": 2}
+ENDEN = {"butt": 0, "round": 1, "square": 2}
+
+# Familie → (normal, fett, kursiv, fett kursiv) — die Standardschriften, die
+# svglib ohne Schriftdatei kennt. Alles andere fällt auf Helvetica.
+SCHRIFTEN = {
+    "helvetica": ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique"),
+    "sans-serif": ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique"),
+    "monospace": ("Courier", "Courier-Bold", "Courier-Oblique", "Courier-BoldOblique"),
+    "courier": ("Courier", "Courier-Bold", "Courier-Oblique", "Courier-BoldOblique"),
+    "courier new": ("Courier", "Courier-Bold", "Courier-Oblique", "Courier-BoldOblique"),
+    "serif": ("Times-Roman", "Times-Bold", "Times-Italic", "Times-BoldItalic"),
+    "times": ("Times-Roman", "Times-Bold", "Times-Italic", "Times-BoldItalic"),
+    "times new roman": ("Times-Roman", "Times-Bold", "Times-Italic", "Times-BoldItalic"),
+}
+ERSATZSCHRIFT = "Helvetica"
+
+_ZAHL = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_X_WERT = re.compile(r"-?\d+(?:\.\d+)?")     # dieselben x-Werte wie `text_gegen_spiegeln`
+_PFAD_BEFEHL = re.compile(r"([MmLlHhVvCcSsQqTtAaZz])([^MmLlHhVvCcSsQqTtAaZz]*)")
+_TRANSFORM = re.compile(r"(\w+)\s*\(([^)]*)\)")
+_TOKEN = re.compile(r'<(/?)([A-Za-z]+)((?:\s+[\w:-]+="[^"]*")*)\s*(/?)>|([^<]+)')
+_ATTRIBUT = re.compile(r'([\w:-]+)="([^"]*)"')
+_PARAMETER = {"M": 2, "L": 2, "H": 1, "V": 1, "C": 6, "S": 4, "Q": 4, "T": 2, "A": 7, "Z": 0}
+
+
+def svg_zahl(wert) -> str:
+    """Kompakte, stabile Zahlendarstellung für SVG-Pfade."""
+    return f"{float(wert):.6f}".rstrip("0").rstrip(".") or "0"
+
+
+_TEXT_OHNE_TRANSFORM = re.compile(
+    r'<text\b(?![^>]*\btransform=)([^>]*?)\bx="(-?\d+(?:\.\d+)?)"([^>]*)>',
+)
+
+
+def text_gegen_spiegeln(fragment: str) -> str:
+    """Text innerhalb eines gespiegelten Symbols seitenrichtig halten.
+
+    Die Position wird mit dem Symbol gespiegelt, die Glyphe selbst erhält um
+    ihre x-Ankerachse eine zweite Spiegelung. Zwei Spiegelungen heben sich für
+    die Schrift auf; die Geometrie bleibt unverändert gespiegelt.
+    """
+    def ersetzen(treffer):
+        gegen = svg_zahl(2 * float(treffer.group(2)))
+        return (f'<text transform="translate({gegen},0) scale(-1,1)"'
+                f'{treffer.group(1)}x="{treffer.group(2)}"{treffer.group(3)}>')
+
+    return _TEXT_OHNE_TRANSFORM.sub(ersetzen, fragment)
+
+
+def _name(schluessel: str) -> str:
+    """Python-Schlüsselwort → SVG-Attribut (`stroke_width` → `stroke-width`)."""
+    return schluessel.replace("_", "-")
+
+
+class SvgZiel:
+    """Sammelt SVG-Zeilen; `svg()` setzt das Dokument zusammen."""
+
+    def __init__(self, **wurzel):
+        self.wurzel = {_name(k): v for k, v in wurzel.items()}
+        self.teile: list = []
+
+    def element(self, tag: str, inhalt=None, **attribute) -> None:
+        kopf = "".join(f' {_name(k)}="{v}"' for k, v in attribute.items())
+        if inhalt is None:
+            self.teile.append(f"<{tag}{kopf}/>")
+        else:
+            text = html.escape(str(inhalt), quote=False)
+            self.teile.append(f"<{tag}{kopf}>{text}</{tag}>")
+
+    def gruppe_auf(self, **attribute) -> None:
+        self.teile.append("<g" + "".join(f' {_name(k)}="{v}"' for k, v in attribute.items()) + ">")
+
+    def gruppe_zu(self) -> None:
+        self.teile.append("</g>")
+
+    def fragmente(self, fragmente) -> None:
+        """Feste Vorlage-Fragmente (SVG-Text) unverändert übernehmen."""
+        self.teile.extend(fragmente)
+
+    def marke(self):
+        return len(self.teile)
+
+    def umhuellen(self, marke, transform: str, gegen_spiegeln: bool = False) -> None:
+        """Alles seit `marke` in eine Gruppe mit `transform` legen.
+
+        Mit `gegen_spiegeln` bleibt Text darin seitenrichtig (siehe
+        `text_gegen_spiegeln`).
+        """
+        if gegen_spiegeln:
+            for index in range(marke, len(self.teile)):
+                self.teile[index] = text_gegen_spiegeln(self.teile[index])
+        if transform:
+            self.teile.insert(marke, f'<g transform="{transform}">')
+            self.teile.append("</g>")
+
+    def svg(self, ausschnitt) -> str:
+        x0, y0, breite, hoehe = ausschnitt
+        kopf = "".join(f' {k}="{v}"' for k, v in self.wurzel.items())
+        return "\n".join([
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{x0} {y0} {breite} {hoehe}"{kopf}>',
+            *self.teile,
+            "</svg>",
+        ])
+
+
+class ZeichnungsZiel:
+    """Baut die ReportLab-Zeichnung direkt, ohne SVG-Text dazwischen."""
+
+    def __init__(self, **wurzel):
+        self._wurzel = Group()
+        self._gruppe = self._wurzel
+        self._stil = {_name(k): str(v) for k, v in wurzel.items() if _name(k) in STIL}
+        self._stapel: list = []
+        # Texte ohne eigene Transformation: (Gruppe, x) — für das Gegenspiegeln.
+        self._texte: list = []
+
+    # ── Ereignisse ────────────────────────────────────────────────────────
+    def element(self, tag: str, inhalt=None, **attribute) -> None:
+        self._element(tag, {_name(k): v for k, v in attribute.items()}, inhalt)
+
+    def gruppe_auf(self, **attribute) -> None:
+        self._auf({_name(k): v for k, v in attribute.items()})
+
+    def gruppe_zu(self) -> None:
+        self._gruppe, self._stil = self._stapel.pop()
+
+    def fragmente(self, fragmente) -> None:
+        for fragment in fragmente:
+            for ereignis in _fragment_ereignisse(fragment):
+                if ereignis[0] == "element":
+                    self._element(*ereignis[1:])
+                elif ereignis[0] == "auf":
+                    self._auf(ereignis[1])
+                else:
+                    self.gruppe_zu()
+
+    def marke(self):
+        return (len(self._gruppe.contents), len(self._texte))
+
+    def umhuellen(self, marke, transform: str, gegen_spiegeln: bool = False) -> None:
+        anfang, texte = marke
+        if gegen_spiegeln:
+            for gruppe, x in self._texte[texte:]:
+                gegen = mmult(translate(float(svg_zahl(2 * x)), 0), scale(-1, 1))
+                gruppe.transform = mmult(gegen, gruppe.transform)
+        if transform:
+            inhalt = self._gruppe.contents[anfang:]
+            del self._gruppe.contents[anfang:]
+            gruppe = Group(*inhalt)
+            gruppe.transform = _matrix(transform)
+            self._gruppe.add(gruppe)
+
+    def zeichnung(self, ausschnitt) -> Drawing:
+        """Fertige Zeichnung: 1 px = 0.75 pt, y nach oben wie im PDF."""
+        x0, y0, breite, hoehe = (float(v) for v in ausschnitt)
+        self._wurzel.transform = mmult(scale(PX_TO_PT, -PX_TO_PT), translate(-x0, -hoehe - y0))
+        zeichnung = Drawing(breite * PX_TO_PT, hoehe * PX_TO_PT)
+        zeichnung.add(self._wurzel)
+        return zeichnung
+
+    # ── intern ────────────────────────────────────────────────────────────
+    def _geerbt(self, attribute: dict) -> dict:
+        eigene = {k: v for k, v in attribute.items() if k in STIL and v not in ("", "inherit")}
+        return {**self._stil, **eigene} if eigene else self._stil
+
+    def _auf(self, attribute: dict) -> None:
+        gruppe = Group()
+        if attribute.get("transform"):
+            gruppe.transform = _matrix(attribute["transform"])
+        self._gruppe.add(gruppe)
+        self._stapel.append((self._gruppe, self._stil))
+        self._gruppe, self._stil = gruppe, self._geerbt(attribute)
+
+    def _element(self, tag: str, attribute: dict, inhalt) -> None:
+        stil = self._geerbt(attribute)
+        laenge = lambda name: _laenge(attribute.get(name))   # noqa: E731
+        if tag == "rect":
+            x, y, w, h, rx, ry = (laenge(n) for n in ("x", "y", "width", "height", "rx", "ry"))
+            rx, ry = min(rx, w / 2), min(ry, h / 2)
+            if rx and not ry:
+                ry = rx
+            elif ry and not rx:
+                rx = ry
+            form = _flaeche(Rect(x, y, w, h, rx=rx, ry=ry), stil)
+        elif tag == "circle":
+            form = _flaeche(Circle(laenge("cx"), laenge("cy"), laenge("r")), stil)
+        elif tag == "line":
+            punkte = [laenge(n) for n in ("x1", "y1", "x2", "y2")]
+            _stupsen(punkte)
+            form = _strich(Line(*punkte), stil)
+        elif tag == "polygon":
+            punkte = [float(v) for v in _ZAHL.findall(str(attribute.get("points", "")))]
+            if not punkte or len(punkte) % 2:
+                return
+            _stupsen(punkte)
+            form = _flaeche(Polygon(punkte), stil)
+        elif tag == "path":
+            form = _pfad(str(attribute.get("d") or ""), stil)
+            if form is None:
+                return
+        elif tag == "text":
+            text = _text(inhalt)
+            if not text:
+                return
+            form = Group(String(laenge("x"), -laenge("y"), text,
+                                fontName=_schrift(stil), fontSize=_laenge(stil.get("font-size"), SCHRIFTGROESSE),
+                                textAnchor=str(stil.get("text-anchor", "start")),
+                                fillColor=_farbe(stil.get("fill", "black"))))
+            form.transform = scale(1, -1)
+            x = str(attribute.get("x", ""))
+            if not attribute.get("transform") and _X_WERT.fullmatch(x):
+                self._texte.append((form, float(x)))
+        else:
+            raise ValueError(f"Unbekanntes Zeichenelement: {tag}")
+        if attribute.get("transform"):
+            if not isinstance(form, Group):
+                form = Group(form)
+            form.transform = mmult(_matrix(attribute["transform"]), form.transform)
+        self._gruppe.add(form)
+
+
+# ── Umrechnung wie svglib ───────────────────────────────────────────────────
+def _laenge(wert, vorgabe: float = 0.0) -> float:
+    if wert is None or wert == "":
+        return vorgabe
+    if isinstance(wert, (int, float)):
+        return float(wert)
+    text = wert.strip()
+    if text.endswith("px"):
+        return float(text[:-2])
+    if text.endswith("pt"):
+        return float(text[:-2]) / PX_TO_PT
+    return float(text)
+
+
+def _text(inhalt) -> str:
+    """Leerraum wie svglib: Zeilenwechsel zu Leerzeichen, aussen weg, innen einfach."""
+    text = str(inhalt if inhalt is not None else "").replace("\r\n", " ").replace("\n", " ").replace("\t", " ")
+    text = text.strip()
+    while "  " in text:
+        text = text.replace("  ", " ")
+    return text
+
+
+@lru_cache(maxsize=256)
+def _grundfarbe(text: str):
+    if len(text) in (7, 9) and text[0] == "#":
+        return colors.HexColor(text, hasAlpha=len(text) == 9)
+    if len(text) == 4 and text[0] == "#":
+        return colors.HexColor("#" + 2 * text[1] + 2 * text[2] + 2 * text[3])
+    farbe = colors.cssParse(text)
+    if farbe is None and isinstance(getattr(colors, text, None), colors.Color):
+        farbe = getattr(colors, text)
+    return farbe
+
+
+def _farbe(wert, alpha: float = 1.0):
+    """Farbe aus einem SVG-Wert; `none` → None. Geteilt, solange deckend."""
+    text = str(wert).strip()
+    if not text or text == "none":
+        return None
+    farbe = _grundfarbe(text)
+    if farbe is None or alpha == getattr(farbe, "alpha", 1):
+        return farbe
+    farbe = farbe.clone()
+    farbe.alpha = alpha
+    return farbe
+
+
+def _strich(form, stil: dict):
+    breite = _laenge(stil.get("stroke-width"), 1.0)
+    form.strokeColor = _farbe(stil.get("stroke", "none")) if breite != 0 else None
+    form.strokeWidth = breite
+    form.strokeOpacity = float(stil.get("stroke-opacity", 1))
+    if str(stil.get("stroke-linejoin")) in FUGEN:
+        form.strokeLineJoin = FUGEN[str(stil["stroke-linejoin"])]
+    if str(stil.get("stroke-linecap")) in ENDEN:
+        form.strokeLineCap = ENDEN[str(stil["stroke-linecap"])]
+    strichelung = str(stil.get("stroke-dasharray", "none"))
+    if strichelung != "none":
+        form.strokeDashArray = [float(v) for v in _ZAHL.findall(strichelung)]
+    return form
+
+
+def _flaeche(form, stil: dict):
+    deckkraft = float(stil.get("fill-opacity", 1))
+    form.fillColor = _farbe(stil.get("fill", "black"), deckkraft)
+    form.fillOpacity = deckkraft
+    form.fillMode = FILL_EVEN_ODD if stil.get("fill-rule") == "evenodd" else FILL_NON_ZERO
+    return _strich(form, stil)
+
+
+def _schrift(stil: dict) -> str:
+    gewicht = str(stil.get("font-weight", "normal"))
+    lage = str(stil.get("font-style", "normal"))
+    if gewicht not in ("normal", "bold") or lage not in ("normal", "italic"):
+        return ERSATZSCHRIFT
+    index = (gewicht == "bold") + 2 * (lage == "italic")
+    for familie in str(stil.get("font-family", "Helvetica")).split(","):
+        schnitte = SCHRIFTEN.get(familie.strip().strip("'\"").lower())
+        if schnitte:
+            return schnitte[index]
+    return ERSATZSCHRIFT
+
+
+def _stupsen(punkte: list) -> None:
+    """Alle Punkte gleich → ersten minimal verschieben (sonst zeichnet ReportLab nichts)."""
+    if len(punkte) >= 4 and all(punkte[i] == punkte[0] and punkte[i + 1] == punkte[1]
+                                for i in range(2, len(punkte) - 1, 2)):
+        punkte[0] *= 1.0000001
+
+
+def _matrix(transform: str) -> tuple:
+    """SVG-`transform` als affine Matrix, Schritte von links nach rechts."""
+    matrix = EINHEIT
+    for art, werte in _TRANSFORM.findall(transform):
+        zahlen = [float(v) for v in _ZAHL.findall(werte)]
+        if art == "translate" and zahlen:
+            matrix = mmult(matrix, translate(zahlen[0], zahlen[1] if len(zahlen) > 1 else 0))
+        elif art == "scale" and zahlen:
+            matrix = mmult(matrix, scale(zahlen[0], zahlen[1] if len(zahlen) > 1 else zahlen[0]))
+        elif art == "rotate" and len(zahlen) == 3:
+            winkel, cx, cy = zahlen
+            matrix = mmult(mmult(mmult(matrix, translate(cx, cy)), rotate(winkel)), translate(-cx, -cy))
+        elif art == "rotate" and zahlen:
+            matrix = mmult(matrix, rotate(zahlen[0]))
+        elif art == "matrix" and len(zahlen) == 6:
+            matrix = mmult(matrix, tuple(zahlen))
+    return matrix
+
+
+@lru_cache(maxsize=2048)
+def _pfad_geometrie(d: str) -> tuple:
+    """(Punkte, Operatoren, offene Teilpfade) eines SVG-Pfads."""
+    pfad = Path()
+    punkte = pfad.points
+    offen: list = []
+    start: list = []
+    letzter = ""
+    for befehl, werte in _PFAD_BEFEHL.findall(d):
+        zahlen = [float(v) for v in _ZAHL.findall(werte)]
+        n = _PARAMETER[befehl.upper()]
+        gruppen = [zahlen[i:i + n] for i in range(0, len(zahlen), n)] if n else [[]]
+        for nummer, z in enumerate(gruppen):
+            if len(z) < n:
+                break
+            op = befehl
+            if nummer and befehl in "Mm":
+                op = "L" if befehl == "M" else "l"   # weitere Paare nach M sind Linien
+            if op in ("M", "m") and pfad.operators and pfad.operators[-1] != 3:
+                offen.append(len(pfad.operators))
+            if op == "M":
+                pfad.moveTo(*z)
+                start = punkte[-2:]
+            elif op == "m":
+                if len(punkte) >= 2:
+                    basis = start if letzter in ("Z", "z") else punkte[-2:]
+                    pfad.moveTo(basis[0] + z[0], basis[1] + z[1])
+                else:
+                    pfad.moveTo(*z)
+                start = punkte[-2:]
+            elif op == "L":
+                pfad.lineTo(*z)
+            elif op == "l":
+                pfad.lineTo(punkte[-2] + z[0], punkte[-1] + z[1])
+            elif op == "H":
+                pfad.lineTo(z[0], punkte[-1])
+            elif op == "h":
+                pfad.lineTo(punkte[-2] + z[0], punkte[-1])
+            elif op == "V":
+                pfad.lineTo(punkte[-2], z[0])
+            elif op == "v":
+                pfad.lineTo(punkte[-2], punkte[-1] + z[0])
+            elif op == "C":
+                pfad.curveTo(*z)
+            elif op == "c":
+                x, y = punkte[-2:]
+                pfad.curveTo(x + z[0], y + z[1], x + z[2], y + z[3], x + z[4], y + z[5])
+            elif op in "Qq":
+                x0, y0 = punkte[-2:]
+                qx, qy, xn, yn = z
+                if op == "q":
+                    qx, qy, xn, yn = x0 + qx, y0 + qy, x0 + xn, y0 + yn
+                # Quadratisch → kubisch: Kontrollpunkte auf 2/3 zum Q-Punkt.
+                pfad.curveTo(x0 + 2 / 3 * (qx - x0), y0 + 2 / 3 * (qy - y0),
+                             xn + 2 / 3 * (qx - xn), yn + 2 / 3 * (qy - yn), xn, yn)
+            elif op in "Aa":
+                rx, ry, phi, gross, richtung, x2, y2 = z
+                x1, y1 = punkte[-2:]
+                if op == "a":
+                    x2, y2 = x1 + x2, y1 + y2
+                if abs(rx) <= 1e-10 or abs(ry) <= 1e-10:
+                    pfad.lineTo(x2, y2)
+                else:
+                    for kurve in _bogen(x1, y1, rx, ry, phi, int(gross), int(richtung), x2, y2):
+                        pfad.curveTo(*kurve)
+            elif op in "Zz":
+                pfad.closePath()
+            else:
+                raise ValueError(f"Pfadbefehl {befehl} wird im Schemaplan nicht verwendet")
+            letzter = op
+    if not pfad.operators:
+        return None
+    if pfad.operators[-1] != 3:
+        offen.append(len(pfad.operators))
+    return tuple(pfad.points), tuple(pfad.operators), tuple(offen)
+
+
+def _pfad(d: str, stil: dict):
+    geometrie = _pfad_geometrie(d)
+    if geometrie is None:
+        return None
+    punkte, operatoren, offen = geometrie
+    pfad = _flaeche(Path(points=list(punkte), operators=list(operatoren)), stil)
+    gruppe = Group()
+    if offen and pfad.fillColor is not None:
+        # ReportLab füllt offene Teilpfade nicht: geschlossene Kopie ohne Strich
+        # darunter, der Pfad selbst nur noch als Strich.
+        geschlossen = list(operatoren)
+        for stelle in reversed(offen):
+            geschlossen.insert(stelle, 3)
+        kopie = Path(points=list(punkte), operators=geschlossen, fillColor=pfad.fillColor,
+                     fillOpacity=pfad.fillOpacity, fillMode=pfad.fillMode,
+                     strokeColor=None, strokeWidth=0)
+        gruppe.add(kopie)
+        pfad.fillColor = None
+    gruppe.add(pfad)
+    return gruppe
+
+
+def _bogen(x1, y1, rx, ry, phi, gross, richtung, x2, y2):
+    """Elliptischer SVG-Bogen als kubische Kurven (je höchstens 90°)."""
+    if x1 == x2 and y1 == y2:
+        return []
+    rx, ry = abs(rx), abs(ry)
+    cos_phi, sin_phi = math.cos(math.radians(phi)), math.sin(math.radians(phi))
+    dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+    x1s = cos_phi * dx + sin_phi * dy
+    y1s = -sin_phi * dx + cos_phi * dy
+    faktor = x1s ** 2 / rx ** 2 + y1s ** 2 / ry ** 2
+    if faktor > 1:
+        rx, ry = rx * math.sqrt(faktor), ry * math.sqrt(faktor)
+    zaehler = rx ** 2 * ry ** 2 - rx ** 2 * y1s ** 2 - ry ** 2 * x1s ** 2
+    nenner = rx ** 2 * y1s ** 2 + ry ** 2 * x1s ** 2
+    wurzel = math.sqrt(max(0.0, zaehler / nenner)) if nenner else 0.0
+    if gross == richtung:
+        wurzel = -wurzel
+    cxs, cys = wurzel * rx * y1s / ry, -wurzel * ry * x1s / rx
+    cx = cos_phi * cxs - sin_phi * cys + (x1 + x2) / 2
+    cy = sin_phi * cxs + cos_phi * cys + (y1 + y2) / 2
+
+    def winkel(ux, uy, vx, vy):
+        return math.atan2(ux * vy - uy * vx, ux * vx + uy * vy)
+
+    ux, uy = (x1s - cxs) / rx, (y1s - cys) / ry
+    start = winkel(1, 0, ux, uy)
+    weite = winkel(ux, uy, (-x1s - cxs) / rx, (-y1s - cys) / ry)
+    if not richtung and weite > 0:
+        weite -= 2 * math.pi
+    elif richtung and weite < 0:
+        weite += 2 * math.pi
+    teile = max(1, math.ceil(abs(weite) / (math.pi / 2) - 1e-9))
+    schritt = weite / teile
+    k = 4 / 3 * math.tan(schritt / 4)
+
+    def punkt(u, v):
+        return (cx + rx * u * cos_phi - ry * v * sin_phi, cy + rx * u * sin_phi + ry * v * cos_phi)
+
+    kurven = []
+    for i in range(teile):
+        a, b = start + i * schritt, start + (i + 1) * schritt
+        kurven.append((*punkt(math.cos(a) - k * math.sin(a), math.sin(a) + k * math.cos(a)),
+                       *punkt(math.cos(b) + k * math.sin(b), math.sin(b) - k * math.cos(b)),
+                       *punkt(math.cos(b), math.sin(b))))
+    return kurven
+
+
+@lru_cache(maxsize=1024)
+def _fragment_ereignisse(fragment: str) -> tuple:
+    """Ein festes SVG-Fragment einmal in Zeichenereignisse zerlegen."""
+    ereignisse = []
+    offen = None
+    for schliessend, tag, attribute, leer, text in _TOKEN.findall(fragment):
+        if text:
+            if offen is not None:
+                offen[2].append(text)
+            continue
+        werte = {k: html.unescape(v) for k, v in _ATTRIBUT.findall(attribute)}
+        if tag == "g":
+            ereignisse.append(("zu",) if schliessend else ("auf", werte))
+        elif schliessend:
+            if offen is not None:
+                ereignisse.append(("element", offen[0], offen[1], html.unescape("".join(offen[2]))))
+            offen = None
+        elif leer:
+            ereignisse.append(("element", tag, werte, None))
+        else:
+            offen = (tag, werte, [])
+    return tuple(ereignisse)
@@ -0,0 +1,95 @@
+"""Grosse Binärantworten stückweise und mit HTTP-Range ausliefern.
+
+Originale (LV-PDFs bis ~20 MB) wurden bisher gar nicht oder nur als Ganzes
+geladen. Hier liest eine Funktion `lese(start, laenge)` jeweils ein Stück aus
+der Quelle (z.B. `substr` in der Datenbank); nie liegt die ganze Datei im
+Speicher.
+
+Unterstützt wird, was Browser und PDF-Viewer tatsächlich schicken: ein
+einzelner Bereich (`bytes=a-b`, `bytes=a-`, `bytes=-n`), `If-Range` und
+`If-None-Match` gegen das ETag. Mehrere Bereiche in einer Anfrage werden
+ignoriert und mit der ganzen Datei beantwortet — das erlaubt RFC 9110.
+"""
+from __future__ import annotations
+
+import re
+from typing import Callable, Iterator, Optional
+from urllib.parse import quote
+
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+STUECK_BYTES = 1024 * 1024
+
+_BEREICH = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def byte_bereich(header: Optional[str], groesse: int) -> Optional[tuple[int, int]]:
+    """(start, ende) inklusive für einen `Range`-Header; None = ganze Datei.
+
+    ValueError, wenn der Bereich syntaktisch gültig, aber nicht erfüllbar ist
+    (→ 416). Unbekannte oder mehrteilige Angaben gelten als nicht gesetzt.
+    """
+    treffer = _BEREICH.match((header or "").strip())
+    if not treffer or treffer.group(1) == treffer.group(2) == "":
+        return None
+    start, ende = treffer.groups()
+    if start == "":
+        laenge = int(ende)
+        if laenge == 0 or groesse == 0:
+            raise ValueError("leerer Bereich")
+        return max(0, groesse - laenge), groesse - 1
+    start = int(start)
+    ende = groesse - 1 if ende == "" else min(int(ende), groesse - 1)
+    if start >= groesse or start > ende:
+        raise ValueError("Bereich ausserhalb der Datei")
+    return start, ende
+
+
+def _stuecke(lese: Callable[[int, int], bytes], start: int, ende: int) -> Iterator[bytes]:
+    pos = start
+    while pos <= ende:
+        stueck = lese(pos, min(STUECK_BYTES, ende - pos + 1))
+        if not stueck:
+            return
+        yield stueck
+        pos += len(stueck)
+
+
+def bereich_antwort(
+    request: Request,
+    *,
+    groesse: int,
+    etag: str,
+    lese: Callable[[int, int], bytes],
+    media_type: str,
+    dateiname: str,
+) -> Response:
+    """Ganze Datei (200), Teilbereich (206), unverändert (304) oder 416."""
+    etag = f'"{etag}"'
+    kopf = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Cache-Control": "private, max-age=0, must-revalidate",
+        "Content-Disposition": f"inline; filename*=UTF-8''{quote(dateiname)}",
+    }
+    if etag in (request.headers.get("if-none-match") or "").replace(" ", "").split(","):
+        return Response(status_code=304, headers=kopf)
+
+    bereich_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        bereich_header = None   # Datei hat sich geändert: ganze Datei schicken
+    try:
+        bereich = byte_bereich(bereich_header, groesse)
+    except ValueError:
+        return Response(status_code=416, headers={**kopf, "Content-Range": f"bytes */{groesse}"})
+
+    if bereich is None:
+        start, ende, status = 0, groesse - 1, 200
+    else:
+        (start, ende), status = bereich, 206
+        kopf["Content-Range"] = f"bytes {start}-{ende}/{groesse}"
+    kopf["Content-Length"] = str(ende - start + 1)
+    return StreamingResponse(_stuecke(lese, start, ende), status_code=status,
+                             media_type=media_type, headers=kopf)
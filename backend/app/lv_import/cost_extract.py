@@ -62,13 +62,13 @@ def cost_rows_from_positions(
     Textzeile rutschen. In diesem Fall bleiben die Beträge bewusst leer und
     werden visuell bzw. manuell geprüft.
     """
+    positions = [p for p in positions or [] if p.get("bkp_nr")]
+    mappings = norm_lv.match_titles(
+        (p.get("beschreibung") or "", p["bkp_nr"]) for p in positions)
     rows = []
-    for position in positions or []:
-        bkp_nr = position.get("bkp_nr")
-        if not bkp_nr:
-            continue
+    for position, mapping in zip(positions, mappings):
+        bkp_nr = position["bkp_nr"]
         title = position.get("beschreibung") or ""
-        mapping = norm_lv.match_title(title, bkp_nr)
         detected_amount = (
             position.get("betrag") if trust_detected_amounts else None
         )
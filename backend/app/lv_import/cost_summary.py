@@ -92,13 +92,13 @@ def _summary_lines(pages, word_pages=None):
     Koordinaten vorliegen; dann entscheidet die Regex am Zeilenende.
     """
     if word_pages:
-        from app.lv_import.spatial import group_words_to_rows, row_text
+        from app.lv_import.spatial import row_index
 
         out = []
         for sp in word_pages:
             seite = sp.get("page")
-            for row in group_words_to_rows(sp.get("words") or []):
-                text = row_text(row)
+            index = row_index(sp)
+            for row, text in zip(index.rows, index.texts):
                 betrag = None
                 # Rechteste Spalte, die ein Geldbetrag ist.
                 for w in sorted(row, key=lambda x: -x["x0"]):
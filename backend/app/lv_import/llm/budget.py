@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import os
+import threading
 import time
 from dataclasses import dataclass
 from dataclasses import field
@@ -48,10 +49,16 @@ class ImportLlmBudget:
     output_tokens: int = 0
     reasoning_tokens: int = 0
     estimated_cost_usd: float = 0.0
+    # Aus dem Antwort-Cache beantwortet: kostenlos, zählt nicht aufs Limit.
+    cache_hits: int = 0
     stop_reason: str | None = None
     models: list[str] = field(default_factory=list)
     reasoning_levels: list[str] = field(default_factory=list)
     started_at: float = field(default_factory=time.monotonic, repr=False)
+    # Parallele Teilpakete der visuellen Prüfung buchen auf dasselbe Budget.
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False,
+    )
 
     @classmethod
     def from_env(cls) -> "ImportLlmBudget":
@@ -87,15 +94,47 @@ class ImportLlmBudget:
             return False
         return True
 
+    def may_call_parallel(self, estimated_input_tokens: list[int]) -> bool:
+        """Passen alle diese Aufrufe GEMEINSAM noch ins Budget?
+
+        Für gleichzeitig gestartete Aufrufe: jeder einzelne `may_call` sähe
+        noch die alten Zähler. Deshalb wird vorher für alle zusammen geprüft."""
+        if not enabled():
+            self.stop_reason = "LV_LLM_ENABLED=false"
+            return False
+        if self.calls + len(estimated_input_tokens) > self.max_calls:
+            return False
+        projected = self.estimated_cost_usd + sum(
+            self._cost(tokens, self.max_output_tokens) for tokens in estimated_input_tokens
+        )
+        return projected <= self.max_cost_usd
+
     def start_call(
         self, *, model: str | None = None, reasoning: str | None = None,
     ) -> None:
-        self.calls += 1
+        with self._lock:
+            self.calls += 1
+            self._note(model, reasoning)
+
+    def record_cache_hit(
+        self, *, model: str | None = None, reasoning: str | None = None,
+    ) -> None:
+        """Antwort aus dem Cache: ein beantworteter Aufruf ohne Tokens und Kosten."""
+        with self._lock:
+            self.cache_hits += 1
+            self._note(model, reasoning)
+
+    def _note(self, model: str | None, reasoning: str | None) -> None:
         if model and model not in self.models:
             self.models.append(model)
         if reasoning and reasoning not in self.reasoning_levels:
             self.reasoning_levels.append(reasoning)
 
+    @property
+    def answered(self) -> int:
+        """Beantwortete Aufrufe — beim Provider oder aus dem Cache."""
+        return self.calls + self.cache_hits
+
     def record(self, response, *, estimated_input_tokens: int = 0) -> None:
         usage = getattr(response, "usage", None)
         input_tokens = (
@@ -114,12 +153,13 @@ class ImportLlmBudget:
             or getattr(usage, "completion_tokens_details", None)
         )
         reasoning_tokens = getattr(output_details, "reasoning_tokens", None) or 0
-        self.input_tokens += int(input_tokens)
-        self.output_tokens += int(output_tokens)
-        self.reasoning_tokens += int(reasoning_tokens)
-        self.estimated_cost_usd += self._cost(int(input_tokens), int(output_tokens))
-        if self.estimated_cost_usd >= self.max_cost_usd:
-            self.stop_reason = "cost_limit_reached"
+        with self._lock:
+            self.input_tokens += int(input_tokens)
+            self.output_tokens += int(output_tokens)
+            self.reasoning_tokens += int(reasoning_tokens)
+            self.estimated_cost_usd += self._cost(int(input_tokens), int(output_tokens))
+            if self.estimated_cost_usd >= self.max_cost_usd:
+                self.stop_reason = "cost_limit_reached"
 
     @staticmethod
     def _cost(input_tokens: int, output_tokens: int) -> float:
@@ -131,6 +171,7 @@ class ImportLlmBudget:
         return {
             "llm_calls": self.calls,
             "llm_max_calls": self.max_calls,
+            "llm_cache_hits": self.cache_hits,
             "llm_input_tokens": self.input_tokens,
             "llm_output_tokens": self.output_tokens,
             "llm_reasoning_tokens": self.reasoning_tokens,
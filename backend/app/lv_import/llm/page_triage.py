@@ -12,6 +12,7 @@ import os
 import re
 from typing import Any
 
+from app.lv_import.llm import response_cache
 from app.lv_import.llm.budget import ImportLlmBudget
 
 DEFAULT_MODEL = "gpt-5.6-terra"
@@ -62,6 +63,9 @@ RESPONSE_SCHEMA = {
     "additionalProperties": False,
 }
 
+# Cache-Version des Auftrags (Antwort-Cache und Extraktions-Cache).
+_PROMPT_VERSION = response_cache.prompt_version(SYSTEM_PROMPT)
+
 _INTERESTING_TERMS = (
     "projekt", "objekt", "offerte", "angebot", "wärmepumpe", "waermepumpe",
     "heizleistung", "erdsonde", "fussbodenheizung", "fußbodenheizung",
@@ -82,6 +86,16 @@ def max_detail_pages() -> int:
     return min(HARD_MAX_DETAIL_PAGES, max(1, configured))
 
 
+def cache_settings() -> dict:
+    """Was das Grobscan-Ergebnis bei gleichem Dokument beeinflusst."""
+    return {
+        "model": os.getenv("LV_PAGE_TRIAGE_MODEL", DEFAULT_MODEL),
+        "reasoning": os.getenv("LV_PAGE_TRIAGE_REASONING", DEFAULT_REASONING),
+        "detail_page_budget": max_detail_pages(),
+        "prompt": _PROMPT_VERSION,
+    }
+
+
 def _quality(page: dict, classification: dict, extraction_method: str) -> dict:
     text = str(page.get("text") or "")
     compact = re.sub(r"\s+", " ", text).strip()
@@ -183,12 +197,43 @@ def _parse_response(response: Any) -> dict:
     return parsed if isinstance(parsed, dict) else {}
 
 
+def _ask(client, model: str, reasoning: str, prompt: str,
+         budget: ImportLlmBudget, estimated_input: int) -> dict:
+    """Der eigentliche Provideraufruf des Grobscans."""
+    if client is None:
+        import openai
+        client = openai.OpenAI()
+    budget.start_call(model=model, reasoning=reasoning)
+    response = client.responses.create(
+        model=model,
+        timeout=min(120.0, float(os.getenv("LV_VISUAL_REVIEW_TIMEOUT_SECONDS", "180"))),
+        store=False,
+        reasoning={"effort": reasoning},
+        max_output_tokens=min(8000, budget.max_output_tokens),
+        input=[
+            {"role": "system", "content": [{"type": "input_text", "text": SYSTEM_PROMPT}]},
+            {"role": "user", "content": [{"type": "input_text", "text": prompt}]},
+        ],
+        text={"format": {
+            "type": "json_schema", "name": "lv_page_triage",
+            "strict": True, "schema": RESPONSE_SCHEMA,
+        }},
+    )
+    budget.record(response, estimated_input_tokens=estimated_input)
+    return _parse_response(response)
+
+
 def triage(
     pages: list[dict], classification: list[dict], extraction_method: str,
     *, client=None, model: str | None = None,
-    budget: ImportLlmBudget | None = None,
+    budget: ImportLlmBudget | None = None, use_cache: bool | None = None,
 ) -> dict:
-    """Sichtet den kompakten Index aller Seiten; jeder Fehler ist ein Fallback."""
+    """Sichtet den kompakten Index aller Seiten; jeder Fehler ist ein Fallback.
+
+    Gleicher Seitenindex + gleiches Modell → Antwort aus dem Antwort-Cache
+    (standardmässig nur ohne injizierten Client)."""
+    if use_cache is None:
+        use_cache = client is None
     page_index = build_page_index(pages, classification, extraction_method)
     deterministic = deterministic_candidates(page_index)
     allowed = {item["page"] for item in page_index}
@@ -208,31 +253,22 @@ def triage(
         "selected_pages": [item["page"] for item in deterministic],
         "page_index": page_index,
     }
-    if not budget.may_call(estimated_input):
+    reasoning = os.getenv("LV_PAGE_TRIAGE_REASONING", DEFAULT_REASONING)
+    key = response_cache.cache_key(
+        model=f"{model}|{reasoning}", prompt_version=_PROMPT_VERSION,
+        schema=RESPONSE_SCHEMA, payload=prompt,
+    )
+    parsed = (
+        response_cache.lookup(key, budget=budget, model=model, reasoning=reasoning)
+        if use_cache else None
+    )
+    if parsed is None and not budget.may_call(estimated_input):
         return {**fallback, **budget.status()}
     try:
-        if client is None:
-            import openai
-            client = openai.OpenAI()
-        reasoning = os.getenv("LV_PAGE_TRIAGE_REASONING", DEFAULT_REASONING)
-        budget.start_call(model=model, reasoning=reasoning)
-        response = client.responses.create(
-            model=model,
-            timeout=min(120.0, float(os.getenv("LV_VISUAL_REVIEW_TIMEOUT_SECONDS", "180"))),
-            store=False,
-            reasoning={"effort": reasoning},
-            max_output_tokens=min(8000, budget.max_output_tokens),
-            input=[
-                {"role": "system", "content": [{"type": "input_text", "text": SYSTEM_PROMPT}]},
-                {"role": "user", "content": [{"type": "input_text", "text": prompt}]},
-            ],
-            text={"format": {
-                "type": "json_schema", "name": "lv_page_triage",
-                "strict": True, "schema": RESPONSE_SCHEMA,
-            }},
-        )
-        budget.record(response, estimated_input_tokens=estimated_input)
-        parsed = _parse_response(response)
+        if parsed is None:
+            parsed = _ask(client, model, reasoning, prompt, budget, estimated_input)
+            if use_cache:
+                response_cache.remember(key, parsed)
         selected: list[dict] = []
         seen: set[int] = set()
         for item in parsed.get("pages") or []:
@@ -18,11 +18,15 @@ Absicherungen:
 """
 from __future__ import annotations
 
+import json
 import os
 from typing import Optional
 
 from app.lv_import import norm_lv
-from app.lv_import.llm.base import CostMappingLLM
+from app.lv_import.llm import response_cache
+from app.lv_import.llm.base import (
+    CostMappingLLM, RESPONSE_SCHEMA, SYSTEM_PROMPT, build_user_prompt,
+)
 from app.lv_import.llm.anthropic_provider import AnthropicCostMapper
 from app.lv_import.llm.openai_provider import OpenAICostMapper
 from app.lv_import.llm.budget import ImportLlmBudget, enabled as global_enabled
@@ -39,6 +43,8 @@ PROVIDERS: dict[str, type[CostMappingLLM]] = {
     "openai": OpenAICostMapper,
 }
 DEFAULT_PROVIDER = "openai"
+# Cache-Version des Zuordnungsauftrags (Antwort-Cache je Position).
+_PROMPT_VERSION = response_cache.prompt_version(SYSTEM_PROMPT)
 
 
 def enabled() -> bool:
@@ -98,12 +104,17 @@ def _confidence_label(conf: float) -> str:
     return "KI unsicher"
 
 
-def resolve(positions: list[dict], *, provider: Optional[CostMappingLLM] = None) -> dict:
+def resolve(
+    positions: list[dict], *, provider: Optional[CostMappingLLM] = None,
+    use_cache: bool | None = None,
+) -> dict:
     """Offene Positionen zuordnen lassen.
 
     Args:
         positions: [{"source_id", "title", "group"(optional)}] — ohne Beträge.
         provider: injizierbar für Tests/Benchmark; sonst aus der Umgebung.
+        use_cache: Antwort-Cache je Position. Standard: nur ohne injizierten
+            Provider — ein Benchmark soll den Provider messen, nicht den Cache.
 
     Returns:
         {source_id: {canonical_key, mapping_method, mapping_confidence,
@@ -113,6 +124,8 @@ def resolve(positions: list[dict], *, provider: Optional[CostMappingLLM] = None)
     positions = positions[:MAX_POSITIONS]
     if not positions:
         return {}
+    if use_cache is None:
+        use_cache = provider is None
     if provider is None:
         if not enabled():
             return {}
@@ -124,7 +137,8 @@ def resolve(positions: list[dict], *, provider: Optional[CostMappingLLM] = None)
         position["candidates"] = norm_lv.candidates(
             position["title"], position.get("group"), position.get("section_path"),
         )
-    rohdaten = provider.resolve(positions, []) or []
+    rohdaten = _resolve_cached(provider, positions) if use_cache else (
+        provider.resolve(positions, []) or [])
 
     gefragte = {p["source_id"] for p in positions}
     allowed_by_source = {
@@ -172,6 +186,48 @@ def resolve(positions: list[dict], *, provider: Optional[CostMappingLLM] = None)
     return out
 
 
+def _position_key(provider: CostMappingLLM, position: dict) -> str:
+    """Cache-Schlüssel einer einzelnen Position: alles, was der Prompt über sie
+    enthält — ausser der laufenden source_id, die je Offerte anders ist."""
+    eintrag = json.loads(build_user_prompt([{**position, "source_id": ""}], []))
+    return response_cache.cache_key(
+        model=f"{provider.name}|{provider.model}|{getattr(provider, 'reasoning', None)}",
+        prompt_version=_PROMPT_VERSION, schema=RESPONSE_SCHEMA,
+        payload=eintrag["positions"][0],
+    )
+
+
+def _resolve_cached(provider: CostMappingLLM, positions: list[dict]) -> list[dict]:
+    """Wiederkehrende Positionstitel aus dem Antwort-Cache beantworten; nur
+    der Rest geht gebündelt an den Provider.
+
+    Gespeichert wird die Rohzuordnung des Modells je Position. Die Prüfungen
+    unten (geschlossene Welt, Kandidaten, Schwellen) laufen für Treffer genauso
+    wie für frische Antworten."""
+    schluessel = {p["source_id"]: _position_key(provider, p) for p in positions}
+    rohdaten: list[dict] = []
+    offen: list[dict] = []
+    for position in positions:
+        treffer = response_cache.lookup(schluessel[position["source_id"]])
+        if treffer is not None:
+            rohdaten.append({**treffer, "source_id": position["source_id"]})
+        else:
+            offen.append(position)
+    if rohdaten and provider.budget is not None:
+        # Ein Bündel aus dem Cache ist EIN kostenloser Aufruf, nicht einer je Zeile.
+        provider.budget.record_cache_hit(
+            model=provider.model, reasoning=getattr(provider, "reasoning", None))
+    if not offen:
+        return rohdaten
+    frisch = provider.resolve(offen, []) or []
+    for eintrag in frisch:
+        sid = str(eintrag.get("source_id") or "")
+        if sid in schluessel:
+            response_cache.remember(
+                schluessel[sid], {k: v for k, v in eintrag.items() if k != "source_id"})
+    return rohdaten + frisch
+
+
 def _offen(conf: float, grund: str) -> dict:
     """Keine Zuordnung — bewusst ein Prüffall statt einer geratenen Zahl."""
     return {"canonical_key": None, "mapping_method": None,
@@ -217,9 +273,11 @@ def apply_to_rows(
               and not r.get("mapping_confirmed") and (r.get("original_title") or "")]
     if not offene:
         return {"sent": 0, "mapped": 0}
-    if provider is None:
+    eigener_provider = provider is None
+    if eigener_provider:
         provider = get_provider(budget=budget)
-    ergebnis = resolve(positions_from_rows(offene), provider=provider)
+    ergebnis = resolve(positions_from_rows(offene), provider=provider,
+                       use_cache=eigener_provider)
     if not ergebnis:
         return {"sent": len(offene), "mapped": 0}
     zugeordnet = 0
@@ -0,0 +1,232 @@
+"""Antwort-Cache für alle LV-LLM-Aufrufe.
+
+Visuelle Prüfung, Grobscan und Norm-LV-Zuordnung fragten den Provider bei
+jedem Import neu — auch bei identischem Auftrag: gleiches Teil-PDF, gleicher
+Prompt, gleiches Modell, gleiches Parserresultat. Besonders die Zuordnung
+sieht über viele Offerten hinweg immer wieder dieselben Positionstitel.
+
+Schlüssel = SHA-256 über Modell, Promptversion, Antwortschema und den
+Eingabe-Payload. Ändert sich eines davon, ist es ein neuer Auftrag. Gespeichert
+wird die bereits geparste Antwort, nie die Rohantwort des Providers.
+
+Speicher (`LV_LLM_CACHE`):
+
+    memory     – prozesslokal (Standard, wenn kein Verzeichnis gesetzt ist)
+    directory  – eine JSON-Datei je Eintrag unter `LV_LLM_CACHE_DIR`;
+                 überlebt Neustarts und wird von allen Workern geteilt
+    off        – kein Cache
+
+Einträge verfallen nach `LV_LLM_CACHE_TTL_SECONDS` (Standard 30 Tage). Über
+`LV_LLM_CACHE_MAX_ENTRIES` (Standard 2000) hinaus werden die am längsten nicht
+gelesenen Einträge verdrängt.
+
+Ein Treffer kostet nichts. `ImportLlmBudget.record_cache_hit` zählt ihn als
+beantworteten Aufruf ohne Tokens, ohne Kosten und ohne Anrechnung aufs
+Aufruflimit.
+
+Getrennte Schicht: kein DB-, kein Web-Bezug.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 2000
+
+
+def _hash(value: Any) -> str:
+    text = value if isinstance(value, str) else json.dumps(
+        value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def prompt_version(system_prompt: str) -> str:
+    """Kurze Version eines Systemprompts — jede Textänderung ist eine neue."""
+    return _hash(system_prompt)[:16]
+
+
+def cache_key(*, model: str | None, prompt_version: str, schema: Any, payload: Any) -> str:
+    return _hash({
+        "model": model or "", "prompt": prompt_version,
+        "schema": _hash(schema), "payload": _hash(payload),
+    })
+
+
+class MemoryStore:
+    """Prozesslokaler LRU mit TTL.
+
+    Abgelegt und ausgegeben werden Kopien — wie beim `DirectoryStore`, wo jede
+    Antwort frisch aus JSON entsteht. Ein Aufrufer, der sein Ergebnis danach
+    weiter bearbeitet, verändert den Cache-Eintrag nicht."""
+
+    def __init__(self, *, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(value)
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DirectoryStore:
+    """Eine JSON-Datei je Eintrag; gemeinsam für alle Prozesse eines Hosts.
+
+    Die Lesezeit steht in der Datei-mtime — das Verdrängen braucht damit keinen
+    zusätzlichen Index. Schreiben erfolgt atomar über eine Temp-Datei."""
+
+    def __init__(self, directory: str | Path, *, ttl_seconds: float, max_entries: int):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if time.time() - float(data.get("stored_at") or 0) > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)
+        except OSError:  # pragma: no cover
+            pass
+        return data.get("value")
+
+    def put(self, key: str, value) -> None:
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps(
+                {"stored_at": time.time(), "value": value}, ensure_ascii=False,
+            ), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("LLM-Cache nicht beschreibbar: %s", exc)
+            tmp.unlink(missing_ok=True)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        try:
+            files = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        except OSError:  # pragma: no cover
+            return
+        for path in files[:max(0, len(files) - self.max_entries)]:
+            path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.directory.glob("*.json"))
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+def _store_from_env():
+    mode = os.getenv("LV_LLM_CACHE", "").strip().lower()
+    directory = os.getenv("LV_LLM_CACHE_DIR")
+    ttl = _int_env("LV_LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+    max_entries = _int_env("LV_LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+    if mode in {"off", "0", "false", "no", "nein"}:
+        return None
+    if directory and mode in {"", "directory"}:
+        try:
+            return DirectoryStore(directory, ttl_seconds=ttl, max_entries=max_entries)
+        except OSError as exc:
+            logger.warning("LV_LLM_CACHE_DIR unbrauchbar (%s) — prozesslokaler Cache", exc)
+    return MemoryStore(ttl_seconds=ttl, max_entries=max_entries)
+
+
+_store = None
+_store_loaded = False
+
+
+def get_store():
+    """Der konfigurierte Speicher (einmal pro Prozess angelegt) oder None."""
+    global _store, _store_loaded
+    if not _store_loaded:
+        _store = _store_from_env()
+        _store_loaded = True
+    return _store
+
+
+def set_store(store) -> None:
+    """Speicher ersetzen (Tests, eigene Backends); None schaltet ab."""
+    global _store, _store_loaded
+    _store, _store_loaded = store, True
+
+
+def lookup(key: str, *, budget=None, model: str | None = None,
+           reasoning: str | None = None):
+    """Treffer liefern und im Budget als kostenlosen Aufruf verbuchen."""
+    store = get_store()
+    value = store.get(key) if store is not None else None
+    if value is not None and budget is not None:
+        budget.record_cache_hit(model=model, reasoning=reasoning)
+    return value
+
+
+def remember(key: str, value) -> None:
+    store = get_store()
+    if store is not None and value:
+        store.put(key, value)
+
+
+def cached(key: str, call: Callable[[], Any], *, budget=None,
+           model: str | None = None, reasoning: str | None = None):
+    """`call()` nur ausführen, wenn der Auftrag noch nicht beantwortet wurde.
+    Leere Antworten (Fehler, Verweigerung, Budgetstopp) werden nicht gespeichert."""
+    hit = lookup(key, budget=budget, model=model, reasoning=reasoning)
+    if hit is not None:
+        return hit
+    value = call()
+    remember(key, value)
+    return value
@@ -6,19 +6,29 @@ sichtbar ``150`` steht. Diese Stufe gibt deshalb dem gerenderten Seitenbild
 Vorrang, prüft alle Summen deterministisch und startet bei Widersprüchen genau
 einen Korrekturdurchgang. Nur ein widerspruchsfreies Resultat darf in den
 Freigabe-Status gelangen.
+
+Grosse Seitenauswahlen (mehr als `LV_VISUAL_REVIEW_CHUNK_PAGES`, Standard 8)
+werden in zusammenhängende Teilpakete zerlegt und gleichzeitig geprüft
+(`LV_VISUAL_REVIEW_CONCURRENCY`, Standard 3, höchstens 4). Die Teilbefunde
+werden zusammengeführt und danach genau wie ein Einzelbefund validiert und
+bei Bedarf korrigiert. Teilpakete gibt es nur, soweit das Importbudget sie
+zusammen mit Korrekturdurchgang und Norm-LV-Zuordnung noch trägt.
 """
 from __future__ import annotations
 
 import base64
-import io
+import hashlib
 import json
 import os
 import re
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from app.lv_import import commercial, norm_lv, systems
 from app.lv_import.feature_keys import LV_IMPORT_FEATURE_KEYS
+from app.lv_import.pdf_document import als_dokument
+from app.lv_import.llm import response_cache
 from app.lv_import.llm.budget import (
     ImportLlmBudget, enabled as global_enabled, timeout_seconds,
 )
@@ -27,6 +37,12 @@ DEFAULT_MODEL = "gpt-5.6-terra"
 DEFAULT_REASONING = "medium"
 MIN_FEATURE_CONFIDENCE = 0.75
 TOLERANCE_CHF = 1.0
+DEFAULT_CHUNK_PAGES = 8
+DEFAULT_CONCURRENCY = 3
+HARD_MAX_CONCURRENCY = 4
+# Aufrufe, die nach der visuellen Prüfung frei bleiben müssen: der
+# Korrekturdurchgang und die Norm-LV-Zuordnung der offenen Kostenzeilen.
+_RESERVED_CALLS = 2
 
 SYSTEM_PROMPT = """Du bist ein erfahrener Schweizer HLK-Fachplaner. Du erhältst
 nur gezielt ausgewählte Problem-, Kosten- oder Konditionsseiten eines bereits
@@ -364,6 +380,9 @@ RESPONSE_SCHEMA = {
     "additionalProperties": False,
 }
 
+# Cache-Version des Auftrags (Antwort-Cache und Extraktions-Cache).
+_PROMPT_VERSION = response_cache.prompt_version(SYSTEM_PROMPT)
+
 
 def enabled() -> bool:
     return global_enabled() and os.getenv(
@@ -379,6 +398,35 @@ def required() -> bool:
     ).strip().lower() not in {"0", "false", "no", "off", "nein"}
 
 
+def cache_settings() -> dict:
+    """Was das Ergebnis der visuellen Prüfung bei gleichen Seiten beeinflusst."""
+    config = status()
+    return {
+        "model": config["visual_review_model"],
+        "reasoning": config["visual_review_reasoning"],
+        "prompt": _PROMPT_VERSION,
+        "chunk_pages": chunk_pages() if concurrency() > 1 else None,
+    }
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def chunk_pages() -> int:
+    """Seiten je Teilpaket (`LV_VISUAL_REVIEW_CHUNK_PAGES`, mindestens 1)."""
+    return max(1, _int_env("LV_VISUAL_REVIEW_CHUNK_PAGES", DEFAULT_CHUNK_PAGES))
+
+
+def concurrency() -> int:
+    """Gleichzeitige Teilpakete (`LV_VISUAL_REVIEW_CONCURRENCY`; 1 = aus)."""
+    return min(HARD_MAX_CONCURRENCY,
+               max(1, _int_env("LV_VISUAL_REVIEW_CONCURRENCY", DEFAULT_CONCURRENCY)))
+
+
 def status() -> dict:
     active = enabled()
     key_ok = bool(os.getenv("OPENAI_API_KEY"))
@@ -565,6 +613,104 @@ def _merge_focused_correction(original: dict, corrected: dict) -> dict:
     return merged
 
 
+def chunk_plan(
+    page_numbers: list[int] | None, budget: ImportLlmBudget, *,
+    size: int, allow_correction: bool = True,
+) -> list[list[int]]:
+    """Seitenauswahl → zusammenhängende Teilpakete in Seitenreihenfolge.
+
+    Ein einziges Paket (= bisheriges Verhalten), wenn die Auswahl klein ist
+    oder das Budget nicht genug Aufrufe übrig lässt. Sonst so viele Pakete,
+    wie die freien Aufrufe erlauben — gleich gross, höchstens `size` Seiten,
+    sofern das Budget es zulässt."""
+    pages = sorted(set(page_numbers or []))
+    if len(pages) <= size:
+        return [pages]
+    frei = budget.max_calls - budget.calls - _RESERVED_CALLS + (0 if allow_correction else 1)
+    anzahl = min(-(-len(pages) // size), frei)
+    if anzahl < 2:
+        return [pages]
+    groesse, rest = divmod(len(pages), anzahl)
+    out, start = [], 0
+    for i in range(anzahl):
+        ende = start + groesse + (1 if i < rest else 0)
+        out.append(pages[start:ende])
+        start = ende
+    return out
+
+
+def _merge_chunks(results: list[dict]) -> dict:
+    """Befunde der Teilpakete (in Seitenreihenfolge) zu EINEM Befund.
+
+    Die Pakete haben disjunkte Seiten. Listen werden vereinigt; was zweimal
+    gleich gemeldet wurde (z.B. eine Position aus einem Kopf, der auf beiden
+    Paketen steht), zählt einmal. Je Merkmal bzw. BKP-Gruppentotal gewinnt die
+    höchste Confidence. Einzelwerte (Projektangaben, Endsummen) nimmt das erste
+    Paket, das sie nennt; widersprechen sich Pakete, bleibt das als Warnung
+    sichtbar — die Validierung entscheidet danach wie beim Einzelbefund."""
+    results = [r for r in results if r]
+    if len(results) <= 1:
+        return dict(results[0]) if results else {}
+    merged: dict = {"warnings": []}
+
+    projekt: dict = {}
+    for r in results:
+        for key, value in (r.get("project_data") or {}).items():
+            if projekt.get(key) is None:
+                projekt[key] = value
+    merged["project_data"] = projekt
+
+    def beste_je(feld: str, schluessel: str) -> list[dict]:
+        beste: dict[str, dict] = {}
+        for r in results:
+            for eintrag in r.get(feld) or []:
+                key = str(eintrag.get(schluessel) or "").strip()
+                alt = beste.get(key)
+                if alt is None or (_number(eintrag.get("confidence")) or 0) > (
+                        _number(alt.get("confidence")) or 0):
+                    beste[key] = eintrag
+        return list(beste.values())
+
+    merged["features"] = beste_je("features", "key")
+    merged["group_totals"] = beste_je("group_totals", "bkp_group")
+
+    def vereinigt(feld: str, identitaet) -> list[dict]:
+        gesehen: set = set()
+        out = []
+        for r in results:
+            for eintrag in r.get(feld) or []:
+                kennung = identitaet(eintrag)
+                if kennung not in gesehen:
+                    gesehen.add(kennung)
+                    out.append(eintrag)
+        return out
+
+    def ganz(eintrag):
+        return json.dumps(eintrag, sort_keys=True, ensure_ascii=False, default=str)
+
+    merged["costs"] = vereinigt("costs", lambda c: (
+        str(c.get("position") or "").strip(), str(c.get("bkp_group") or "").strip(),
+        _number(c.get("amount"))))
+    merged["conditions"] = vereinigt("conditions", lambda c: (
+        c.get("label"), c.get("kind"), c.get("direction"),
+        _number(c.get("rate_percent")), _number(c.get("amount"))))
+    for feld in ("heat_emission_systems", "heat_generation_systems",
+                 "handwritten_corrections"):
+        merged[feld] = vereinigt(feld, ganz)
+
+    for feld in ("trade_total", "vat_rate", "stated_subtotal_excl_vat",
+                 "stated_vat_amount", "stated_total_incl_vat"):
+        werte = [r.get(feld) for r in results if _number(r.get(feld)) is not None]
+        merged[feld] = werte[0] if werte else None
+        if len({_number(w) for w in werte}) > 1:
+            merged["warnings"].append(
+                f"Teilpakete nennen unterschiedliche Werte für {feld}: "
+                + ", ".join(f"{_number(w):g}" for w in werte))
+    merged["warnings"] = list(dict.fromkeys(
+        merged["warnings"] + [w for r in results for w in r.get("warnings") or []]))
+    return merged
+
+
 def validate(result: dict, *, require_costs: bool = True) -> list[str]:
     """Prüft Geldsummen, Dubletten und technisch unmögliche Mengen."""
     issues: list[str] = []
@@ -673,28 +819,18 @@ def _response_text(response) -> str:
     return ""
 
 
-def _selected_pdf(pdf_bytes: bytes, page_numbers: list[int] | None) -> bytes:
-    """Erzeugt für den API-Aufruf ein PDF nur mit den ausgewählten Seiten."""
-    if not page_numbers:
-        return pdf_bytes
-    try:
-        from pypdf import PdfReader, PdfWriter
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        writer = PdfWriter()
-        for number in sorted(set(page_numbers)):
-            if 1 <= number <= len(reader.pages):
-                writer.add_page(reader.pages[number - 1])
-        target = io.BytesIO()
-        writer.write(target)
-        return target.getvalue() if len(writer.pages) else pdf_bytes
-    except Exception:
-        return pdf_bytes
+def _selected_pdf(pdf, page_numbers: list[int] | None) -> bytes:
+    """Erzeugt für den API-Aufruf ein PDF nur mit den ausgewählten Seiten.
+
+    `pdf` darf Bytes oder das bereits geparste `PdfDocument` der Pipeline sein;
+    dann wird das Original nicht erneut gelesen."""
+    return als_dokument(pdf).subset(page_numbers)
 
 
 def _call(
     client, pdf_bytes: bytes, model: str, budget: ImportLlmBudget,
     correction: str | None = None, original_pages: list[int] | None = None,
-    parser_context: dict | None = None,
+    parser_context: dict | None = None, use_cache: bool = False,
 ) -> dict:
     task = (
         "Prüfe nur die angehängten ausgewählten Seiten. Gib den kleinen "
@@ -723,11 +859,20 @@ def _call(
             "betroffenen Seiten erneut visuell und liefere den kompletten korrigierten "
             f"Datensatz. Fehler:\n{correction}"
         )
+    reasoning = os.getenv("LV_VISUAL_REVIEW_REASONING", DEFAULT_REASONING)
+    key = response_cache.cache_key(
+        model=f"{model}|{reasoning}", prompt_version=_PROMPT_VERSION,
+        schema=RESPONSE_SCHEMA,
+        payload={"pdf": hashlib.sha256(pdf_bytes).hexdigest(), "task": task},
+    )
+    if use_cache:
+        hit = response_cache.lookup(key, budget=budget, model=model, reasoning=reasoning)
+        if hit is not None:
+            return hit
     encoded = base64.b64encode(pdf_bytes).decode("ascii")
     estimated_input = max(500, len(pdf_bytes) // 80 + len(task) // 4)
     if not budget.may_call(estimated_input):
         return {}
-    reasoning = os.getenv("LV_VISUAL_REVIEW_REASONING", DEFAULT_REASONING)
     budget.start_call(model=model, reasoning=reasoning)
     response = client.responses.create(
         model=model,
@@ -758,16 +903,65 @@ def _call(
         parsed = json.loads(_response_text(response))
     except (TypeError, ValueError):
         return {}
-    return parsed if isinstance(parsed, dict) else {}
+    if not isinstance(parsed, dict):
+        return {}
+    if use_cache:
+        response_cache.remember(key, parsed)
+    return parsed
+
+
+def _first_pass(
+    client, document, page_numbers: list[int] | None, model: str,
+    budget: ImportLlmBudget, *, parser_context: dict | None, use_cache: bool,
+    allow_correction: bool, chunk_size: int, workers: int,
+) -> tuple[dict, list[list[int]]]:
+    """Erster Durchgang — als ein Aufruf oder als parallele Teilpakete."""
+    plan = (
+        chunk_plan(page_numbers, budget, size=chunk_size,
+                   allow_correction=allow_correction)
+        if page_numbers and workers > 1 else [page_numbers]
+    )
+    if len(plan) > 1:
+        pakete = [document.subset(seiten) for seiten in plan]
+        if not budget.may_call_parallel([max(500, len(p) // 80) for p in pakete]):
+            plan = [page_numbers]
+    if len(plan) == 1:
+        result = _call(
+            client, document.subset(page_numbers), model, budget,
+            original_pages=page_numbers, parser_context=parser_context,
+            use_cache=use_cache,
+        )
+        return result, plan
+    with ThreadPoolExecutor(max_workers=min(workers, len(plan))) as pool:
+        futures = [
+            pool.submit(
+                _call, client, paket, model, budget, original_pages=seiten,
+                parser_context=parser_context, use_cache=use_cache,
+            )
+            for paket, seiten in zip(pakete, plan)
+        ]
+        teile = [future.result() for future in futures]
+    if not all(teile):
+        # Ein fehlendes Teilpaket ist kein vollständiger Befund.
+        return {}, plan
+    return _merge_chunks(teile), plan
 
 
 def review(
-    pdf_bytes: bytes, *, page_numbers: list[int] | None = None, client=None,
+    pdf_bytes, *, page_numbers: list[int] | None = None, client=None,
     model: str | None = None, budget: ImportLlmBudget | None = None,
     parser_context: dict | None = None, require_costs: bool = True,
-    allow_correction: bool = True,
+    allow_correction: bool = True, use_cache: bool | None = None,
+    chunk_size: int | None = None, workers: int | None = None,
 ) -> dict:
-    """Visuelle Auswertung plus höchstens ein automatischer Korrekturdurchgang."""
+    """Visuelle Auswertung plus höchstens ein automatischer Korrekturdurchgang.
+
+    `pdf_bytes` darf auch das `PdfDocument` der Pipeline sein. Der Antwort-
+    Cache gilt standardmässig nur ohne injizierten Client — Tests und
+    Benchmarks sollen den Provider sehen, nicht den Cache. `chunk_size` und
+    `workers` überschreiben die Teilpaket-Einstellungen aus der Umgebung."""
+    if use_cache is None:
+        use_cache = client is None
     config = status()
     if client is None and not config["visual_review_available"]:
         return {"called": False, "success": False, "attempts": 0,
@@ -780,17 +974,22 @@ def review(
         client = openai.OpenAI()
     budget = budget or ImportLlmBudget.from_env()
     model = model or config["visual_review_model"]
-    selected_pdf = _selected_pdf(pdf_bytes, page_numbers)
+    # Einmal geparst für Erst- und Korrekturdurchgang (Bytes oder PdfDocument).
+    document = als_dokument(pdf_bytes)
+    selected_pdf = document.subset(page_numbers)
     result: dict = {}
     issues: list[str] = []
     attempts = 0
     focused_pages: list[int] = []
+    chunks: list[list[int]] = [sorted(set(page_numbers or []))]
     try:
-        result = _call(
-            client, selected_pdf, model, budget, original_pages=page_numbers,
-            parser_context=parser_context,
+        result, chunks = _first_pass(
+            client, document, page_numbers, model, budget,
+            parser_context=parser_context, use_cache=use_cache,
+            allow_correction=allow_correction,
+            chunk_size=chunk_size or chunk_pages(), workers=workers or concurrency(),
         )
-        attempts = budget.calls
+        attempts = budget.answered
         issues = validate(result, require_costs=require_costs)
         if (
             issues and allow_correction
@@ -803,7 +1002,7 @@ def review(
             fokus = conflict_pages(result, issues)
             korrektur_seiten = fokus or (page_numbers or [])
             korrektur_pdf = (
-                _selected_pdf(pdf_bytes, korrektur_seiten)
+                document.subset(korrektur_seiten)
                 if fokus and set(fokus) != set(page_numbers or []) else selected_pdf
             )
             if fokus:
@@ -815,12 +1014,13 @@ def review(
             corrected = _call(
                 client, korrektur_pdf, model, budget, correction,
                 original_pages=korrektur_seiten, parser_context=parser_context,
+                use_cache=use_cache,
             )
             result = (
                 _merge_focused_correction(result, corrected)
                 if fokus else corrected
             )
-            attempts = budget.calls
+            attempts = budget.answered
             issues = validate(result, require_costs=require_costs)
             focused_pages = fokus
     except Exception as exc:
@@ -833,6 +1033,7 @@ def review(
         "issues": issues,
         "reviewed_pages": sorted(set(page_numbers or [])),
         "focused_pages": focused_pages,
+        "review_chunks": chunks if len(chunks) > 1 else [],
         **budget.status(),
         **config,
     }
@@ -955,11 +1156,15 @@ def apply_result(features: dict, result: dict) -> tuple[list[dict], dict]:
 
     rows: list[dict] = []
     costs_by_group: dict[str, list[dict]] = {}
-    for item in result.get("costs") or []:
+    costs = result.get("costs") or []
+    mappings = norm_lv.match_titles(
+        (str(item.get("title") or "").strip(), str(item.get("bkp_group") or "").strip())
+        for item in costs
+    )
+    for item, mapping in zip(costs, mappings):
         group = str(item.get("bkp_group") or "").strip()
         amount = round(float(item["amount"]), 2)
         title = str(item.get("title") or "").strip()
-        mapping = norm_lv.match_title(title, group)
         umfang = str(item.get("scope_summary") or "").strip()[:400]
         # Eine Sammelposition («Speicher / Frischwasserstation») deckt mehrere
         # Norm-Positionen ab. Der Betrag zählt trotzdem nur einmal.
@@ -19,6 +19,7 @@ geraten und nie ein Schlüssel ausserhalb der Liste erzeugt.
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 from typing import Optional
 
 from app.data.bkp_positionen import BKP_POSITIONEN, BKP_GRUPPEN
@@ -63,17 +64,32 @@ def candidates(
     title: str, bkp_group: str | None, section_path: str | None = None,
     limit: int = 6,
 ) -> list[dict]:
-    """Wenige Ziele für einen unsicheren Fall, bevorzugt aus demselben BKP."""
-    context_tokens = set(falte(f"{section_path or ''} {title}").split())
+    """Wenige Ziele für einen unsicheren Fall, bevorzugt aus demselben BKP.
+
+    Bewertet werden nur Positionen, die ein Wort mit dem Kontext teilen oder in
+    derselben Gruppe liegen (Tokenindex). Alle übrigen haben Punktzahl 0 und
+    füllen — wie bei der vollständigen Rangliste — nach Schlüssel auf."""
+    anzahl = max(1, min(limit, 8))
+    overlap: dict[int, int] = {}
+    for token in set(falte(f"{section_path or ''} {title}").split()):
+        for index in _TOKEN_INDEX.get(token, ()):
+            overlap[index] = overlap.get(index, 0) + 1
+    gruppe = str(bkp_group or "")
+    for index in _GRUPPEN_INDEX.get(gruppe, ()):
+        overlap.setdefault(index, 0)
     ranked = []
-    for position in NORM_POSITIONS:
-        target_tokens = set(falte(position["bezeichnung"]).split())
-        overlap = len(context_tokens & target_tokens)
-        same_group = position["gruppe"] == str(bkp_group or "")
-        score = (10 if same_group else 0) + overlap
-        ranked.append((score, same_group, position["key"], position))
+    for index, treffer in overlap.items():
+        position = NORM_POSITIONS[index]
+        same_group = position["gruppe"] == gruppe
+        ranked.append(((10 if same_group else 0) + treffer, same_group, position["key"], index))
     ranked.sort(key=lambda item: (-item[0], -int(item[1]), item[2]))
-    selected = [item[3] for item in ranked[:max(1, min(limit, 8))]]
+    selected = [NORM_POSITIONS[item[3]] for item in ranked[:anzahl]]
+    if len(selected) < anzahl:
+        for index in _NACH_SCHLUESSEL:
+            if index not in overlap:
+                selected.append(NORM_POSITIONS[index])
+                if len(selected) == anzahl:
+                    break
     return [
         {"key": p["key"], "title": p["bezeichnung"], "group": p["gruppe"]}
         for p in selected
@@ -94,6 +110,15 @@ def falte(text: str) -> str:
 
 _EXACT_INDEX = {falte(p["bezeichnung"]): p["key"] for p in NORM_POSITIONS}
 
+# Kandidatensuche (`candidates`): Wort → Norm-Positionen, Gruppe → Positionen.
+_TOKEN_INDEX: dict[str, list[int]] = {}
+_GRUPPEN_INDEX: dict[str, list[int]] = {}
+for _i, _p in enumerate(NORM_POSITIONS):
+    for _token in set(falte(_p["bezeichnung"]).split()):
+        _TOKEN_INDEX.setdefault(_token, []).append(_i)
+    _GRUPPEN_INDEX.setdefault(_p["gruppe"], []).append(_i)
+_NACH_SCHLUESSEL = sorted(range(len(NORM_POSITIONS)), key=lambda i: NORM_POSITIONS[i]["key"])
+
 # ── Deterministische Regeln ────────────────────────────────────────────────
 # Eine Regel trifft, wenn ALLE `terms` im gefalteten Titel vorkommen, KEIN
 # `nicht` vorkommt, und — falls `kontext` gesetzt ist — mindestens einer der
@@ -177,8 +202,100 @@ _UNBEKANNT = sorted({r["key"] for r in _RULES} - NORM_KEYS)
 assert not _UNBEKANNT, f"Regel zeigt auf unbekannte Norm-Position: {_UNBEKANNT}"
 
 
-def _kontext_erfuellt(regel: dict, norm: str, bkp_group: Optional[str]) -> bool:
-    """Erfüllt die Position den fachlichen Kontext einer Regel?
+# ── Kompilierter Regelabgleich ─────────────────────────────────────────────
+# Die Regeln prüfen Teilzeichenketten («bohr» trifft «Bohrungen», «wp» auch
+# mitten im Wort). Statt für jeden Titel jede Regel mit `in` abzufragen, sucht
+# ein Aho-Corasick-Automat alle Begriffe (terms, nicht, kontext) in EINEM
+# Durchlauf über den Titel. Über den ersten Begriff jeder Regel (invertierter
+# Index) werden nur die Regeln geprüft, die überhaupt treffen können. Die
+# Semantik bleibt exakt die von `begriff in norm`.
+
+class _Automat:
+    """Aho-Corasick über eine feste Begriffsmenge."""
+
+    def __init__(self, begriffe):
+        self._goto: list[dict[str, int]] = [{}]
+        self._ausgabe: list[frozenset[str]] = [frozenset()]
+        for begriff in begriffe:
+            zustand = 0
+            for zeichen in begriff:
+                folge = self._goto[zustand].get(zeichen)
+                if folge is None:
+                    folge = len(self._goto)
+                    self._goto[zustand][zeichen] = folge
+                    self._goto.append({})
+                    self._ausgabe.append(frozenset())
+                zustand = folge
+            self._ausgabe[zustand] = self._ausgabe[zustand] | {begriff}
+        # Fehlerfunktion in Breitensuche; Ausgaben erben vom Fehlerzustand.
+        self._fehler = [0] * len(self._goto)
+        schlange = list(self._goto[0].values())
+        for zustand in schlange:
+            for zeichen, folge in self._goto[zustand].items():
+                schlange.append(folge)
+                f = self._fehler[zustand]
+                while f and zeichen not in self._goto[f]:
+                    f = self._fehler[f]
+                ziel = self._goto[f].get(zeichen, 0)
+                self._fehler[folge] = ziel if ziel != folge else 0
+                self._ausgabe[folge] = self._ausgabe[folge] | self._ausgabe[self._fehler[folge]]
+
+    def finde(self, text: str) -> set[str]:
+        """Alle Begriffe, die als Teilzeichenkette in `text` vorkommen."""
+        goto, fehler, ausgabe = self._goto, self._fehler, self._ausgabe
+        gefunden: set[str] = set()
+        zustand = 0
+        for zeichen in text:
+            while zustand and zeichen not in goto[zustand]:
+                zustand = fehler[zustand]
+            zustand = goto[zustand].get(zeichen, 0)
+            if ausgabe[zustand]:
+                gefunden |= ausgabe[zustand]
+        return gefunden
+
+
+_AUTOMAT = _Automat(sorted({
+    begriff for regel in _RULES
+    for begriff in (*regel["terms"], *(regel.get("nicht") or ()), *(regel.get("kontext") or ()))
+}))
+# Erster Begriff → Regelindizes (in Regelreihenfolge).
+_REGELN_JE_BEGRIFF: dict[str, list[int]] = {}
+for _i, _regel in enumerate(_RULES):
+    _REGELN_JE_BEGRIFF.setdefault(_regel["terms"][0], []).append(_i)
+
+
+@lru_cache(maxsize=4096)
+def _regel_kandidaten(norm: str) -> tuple[tuple[int, bool], ...]:
+    """Regeln, deren Begriffe alle im Titel stehen und kein `nicht`.
+
+    Je Regel: (Index, Kontextbegriff im Titel). Unabhängig von der BKP-Gruppe
+    und deshalb je gefaltetem Titel nur einmal gerechnet."""
+    gefunden = _AUTOMAT.finde(norm)
+    indizes = sorted({i for begriff in gefunden for i in _REGELN_JE_BEGRIFF.get(begriff, ())})
+    out = []
+    for i in indizes:
+        regel = _RULES[i]
+        if not gefunden.issuperset(regel["terms"]):
+            continue
+        if not gefunden.isdisjoint(regel.get("nicht") or ()):
+            continue
+        out.append((i, not gefunden.isdisjoint(regel.get("kontext") or ())))
+    return tuple(out)
+
+
+def _regel_treffer(norm: str, bkp_group: Optional[str]):
+    """(Regel, Kontext erfüllt) aller anwendbaren Regeln in Regelreihenfolge."""
+    for i, kontext_im_titel in _regel_kandidaten(norm):
+        regel = _RULES[i]
+        kontext = regel.get("kontext")
+        kontext_ok = bool(kontext) and (kontext_im_titel or _gruppe_ist_kontext(regel, bkp_group))
+        if kontext and not kontext_ok:
+            continue
+        yield regel, kontext_ok
+
+
+def _gruppe_ist_kontext(regel: dict, bkp_group: Optional[str]) -> bool:
+    """Liefert die Quellhierarchie den fachlichen Kontext einer Regel?
 
     Der Kontext steht meist im Titel («Montage Wärmeverteilung»). Er kann aber
     auch allein aus der Quellhierarchie kommen: «243.5 Transport, Montage» nennt
@@ -186,11 +303,6 @@ def _kontext_erfuellt(regel: dict, norm: str, bkp_group: Optional[str]) -> bool:
     bliebe eine korrekt einsortierte Position ohne Zuordnung, nur weil der
     Unternehmer knapp formuliert hat.
     """
-    kontext = regel.get("kontext")
-    if not kontext:
-        return False
-    if any(begriff in norm for begriff in kontext):
-        return True
     haupt = str(bkp_group or "").split(".")[0]
     return bool(haupt) and regel["key"].split(".")[0] == haupt
 
@@ -215,15 +327,7 @@ def match_title(title: str, bkp_group: Optional[str] = None) -> dict:
 
     # 2) Regeln — beste Trefferstärke gewinnt, Gleichstand bleibt offen.
     treffer: list[tuple[float, str, str]] = []
-    for regel in _RULES:
-        if not all(t in norm for t in regel["terms"]):
-            continue
-        if any(t in norm for t in regel.get("nicht") or ()):
-            continue
-        kontext = regel.get("kontext")
-        kontext_ok = _kontext_erfuellt(regel, norm, bkp_group)
-        if kontext and not kontext_ok:
-            continue
+    for regel, kontext_ok in _regel_treffer(norm, bkp_group):
         score = len(regel["terms"]) + (1.0 if kontext_ok else 0.0)
         # Passende BKP-Gruppe ist nur ein schwacher Bonus (Nummern weichen ab).
         if bkp_group and regel["key"].startswith(bkp_group):
@@ -248,6 +352,22 @@ def match_title(title: str, bkp_group: Optional[str] = None) -> dict:
             "mapping_reason": f"Regel: {beste[2]}"}
 
 
+def match_titles(eintraege) -> list[dict]:
+    """Batch-Variante von `match_title` für alle Kostenzeilen eines Imports.
+
+    `eintraege`: Paare (Titel, BKP-Gruppe). Gleiche Titel werden nur einmal
+    gefaltet und abgeglichen; das Ergebnis ist je Eintrag identisch mit
+    `match_title` (jeweils eine eigene Kopie)."""
+    gesehen: dict[tuple[str, str | None], dict] = {}
+    out = []
+    for title, bkp_group in eintraege:
+        schluessel = (str(title or ""), bkp_group)
+        if schluessel not in gesehen:
+            gesehen[schluessel] = match_title(title, bkp_group)
+        out.append(dict(gesehen[schluessel]))
+    return out
+
+
 def _keine(grund: str) -> dict:
     return {"canonical_key": None, "mapping_method": None,
             "mapping_confidence": None, "mapping_reason": grund}
@@ -281,15 +401,7 @@ def covered_keys(title: str, bkp_group: str | None = None) -> list[str]:
     if not norm:
         return []
     treffer: list[tuple[float, str]] = []
-    for regel in _RULES:
-        if not all(t in norm for t in regel["terms"]):
-            continue
-        if any(t in norm for t in regel.get("nicht") or ()):
-            continue
-        kontext = regel.get("kontext")
-        kontext_ok = _kontext_erfuellt(regel, norm, bkp_group)
-        if kontext and not kontext_ok:
-            continue
+    for regel, kontext_ok in _regel_treffer(norm, bkp_group):
         score = len(regel["terms"]) + (1.0 if kontext_ok else 0.0)
         if bkp_group and regel["key"].startswith(str(bkp_group)):
             score += 0.25
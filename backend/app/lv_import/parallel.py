@@ -0,0 +1,85 @@
+"""Seitenparallele Extraktion in Worker-Prozessen.
+
+OCR und pdfplumber-Wortboxen sind reine CPU-Arbeit pro Seite und voneinander
+unabhängig. Ein gescanntes LV mit 60+ Seiten lief bisher Seite für Seite in
+einem Thread. `map_pages` verteilt die Seiten auf einen Prozesspool:
+
+- Die PDF-Bytes gehen pro Worker genau einmal hinüber (Initializer), nicht
+  pro Seite.
+- Die Seiten werden in zusammenhängende Blöcke geteilt; ein Worker öffnet das
+  PDF pro Block einmal.
+- Die Reihenfolge der Ergebnisse entspricht immer der Reihenfolge der Seiten.
+
+Kleine Dokumente laufen weiter im aufrufenden Prozess — der Prozessstart
+kostet mehr, als er spart. Kann kein Pool gestartet werden (z.B. in einer
+Sandbox ohne Prozesse), läuft derselbe Code sequenziell; das Ergebnis ist
+identisch.
+
+Worker-Anzahl: `LV_PAGE_WORKERS` (Standard bis 4, höchstens 8; `1` schaltet
+die Parallelisierung ab).
+
+Getrennte Schicht: kein DB-, kein Web-Bezug.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable
+
+from app import prozesspools
+
+logger = logging.getLogger(__name__)
+
+# Unterhalb dieser Seitenzahl lohnt sich kein Prozesspool.
+MIN_PAGES_PARALLEL = 8
+
+# Im Worker-Prozess: die PDF-Bytes, einmal per Initializer übergeben.
+_PDF_BYTES = b""
+
+
+def page_workers(workers: int | None = None) -> int:
+    """Effektive Worker-Anzahl (Argument > Umgebung > Standard), gedeckelt."""
+    return prozesspools.workers_aus_umgebung("LV_PAGE_WORKERS", workers)
+
+
+def lohnt_parallel(page_count: int, workers: int | None = None) -> bool:
+    """Würde `map_pages` für so viele Seiten einen Pool starten?"""
+    return page_workers(workers) > 1 and page_count >= MIN_PAGES_PARALLEL
+
+
+def _init_worker(pdf_bytes: bytes) -> None:
+    global _PDF_BYTES
+    _PDF_BYTES = pdf_bytes
+
+
+def _run_chunk(fn, numbers: list[int]) -> list:
+    return fn(_PDF_BYTES, numbers)
+
+
+def map_pages(
+    fn: Callable[[bytes, list[int]], list], pdf_bytes: bytes,
+    page_numbers, *, workers: int | None = None, chunks_per_worker: int = 1,
+) -> list:
+    """`fn(pdf_bytes, [seiten…]) -> [ergebnis je seite]` seitenparallel ausführen.
+
+    `fn` muss auf Modulebene liegen (picklebar) und je Seite genau ein Ergebnis
+    in Eingabereihenfolge liefern. `chunks_per_worker > 1` verteilt feiner —
+    sinnvoll, wenn Seiten sehr unterschiedlich teuer sind (OCR)."""
+    numbers = list(page_numbers)
+    if not lohnt_parallel(len(numbers), workers):
+        return fn(pdf_bytes, numbers)
+    n = page_workers(workers)
+    blocks = prozesspools.aufteilen(numbers, min(len(numbers), n * max(1, chunks_per_worker)))
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(pdf_bytes,),
+        ) as pool:
+            results = list(pool.map(partial(_run_chunk, fn), blocks))
+    except (BrokenProcessPool, OSError) as exc:
+        logger.warning("Seitenparallele Extraktion nicht möglich (%s) — sequenziell", exc)
+        return fn(pdf_bytes, numbers)
+    return [r for block in results for r in block]
@@ -0,0 +1,194 @@
+"""Ein geparstes PDF für den ganzen Import.
+
+Früher wurden dieselben Bytes bis zu dreimal vollständig gelesen: pypdf für
+den Text (`pdf_extract.extract_pages`), pdfplumber für die Wortkoordinaten
+(`spatial.extract_words`) und nochmals pypdf für jedes Teil-PDF der visuellen
+Prüfung (`visual_review._selected_pdf`). Bei grossen LVs war das Parsen der
+grösste Teil der Importzeit.
+
+`PdfDocument` öffnet jede Bibliothek höchstens einmal und hält den Parser
+offen:
+
+    text(n)     – pypdf-Text einer Seite, lazy und gecacht
+    words(n)    – pdfplumber-Wortboxen einer Seite, lazy und gecacht
+    subset([…]) – Teil-PDF aus dem bereits geparsten pypdf-Dokument
+
+pdfplumber-Seiten werden nach dem Auslesen der Wörter wieder geschlossen, damit
+die Layoutobjekte nicht für alle Seiten gleichzeitig im Speicher liegen. Bei
+grossen Dokumenten verteilt `word_pages` die Seiten auf Worker-Prozesse.
+
+Die Ausgaben entsprechen exakt `extract_pages`/`extract_words` — die Klasse
+ändert nur, WIE oft geparst wird, nicht WAS herauskommt. Fehlertoleranz wie
+dort: defekte PDFs oder fehlende Bibliotheken liefern leere Ergebnisse.
+
+Getrennte Schicht: kein DB-, kein Web-Bezug.
+"""
+from __future__ import annotations
+
+import io
+from functools import cached_property
+
+from app.lv_import.parallel import lohnt_parallel, map_pages
+
+
+class PdfDocument:
+    """Lazy geparste Sicht auf EIN PDF (Text, Wortboxen, Teil-PDFs)."""
+
+    def __init__(self, pdf_bytes: bytes):
+        self.pdf_bytes = pdf_bytes or b""
+        self._texts: dict[int, str] = {}
+        self._words: dict[int, list[dict]] = {}
+        self._subsets: dict[tuple[int, ...], bytes] = {}
+
+    # ── pypdf ──────────────────────────────────────────────────────────────
+    @cached_property
+    def _reader(self):
+        if not self.pdf_bytes:
+            return None
+        try:
+            from pypdf import PdfReader
+        except ImportError:  # pragma: no cover
+            return None
+        try:
+            return PdfReader(io.BytesIO(self.pdf_bytes))
+        except Exception:
+            return None
+
+    @cached_property
+    def page_count(self) -> int:
+        """Seitenzahl laut pypdf; 0 bei defektem oder leerem PDF."""
+        if self._reader is None:
+            return 0
+        try:
+            return len(self._reader.pages)
+        except Exception:
+            return 0
+
+    def text(self, page_number: int) -> str:
+        """Born-digital Text einer Seite (1-basiert)."""
+        if page_number not in self._texts:
+            try:
+                text = self._reader.pages[page_number - 1].extract_text() or ""
+            except Exception:
+                text = ""
+            self._texts[page_number] = text
+        return self._texts[page_number]
+
+    def text_pages(self) -> list[dict]:
+        """Wie `pdf_extract.extract_pages`: [{"page": 1, "text": "..."}, ...]."""
+        return [{"page": n, "text": self.text(n)} for n in range(1, self.page_count + 1)]
+
+    def subset(self, page_numbers: list[int] | None) -> bytes:
+        """Teil-PDF nur mit den gewünschten Seiten, aus dem offenen Reader.
+
+        Ohne Auswahl, bei ungültigen Seiten oder Fehlern kommt das Original
+        zurück — wie bisher in `visual_review._selected_pdf`."""
+        if not page_numbers:
+            return self.pdf_bytes
+        key = tuple(sorted(set(page_numbers)))
+        if key not in self._subsets:
+            self._subsets[key] = self._write_subset(key)
+        return self._subsets[key]
+
+    def _write_subset(self, numbers: tuple[int, ...]) -> bytes:
+        if self._reader is None:
+            return self.pdf_bytes
+        try:
+            from pypdf import PdfWriter
+            writer = PdfWriter()
+            for number in numbers:
+                if 1 <= number <= self.page_count:
+                    writer.add_page(self._reader.pages[number - 1])
+            target = io.BytesIO()
+            writer.write(target)
+            return target.getvalue() if len(writer.pages) else self.pdf_bytes
+        except Exception:
+            return self.pdf_bytes
+
+    # ── pdfplumber ─────────────────────────────────────────────────────────
+    @cached_property
+    def _plumber(self):
+        if not self.pdf_bytes:
+            return None
+        try:
+            import pdfplumber
+        except ImportError:  # pragma: no cover — optionale Abhängigkeit
+            return None
+        try:
+            return pdfplumber.open(io.BytesIO(self.pdf_bytes))
+        except Exception:  # pragma: no cover — defektes PDF darf nie den Import sprengen
+            return None
+
+    @cached_property
+    def _plumber_page_count(self) -> int:
+        if self._plumber is None:
+            return 0
+        try:
+            return len(self._plumber.pages)
+        except Exception:  # pragma: no cover
+            return 0
+
+    def words(self, page_number: int) -> list[dict]:
+        """Wortboxen einer Seite (1-basiert) im Format von `spatial.extract_words`."""
+        if page_number not in self._words:
+            self._words[page_number] = self._read_words(page_number)
+        return self._words[page_number]
+
+    def _read_words(self, page_number: int) -> list[dict]:
+        try:
+            page = self._plumber.pages[page_number - 1]
+        except Exception:  # pragma: no cover
+            return []
+        try:
+            words = page.extract_words() or []
+        except Exception:  # pragma: no cover
+            words = []
+        finally:
+            # Layoutobjekte der Seite freigeben; die Wörter sind kopiert.
+            close = getattr(page, "close", None)
+            if close is not None:
+                close()
+        return [
+            {"text": w.get("text", ""), "x0": float(w.get("x0", 0)),
+             "x1": float(w.get("x1", 0)), "top": float(w.get("top", 0)),
+             "bottom": float(w.get("bottom", 0))}
+            for w in words
+        ]
+
+    def word_pages(self, *, workers: int | None = None) -> list[dict]:
+        """Wie `spatial.extract_words`: [{"page": 1, "words": [...]}, ...].
+
+        Grosse Dokumente werden seitenparallel ausgelesen (`parallel.map_pages`);
+        jeder Worker öffnet das PDF einmal für seinen Seitenblock. Kleine
+        Dokumente bleiben beim bereits offenen Parser."""
+        numbers = range(1, self._plumber_page_count + 1)
+        offen = [n for n in numbers if n not in self._words]
+        if lohnt_parallel(len(offen), workers):
+            for n, words in zip(offen, map_pages(_woerter_seiten, self.pdf_bytes,
+                                                 offen, workers=workers)):
+                self._words[n] = words
+        return [{"page": n, "words": self.words(n)} for n in numbers]
+
+    def close(self) -> None:
+        """Offene Parser freigeben (pdfplumber hält Dateiobjekte)."""
+        plumber = self.__dict__.pop("_plumber", None)
+        if plumber is not None:
+            try:
+                plumber.close()
+            except Exception:  # pragma: no cover
+                pass
+        self.__dict__.pop("_reader", None)
+
+
+def _woerter_seiten(pdf_bytes: bytes, page_numbers: list[int]) -> list[list[dict]]:
+    """Worker: Wortboxen eines Seitenblocks mit einem eigenen Parse."""
+    dokument = PdfDocument(pdf_bytes)
+    try:
+        return [dokument.words(n) for n in page_numbers]
+    finally:
+        dokument.close()
+
+
+def als_dokument(pdf) -> PdfDocument:
+    """Bytes oder bereits geparstes Dokument → `PdfDocument`."""
+    return pdf if isinstance(pdf, PdfDocument) else PdfDocument(pdf)
@@ -11,28 +11,16 @@ Getrennte Schicht: kein DB-, kein Web-Bezug — nur Bytes → Seiten.
 """
 from __future__ import annotations
 
+from app.lv_import.parallel import map_pages
+from app.lv_import.pdf_document import PdfDocument
+
 
 def extract_pages(pdf_bytes: bytes) -> list[dict]:
-    """PDF-Bytes → [{"page": 1, "text": "..."}, ...]. Fehler/leere PDFs → []."""
-    if not pdf_bytes:
-        return []
-    try:
-        from pypdf import PdfReader
-    except ImportError:  # pragma: no cover
-        return []
-    import io
-    try:
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-    except Exception:
-        return []
-    pages = []
-    for i, page in enumerate(reader.pages, start=1):
-        try:
-            text = page.extract_text() or ""
-        except Exception:
-            text = ""
-        pages.append({"page": i, "text": text})
-    return pages
+    """PDF-Bytes → [{"page": 1, "text": "..."}, ...]. Fehler/leere PDFs → [].
+
+    Einzelaufruf; innerhalb eines Imports liest `LvPipeline` den Text über ihr
+    gemeinsames `PdfDocument`."""
+    return PdfDocument(pdf_bytes).text_pages()
 
 
 def ist_durchsuchbar(pages) -> bool:
@@ -41,29 +29,65 @@ def ist_durchsuchbar(pages) -> bool:
     return any((p.get("text") or "").strip() for p in (pages or []))
 
 
-def ocr_pages(pdf_bytes: bytes) -> list[dict]:
+# Auflösung der OCR-Rasterung — der bisherige pdf2image-Standard.
+OCR_DPI = 200
+
+
+def ocr_pages(pdf_bytes: bytes, *, page_count: int | None = None,
+              workers: int | None = None) -> list[dict]:
     """OCR-Fallback für Bild-PDF. Best-effort: braucht pdf2image + pytesseract +
     das Tesseract-Binary. Fehlt eine Abhängigkeit, wird [] geliefert (kein
-    Absturz) — der Import bleibt dann ein Bild-PDF und wird manuell erfasst."""
+    Absturz) — der Import bleibt dann ein Bild-PDF und wird manuell erfasst.
+
+    Jede Seite wird einzeln gerastert und sofort erkannt, statt alle Bilder
+    gleichzeitig im Speicher zu halten; grosse Scans laufen seitenparallel
+    (`parallel.map_pages`). Die Seitenreihenfolge bleibt erhalten."""
     if not pdf_bytes:
         return []
     try:
-        from pdf2image import convert_from_bytes
-        import pytesseract
+        import pdf2image  # noqa: F401
+        import pytesseract  # noqa: F401
     except ImportError:  # pragma: no cover — OCR-Deps optional
         return []
+    if page_count is None:
+        page_count = PdfDocument(pdf_bytes).page_count
+    if not page_count:
+        page_count = _pdfinfo_seiten(pdf_bytes)
+    if not page_count:
+        return []
+    texte = map_pages(_ocr_seiten, pdf_bytes, range(1, page_count + 1),
+                      workers=workers, chunks_per_worker=2)
+    return [{"page": i, "text": text} for i, text in enumerate(texte, start=1)]
+
+
+def _pdfinfo_seiten(pdf_bytes: bytes) -> int:
+    """Seitenzahl über poppler, wenn pypdf das PDF nicht lesen kann."""
     try:
-        images = convert_from_bytes(pdf_bytes)
+        from pdf2image import pdfinfo_from_bytes
+        return int(pdfinfo_from_bytes(pdf_bytes).get("Pages") or 0)
     except Exception:  # pragma: no cover
-        return []
-    pages = []
-    for i, img in enumerate(images, start=1):
+        return 0
+
+
+def _ocr_seiten(pdf_bytes: bytes, page_numbers: list[int]) -> list[str]:
+    """Worker: Seiten einzeln rastern und erkennen (höchstens ein Bild offen)."""
+    from pdf2image import convert_from_bytes
+    import pytesseract
+    texte = []
+    for nummer in page_numbers:
+        try:
+            bilder = convert_from_bytes(
+                pdf_bytes, dpi=OCR_DPI, first_page=nummer, last_page=nummer)
+        except Exception:  # pragma: no cover
+            bilder = []
         try:
-            text = pytesseract.image_to_string(img, lang="deu")
+            text = pytesseract.image_to_string(bilder[0], lang="deu") if bilder else ""
         except Exception:  # pragma: no cover
             text = ""
-        pages.append({"page": i, "text": text})
-    return pages
+        for bild in bilder:
+            bild.close()
+        texte.append(text)
+    return texte
 
 
 def ocr_verfuegbar() -> dict:
@@ -3,9 +3,9 @@
 Früher hat jeder Extraktor das PDF neu durchsucht. Jetzt läuft der Weg genau
 einmal, und alle Zwischenergebnisse werden weiterverwendet:
 
-    PDF
-    ↓ extract_pages()            (born-digital Text, pypdf)
-    ↓ spatial extraction         (Wortkoordinaten, pdfplumber — optional)
+    PDF → PdfDocument            (jede Bibliothek parst genau einmal)
+    ↓ text_pages()               (born-digital Text, pypdf)
+    ↓ word_pages()               (Wortkoordinaten, pdfplumber — optional)
     ↓ page classification        (welche Seite ist was)
     ↓ positions / features / costs
 
@@ -19,12 +19,28 @@ from __future__ import annotations
 from functools import cached_property
 
 from app.lv_import import page_classifier as pc
-from app.lv_import.pdf_extract import extract_pages, ist_durchsuchbar, ocr_pages
-from app.lv_import.spatial import extract_words, words_to_pages
+from app.lv_import.pdf_document import PdfDocument
+from app.lv_import.pdf_extract import ist_durchsuchbar, ocr_pages
+from app.lv_import.spatial import words_to_pages, wortseiten
 
 # Extraktionsmethoden (Punkt 28). "image" = gar kein Text gefunden.
 SPATIAL, TEXT, OCR, IMAGE, MANUAL = "spatial_pdf", "text", "ocr", "image", "manual"
 
+# Erhöhen, sobald sich das Ergebnis einer Extraktionsstufe für dieselben Bytes
+# ändert (Text, Wortboxen, Zeilenbildung, Seitenklassen). Gespeicherte
+# Extraktionen einer anderen Version werden dann nicht mehr verwendet.
+PIPELINE_VERSION = "2026.10.1"
+
+# Was `snapshot()` festhält und `from_snapshot()` wieder einsetzt.
+_SNAPSHOT_STAGES = ("pages", "word_pages", "extraction_method", "classification")
+
+
+def extractor_settings() -> dict:
+    """Einstellungen, die das Extraktionsergebnis beeinflussen (Cache-Schlüssel)."""
+    from app.lv_import.pdf_extract import OCR_DPI
+    from app.lv_import.spatial import ZEILEN_TOLERANZ
+    return {"ocr_dpi": OCR_DPI, "zeilen_toleranz": ZEILEN_TOLERANZ}
+
 
 class LvPipeline:
     """Hält alle Zwischenergebnisse EINES LV-Imports.
@@ -35,18 +51,37 @@ class LvPipeline:
 
     def __init__(self, pdf_bytes: bytes):
         self.pdf_bytes = pdf_bytes or b""
+        # Das EINE geparste Dokument — auch für die Teil-PDFs der visuellen
+        # Prüfung (`visual_review.review(pipeline.document, ...)`).
+        self.document = PdfDocument(self.pdf_bytes)
+
+    @classmethod
+    def from_snapshot(cls, pdf_bytes: bytes, snapshot: dict) -> "LvPipeline":
+        """Pipeline mit bereits extrahierten Stufen (Extraktions-Cache).
+
+        Die Stufen landen direkt im `cached_property`-Speicher; das PDF wird
+        nur noch geöffnet, falls später Teil-PDFs gebraucht werden."""
+        pipeline = cls(pdf_bytes)
+        for name in _SNAPSHOT_STAGES:
+            pipeline.__dict__[name] = snapshot[name]
+        pipeline.__dict__["word_pages"] = wortseiten(snapshot["word_pages"])
+        return pipeline
+
+    def snapshot(self) -> dict:
+        """JSON-fähiger Stand der Extraktionsstufen für den Cache."""
+        return {name: getattr(self, name) for name in _SNAPSHOT_STAGES}
 
     # ── Stufe 1: Text ──────────────────────────────────────────────────────
     @cached_property
     def _digital_pages(self) -> list[dict]:
-        return extract_pages(self.pdf_bytes)
+        return self.document.text_pages()
 
     @cached_property
     def word_pages(self) -> list[dict]:
         """Wortkoordinaten (Punkt 3). Leer, wenn pdfplumber fehlt oder Scan."""
         if not ist_durchsuchbar(self._digital_pages):
             return []
-        return [sp for sp in extract_words(self.pdf_bytes) if sp.get("words")]
+        return wortseiten(sp for sp in self.document.word_pages() if sp.get("words"))
 
     @cached_property
     def pages(self) -> list[dict]:
@@ -60,7 +95,7 @@ class LvPipeline:
                 return raeumlich
         if ist_durchsuchbar(self._digital_pages):
             return self._digital_pages
-        ocr = ocr_pages(self.pdf_bytes)
+        ocr = ocr_pages(self.pdf_bytes, page_count=self.document.page_count or None)
         if ist_durchsuchbar(ocr):
             return ocr
         return self._digital_pages
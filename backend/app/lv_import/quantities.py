@@ -23,7 +23,7 @@ import re
 from typing import Optional
 
 from app.lv_import.normalization import parse_number, parse_int
-from app.lv_import.spatial import group_words_to_rows, parse_table_row, row_text, row_bbox
+from app.lv_import.spatial import row_index
 from app.lv_import.synonyms import (
     FEATURE_TERMS, PIPE_INCLUDE_TERMS, PIPE_EXCLUDE_TERMS,
     PIPE_EXCLUDE_SECTION_TERMS, PIPE_SOURCE_TERMS, STORAGE_TERMS,
@@ -104,10 +104,11 @@ def build_rows(pages, word_pages=None) -> list[dict]:
     if word_pages:
         for sp in word_pages:
             seite = sp.get("page")
-            for row in group_words_to_rows(sp.get("words") or []):
-                parsed = parse_table_row(row)
-                parsed.update({"text": row_text(row), "source_page": seite,
-                               "bbox": row_bbox(row), "spatial": True})
+            index = row_index(sp)
+            for i, text in enumerate(index.texts):
+                parsed = index.parsed(i)
+                parsed.update({"text": text, "source_page": seite,
+                               "bbox": index.bboxes[i], "spatial": True})
                 rows.append(parsed)
         if rows:
             return rows
@@ -23,6 +23,7 @@ import re
 from typing import Optional
 
 from app.lv_import.normalization import parse_number
+from app.lv_import.pdf_document import PdfDocument
 
 # Zwei Wörter gehören zur selben Tabellenzeile, wenn ihre vertikale Mitte
 # weniger als diese Toleranz auseinanderliegt (in PDF-Punkten). Bewusst klein:
@@ -30,35 +31,17 @@ from app.lv_import.normalization import parse_number
 ZEILEN_TOLERANZ = 3.0
 
 
-def extract_words(pdf_bytes: bytes) -> list[dict]:
+def extract_words(pdf_bytes: bytes, *, workers: int | None = None) -> list[dict]:
     """PDF-Bytes → [{"page": 1, "words": [{text,x0,x1,top,bottom}, ...]}, ...].
 
     Best-effort: fehlt pdfplumber oder ist das PDF ein Scan, kommt [] zurück und
-    der Importer bleibt beim Textparser (Punkt 28: kein Rückschritt)."""
-    if not pdf_bytes:
-        return []
+    der Importer bleibt beim Textparser (Punkt 28: kein Rückschritt).
+    Einzelaufruf; `LvPipeline` nutzt dafür ihr gemeinsames `PdfDocument`."""
+    dokument = PdfDocument(pdf_bytes)
     try:
-        import pdfplumber
-    except ImportError:  # pragma: no cover — optionale Abhängigkeit
-        return []
-    import io
-    seiten = []
-    try:
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            for i, page in enumerate(pdf.pages, start=1):
-                try:
-                    words = page.extract_words() or []
-                except Exception:  # pragma: no cover
-                    words = []
-                seiten.append({"page": i, "words": [
-                    {"text": w.get("text", ""), "x0": float(w.get("x0", 0)),
-                     "x1": float(w.get("x1", 0)), "top": float(w.get("top", 0)),
-                     "bottom": float(w.get("bottom", 0))}
-                    for w in words
-                ]})
-    except Exception:  # pragma: no cover — defektes PDF darf nie den Import sprengen
-        return []
-    return seiten
+        return wortseiten(dokument.word_pages(workers=workers))
+    finally:
+        dokument.close()
 
 
 def words_to_pages(word_pages) -> list[dict]:
@@ -67,31 +50,123 @@ def words_to_pages(word_pages) -> list[dict]:
     Nutzt die Koordinaten, um Zeilen in visueller Reihenfolge (oben→unten,
     links→rechts) zu erzeugen. Das allein behebt schon einen Teil der
     Reihenfolge-Probleme des flachen Extrakts."""
-    out = []
-    for sp in word_pages or []:
-        zeilen = group_words_to_rows(sp.get("words") or [])
-        text = "\n".join(" ".join(w["text"] for w in z) for z in zeilen)
-        out.append({"page": sp.get("page"), "text": text})
-    return out
+    return [{"page": sp.get("page"), "text": "\n".join(row_index(sp).texts)}
+            for sp in word_pages or []]
 
 
 def group_words_to_rows(words) -> list[list[dict]]:
-    """Wörter zu visuellen Zeilen gruppieren (nach `top`, dann nach `x0`)."""
+    """Wörter zu visuellen Zeilen gruppieren (nach `top`, dann nach `x0`).
+
+    Linear nach dem Sortieren: Die Zeilenmitte wird laufend mitgeführt statt
+    für jedes neue Wort über alle Wörter der Zeile neu gemittelt. Die Summe
+    entsteht in derselben Reihenfolge — das Ergebnis ist bitgleich."""
+    return _gruppieren(words)[0]
+
+
+def _gruppieren(words) -> tuple[list[list[dict]], list[float]]:
+    """Zeilen und ihre mittlere vertikale Mitte."""
     if not words:
-        return []
+        return [], []
     sortiert = sorted(words, key=lambda w: (round(w["top"], 1), w["x0"]))
     zeilen: list[list[dict]] = []
+    mitten: list[float] = []
     aktuell: list[dict] = [sortiert[0]]
+    summe = (sortiert[0]["top"] + sortiert[0]["bottom"]) / 2
     for w in sortiert[1:]:
-        mitte_aktuell = sum((x["top"] + x["bottom"]) / 2 for x in aktuell) / len(aktuell)
         mitte_w = (w["top"] + w["bottom"]) / 2
-        if abs(mitte_w - mitte_aktuell) <= ZEILEN_TOLERANZ:
+        if abs(mitte_w - summe / len(aktuell)) <= ZEILEN_TOLERANZ:
             aktuell.append(w)
+            summe += mitte_w
         else:
             zeilen.append(sorted(aktuell, key=lambda x: x["x0"]))
-            aktuell = [w]
+            mitten.append(summe / len(aktuell))
+            aktuell, summe = [w], mitte_w
     zeilen.append(sorted(aktuell, key=lambda x: x["x0"]))
-    return zeilen
+    mitten.append(summe / len(aktuell))
+    return zeilen, mitten
+
+
+class RowIndex:
+    """Die visuellen Zeilen EINER Wortseite, einmal gebildet.
+
+    Mengen, Merkmale, Kostenzusammenstellung und Labelsuche lesen dieselben
+    Seiten. Früher gruppierte jeder Aufrufer — und jede Labelsuche — die Wörter
+    neu. Der Index hält Zeilen, Zeilenmitten, Texte, Bounding-Boxen, die
+    geparsten Tabellenzeilen (bei Bedarf) und einen Tokenindex Wort → Zeilen.
+    """
+
+    def __init__(self, words, page=None):
+        self.page = page
+        self.words = words
+        self.rows, self.centers = _gruppieren(words or [])
+        self.texts = [row_text(row) for row in self.rows]
+        self.lows = [text.lower() for text in self.texts]
+        self.tokens: dict[str, list[int]] = {}
+        for i, low in enumerate(self.lows):
+            for token in dict.fromkeys(low.split()):
+                self.tokens.setdefault(token, []).append(i)
+        self.word_count = len(words or [])
+        self._bboxes: list | None = None
+        self._parsed: dict[int, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def bboxes(self) -> list[list[float]]:
+        if self._bboxes is None:
+            self._bboxes = [row_bbox(row) for row in self.rows]
+        return self._bboxes
+
+    def parsed(self, i: int) -> dict:
+        """`parse_table_row` der Zeile i (einmal gerechnet; Kopie zurück)."""
+        if i not in self._parsed:
+            self._parsed[i] = parse_table_row(self.rows[i])
+        return dict(self._parsed[i])
+
+    def rows_containing(self, label_low: str) -> list[int]:
+        """Zeilen, deren kleingeschriebener Text `label_low` enthält.
+
+        Hat das Label ein inneres, vollständiges Wort («gesamt länge sonde»),
+        kommen nur die Zeilen dieses Wortes aus dem Tokenindex in Frage. Sonst
+        (Teilwort wie «sonde» in «Erdsonden») bleibt es der Vergleich mit den
+        vorberechneten Zeilentexten."""
+        teile = label_low.split()
+        if len(teile) >= 3:
+            kandidaten = self.tokens.get(teile[1], ())
+        else:
+            kandidaten = range(len(self.lows))
+        return [i for i in kandidaten if label_low in self.lows[i]]
+
+
+class WortSeite(dict):
+    """Wortseite `{"page", "words"}`, die ihren Zeilenindex selbst trägt.
+
+    Der Index lebt am Objekt, das die Wortliste besitzt (`LvPipeline.word_pages`;
+    gefilterte Listen enthalten dieselben Seiten) und stirbt mit ihm. Für JSON
+    (Extraktions-Cache) bleibt es ein gewöhnliches dict."""
+
+    zeilenindex: Optional["RowIndex"] = None
+
+
+def wortseiten(word_pages) -> list[WortSeite]:
+    """Wortseiten in `WortSeite` fassen, damit `row_index` je Seite einmal rechnet."""
+    return [sp if isinstance(sp, WortSeite) else WortSeite(sp) for sp in word_pages or []]
+
+
+def row_index(word_page) -> RowIndex:
+    """Zeilenindex einer Wortseite `{"page", "words"}`.
+
+    Eine `WortSeite` rechnet ihn einmal; ein gewöhnliches dict jedes Mal neu."""
+    words = word_page.get("words") or []
+    index = getattr(word_page, "zeilenindex", None)
+    if index is not None and index.words is words and index.word_count == len(words):
+        return index
+    index = RowIndex(words, word_page.get("page"))
+    if isinstance(word_page, WortSeite):
+        # Zwei Threads rechnen schlimmstenfalls denselben Index doppelt.
+        word_page.zeilenindex = index
+    return index
 
 
 def row_text(row) -> str:
@@ -213,18 +288,17 @@ def find_value_right_of_label(word_pages, label, *, einheit=None,
         return None
     for sp in word_pages or []:
         seite = sp.get("page")
-        zeilen = group_words_to_rows(sp.get("words") or [])
-        for zi, row in enumerate(zeilen):
-            text_low = row_text(row).lower()
-            if label_low not in text_low:
-                continue
+        index = row_index(sp)
+        zeilen = index.rows
+        for zi in index.rows_containing(label_low):
+            row = zeilen[zi]
             # Position des Labelendes bestimmen: das letzte Wort, das noch zum
             # Label gehört. Danach zählt nur, was RECHTS davon steht.
             label_ende_x = _label_ende_x(row, label_low)
             treffer = _zahl_rechts(row, label_ende_x, einheit)
             if treffer is not None:
                 return {"value": treffer[0], "source_page": seite,
-                        "source_text": row_text(row), "bbox": row_bbox(row)}
+                        "source_text": index.texts[zi], "bbox": index.bboxes[zi]}
             # Optionaler Notfall: dieselbe Spalte, nächste Zeile(n).
             for extra in range(1, max_zeilen_abstand + 1):
                 if zi + extra >= len(zeilen):
@@ -233,8 +307,8 @@ def find_value_right_of_label(word_pages, label, *, einheit=None,
                 treffer = _zahl_rechts(folge, label_ende_x, einheit)
                 if treffer is not None:
                     return {"value": treffer[0], "source_page": seite,
-                            "source_text": f"{row_text(row)} / {row_text(folge)}",
-                            "bbox": row_bbox(folge)}
+                            "source_text": f"{index.texts[zi]} / {index.texts[zi + extra]}",
+                            "bbox": index.bboxes[zi + extra]}
     return None
 
 
@@ -274,13 +348,12 @@ def find_labeled_rows(word_pages, begriffe) -> list[dict]:
     out = []
     for sp in word_pages or []:
         seite = sp.get("page")
-        for row in group_words_to_rows(sp.get("words") or []):
-            text = row_text(row)
-            low = text.lower()
+        index = row_index(sp)
+        for i, low in enumerate(index.lows):
             if not any(b in low for b in begriffe_low):
                 continue
-            parsed = parse_table_row(row)
-            parsed.update({"source_page": seite, "source_text": text,
-                           "bbox": row_bbox(row)})
+            parsed = index.parsed(i)
+            parsed.update({"source_page": seite, "source_text": index.texts[i],
+                           "bbox": index.bboxes[i]})
             out.append(parsed)
     return out
@@ -23,6 +23,8 @@ app.add_middleware(
     allow_origins=list(set(origins)),
     allow_methods=["*"],
     allow_headers=["*"],
+    # Seitenweise Listen und Range-Downloads (PDF-Viewer) lesen diese Header.
+    expose_headers=["X-Next-Cursor", "Accept-Ranges", "Content-Range", "Content-Length", "ETag"],
     allow_credentials=False,
 )
 
@@ -88,11 +90,12 @@ from app.database import Base, engine, SessionLocal
 from app.models.heizungscockpit import (  # noqa: F401 — Tabellen vor create_all importieren
     HcAuditEvent, HcProject, HcProjectBaseData, HcGroupTemplate, HcHeatingGroup,
     HcCalculationResult, HcSchema, HcSchemaRevision, BkpEintrag, HcGruppeTyp,
+    HcHydraulikCache, HcRevisionBerechnung,
 )
 from app.models.auth import Firma, User, Role  # noqa: F401
 from app.models.kv import RefProjekt, RefKostenzeile, RefProjektGewerk, RefProjektFeature, Kostenschaetzung, BauindexEintrag  # noqa: F401
 from app.models.grobkostenschaetzung import Korrekturfaktor  # noqa: F401
-from app.models.lv_import import LvImport, LvImportFeature, LvImportCost  # noqa: F401
+from app.models.lv_import import LvImport, LvImportFeature, LvImportCost, LvExtractionCache  # noqa: F401
 from app.bootstrap_admin import seed_admin as _seed_admin
 from app.runtime import is_production
 
@@ -132,7 +135,12 @@ def _ensure_columns():
             ("ebf_m2", "FLOAT"), ("anzahl_nutzungseinheiten", "INTEGER"),
             ("projektart", "VARCHAR"), ("region", "VARCHAR"), ("zertifizierung", "VARCHAR"),
         ],
-        "hc_schemas": [("underlay_json", "TEXT")],
+        "hc_schemas": [("underlay_json", "TEXT"), ("underlay_bild", "TEXT"),
+                       ("underlay_sha256", "VARCHAR(64)")],
+        "hc_schema_revisions": [
+            ("graph_art", "VARCHAR"), ("graph_basis_nr", "INTEGER"),
+            ("graph_daten", "BLOB"), ("calculation_sha256", "VARCHAR(64)"),
+        ],
         "ref_projekte": [
             ("anlagenkonfiguration", "VARCHAR"),
             ("installierte_leistung_neu_kw", "FLOAT"), ("flaeche_fbh_m2", "FLOAT"),
@@ -157,6 +165,8 @@ def _ensure_columns():
             ("projekt_name", "VARCHAR"), ("projekt_nummer", "VARCHAR"),
             ("ort", "VARCHAR"), ("unternehmer", "VARCHAR"), ("offert_datum", "VARCHAR"),
             ("debug_json", "TEXT"),
+            ("processing_stage", "VARCHAR"), ("processing_started_at", "TIMESTAMP"),
+            ("processing_finished_at", "TIMESTAMP"),
         ],
         "lv_import_features": [
             ("source_excerpt", "TEXT"), ("source_bbox", "VARCHAR"),
@@ -199,6 +209,7 @@ def _ensure_columns():
                 # Postgres 9.6+: ADD COLUMN IF NOT EXISTS macht die separate
                 # Existenzprüfung überflüssig und ist bei jedem Neustart idempotent.
                 for name, typ in cols:
+                    typ = "BYTEA" if typ == "BLOB" else typ
                     conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {name} {typ}"))
         _drop_legacy_admin_password_fingerprint(conn, is_sqlite=is_sqlite)
         conn.commit()
@@ -337,3 +348,27 @@ def init_db_and_seed():
             raise RuntimeError("Lokale Korrekturfaktoren konnten nicht angelegt werden") from exc
     finally:
         db.close()
+
+
+@app.on_event("startup")
+def verwaiste_lv_imports_abschliessen():
+    # Läuft nach `init_db_and_seed`, auch in Produktion: Jobs im Speicher
+    # überleben keinen Neustart. Ändert nur Status, nie das Schema.
+    from app.services import lv_import_jobs
+
+    db = SessionLocal()
+    try:
+        anzahl = lv_import_jobs.verwaiste_jobs_aufraeumen(db)
+        if anzahl:
+            print(f"[INIT] {anzahl} verwaiste LV-Imports als fehlgeschlagen abgeschlossen")
+    finally:
+        db.close()
+
+
+@app.on_event("shutdown")
+def prozesspools_beenden():
+    # Variantenrechnung, Projekt-Export und PDF-Berechnungen halten ihre
+    # Worker-Prozesse über Anfragen hinweg; beim Herunterfahren gehen sie mit.
+    from app import prozesspools
+
+    prozesspools.alle_beenden()
@@ -9,11 +9,12 @@ from sqlalchemy import (
     Float,
     ForeignKey,
     Integer,
+    LargeBinary,
     String,
     Text,
     UniqueConstraint,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from app.database import Base
 
 
@@ -252,7 +253,11 @@ class HcSchema(Base):
     # häufig autospeichernden graph_json, damit das grosse Bild-Blob nicht bei
     # jedem Zeichnen mitgeschrieben wird: {mime, data(dataURL), name, w, h,
     # x, y, scale, opacity, locked}. NULL = kein Underlay (Altbestand lädt normal).
+    # Die Data-URL selbst liegt in `underlay_bild` (nur ohne Blob-Speicher) und
+    # wird erst beim Zugriff geladen; Kachelabrufe lesen nur `underlay_sha256`.
     underlay_json = Column(Text, nullable=True)
+    underlay_bild = deferred(Column(Text, nullable=True))
+    underlay_sha256 = Column(String(64), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -280,8 +285,17 @@ class HcSchemaRevision(Base):
     version_nr = Column(Integer, nullable=False)
     bezeichnung = Column(String, nullable=True)
     notiz = Column(Text, nullable=True)
-    graph_json = Column(Text, nullable=False)
-    calculation_json = Column(Text, nullable=True)
+    # Speicherformat (`app.services.schema_revisionen`): ältere Stände tragen
+    # Graph und Berechnung im Klartext. Neue speichern den Graphen komprimiert
+    # als Vollstand oder Delta (`graph_art`, dann ist graph_json leer) und die
+    # Berechnung inhaltsadressiert in `hc_revision_berechnungen`. Gelesen wird
+    # nur über den Dienst; die Listenansicht lädt keine der grossen Spalten.
+    graph_json = deferred(Column(Text, nullable=False))
+    calculation_json = deferred(Column(Text, nullable=True))
+    graph_art = Column(String, nullable=True)                  # "voll" | "delta" | NULL = Klartext
+    graph_basis_nr = Column(Integer, nullable=True)            # version_nr, auf die das Delta aufsetzt
+    graph_daten = deferred(Column(LargeBinary, nullable=True))  # zlib(JSON)
+    calculation_sha256 = Column(String(64), nullable=True, index=True)
     calculation_engine_version = Column(String, nullable=False, default="hydraulik-v1")
     diff_json = Column(Text, nullable=False, default="{}")
     node_count = Column(Integer, nullable=False, default=0)
@@ -293,6 +307,42 @@ class HcSchemaRevision(Base):
     schema = relationship("HcSchema", back_populates="revisions")
 
 
+class HcRevisionBerechnung(Base):
+    """Rechenergebnis gespeicherter Schema-Stände, einmal je Inhalt.
+
+    Stände, die sich nur in Lage oder Beschriftung unterscheiden, haben dasselbe
+    Ergebnis; es liegt hier einmal (zlib-komprimiertes JSON), adressiert über
+    seinen SHA-256. Anders als `hc_hydraulik_cache` verfällt nichts — ein Stand
+    ist unveränderlich.
+    """
+
+    __tablename__ = "hc_revision_berechnungen"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, unique=True, index=True)
+    daten = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class HcHydraulikCache(Base):
+    """Dauerhafte Stufe des Hydraulik-Ergebnis-Caches.
+
+    Schlüssel = SHA-256 aus Rechengraph und Rechenstand
+    (`app.services.hydraulik_cache`). Projektstatus, PDF-Export und Schema-Stand
+    rechnen denselben gespeicherten Graphen so nur einmal — auch über einen
+    Neustart hinweg. Reines Maschinenergebnis ohne Mandantenbezug: wer den
+    Schlüssel kennt, kennt schon den ganzen Graphen.
+    """
+
+    __tablename__ = "hc_hydraulik_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)
+    engine_version = Column(String, nullable=False)
+    ergebnis_json = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
 class HcProjectParameter(Base):
     """Herkunft eines Projektparameters (§6) — nur die Werte, die WEDER aus den
     Grunddaten NOCH aus dem Schema stammen: Ergänzungen aus dem Gebäude
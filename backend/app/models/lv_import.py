@@ -5,15 +5,16 @@ from datetime import datetime
 import enum
 
 from sqlalchemy import (
-    Column, DateTime, Float, ForeignKey, Integer, LargeBinary, String, Text, Boolean,
+    Column, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String, Text, Boolean,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from app.database import Base
 
 
 class LvImportStatus(str, enum.Enum):
-    uploaded = "uploaded"
+    uploaded = "uploaded"        # Original gespeichert, Job wartet auf einen Worker
+    processing = "processing"    # Worker läuft; Stufe in `processing_stage`
     extracted = "extracted"
     review = "review"
     approved = "approved"
@@ -22,13 +23,20 @@ class LvImportStatus(str, enum.Enum):
 
 class LvImport(Base):
     __tablename__ = "lv_imports"
+    # Keyset-Pagination der Importliste: neueste zuerst, je Firma.
+    __table_args__ = (
+        Index("ix_lv_imports_tenant_created_id", "tenant_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tenant_id = Column(Integer, default=1, nullable=False, index=True)
     project_id = Column(Integer, ForeignKey("hc_projects.id"), nullable=True, index=True)
     filename = Column(String, nullable=False)
     file_hash = Column(String, nullable=False, index=True)     # SHA-256 des Originals
-    original_pdf = Column(LargeBinary, nullable=True)          # Original nie überschreiben
+    # Original (bis ~20 MB) und Debug-Bericht werden erst beim Zugriff geladen:
+    # Liste, Status-Polling und Übersichten brauchen sie nicht. Das Original
+    # liefert `GET /lv-imports/{id}/original` stückweise aus.
+    original_pdf = deferred(Column(LargeBinary, nullable=True))  # Original nie überschreiben
     page_count = Column(Integer, nullable=False, default=0)
     is_searchable = Column(Boolean, nullable=False, default=True)  # born-digital vs. Bild-PDF
     # Herkunft des Textes (P0 #1): "digital" = Textebene, "ocr" = per OCR erkannt,
@@ -57,7 +65,12 @@ class LvImport(Base):
     waehrung = Column(String, nullable=True)
     # Punkt 25/30 — Verarbeitungsbericht (Seitenklassen, Trefferzahlen) als JSON
     # für die Import-Zusammenfassung und den Debug-Dump.
-    debug_json = Column(Text, nullable=True)
+    debug_json = deferred(Column(Text, nullable=True))
+    # Importjob: die Extraktion läuft ausserhalb des Upload-Requests. Die Stufe
+    # macht den Fortschritt für den Statusendpunkt sichtbar.
+    processing_stage = Column(String, nullable=True)
+    processing_started_at = Column(DateTime, nullable=True)
+    processing_finished_at = Column(DateTime, nullable=True)
     created_by = Column(Integer, nullable=True, index=True)
     created_by_name = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -214,3 +227,25 @@ class LvImportSystem(Base):
     confirmed = Column(Boolean, nullable=False, default=False)
 
     lv_import = relationship("LvImport", back_populates="systems")
+
+
+class LvExtractionCache(Base):
+    """Inhaltsadressierter Cache der teuren Importstufen.
+
+    Schlüssel = Hash aus Datei-SHA-256, Pipelineversion und den Einstellungen
+    der jeweiligen Stufe (`app.services.lv_extraction_cache`). Ein erneuter
+    Upload desselben Angebots — auch in ein anderes Projekt — überspringt damit
+    Text-/Wortextraktion, OCR, Klassifikation, Grobscan und visuelle Prüfung.
+    Gespeichert wird nur Maschinenergebnis, nie eine Benutzerkorrektur.
+    """
+
+    __tablename__ = "lv_extraction_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)
+    kind = Column(String, nullable=False)          # extraction | triage | visual
+    file_hash = Column(String, nullable=False, index=True)
+    payload_json = Column(Text, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, nullable=True)
@@ -146,14 +146,15 @@ def _graph_counts(graph_json) -> tuple[int, int]:
     return len(graph.get("nodes") or []), len(graph.get("edges") or [])
 
 
-def _schema_warnungen(graph_json) -> Optional[int]:
+def _schema_warnungen(graph_json, db=None) -> Optional[int]:
     """Anzahl Hydraulik-Warnungen aus dem Rechenkern — dieselbe Wahrheit wie im
-    Editor (§16). Fehler bei kaputten Graphen dürfen den Status nicht sprengen."""
+    Editor (§16). Fehler bei kaputten Graphen dürfen den Status nicht sprengen.
+    Das Ergebnis teilt sich den Cache mit Editor, Export und Schema-Stand."""
     import json
-    from app.calculations.hydraulik import berechne_schema
+    from app.services import hydraulik_cache
     try:
         graph = json.loads(graph_json) if isinstance(graph_json, str) else (graph_json or {})
-        res = berechne_schema(graph.get("nodes") or [], graph.get("edges") or [])
+        res = hydraulik_cache.berechne(graph.get("nodes") or [], graph.get("edges") or [], db)
         return len(res.get("warnungen") or [])
     except Exception:
         return None
@@ -191,7 +192,7 @@ def status_fuer_projekt(db, project, tenant_id: int) -> dict:
         )
         revision_nr = letzte_rev.version_nr if letzte_rev else 0
         if node_count > 0:
-            schema_warnings = _schema_warnungen(schema.graph_json)
+            schema_warnings = _schema_warnungen(schema.graph_json, db)
 
     ks = (
         db.query(Kostenschaetzung)
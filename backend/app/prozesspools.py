@@ -0,0 +1,89 @@
+"""Dauerhafte Prozesspools für CPU-lastige Arbeit im Webprozess.
+
+Variantenrechnung, Projekt-Export und Berechnungsteil des PDFs verteilen ihre
+Arbeit auf Worker-Prozesse. Ein Pool je Aufgabe bleibt über Anfragen hinweg
+bestehen — der Start eines `spawn`-Prozesses kostet mehr als die meisten
+Aufträge. Hier liegt, was sie teilen (Worker-Anzahl und Aufteilung nutzt auch
+die seitenparallele LV-Extraktion mit ihrem kurzlebigen Pool):
+
+- Worker-Anzahl: Argument > Umgebungsvariable > Standard, gedeckelt
+- Aufteilung der Arbeit in zusammenhängende, gleich grosse Blöcke
+- lazy gestarteter Pool je Name, neu bei anderer Worker-Anzahl
+- Verwerfen nach einem weggebrochenen Pool
+- `alle_beenden` beim Herunterfahren der App (`main.py`)
+
+Getrennte Schicht: kein DB-, kein Web-Bezug.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_WORKERS = 4
+HARD_MAX_WORKERS = 8
+
+_alle: list["Prozesspool"] = []
+_alle_lock = threading.Lock()
+
+
+def workers_aus_umgebung(variable: str, workers: int | None = None) -> int:
+    """Effektive Worker-Anzahl (Argument > Umgebung > Standard), gedeckelt."""
+    if workers is None:
+        try:
+            workers = int(os.getenv(variable, "0")) or min(DEFAULT_WORKERS, os.cpu_count() or 1)
+        except ValueError:
+            workers = min(DEFAULT_WORKERS, os.cpu_count() or 1)
+    return min(HARD_MAX_WORKERS, max(1, workers))
+
+
+def aufteilen(werte: list, teile: int) -> list:
+    """Zusammenhängende, möglichst gleich grosse Blöcke in Eingabereihenfolge."""
+    groesse, rest = divmod(len(werte), teile)
+    out, start = [], 0
+    for i in range(teile):
+        ende = start + groesse + (1 if i < rest else 0)
+        if ende > start:
+            out.append(werte[start:ende])
+        start = ende
+    return out
+
+
+class Prozesspool:
+    """Ein benannter, lazy gestarteter `ProcessPoolExecutor`."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._pool: ProcessPoolExecutor | None = None
+        self._workers = 0
+        self._lock = threading.Lock()
+        with _alle_lock:
+            _alle.append(self)
+
+    def hole(self, workers: int) -> ProcessPoolExecutor:
+        """Den Pool mit `workers` Prozessen; startet ihn bei Bedarf neu."""
+        with self._lock:
+            if self._pool is None or self._workers != workers:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False, cancel_futures=True)
+                # `spawn`: keine geerbten DB-Verbindungen und Threads des Webprozesses.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                self._workers = workers
+            return self._pool
+
+    def verwerfen(self) -> None:
+        """Pool beenden; der nächste `hole` startet einen neuen."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+def alle_beenden() -> None:
+    """Alle Pools beenden, z.B. beim Herunterfahren der App."""
+    with _alle_lock:
+        pools = list(_alle)
+    for pool in pools:
+        pool.verwerfen()
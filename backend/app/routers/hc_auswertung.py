@@ -16,7 +16,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from fastapi.responses import Response
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload, undefer
 
 from app.auth import get_current_user
 from app import fachwerte
@@ -445,8 +445,11 @@ def list_refs(user: User = Depends(get_current_user), db: Session = Depends(get_
         db.query(RefProjekt).filter(RefProjekt.tenant_id == user.tenant_id)
         .order_by(RefProjekt.created_at.desc()).all()
     )
+    # Die Übersicht braucht je Import den Debug-Bericht (Konditionen) — aber
+    # nie das Original-PDF, das bleibt `deferred`.
     imports = (
         db.query(LvImport)
+        .options(undefer(LvImport.debug_json), selectinload(LvImport.conditions))
         .filter(
             LvImport.tenant_id == user.tenant_id,
             LvImport.ref_projekt_id.in_([r.id for r in refs] or [-1]),
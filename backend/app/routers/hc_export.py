@@ -2,16 +2,19 @@ import json
 import re
 
 from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.auth import get_current_user
-from app.calculations.hydraulik import berechne_schema
 from app.database import get_db
 from app.export.pdf import erzeuge_pdf
 from app.export.design import fuer_firma
 from app.models.auth import User
-from app.models.heizungscockpit import HcProject, HcSchema
+from app.models.heizungscockpit import HcProject, HcProjectNote, HcSchema, HcSchemaRevision
+from app.routers.hc_grobkostenschaetzung import export_daten, export_dateiname, markiere_exportiert_nach
+from app.services import hydraulik_cache, pdf_export_cache, projekt_export
 
 router = APIRouter(prefix="/api/v1", tags=["Heizungscockpit – Export"])
 
@@ -21,6 +24,32 @@ class SchemaPdfRequest(BaseModel):
     graph: dict | None = None
 
 
+def _sicher(name: str | None, ersatz: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", name or "").strip("_") or ersatz
+
+
+def _plankopf(p: HcProject | None, s: HcSchema, user: User, revision: int) -> dict:
+    return {
+        "projektnummer": p.projektnummer if p and p.projektnummer else (str(p.id) if p else "—"),
+        "bauherr": (p.bauherr or p.kunde) if p else "—",
+        "standort": (
+            ", ".join(filter(None, [p.strasse, " ".join(filter(None, [p.plz, p.ort]))]))
+            or p.standort or "—"
+        ) if p else "—",
+        "planer": user.name or user.email,
+        "bearbeiter": user.name or user.email,
+        "planbezeichnung": (p.planbezeichnung if p and p.planbezeichnung else None) or s.name or "Prinzipschema",
+        "dokumentnummer": f"HC-{p.id if p else 'P'}-{s.id}",
+        "revision": str(revision),
+        "status": (
+            f"SIA {p.sia_phase or '—'} · {p.projektfortschritt_pct or 0}%"
+            if p else "Entwurf"
+        ),
+        "planformat": "A3 quer",
+        "logo_data_url": user.firma.logo_data_url if user.firma else None,
+    }
+
+
 def _schema_pdf_response(schema_id: int, inhalt: str, user: User, db: Session,
                          graph_override: dict | None = None):
     if inhalt not in ("schema", "berechnungen", "beides"):
@@ -43,7 +72,7 @@ def _schema_pdf_response(schema_id: int, inhalt: str, user: User, db: Session,
             graph = {}
     nodes = graph.get("nodes") or []
     edges = graph.get("edges") or []
-    results = berechne_schema(nodes, edges)
+    results = hydraulik_cache.berechne(nodes, edges, db)
 
     pdf = erzeuge_pdf(
         p.name if p else "Projekt", s.name or "Schema", inhalt,
@@ -51,28 +80,10 @@ def _schema_pdf_response(schema_id: int, inhalt: str, user: User, db: Session,
         # Der Auftritt gehoert der Firma, die exportiert. Ohne eigene Marke
         # bleibt es beim bisherigen Standard-Look.
         marke=fuer_firma(user.firma.name if user.firma else None),
-        plankopf={
-            "projektnummer": p.projektnummer if p and p.projektnummer else (str(p.id) if p else "—"),
-            "bauherr": (p.bauherr or p.kunde) if p else "—",
-            "standort": (
-                ", ".join(filter(None, [p.strasse, " ".join(filter(None, [p.plz, p.ort]))]))
-                or p.standort or "—"
-            ) if p else "—",
-            "planer": user.name or user.email,
-            "bearbeiter": user.name or user.email,
-            "planbezeichnung": (p.planbezeichnung if p and p.planbezeichnung else None) or s.name or "Prinzipschema",
-            "dokumentnummer": f"HC-{p.id if p else 'P'}-{s.id}",
-            "revision": str(max((revision.version_nr for revision in s.revisions), default=0)),
-            "status": (
-                f"SIA {p.sia_phase or '—'} · {p.projektfortschritt_pct or 0}%"
-                if p else "Entwurf"
-            ),
-            "planformat": "A3 quer",
-            "logo_data_url": user.firma.logo_data_url if user.firma else None,
-        },
+        plankopf=_plankopf(p, s, user, max((revision.version_nr for revision in s.revisions), default=0)),
+        cache=pdf_export_cache.prozess_cache(),
     )
-    sicher = re.sub(r"[^A-Za-z0-9_-]+", "_", (p.name if p else "Projekt")).strip("_") or "Projekt"
-    dateiname = f"{sicher}_{inhalt}.pdf"
+    dateiname = f"{_sicher(p.name if p else 'Projekt', 'Projekt')}_{inhalt}.pdf"
     return Response(
         content=pdf,
         media_type="application/pdf",
@@ -84,7 +95,7 @@ def _schema_pdf_response(schema_id: int, inhalt: str, user: User, db: Session,
 def schema_pdf(schema_id: int, inhalt: str = "beides", user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """PDF-Export: inhalt = schema | berechnungen | beides (Abnahme F4).
 
-    Schema als Vektor (SVG→PDF, A3 quer) inkl. Legende; Berechnungen pro
+    Schema als Vektor (A3 quer) inkl. Legende; Berechnungen pro
     Bauteil mit Eingaben + Resultat + Einheit; Deckblatt immer dabei.
     Verlangt ein gültiges Bearer-Token (Sicherheits-Review 2026-07-19) — das
     Frontend muss den PDF-Endpunkt darum authentifiziert (Axios-Blob statt
@@ -101,3 +112,150 @@ def schema_pdf_exakt(schema_id: int, body: SchemaPdfRequest,
         schema_id, body.inhalt, user, db,
         graph_override=body.graph,
     )
+
+
+# ── Projekt-Export (alle Schemas, Grobkostenschätzung, Journal) ────────────
+
+def _projekt_export_teile(project_id: int, variante: str, user: User, db: Session) -> tuple:
+    """Alles, was ins Projekt-ZIP gehört, als renderfertige Teile.
+
+    Hier liegt der ganze DB-Zugriff; gerendert wird danach ohne DB. Ist ein
+    Rechenergebnis schon im Hydraulik-Cache, geht es mit, sonst rechnet der
+    Worker. Eine fehlende oder veraltete Grobkostenschätzung fehlt im ZIP und
+    steht als Hinweis drin.
+
+    Liefert (dateiname, teile, hinweise, geschrieben). `geschrieben` gehört an
+    `zip_strom`/`starte_job`: erst wenn PDF und Excel der Schätzung im ZIP
+    stehen, gilt sie als exportiert.
+    """
+    if variante not in ("brutto", "netto"):
+        raise HTTPException(status_code=422, detail="variante muss brutto oder netto sein")
+    p = (db.query(HcProject)
+         .filter(HcProject.id == project_id, HcProject.tenant_id == user.tenant_id)
+         .first())
+    if not p:
+        raise HTTPException(status_code=404, detail="Projekt nicht gefunden")
+    projekt_name = p.name or "Projekt"
+    marke = fuer_firma(user.firma.name if user.firma else None)
+    teile, hinweise = [], []
+    geschrieben = None
+
+    schemas = (db.query(HcSchema)
+               .filter(HcSchema.project_id == p.id, HcSchema.tenant_id == user.tenant_id)
+               .order_by(HcSchema.id)
+               .all())
+    revisionen = dict(
+        db.query(HcSchemaRevision.schema_id, func.max(HcSchemaRevision.version_nr))
+        .filter(HcSchemaRevision.schema_id.in_([s.id for s in schemas]))
+        .group_by(HcSchemaRevision.schema_id)
+        .all()
+    ) if schemas else {}
+    vergeben = set()
+    for s in schemas:
+        try:
+            graph = json.loads(s.graph_json) if s.graph_json else {}
+        except Exception:
+            graph = {}
+        nodes = graph.get("nodes") or []
+        edges = graph.get("edges") or []
+        name = f"Schemas/{_sicher(s.name, 'Schema')}.pdf"
+        if name in vergeben:
+            name = f"Schemas/{_sicher(s.name, 'Schema')}_{s.id}.pdf"
+        vergeben.add(name)
+        teile.append(projekt_export.Teil(name, projekt_export.SCHEMA, {
+            "projekt_name": projekt_name,
+            "schema_name": s.name or "Schema",
+            "nodes": nodes,
+            "edges": edges,
+            "results": hydraulik_cache.nachschlagen(nodes, edges, db),
+            "plankopf": _plankopf(p, s, user, revisionen.get(s.id) or 0),
+            "marke": marke,
+        }))
+
+    try:
+        _, inputs, result, ks, _ = export_daten(project_id, variante, user, db)
+    except HTTPException as exc:
+        hinweise.append(f"Grobkostenschätzung: nicht enthalten ({exc.detail})")
+    else:
+        kosten = {"projekt_name": projekt_name, "inputs": inputs, "result": result, "variante": variante}
+        teile.append(projekt_export.Teil(
+            export_dateiname(projekt_name, variante, "pdf"), projekt_export.KOSTEN_PDF, kosten))
+        teile.append(projekt_export.Teil(
+            export_dateiname(projekt_name, variante, "xlsx"), projekt_export.KOSTEN_XLSX, kosten))
+        geschrieben = _nach_kosten_export(ks.id, variante, db)
+
+    notizen = (db.query(HcProjectNote)
+               .filter(HcProjectNote.project_id == p.id, HcProjectNote.tenant_id == user.tenant_id)
+               .order_by(HcProjectNote.created_at)
+               .all())
+    if notizen:
+        teile.append(projekt_export.Teil("Journal.txt", projekt_export.JOURNAL, {
+            "projekt_name": projekt_name,
+            "eintraege": [{
+                "kind": n.kind,
+                "titel": n.titel,
+                "text": n.text,
+                "faellig_am": n.faellig_am.isoformat() if n.faellig_am else None,
+                "erledigt_at": n.erledigt_at.isoformat() if n.erledigt_at else None,
+                "autor_name": n.autor_name,
+                "created_at": n.created_at.isoformat() if n.created_at else None,
+            } for n in notizen],
+        }))
+    return f"{_sicher(projekt_name, 'Projekt')}_Export.zip", teile, hinweise, geschrieben
+
+
+def _nach_kosten_export(ks_id: int, variante: str, db: Session):
+    # Der Stream bzw. Job läuft über das Ende der Request-Session hinaus.
+    neue_session = sessionmaker(bind=db.get_bind())
+
+    def geschrieben(im_zip: list) -> None:
+        arten = {t.art for t in im_zip}
+        if {projekt_export.KOSTEN_PDF, projekt_export.KOSTEN_XLSX} <= arten:
+            with neue_session() as s:
+                markiere_exportiert_nach(ks_id, variante, s)
+    return geschrieben
+
+
+@router.get("/projects/{project_id}/export.zip")
+def projekt_export_zip(project_id: int, variante: str = "netto",
+                       user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Alle Schemas (PDF), Grobkostenschätzung (PDF + Excel) und Journal als ZIP.
+
+    Gerendert wird parallel; das ZIP fliesst, sobald die ersten Teile fertig
+    sind. Für sehr grosse Projekte: `POST …/export-jobs`.
+    """
+    dateiname, teile, hinweise, geschrieben = _projekt_export_teile(project_id, variante, user, db)
+    return StreamingResponse(
+        projekt_export.zip_strom(teile, hinweise, geschrieben=geschrieben),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{dateiname}"'},
+    )
+
+
+@router.post("/projects/{project_id}/export-jobs", status_code=202)
+def projekt_export_job(project_id: int, variante: str = "netto",
+                       user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Projekt-Export im Hintergrund; Status über `GET /export-jobs/{id}`."""
+    dateiname, teile, hinweise, geschrieben = _projekt_export_teile(project_id, variante, user, db)
+    job = projekt_export.starte_job(teile, user.tenant_id, dateiname, hinweise, geschrieben=geschrieben)
+    return job.als_dict()
+
+
+def _job(job_id: str, user: User) -> projekt_export.ExportJob:
+    job = projekt_export.hole_job(job_id, user.tenant_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export-Job nicht gefunden")
+    return job
+
+
+@router.get("/export-jobs/{job_id}")
+def projekt_export_job_status(job_id: str, user: User = Depends(get_current_user)):
+    return _job(job_id, user).als_dict()
+
+
+@router.get("/export-jobs/{job_id}/download")
+def projekt_export_job_download(job_id: str, user: User = Depends(get_current_user)):
+    job = _job(job_id, user)
+    if job.status != projekt_export.FERTIG:
+        raise HTTPException(status_code=409, detail=f"Export-Job ist nicht fertig ({job.status})")
+    return FileResponse(job.pfad, media_type="application/zip", filename=job.dateiname)
@@ -44,8 +44,9 @@ from app.models.auth import User
 from app.models.grobkostenschaetzung import Korrekturfaktor
 from app.models.heizungscockpit import HcProject
 from app.project_context import context_fuer_projekt, vorbelegung_aus_context
+from app.services import referenz_snapshot
 from app.models.kv import (
-    BauindexEintrag, Kostenschaetzung, KostenschaetzungVersion,
+    Kostenschaetzung, KostenschaetzungVersion,
     RefKostenzeile, RefProjekt, RefProjektGewerk,
 )
 
@@ -293,20 +294,9 @@ def _ref_to_calc_dict(r: RefProjekt) -> dict:
 
 
 def _berechne(body: SchaetzungIn, user: User, db: Session) -> tuple:
-    refs = [
-        _ref_to_calc_dict(r)
-        for r in db.query(RefProjekt).filter(RefProjekt.tenant_id == user.tenant_id).all()
-    ]
-    faktoren = [
-        {"name": f.name, "faktor": f.faktor, "aktiv": f.aktiv}
-        for f in db.query(Korrekturfaktor)
-        .filter(Korrekturfaktor.tenant_id == user.tenant_id, Korrekturfaktor.aktiv == True)  # noqa: E712
-        .all()
-    ]
-    bauindex = [
-        {"periode": e.periode, "wert": e.wert}
-        for e in db.query(BauindexEintrag).filter(BauindexEintrag.tenant_id == user.tenant_id).all()
-    ]
+    # Referenzen, Faktoren und Bauindex aus dem Firmen-Schnappschuss: einmal
+    # geladen und normalisiert, bis sich die Referenzdaten ändern.
+    snapshot = referenz_snapshot.snapshot_fuer(db, user.tenant_id, _ref_to_calc_dict)
     ziel = body.model_dump(mode="json")
     ziel["nutzung"] = fachwerte.normalize("building_uses", body.nutzung) or body.nutzung
     ziel["projektart"] = fachwerte.normalize("project_types", body.projektart) or body.projektart
@@ -320,16 +310,15 @@ def _berechne(body: SchaetzungIn, user: User, db: Session) -> tuple:
     ziel["hat_erdsonden"] = _hat_erdsonden(ziel["waermeerzeuger"])
     ziel["abgabe_dominant"] = _abgabe_dominant_von(ziel["waermeabgabe"])
 
-    def rechne(variante_feld: str) -> dict:
-        referenzen = [{**m, "positionen": m[variante_feld]} for m in refs]
-        variante = "brutto" if variante_feld == "positionen_brutto" else "netto"
+    def rechne(variante: str) -> dict:
         return berechne_grobkostenschaetzung(
-            ziel, referenzen, faktoren, bauindex_eintraege=bauindex,
+            ziel, snapshot.referenzen_je_variante[variante], snapshot.faktoren,
+            bauindex_eintraege=snapshot.bauindex,
             manuelle_betraege=body.manuelle_betraege.get(variante, {}),
             ausgeschlossene_positionen=set(body.ausgeschlossene_positionen.get(variante, {})),
         )
 
-    result = {"brutto": rechne("positionen_brutto"), "netto": rechne("positionen_netto")}
+    result = {"brutto": rechne("brutto"), "netto": rechne("netto")}
     # date-Objekte (Abrechnungsdaten der Referenzen) JSON-tauglich machen —
     # nötig fürs Speichern in der Kostenschaetzung-Tabelle (json.dumps).
     return ziel, jsonable_encoder(result)
@@ -538,7 +527,7 @@ def list_schaetzung_versionen(project_id: int, user: User = Depends(get_current_
     } for v in versionen]
 
 
-def _export_daten(project_id: int, variante: str, user: User, db: Session) -> tuple:
+def export_daten(project_id: int, variante: str, user: User, db: Session) -> tuple:
     if variante not in {"brutto", "netto"}:
         raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Variante muss brutto oder netto sein")
     project = db.query(HcProject).filter(
@@ -564,7 +553,25 @@ def _export_daten(project_id: int, variante: str, user: User, db: Session) -> tu
     return project.name or "Projekt", inputs, result, ks, workflow
 
 
-def _export_dateiname(projekt_name: str, variante: str, endung: str) -> str:
+def markiere_exportiert(ks: Kostenschaetzung, workflow: dict, variante: str, db: Session) -> None:
+    """Eine freigegebene Schätzung gilt nach dem Export ihrer Variante als exportiert."""
+    if workflow.get("status") == "freigegeben" and workflow.get("variante", "netto") == variante:
+        gespeicherte_inputs, _, details = _lade_speicherinhalt(ks)
+        workflow["status"] = "exportiert"
+        _speichere_inputs(ks, gespeicherte_inputs, workflow, details)
+        db.commit()
+
+
+def markiere_exportiert_nach(ks_id: int, variante: str, db: Session) -> None:
+    """`markiere_exportiert` für Exporte, die erst nach der Anfrage fertig sind
+    (eigene Session, Stand frisch aus der Datenbank)."""
+    ks = db.get(Kostenschaetzung, ks_id)
+    if ks is not None:
+        _, workflow, _ = _lade_speicherinhalt(ks)
+        markiere_exportiert(ks, workflow, variante, db)
+
+
+def export_dateiname(projekt_name: str, variante: str, endung: str) -> str:
     sicher = re.sub(r"[^A-Za-z0-9_-]+", "_", projekt_name).strip("_") or "Projekt"
     return f"{sicher}_Grobkostenschaetzung_{variante}.{endung}"
 
@@ -572,33 +579,25 @@ def _export_dateiname(projekt_name: str, variante: str, endung: str) -> str:
 @router.get("/projekt/{project_id}/export.pdf")
 def export_pdf(project_id: int, variante: str = "netto",
                user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    projekt_name, inputs, result, ks, workflow = _export_daten(project_id, variante, user, db)
+    projekt_name, inputs, result, ks, workflow = export_daten(project_id, variante, user, db)
     pdf = erzeuge_grobkostenschaetzung_pdf(projekt_name, inputs, result, variante)
-    if workflow.get("status") == "freigegeben" and workflow.get("variante", "netto") == variante:
-        gespeicherte_inputs, _, details = _lade_speicherinhalt(ks)
-        workflow["status"] = "exportiert"
-        _speichere_inputs(ks, gespeicherte_inputs, workflow, details)
-        db.commit()
+    markiere_exportiert(ks, workflow, variante, db)
     return Response(
         content=pdf, media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{_export_dateiname(projekt_name, variante, "pdf")}"'},
+        headers={"Content-Disposition": f'attachment; filename="{export_dateiname(projekt_name, variante, "pdf")}"'},
     )
 
 
 @router.get("/projekt/{project_id}/export.xlsx")
 def export_excel(project_id: int, variante: str = "netto",
                  user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    projekt_name, inputs, result, ks, workflow = _export_daten(project_id, variante, user, db)
+    projekt_name, inputs, result, ks, workflow = export_daten(project_id, variante, user, db)
     xlsx = erzeuge_grobkostenschaetzung_excel(projekt_name, inputs, result, variante)
-    if workflow.get("status") == "freigegeben" and workflow.get("variante", "netto") == variante:
-        gespeicherte_inputs, _, details = _lade_speicherinhalt(ks)
-        workflow["status"] = "exportiert"
-        _speichere_inputs(ks, gespeicherte_inputs, workflow, details)
-        db.commit()
+    markiere_exportiert(ks, workflow, variante, db)
     return Response(
         content=xlsx,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f'attachment; filename="{_export_dateiname(projekt_name, variante, "xlsx")}"'},
+        headers={"Content-Disposition": f'attachment; filename="{export_dateiname(projekt_name, variante, "xlsx")}"'},
     )
 
 
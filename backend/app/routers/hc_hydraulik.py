@@ -1,12 +1,12 @@
-from functools import lru_cache
-import json
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
 
-from app.calculations.hydraulik import berechne_schema
+from app.calculations.hydraulik_varianten import MAX_VARIANTEN, vergleiche_varianten
+from app.calculations.sole_kennlinie import Solekreis, sondenfeld_raster
 from app.export.bauteil_infos import node_infos
+from app.services import hydraulik_cache
 
 router = APIRouter(prefix="/api/v1/hydraulik", tags=["Heizungscockpit – Hydraulik"])
 
@@ -33,10 +33,21 @@ class GraphInput(BaseModel):
     edges: List[GraphEdge]
 
 
-@lru_cache(maxsize=128)
-def _berechne_gecacht(nodes_json: str, edges_json: str):
-    """Reine Hydraulikberechnung für identische Graphen wiederverwenden."""
-    return berechne_schema(json.loads(nodes_json), json.loads(edges_json))
+class Variante(BaseModel):
+    name: Optional[str] = None
+    aenderungen: Dict[str, dict] = {}   # Bauteil-ID → überschriebene Datenfelder
+
+
+class VariantenInput(GraphInput):
+    varianten: List[Variante] = Field(..., max_length=MAX_VARIANTEN)
+
+
+class SondenfeldInput(GraphInput):
+    erdsonden_id: str
+    sonden_anzahlen: List[int] = Field(..., min_length=1, max_length=100)
+    sonden_tiefen_m: List[float] = Field(..., min_length=1, max_length=100)
+    # Datenblattpunkte [{v_m3h, h_mws}]; fehlt sie, gilt die Kennlinie der Solepumpe.
+    kennlinie: Optional[List[dict]] = None
 
 
 @router.post("/berechnen")
@@ -48,10 +59,65 @@ def hydraulik_berechnen(body: GraphInput):
     """
     nodes = [n.model_dump() for n in body.nodes]
     edges = [e.model_dump() for e in body.edges]
-    ergebnis = _berechne_gecacht(
-        json.dumps(nodes, sort_keys=True, separators=(",", ":")),
-        json.dumps(edges, sort_keys=True, separators=(",", ":")),
-    )
+    # Gleicher Graph → Ergebnis aus dem gemeinsamen Cache (hydraulik_cache);
+    # geänderter Graph → nur die Auslegungen geänderter Kreise neu.
+    ergebnis = hydraulik_cache.berechne(nodes, edges)
     # Die Kennwerte fürs Datenkästchen am Bauteil kommen aus derselben Quelle
     # wie im PDF-Export — sonst steht im Plan etwas anderes als am Bildschirm.
     return {**ergebnis, "node_infos": node_infos(nodes, ergebnis)}
+
+
+@router.post("/varianten")
+def hydraulik_varianten(body: VariantenInput):
+    """Variantenvergleich: Basisgraph plus Überschreibungen je Bauteil.
+
+    Liefert die Vergleichszeile der Basis (Flüsse, DN, Δp, Pumpen-Betriebspunkte,
+    Erdsonden, Warnungen) und je Variante nur die Abweichungen davon.
+    Grössere Sätze rechnen parallel (hydraulik_varianten).
+    """
+    nodes, edges = hydraulik_cache.rechengraph(
+        [n.model_dump() for n in body.nodes], [e.model_dump() for e in body.edges])
+    try:
+        vergleich = vergleiche_varianten(nodes, edges, [v.aenderungen for v in body.varianten])
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return {
+        **vergleich,
+        "varianten": [
+            {"name": v.name or f"Variante {i}", **zeile}
+            for i, (v, zeile) in enumerate(zip(body.varianten, vergleich["varianten"]), start=1)
+        ],
+    }
+
+
+@router.post("/sondenfeld")
+def hydraulik_sondenfeld(body: SondenfeldInput):
+    """Sondenfeld-Raster: alle Kombinationen Sondenanzahl × Sondentiefe.
+
+    Rohre, Zuleitungen, Wärmeträger und Auslegungsvolumenstrom kommen aus dem
+    Erdsondenfeld im Schema; je Kombination stehen Förderhöhe, Strömungsart in
+    der Sonde und — mit Pumpenkennlinie — der Betriebspunkt (sole_kennlinie).
+    """
+    nodes, edges = hydraulik_cache.rechengraph(
+        [n.model_dump() for n in body.nodes], [e.model_dump() for e in body.edges])
+    ergebnis = hydraulik_cache.berechne(nodes, edges)
+    ews = (ergebnis.get("erdsonden_results") or {}).get(body.erdsonden_id)
+    if ews is None:
+        raise HTTPException(status_code=422, detail="Kein Erdsondenfeld mit dieser ID im Schema")
+    kennlinie = body.kennlinie
+    if kennlinie is None:
+        pumpe = next((pid for pid, p in (ergebnis.get("pumpen_results") or {}).items()
+                      if p.get("erdsonden_id") == body.erdsonden_id), None)
+        kennlinie = next((n["data"].get("kennlinie") for n in nodes if n["id"] == pumpe), None)
+    try:
+        kreis = Solekreis.aus_ergebnis(ews.get("druckverlust") or {})
+        raster = sondenfeld_raster(kreis, body.sonden_anzahlen, body.sonden_tiefen_m,
+                                   kennlinie or None)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return {
+        "volumenstrom_m3_h": kreis.volumenstrom_m3_h,
+        "erforderlich_gesamt_m": ews.get("erforderlich_gesamt_m"),
+        "mit_kennlinie": bool(kennlinie),
+        "raster": raster,
+    }
@@ -12,11 +12,14 @@ import json
 import re
 from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.auth import get_current_user
 from app.database import get_db
+from app.http_range import bereich_antwort
 from app.models.auth import Role, User
 from app.models.lv_import import (
     LvImport, LvImportFeature, LvImportCost, LvImportCondition, LvImportStatus,
@@ -25,27 +28,18 @@ from app.models.lv_import import (
 from app.models.kv import (
     RefProjekt, RefKostenzeile, RefProjektFeature, RefProjektGewerk,
 )
-from app.lv_import.pipeline import LvPipeline
-from app.lv_import.feature_extract import extract_features
-from app.lv_import.cost_extract import cost_rows_from_positions
-from app.lv_import.cost_summary import parse_cost_summary, to_cost_rows, has_cost_summary
-from app.lv_import.project_extract import extract_project_data
 from app.lv_import import commercial, norm_lv
 from app.lv_import.llm import resolver as llm
-from app.lv_import import commercial, conditions_extract, systems
+from app.lv_import import systems
 from app.deps.feature_guard import require_feature
 from app.plan_features import Feature
+from app.services import blob_store
 from app.services import features as feature_service
+from app.services import lv_import_jobs
 from app import fachwerte
 from app.lv_import.feature_keys import (
-    ABGELEITETE_FEATURE_KEYS, FEATURE_DEFS, LV_IMPORT_FEATURE_KEYS,
-    FEATURE_TO_CONTEXT,
+    ABGELEITETE_FEATURE_KEYS, FEATURE_DEFS, FEATURE_TO_CONTEXT,
 )
-from app.lv_import import page_classifier as pc
-from app.lv_import.review_packet import build_review_packet
-from app.lv_import.positions import parse_positions
-from app.lv_import.llm import page_triage, visual_review
-from app.lv_import.llm.budget import ImportLlmBudget
 
 router = APIRouter(prefix="/api/v1/lv-imports", tags=["KV – LV-Import"])
 
@@ -61,8 +55,11 @@ def _get_import(db: Session, user: User, import_id: int) -> LvImport:
     return imp
 
 
-def _als_text(wert):
-    return None if wert in (None, "") else str(wert)[:255]
+def _nicht_in_verarbeitung(db: Session, imp: LvImport) -> None:
+    """Solange der Job läuft, schreibt der Worker die Zeilen — keine Eingriffe."""
+    lv_import_jobs.verwaist_abschliessen(db, imp)
+    if imp.status in lv_import_jobs.OFFEN:
+        raise HTTPException(status_code=409, detail="Import wird noch verarbeitet")
 
 
 def _system_out(s: LvImportSystem) -> dict:
@@ -168,7 +165,8 @@ def _condition_out(c: LvImportCondition) -> dict:
 def _import_out(imp: LvImport, detail: bool = False) -> dict:
     base = {
         "id": imp.id, "filename": imp.filename, "file_hash": imp.file_hash,
-        "status": imp.status, "page_count": imp.page_count,
+        "status": imp.status, "processing_stage": imp.processing_stage,
+        "page_count": imp.page_count,
         "is_searchable": imp.is_searchable, "extract_method": imp.extract_method,
         "project_id": imp.project_id,
         "ref_projekt_id": imp.ref_projekt_id, "created_by_name": imp.created_by_name,
@@ -205,7 +203,7 @@ def _report(imp: LvImport) -> dict:
         return {}
 
 
-@router.post("", status_code=201)
+@router.post("", status_code=202)
 async def upload_lv(
     file: UploadFile = File(...),
     project_id: int | None = Form(default=None),
@@ -213,457 +211,90 @@ async def upload_lv(
     db: Session = Depends(get_db),
 ):
     """B2 — PDF hochladen: Firma prüfen, Original + SHA-256 speichern, Import
-    anlegen und Extraktion starten. Original wird nie überschrieben."""
+    anlegen und die Extraktion als Hintergrundjob einreichen. Original wird nie
+    überschrieben. Antwortet sofort mit 202; den Fortschritt liefert
+    `GET /{import_id}/status`."""
     raw = await file.read()
     if not raw:
         raise HTTPException(status_code=422, detail="Leere Datei")
     file_hash = hashlib.sha256(raw).hexdigest()
+    # Mit Blob-Speicher behält die Zeile nur den Hash (gleiche Datei = ein Blob).
+    # Datei- bzw. S3-Zugriff blockiert — nicht im Event-Loop.
+    speicher = blob_store.get_speicher()
+    if speicher is not None:
+        await run_in_threadpool(speicher.speichere, raw)
 
     imp = LvImport(
         tenant_id=user.tenant_id, project_id=project_id,
         filename=file.filename or "lv.pdf", file_hash=file_hash,
-        original_pdf=raw, created_by=user.id,
+        original_pdf=None if speicher is not None else raw, created_by=user.id,
         created_by_name=user.name or user.email,
         status=LvImportStatus.uploaded.value,
     )
     db.add(imp)
-    db.flush()
-
-    # B3 / P0 #1 / Punkt 29 — EINE Pipeline: Text, Wortkoordinaten, Seiten-
-    # klassifikation und alle Extraktoren laufen genau einmal und teilen ihre
-    # Zwischenergebnisse. Die Methode (spatial_pdf/text/ocr/image) wird
-    # festgehalten, damit im Review sichtbar bleibt, woher ein Wert stammt.
-    # Fehler dürfen den Import nicht sprengen.
-    pipeline = LvPipeline(raw)
-    imp.page_count = pipeline.page_count
-    imp.is_searchable = pipeline.is_searchable
-    imp.extract_method = pipeline.extraction_method
-    try:
-        # Punkt 19 — Projektangaben aus dem Deckblatt vorschlagen (nur belegbare;
-        # EBF/Zertifizierung/Projektart werden NICHT geraten).
-        projekt = extract_project_data(pipeline.grunddaten_pages)
-        imp.projekt_name = (projekt.get("project_name") or {}).get("value")
-        imp.projekt_nummer = (projekt.get("project_number") or {}).get("value")
-        imp.ort = (projekt.get("location") or {}).get("value")
-        imp.unternehmer = (projekt.get("contractor") or {}).get("value")
-        imp.offert_datum = (projekt.get("offer_date") or {}).get("value")
-        imp.gewerk = "heizung"
-        imp.waehrung = "CHF"
-        if projekt.get("building_use"):
-            imp.gebaeudetyp = projekt["building_use"]["value"]
-        if projekt.get("project_type"):
-            imp.projektart = projekt["project_type"]["value"]
-        if projekt.get("units"):
-            imp.anzahl_einheiten = projekt["units"]["value"]
-
-        features = extract_features(pipeline.technik_pages, pipeline.technik_word_pages)
-        positions = parse_positions(pipeline.lv_pages)
-        # Punkt 13 — Kosten primär aus der Kostenzusammenstellung; nur wenn es
-        # keine gibt, werden die LV-Positionstotale ausgewertet.
-        summary = parse_cost_summary(pipeline.cost_summary_pages,
-                                     pipeline.cost_summary_word_pages)
-        if has_cost_summary(summary):
-            costs = to_cost_rows(summary)
-        else:
-            # Einzelpositionen bleiben einzeln sichtbar: Menge, Preis und Titel
-            # können so vom Menschen direkt in derselben Zeile geprüft werden.
-            costs = cost_rows_from_positions(
-                positions,
-                trust_detected_amounts=pipeline.extraction_method != "ocr",
-            )
-        # Die Detailprüfung erhält nicht mehr eine starre Acht-Seiten-Auswahl.
-        # Zuerst sichtet ein kompakter Grobscan den Index des ganzen Dokuments;
-        # danach werden seine relevanten/unsicheren Seiten zusammen mit den
-        # deterministischen Pflichtseiten hochauflösend geprüft.
-        review = build_review_packet(features, costs, positions)
-        summary_invalid = (
-            not has_cost_summary(summary)
-            or any(
-                item.get("validation_status") != "valid"
-                for item in (summary.get("group_totals") or {}).values()
-            )
-        )
-        # Gut geparste Kosten werden nicht nochmals als Seitenbild an OpenAI
-        # gesendet. Nur bei einem echten Summenkonflikt kommen die Kosten-
-        # zusammenstellungsseiten dazu. Konditionen werden im ganzen bereits
-        # geparsten Dokument gesucht, damit z.B. die Rabattseite 2 nicht wegen
-        # einer abweichenden Seitenklasse verloren geht.
-        priority_review_pages = {
-            p["page"] for p in pipeline.cost_summary_pages
-            if summary_invalid and p.get("page")
-        }
-        commercial_review_pages = visual_review.select_commercial_review_pages(
-            pipeline.pages, max_pages=2,
-        )
-        priority_review_pages.update(commercial_review_pages)
-        if summary_invalid:
-            priority_review_pages.update(
-                visual_review.select_cost_review_pages(
-                    pipeline.pages, max_pages=3,
-                )
-            )
-        # Der Projektkopf wird im selben sparsamen Visual-Review-Aufruf geprüft.
-        # Kein zusätzlicher API-Call; höchstens die erste Deckblattseite kommt
-        # zum bereits kleinen Seitenpaket hinzu.
-        priority_review_pages.update(
-            p["page"] for p in pipeline.grunddaten_pages[:1] if p.get("page")
-        )
-        technical_review_pages = visual_review.select_technical_review_pages(
-            pipeline.technik_pages, features,
-        )
-        review_pages = set(priority_review_pages)
-        review_pages.update(
-            (features.get(key) or {}).get("source_page")
-            for key in LV_IMPORT_FEATURE_KEYS
-            if (features.get(key) or {}).get("confidence") == "low"
-            and (features.get(key) or {}).get("source_page")
-        )
-        # Vollständig fehlende Kennwerte hatten bisher keine source_page und
-        # gelangten deshalb nie zur visuellen KI-Prüfung. Aus den bereits
-        # geparsten Technikseiten werden dafür wenige starke Stichworttreffer
-        # ergänzt; das PDF wird nicht nochmals ausgelesen.
-        review_pages.update(technical_review_pages)
-        for check in review["deterministic_checks"]:
-            if check.get("severity") != "warning":
-                continue
-            review_pages.update(
-                f.get("source_page") for f in features.values()
-                if isinstance(f, dict) and f.get("source_page")
-            )
-        if pipeline.extraction_method == "image" and not review_pages:
-            # Ohne Textebene sind nur ein kleiner Anfangs-/Endseiten-Sample
-            # vertretbar; der Import bleibt andernfalls zur manuellen Prüfung.
-            all_pages = list(range(1, pipeline.page_count + 1))
-            review_pages.update(
-                all_pages if len(all_pages) <= 6 else all_pages[:2] + all_pages[-4:]
-            )
-        prioritized = sorted(priority_review_pages)
-        required_review_pages = (
-            prioritized
-            + [page for page in technical_review_pages if page not in priority_review_pages]
-            + [page for page in sorted(review_pages)
-               if page not in priority_review_pages and page not in technical_review_pages]
-        )
-        budget = ImportLlmBudget.from_env()
-        # Trennung der beiden Stufen: `lv_import` deckt Upload, Parser und
-        # Review ab, `lv_ai_review` zusätzlich jede kostenpflichtige
-        # LLM-Auswertung. Fehlt die zweite, bleibt der Import trotzdem nutzbar.
-        ki_erlaubt = (
-            user.role == Role.admin
-            or feature_service.get_effective_feature(
-                db, user.tenant_id, Feature.LV_AI_REVIEW.value
-            ).enabled
-        )
-        triage = (
-            page_triage.triage(
-                pipeline.pages, pipeline.classification,
-                pipeline.extraction_method, budget=budget,
-            )
-            if ki_erlaubt else {
-                "called": False, "document_quality": None, "issues": [],
-                "pages": [], "selected_pages": [], "page_index": [],
-            }
-        )
-        review_pages, review_page_reasons = page_triage.select_detail_pages(
-            triage, required_review_pages,
-        )
-        if not ki_erlaubt:
-            review_pages = []
-            review_page_reasons = []
-        visual = (
-            visual_review.review(
-                raw, page_numbers=review_pages, budget=budget,
-                parser_context={
-                    "features": review["packet"]["features"],
-                    "costs": (
-                        review["packet"]["costs"] if summary_invalid else []
-                    ),
-                    "trade_total": summary.get("trade_total"),
-                    "checks": review["packet"]["checks"],
-                    "costs_valid": not summary_invalid,
-                },
-                require_costs=summary_invalid,
-                # Der zweite visuelle Call übertrug bisher dieselben hoch-
-                # aufgelösten PDF-Seiten nochmals. Bei korrekten Parserkosten
-                # bleibt ein unsicherer KI-Wert stattdessen manuell prüfbar.
-                allow_correction=summary_invalid,
-            )
-            if review_pages else {
-                "called": False, "success": True, "attempts": 0, "result": {},
-                "issues": [], "reviewed_pages": [], **budget.status(),
-                **visual_review.status(),
-            }
-        )
-        vorhandene_konditionen = 0
-        konditionen_quelle = "keine"
-        visual_apply = {
-            "visual_review_features_applied": 0,
-            "visual_review_costs_applied": 0,
-            "visual_review_warnings": [],
-        }
-        if visual.get("result"):
-            if (
-                visual["result"].get("trade_total") is None
-                and summary.get("trade_total") is not None
-            ):
-                visual["result"]["trade_total"] = summary["trade_total"]
-            visual_costs, visual_apply = visual_review.apply_result(
-                features, visual["result"],
-            )
-            visual_project = visual_apply.get("project_data") or {}
-            for field, attr in (
-                ("project_name", "projekt_name"),
-                ("project_number", "projekt_nummer"),
-                ("location", "ort"),
-                ("contractor", "unternehmer"),
-                ("offer_date", "offert_datum"),
-            ):
-                if visual_project.get(field):
-                    setattr(imp, attr, visual_project[field])
-            for field, attr, registry in (
-                ("building_use", "gebaeudetyp", "building_uses"),
-                ("project_type", "projektart", "project_types"),
-            ):
-                code = fachwerte.normalize(registry, visual_project.get(field))
-                if code:
-                    setattr(imp, attr, code)
-            # Ein fehlerfreier Parser bleibt Kostenquelle. KI-Kosten ersetzen ihn
-            # nur, wenn Positionen/Summen fehlen oder widersprüchlich sind.
-            visual_costs_complete = bool(
-                visual_costs
-                and (visual.get("result") or {}).get("group_totals")
-                and (visual.get("result") or {}).get("trade_total") is not None
-            )
-            if summary_invalid and visual_costs_complete:
-                # Ein kleiner Summenkonflikt (typisch: schwer lesbare
-                # Handschrift) darf nicht dazu führen, dass wir stattdessen
-                # offensichtlich falsche OCR-Zahlen aus Detailseiten zeigen.
-                # Die visuell gelesenen Werte bleiben sichtbar, aber der ganze
-                # Satz bleibt bis zur Bestätigung ein Prüffall.
-                if not visual["success"]:
-                    for row in visual_costs:
-                        row["requires_review"] = True
-                        row["confidence"] = "medium"
-                        row["validation_status"] = "mismatch"
-                costs = visual_costs
-            commercial_result = visual_apply.get("commercial") or {}
-        # Konditionen: der Text wird IMMER deterministisch gelesen. Bisher gab
-        # es dafür nur die visuelle KI-Prüfung — ohne Schlüssel oder nach einem
-        # Timeout blieb die Konditionsliste leer und die Bruttosumme auf 0,
-        # obwohl Rabatt, Skonto und MWST lesbar im Dokument stehen. Die KI
-        # ergänzt jetzt nur noch, was der Parser nicht gefunden hat.
-        kommerzielle_nummern = set(commercial_review_pages)
-        konditionen_seiten = [
-            page for page in pipeline.pages
-            if page.get("page") in kommerzielle_nummern
-        ]
-        konditionen_seiten += [
-            page for page in pipeline.cost_summary_pages
-            if page.get("page") not in {p.get("page") for p in konditionen_seiten}
-        ]
-        konditionen_seiten = konditionen_seiten or pipeline.pages[-3:]
-        geparste_konditionen = conditions_extract.parse_conditions(konditionen_seiten)
-        visual_commercial = visual_apply.get("commercial") or {}
-        merged_conditions = commercial.merge_conditions(
-            visual_commercial.get("conditions") or [],
-            geparste_konditionen.get("conditions") or [],
-        )
-        basis = visual_commercial.get("base_amount")
-        if basis is None:
-            basis = geparste_konditionen.get("base_amount")
-        if basis is None:
-            basis = summary.get("trade_total")
-        vat_rate = visual_commercial.get("vat_rate")
-        if vat_rate is None:
-            vat_rate = geparste_konditionen.get("vat_rate")
-        kette, konditions_hinweise = commercial.validate(
-            basis, merged_conditions, vat_rate, None,
-            geparste_konditionen.get("stated_vat_amount"),
-            geparste_konditionen.get("stated_total_incl_vat"),
-        )
-        for item in kette.get("conditions") or []:
-            db.add(LvImportCondition(
-                lv_import_id=imp.id,
-                original_label=str(item.get("label") or "")[:255],
-                kind=item["kind"], direction=item["direction"],
-                rate_percent=item.get("rate_percent"),
-                amount=item.get("amount"), basis_amount=item.get("basis_amount"),
-                calculated_amount=item.get("calculated_amount"),
-                running_total=item.get("running_total"),
-                order_index=int(item.get("order") or 0),
-                source_page=item.get("source_page"),
-                status=item.get("status") or "priced",
-            ))
-        vorhandene_konditionen = len(kette.get("conditions") or [])
-        visual_apply["commercial"] = {"base_amount": basis, **kette}
-        if visual_commercial.get("conditions") and geparste_konditionen.get("conditions"):
-            konditionen_quelle = "visual_ai_pdf+parser"
-        elif visual_commercial.get("conditions"):
-            konditionen_quelle = "visual_ai_pdf"
-        elif conditions_extract.has_conditions(geparste_konditionen):
-            konditionen_quelle = "parser"
-
-        # Erst nach der autoritativen visuellen Auswertung offene Titel gegen
-        # das geschlossene Norm-LV auflösen.
-        llm_stat = (
-            llm.apply_to_rows(costs, budget=budget) if ki_erlaubt
-            else {"sent": 0, "mapped": 0}
-        )
-        # Ein Import zählt als EIN Vorgang, auch wenn er intern mehrere
-        # LLM-Aufrufe macht. Gezählt wird erst, wenn tatsächlich einer lief.
-        if ki_erlaubt and budget.calls > 0:
-            feature_service.zaehle_nutzung(
-                db, user.tenant_id, Feature.LV_AI_REVIEW.value,
-                amount=budget.estimated_cost_usd or None,
-            )
-        feature_service.zaehle_nutzung(db, user.tenant_id, Feature.LV_IMPORT.value)
-        # ALLE kanonischen Features anlegen (auch nicht erkannte) → der Nutzer
-        # sieht die vollständige Checkliste und kann fehlende Werte ergänzen.
-        for key in LV_IMPORT_FEATURE_KEYS:
-            f = features.get(key)
-            val = f.get("value") if f else None
-            bbox = (f or {}).get("source_bbox")
-            db.add(LvImportFeature(
-                lv_import_id=imp.id, key=key,
-                value=None if val is None else str(val),
-                unit=FEATURE_DEFS.get(key, {}).get("einheit"),
-                confidence=f.get("confidence") if f else None,
-                source_page=f.get("source_page") if f else None,
-                source_text=f.get("source_text") if f else None,
-                source_excerpt=f.get("source_excerpt") if f else None,
-                source_bbox=",".join(str(round(v, 1)) for v in bbox) if bbox else None,
-                derived_from=f.get("derived_from") if f else None,
-                printed_value=_als_text((f or {}).get("printed_value")),
-                corrected_value=_als_text((f or {}).get("corrected_value")),
-                selected_source=(f or {}).get("selected_source"),
-                requires_review=bool((f or {}).get("requires_review", False)),
-            ))
-        for c in costs:
-            db.add(LvImportCost(
-                lv_import_id=imp.id, bkp_nr=c["bkp_nr"],
-                original_position=c.get("original_position"),
-                original_title=c.get("original_title"),
-                section_path=c.get("section_path"),
-                canonical_key=c.get("canonical_key"),
-                original_amount=c.get("detected_amount"),
-                mapping_method=c.get("mapping_method"),
-                mapping_confidence=c.get("mapping_confidence"),
-                mapping_reason=c.get("mapping_reason"),
-                is_group_total=bool(c.get("is_group_total", False)),
-                validation_status=c.get("validation_status"),
-                source=c.get("source"),
-                detected_amount=c.get("detected_amount"), confidence=c.get("confidence"),
-                source_page=c.get("source_page"), source_text=c.get("source_text"),
-                positionen=c.get("positionen", 1),
-                source_parent_bkp=c.get("source_parent_bkp")
-                or (str(c.get("bkp_nr") or "").split(".")[0] or None),
-                source_scope_summary=c.get("source_scope_summary"),
-                included_norm_keys=c.get("included_norm_keys"),
-                amount_allocation=c.get("amount_allocation"),
-                requires_review=bool(c.get("requires_review", False)),
-            ))
-        # Anlagensysteme: Wärmeabgabe und Wärmeerzeugung. Der Parser findet sie
-        # in born-digital LVs, die visuelle Prüfung in Scans — beide Wege enden
-        # in derselben Struktur.
-        visuelle_systeme = systems.filter_visual_generators_by_page_evidence(
-            visual_apply.get("systems") or [], pipeline.pages,
-            text_available=pipeline.extraction_method != "image",
-        )
-        systeme = systems.merge(
-            systems.detect(pipeline.technik_pages, systems.HEAT_EMISSION)
-            + systems.detect(pipeline.technik_pages, systems.HEAT_GENERATION),
-            visuelle_systeme,
-        )
-        for eintrag in systeme:
-            db.add(LvImportSystem(lv_import_id=imp.id, **eintrag))
-        # Punkt 25/30 — Verarbeitungsbericht: was wurde erkannt, was muss geprüft
-        # werden. Speist die Import-Zusammenfassung und den Debug-Dump.
-        erkannte = [
-            k for k in LV_IMPORT_FEATURE_KEYS
-            if (features.get(k) or {}).get("value") is not None
-        ]
-        pruefen = [c["bkp_nr"] for c in costs if not c.get("canonical_key")
-                   and not c.get("is_group_total")]
-        imp.debug_json = json.dumps({
-            **pipeline.debug_dump(),
-            "cost_source": (
-                "cost_summary" if has_cost_summary(summary)
-                else "visual_ai_pdf" if visual_apply.get("visual_review_costs_applied")
-                else "lv_positions"
-            ),
-            "features_erkannt": len(erkannte),
-            "features_total": len(LV_IMPORT_FEATURE_KEYS),
-            "feature_keys_erkannt": erkannte,
-            "kostenpositionen": len([c for c in costs if not c.get("is_group_total")]),
-            "gruppentotale": len([c for c in costs if c.get("is_group_total")]),
-            "kosten_ohne_zuordnung": len(pruefen),
-            "llm_positions_sent": llm_stat["sent"],
-            "llm_positions_mapped": llm_stat["mapped"],
-            "parser_first": True,
-            "llm_review_characters": review["characters"],
-            "llm_review_estimated_tokens": review["estimated_tokens"],
-            "llm_review_positions_sent": review["positions_sent"],
-            "deterministic_checks": review["deterministic_checks"],
-            "parsed_positions": len(positions),
-            "visual_review_called": visual["called"],
-            "visual_review_success": visual["success"],
-            "visual_review_attempts": visual["attempts"],
-            "visual_review_issues": visual["issues"],
-            "visual_review_pages": visual.get("reviewed_pages") or [],
-            "visual_review_focused_pages": visual.get("focused_pages") or [],
-            "page_triage_called": triage.get("called", False),
-            "page_triage_document_quality": triage.get("document_quality"),
-            "page_triage_issues": triage.get("issues") or [],
-            "page_triage_selected": review_page_reasons,
-            "page_triage_page_count": len(triage.get("page_index") or []),
-            "page_triage_detail_limit": page_triage.max_detail_pages(),
-            "systeme_waermeabgabe": len(systems.delivery_codes(systeme)),
-            "systeme_waermeerzeugung": len(systems.generator_codes(systeme)),
-            "handschrift_offen": len(visual_apply.get("handwritten_open") or []),
-            "konditionen_erkannt": vorhandene_konditionen,
-            "konditionen_quelle": konditionen_quelle,
-            "konditionen_hinweise": konditions_hinweise,
-            "kosten_pruefen": len([c for c in costs if c.get("requires_review")]),
-            **budget.status(),
-            **visual_review.status(),
-            **visual_apply,
-            **llm.status(),
-            "gruppen_validierung": {
-                g: i.get("validation_status")
-                for g, i in (summary.get("group_totals") or {}).items()},
-            "trade_total": summary.get("trade_total"),
-            "commercial": visual_apply.get("commercial") or {},
-            "projekt_erkannt": sorted(projekt.keys()),
-        }, ensure_ascii=False)
-        quality_ready = visual["success"] or not visual_review.required()
-        imp.status = (
-            LvImportStatus.review.value
-            if quality_ready else LvImportStatus.extracted.value
-        )
-    except Exception as exc:
-        imp.status = LvImportStatus.failed.value
-        imp.debug_json = json.dumps({
-            **pipeline.debug_dump(),
-            "parser_first": False,
-            "error_stage": "extract_and_normalize",
-            "error_type": type(exc).__name__,
-            "error": str(exc)[:400],
-            **visual_review.status(),
-        }, ensure_ascii=False)
-
+    # Trennung der beiden Stufen: `lv_import` deckt Upload, Parser und
+    # Review ab, `lv_ai_review` zusätzlich jede kostenpflichtige
+    # LLM-Auswertung. Fehlt die zweite, bleibt der Import trotzdem nutzbar.
+    # Die Berechtigung wird hier geprüft — der Worker kennt keinen Benutzer.
+    ki_erlaubt = (
+        user.role == Role.admin
+        or feature_service.get_effective_feature(
+            db, user.tenant_id, Feature.LV_AI_REVIEW.value
+        ).enabled
+    )
+    # Erst committen, dann einreichen: der Worker liest den Import mit
+    # eigener Session.
     db.commit()
+    lv_import_jobs.submit(imp.id, ki_erlaubt=ki_erlaubt)
     db.refresh(imp)
-    return _import_out(imp, detail=True)
+    return {
+        **_import_out(imp),
+        "job_id": imp.id,
+        "status_url": f"{router.prefix}/{imp.id}/status",
+    }
+
+
+def _cursor(imp: LvImport) -> str:
+    return f"{imp.created_at.isoformat()}_{imp.id}"
+
+
+def _nach_cursor(cursor: str):
+    """Filter «älter als der Cursor» in der Sortierung (created_at, id) absteigend."""
+    zeit, _, import_id = cursor.rpartition("_")
+    try:
+        zeit, import_id = datetime.fromisoformat(zeit), int(import_id)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Ungültiger Cursor")
+    return or_(LvImport.created_at < zeit,
+               and_(LvImport.created_at == zeit, LvImport.id < import_id))
 
 
 @router.get("")
-def list_lv(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    rows = (
+def list_lv(
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=200),
+    cursor: str | None = None,
+    user: User = Depends(get_current_user), db: Session = Depends(get_db),
+):
+    """Importliste, neueste zuerst. Original-PDF und Debug-Bericht sind
+    `deferred` und werden hier nie geladen.
+
+    Mit `limit` seitenweise (Keyset über created_at/id): der Cursor der
+    nächsten Seite steht im Header `X-Next-Cursor`, fehlt er, ist es die letzte.
+    """
+    query = (
         db.query(LvImport)
         .filter(LvImport.tenant_id == user.tenant_id)
         .order_by(LvImport.created_at.desc(), LvImport.id.desc())
-        .all()
     )
+    if cursor:
+        query = query.filter(_nach_cursor(cursor))
+    if limit is None:
+        return [_import_out(imp) for imp in query.all()]
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _cursor(rows[-1])
     return [_import_out(imp) for imp in rows]
 
 
@@ -696,6 +327,56 @@ def get_lv(import_id: int, user: User = Depends(get_current_user), db: Session =
     return _import_out(_get_import(db, user, import_id), detail=True)
 
 
+@router.get("/{import_id}/status")
+def lv_status(import_id: int, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Jobzustand für das Polling nach dem Upload: Status, aktuelle Stufe und
+    bei Abbruch die Fehlermeldung. Bewusst ohne Zeilen — billig abfragbar.
+    Ein verwaister Job wird hier abgeschlossen, damit das Polling endet."""
+    imp = _get_import(db, user, import_id)
+    lv_import_jobs.verwaist_abschliessen(db, imp)
+    return lv_import_jobs.status(imp)
+
+
+@router.get("/{import_id}/original")
+def lv_original(
+    import_id: int, request: Request,
+    user: User = Depends(get_current_user), db: Session = Depends(get_db),
+):
+    """Original-PDF stückweise, mit HTTP-Range (PDF-Viewer laden seitenweise).
+
+    Die Datei wird nie als Ganzes geladen: Grösse und Stücke kommen aus dem
+    Blob-Speicher oder per `length`/`substr` aus der Datenbank. ETag ist der
+    SHA-256 des Originals.
+    """
+    zeile = (
+        db.query(LvImport.filename, LvImport.file_hash, func.length(LvImport.original_pdf))
+        .filter(LvImport.id == import_id, LvImport.tenant_id == user.tenant_id)
+        .first()
+    )
+    if not zeile:
+        raise HTTPException(status_code=404, detail="LV-Import nicht gefunden")
+    dateiname, file_hash, groesse = zeile
+    speicher = blob_store.get_speicher()
+    im_speicher = speicher.groesse(file_hash) if speicher is not None and not groesse else None
+    if im_speicher is not None:
+        return bereich_antwort(request, groesse=im_speicher, etag=file_hash,
+                               lese=lambda start, laenge: speicher.lese(file_hash, start, laenge),
+                               media_type="application/pdf", dateiname=dateiname or "lv.pdf")
+    if not groesse:
+        raise HTTPException(status_code=404, detail="Original nicht gespeichert")
+    # Die Stücke liest eine eigene Session: der Stream läuft über das Ende
+    # der Request-Session hinaus.
+    neue_session = sessionmaker(bind=db.get_bind())
+
+    def lese(start: int, laenge: int) -> bytes:
+        with neue_session() as leser:
+            return bytes(leser.query(func.substr(LvImport.original_pdf, start + 1, laenge))
+                         .filter(LvImport.id == import_id).scalar() or b"")
+
+    return bereich_antwort(request, groesse=groesse, etag=file_hash, lese=lese,
+                           media_type="application/pdf", dateiname=dateiname or "lv.pdf")
+
+
 @router.get("/{import_id}/debug")
 def debug_lv(import_id: int, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Punkt 30 — Debug-Dump für die Arbeit an echten LVs.
@@ -755,6 +436,7 @@ def map_costs(import_id: int, user: User = Depends(require_feature(Feature.LV_AI
     imp = _get_import(db, user, import_id)
     if imp.status == LvImportStatus.approved.value:
         raise HTTPException(status_code=409, detail="Import ist bereits freigegeben")
+    _nicht_in_verarbeitung(db, imp)
 
     offen = [c for c in imp.costs
              if not c.is_group_total and not c.canonical_key
@@ -1236,6 +918,7 @@ def approve_lv(import_id: int, user: User = Depends(get_current_user), db: Sessi
     imp = _get_import(db, user, import_id)
     if imp.status == LvImportStatus.approved.value:
         raise HTTPException(status_code=409, detail="Import ist bereits freigegeben")
+    _nicht_in_verarbeitung(db, imp)
     # Freigabe nur, wenn jeder relevante Wert geprüft ist — bestätigt ODER
     # bewusst als unbekannt markiert (beides setzt confirmed=True).
     unbestaetigt = [f.key for f in imp.features if not f.confirmed]
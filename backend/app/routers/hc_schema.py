@@ -2,15 +2,19 @@ from datetime import datetime
 import json
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.auth import get_current_user
-from app.calculations.hydraulik import berechne_schema
+from app.calculations.hydraulik import HYDRAULIK_ENGINE_VERSION
 from app.database import get_db
+from app.http_range import bereich_antwort
 from app.models.auth import User
 from app.models.heizungscockpit import HcAuditEvent, HcProject, HcSchema, HcSchemaRevision
+from app.services import (
+    blob_ablage, blob_store, editor_sitzungen, hydraulik_cache, schema_revisionen, underlay_kacheln,
+)
 from app.schemas.hc_schemas import (
     AuditEventOut,
     SchemaCreate,
@@ -18,6 +22,8 @@ from app.schemas.hc_schemas import (
     SchemaRevisionCreate,
     SchemaRevisionDetailOut,
     SchemaRevisionOut,
+    SchemaSitzungCreate,
+    SchemaSitzungPatch,
     SchemaUpdate,
     UnderlayIn,
     UnderlayOut,
@@ -87,6 +93,13 @@ def _json_dict(raw: str | None) -> dict:
     return value if isinstance(value, dict) else {}
 
 
+def _stand_graph(db: Session, revision: HcSchemaRevision) -> dict:
+    try:
+        return _json_dict(schema_revisionen.graph_text(db, revision))
+    except ValueError:
+        raise HTTPException(status_code=409, detail="Schema-Stand ist unvollständig gespeichert")
+
+
 def _require_revision(revision_id: int, schema: HcSchema, db: Session) -> HcSchemaRevision:
     revision = (
         db.query(HcSchemaRevision)
@@ -194,7 +207,7 @@ def _graph_diff(before: dict, after: dict) -> dict:
     }
 
 
-def _revision_out(revision: HcSchemaRevision, *, detail: bool = False):
+def _revision_out(revision: HcSchemaRevision, *, db: Optional[Session] = None, detail: bool = False):
     values = {
         "id": revision.id,
         "schema_id": revision.schema_id,
@@ -211,8 +224,8 @@ def _revision_out(revision: HcSchemaRevision, *, detail: bool = False):
         "created_at": revision.created_at,
     }
     if detail:
-        values["graph"] = _json_dict(revision.graph_json)
-        values["calculation"] = _json_dict(revision.calculation_json) if revision.calculation_json else None
+        values["graph"] = _stand_graph(db, revision)
+        values["calculation"] = schema_revisionen.berechnung(db, revision)
         return SchemaRevisionDetailOut(**values)
     return SchemaRevisionOut(**values)
 
@@ -314,8 +327,114 @@ def save_schema_graph(schema_id: int, body: SchemaUpdate,
     return {"id": s.id, "updated_at": s.updated_at}
 
 
+# ── Editor-Sitzung: Graph bleibt serverseitig, der Editor schickt Patches ──
+def _sitzung_speichern(sitzung: editor_sitzungen.EditorSitzung, db: Session) -> bool:
+    """Sitzungsstand als Graph des Schemas speichern.
+
+    False, wenn das Schema inzwischen anderweitig gespeichert wurde (anderer Tab,
+    Wiederherstellen einer Version) — dann wird nichts überschrieben.
+    """
+    s = (
+        db.query(HcSchema)
+        .filter(HcSchema.id == sitzung.schema_id, HcSchema.tenant_id == sitzung.tenant_id)
+        .first()
+    )
+    if not s or (sitzung.gespeichert_am is not None and s.updated_at != sitzung.gespeichert_am):
+        return False
+    s.graph_json = json.dumps(sitzung.graph, separators=(",", ":"), ensure_ascii=False)
+    s.updated_at = datetime.utcnow()
+    db.commit()
+    sitzung.gespeichert(s.updated_at)
+    return True
+
+
+def _verdraengte_speichern(verdraengt: list, db: Session) -> None:
+    for sitzung in verdraengt:
+        with sitzung.lock:
+            _sitzung_speichern(sitzung, db)
+
+
+def _require_sitzung(sitzung_id: str, user: User) -> editor_sitzungen.EditorSitzung:
+    sitzung = editor_sitzungen.sitzungen().hole(sitzung_id, user.tenant_id, user.id)
+    if not sitzung:
+        raise HTTPException(status_code=404, detail="Editor-Sitzung abgelaufen")
+    return sitzung
+
+
+@router.post("/schemas/{schema_id}/sitzungen", status_code=201)
+def open_schema_sitzung(schema_id: int, body: SchemaSitzungCreate,
+                        user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Sitzung eröffnen: einmal der ganze Graph, danach nur noch Patches.
+
+    Antwortet mit der vollen Berechnung wie `/hydraulik/berechnen`.
+    """
+    s = _require_schema(schema_id, user, db)
+    graph = body.graph if body.graph is not None else _json_dict(s.graph_json)
+    sitzung = editor_sitzungen.EditorSitzung(
+        s.id, s.tenant_id, user.id, graph,
+        gespeichert_am=s.updated_at, ungespeichert=body.graph is not None,
+    )
+    _verdraengte_speichern(editor_sitzungen.sitzungen().oeffne(sitzung), db)
+    return {"sitzung_id": sitzung.id, "version": sitzung.version, "ergebnis": sitzung.ergebnis}
+
+
+@router.patch("/schema-sitzungen/{sitzung_id}")
+def patch_schema_sitzung(sitzung_id: str, body: SchemaSitzungPatch,
+                         user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Operationen anwenden; Antwort enthält nur die geänderten Resultate.
+
+    Der Autosave läuft aus dem Sitzungsstand, höchstens alle
+    SCHEMA_SITZUNG_AUTOSAVE_SECONDS. `konflikt` meldet, dass das Schema
+    anderweitig gespeichert wurde und der Autosave darum ruht.
+    """
+    _verdraengte_speichern(editor_sitzungen.sitzungen().abgelaufen(), db)
+    sitzung = _require_sitzung(sitzung_id, user)
+    ops = [op.model_dump(mode="json", exclude_unset=True) for op in body.ops]
+    with sitzung.lock:
+        try:
+            delta = sitzung.patch(body.version, ops)
+        except editor_sitzungen.VersionsKonflikt:
+            raise HTTPException(status_code=409, detail={
+                "message": "Editor-Stand veraltet", "version": sitzung.version})
+        except editor_sitzungen.PatchFehler as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+        konflikt = sitzung.speichern_faellig() and not _sitzung_speichern(sitzung, db)
+        return {
+            "version": sitzung.version,
+            "gespeichert": not sitzung.ungespeichert,
+            "konflikt": konflikt,
+            **delta,
+        }
+
+
+@router.post("/schema-sitzungen/{sitzung_id}/speichern")
+def save_schema_sitzung(sitzung_id: str, user: User = Depends(get_current_user),
+                        db: Session = Depends(get_db)):
+    """Sofort speichern, z.B. beim Verlassen des Editors."""
+    sitzung = _require_sitzung(sitzung_id, user)
+    with sitzung.lock:
+        if sitzung.ungespeichert and not _sitzung_speichern(sitzung, db):
+            raise HTTPException(status_code=409, detail="Schema wurde anderweitig gespeichert")
+        return {"id": sitzung.schema_id, "version": sitzung.version, "updated_at": sitzung.gespeichert_am}
+
+
+@router.delete("/schema-sitzungen/{sitzung_id}", status_code=204)
+def close_schema_sitzung(sitzung_id: str, user: User = Depends(get_current_user),
+                         db: Session = Depends(get_db)):
+    sitzung = _require_sitzung(sitzung_id, user)
+    with sitzung.lock:
+        if sitzung.ungespeichert:
+            _sitzung_speichern(sitzung, db)
+        editor_sitzungen.sitzungen().schliesse(sitzung.id)
+
+
 # ── Underlay: Hintergrund-Plan zum Nachzeichnen (§ Editor #5) ──
 # Firmenweit im Projekt gespeichert, aber getrennt vom autospeichernden Graphen.
+# `underlay_json` hält nur Lage, Manifest und Hash; das Bild kommt über
+# `/underlay/bild` mit ETag — aus dem Blob-Speicher oder, ohne Speicher, aus
+# der deferred Spalte `underlay_bild`. Angezeigt wird es als Kachelpyramide
+# (`underlay_kacheln`): die Antworten tragen nur Lage und Manifest, nie die
+# Bilddaten, und Kachelabrufe lesen nur `underlay_sha256`.
 _UNDERLAY_MIME_OK = {"image/png", "image/jpeg", "image/webp"}
 _UNDERLAY_MAX_CHARS = 12_000_000  # ~9 MB Bilddaten als Data-URL
 
@@ -325,6 +444,52 @@ def _underlay_dict(schema: HcSchema) -> dict | None:
     return value or None
 
 
+def _underlay_mit_bild(schema: HcSchema) -> dict | None:
+    """Underlay samt Data-URL (lädt die deferred Spalte)."""
+    underlay = _underlay_dict(schema)
+    if underlay and schema.underlay_bild:
+        underlay["data"] = schema.underlay_bild
+    return underlay
+
+
+def _underlay_schreiben(schema: HcSchema, underlay: dict) -> None:
+    """Lage nach `underlay_json`, Data-URL nach `underlay_bild`, Hash daneben."""
+    underlay = dict(underlay)
+    data = underlay.pop("data", None)
+    if data:
+        # Altbestand mit eingebetteter Data-URL wird beim Schreiben umgezogen.
+        schema.underlay_bild = data
+    elif underlay.get("blob"):
+        schema.underlay_bild = None
+    try:
+        sha256 = _bild_hash({**underlay, "data": data})
+    except ValueError:
+        sha256 = None
+    if sha256 and not underlay.get("blob"):
+        underlay["sha256"] = sha256
+    schema.underlay_sha256 = sha256
+    schema.underlay_json = json.dumps(underlay, separators=(",", ":"), ensure_ascii=False)
+
+
+def _bild_hash(underlay: dict) -> str:
+    """SHA-256 des Bilds; ValueError bei unlesbarer eingebetteter Data-URL."""
+    return (underlay.get("blob") or underlay.get("sha256")
+            or blob_store.pruefsumme(blob_ablage.data_url_bytes(underlay.get("data") or "")))
+
+
+def _underlay_antwort(underlay: dict | None) -> dict | None:
+    """Lage und Kachel-Manifest ohne Bilddaten; ältere Underlays erhalten es hier."""
+    if not underlay:
+        return None
+    antwort = {k: v for k, v in underlay.items() if k not in ("data", "dateien")}
+    try:
+        antwort["sha256"] = _bild_hash(underlay)
+    except ValueError:
+        return antwort
+    antwort.setdefault("kacheln", underlay_kacheln.manifest(underlay.get("w") or 1, underlay.get("h") or 1))
+    return antwort
+
+
 def _clamp(value, low, high, fallback):
     try:
         return max(low, min(high, float(value)))
@@ -336,7 +501,81 @@ def _clamp(value, low, high, fallback):
 def get_schema_underlay(schema_id: int, user: User = Depends(get_current_user),
                         db: Session = Depends(get_db)):
     schema = _require_schema(schema_id, user, db)
-    return _underlay_dict(schema)
+    return _underlay_antwort(_underlay_dict(schema))
+
+
+@router.get("/schemas/{schema_id}/underlay/bild")
+def get_schema_underlay_bild(schema_id: int, request: Request,
+                             user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Das Underlay-Bild selbst; ETag ist sein SHA-256, der Browser lädt es nur einmal."""
+    schema = _require_schema(schema_id, user, db)
+    underlay = _underlay_mit_bild(schema)
+    try:
+        bild = blob_ablage.underlay_bild(underlay) if underlay else None
+    except ValueError:
+        bild = None
+    if bild is None:
+        raise HTTPException(status_code=404, detail="Kein Underlay-Bild vorhanden")
+    etag, groesse, lese = bild
+    return bereich_antwort(request, groesse=groesse, etag=etag, lese=lese,
+                           media_type=underlay.get("mime") or "application/octet-stream",
+                           dateiname=underlay.get("name") or "underlay")
+
+
+def _underlay_datei(schema_id: int, name: str, v: Optional[str], request: Request,
+                    user: User, db: Session) -> Response:
+    zeile = (db.query(HcSchema.underlay_sha256)
+             .filter(HcSchema.id == schema_id, HcSchema.tenant_id == user.tenant_id)
+             .first())
+    if zeile is None:
+        raise HTTPException(status_code=404, detail="Schema nicht gefunden")
+    bild_hash = zeile.underlay_sha256
+    if not bild_hash:
+        # Zeile aus der Zeit vor `underlay_sha256` (Dev-DB ohne Migration).
+        underlay = _underlay_mit_bild(_require_schema(schema_id, user, db))
+        try:
+            bild_hash = _bild_hash(underlay) if underlay else None
+        except ValueError:
+            bild_hash = None
+    if not bild_hash:
+        raise HTTPException(status_code=404, detail="Kein Underlay vorhanden")
+    etag = f'"{bild_hash[:32]}-{name.replace("/", "-")}"'
+    # Mit passender Version (`?v=<sha256>`) ist die URL unveränderlich.
+    kopf = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"
+            if v == bild_hash else "private, no-cache"}
+    if etag in (request.headers.get("if-none-match") or "").replace(" ", "").split(","):
+        return Response(status_code=304, headers=kopf)
+
+    # Erst wenn die Pyramide nicht im Prozess liegt: Underlay bzw. Bild laden.
+    def underlay_lesen() -> dict:
+        return _json_dict(db.query(HcSchema.underlay_json).filter(HcSchema.id == schema_id).scalar())
+
+    def bild_lesen() -> bytes:
+        _, groesse, lese = blob_ablage.underlay_bild(_underlay_mit_bild(db.get(HcSchema, schema_id)))
+        return lese(0, groesse)
+
+    try:
+        inhalt = underlay_kacheln.datei(bild_hash, name, underlay_lesen, bild_lesen)
+    except (TypeError, ValueError):
+        inhalt = None
+    if inhalt is None:
+        raise HTTPException(status_code=404, detail="Kachel nicht vorhanden")
+    return Response(content=inhalt, media_type="image/webp", headers=kopf)
+
+
+@router.get("/schemas/{schema_id}/underlay/kacheln/{stufe}/{x}/{y}")
+def get_schema_underlay_kachel(schema_id: int, stufe: int, x: int, y: int, request: Request,
+                               v: Optional[str] = Query(None),
+                               user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Eine WebP-Kachel (`KANTE` px) der Stufe `stufe` (0 = volle Auflösung)."""
+    return _underlay_datei(schema_id, underlay_kacheln.schluessel(stufe, x, y), v, request, user, db)
+
+
+@router.get("/schemas/{schema_id}/underlay/vorschau")
+def get_schema_underlay_vorschau(schema_id: int, request: Request, v: Optional[str] = Query(None),
+                                 user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Kleines Vorschaubild, sofort sichtbar, bis die Kacheln geladen sind."""
+    return _underlay_datei(schema_id, underlay_kacheln.VORSCHAU, v, request, user, db)
 
 
 @router.put("/schemas/{schema_id}/underlay", response_model=UnderlayOut)
@@ -358,7 +597,22 @@ def set_schema_underlay(schema_id: int, body: UnderlayIn,
         "opacity": _clamp(body.opacity, 0.05, 1.0, 0.6),
         "locked": bool(body.locked),
     }
-    schema.underlay_json = json.dumps(underlay, separators=(",", ":"), ensure_ascii=False)
+    # Einmal dekodieren: Kacheln, Vorschau und die echte Bildgrösse.
+    try:
+        daten = blob_ablage.data_url_bytes(body.data)
+        pyramide = underlay_kacheln.baue(daten)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    underlay.update(w=pyramide.w, h=pyramide.h,
+                    kacheln=underlay_kacheln.manifest(pyramide.w, pyramide.h))
+    speicher = blob_store.get_speicher()
+    if speicher is not None:
+        underlay = blob_ablage.underlay_auslagern(underlay, speicher)
+        underlay["dateien"] = underlay_kacheln.ablegen(pyramide, speicher)
+    else:
+        underlay["sha256"] = blob_store.pruefsumme(daten)
+        underlay_kacheln.prozess_cache().lege_ab(underlay["sha256"], pyramide)
+    _underlay_schreiben(schema, underlay)
     schema.updated_at = datetime.utcnow()
     db.add(HcAuditEvent(
         tenant_id=user.tenant_id, project_id=schema.project_id, schema_id=schema.id,
@@ -368,7 +622,7 @@ def set_schema_underlay(schema_id: int, body: UnderlayIn,
                                 separators=(",", ":"), ensure_ascii=False),
     ))
     db.commit()
-    return underlay
+    return _underlay_antwort(underlay)
 
 
 @router.patch("/schemas/{schema_id}/underlay", response_model=UnderlayOut)
@@ -389,10 +643,10 @@ def patch_schema_underlay(schema_id: int, body: UnderlayTransformIn,
         underlay["opacity"] = _clamp(body.opacity, 0.05, 1.0, underlay.get("opacity", 0.6))
     if body.locked is not None:
         underlay["locked"] = bool(body.locked)
-    schema.underlay_json = json.dumps(underlay, separators=(",", ":"), ensure_ascii=False)
+    _underlay_schreiben(schema, underlay)
     schema.updated_at = datetime.utcnow()
     db.commit()
-    return underlay
+    return _underlay_antwort(underlay)
 
 
 @router.delete("/schemas/{schema_id}/underlay")
@@ -400,7 +654,7 @@ def delete_schema_underlay(schema_id: int, user: User = Depends(get_current_user
                            db: Session = Depends(get_db)):
     schema = _require_schema(schema_id, user, db)
     if schema.underlay_json:
-        schema.underlay_json = None
+        schema.underlay_json = schema.underlay_bild = schema.underlay_sha256 = None
         schema.updated_at = datetime.utcnow()
         db.add(HcAuditEvent(
             tenant_id=user.tenant_id, project_id=schema.project_id, schema_id=schema.id,
@@ -448,7 +702,7 @@ def create_schema_revision(
     graph = body.graph if isinstance(body.graph, dict) else _json_dict(schema.graph_json)
     nodes = graph.get("nodes") if isinstance(graph.get("nodes"), list) else []
     edges = graph.get("edges") if isinstance(graph.get("edges"), list) else []
-    calculation = berechne_schema(nodes, edges)
+    calculation = hydraulik_cache.berechne(nodes, edges, db)
 
     previous = (
         db.query(HcSchemaRevision)
@@ -459,7 +713,7 @@ def create_schema_revision(
         .order_by(HcSchemaRevision.version_nr.desc())
         .first()
     )
-    previous_graph = _json_dict(previous.graph_json) if previous else {}
+    previous_graph = _stand_graph(db, previous) if previous else {}
     diff = _graph_diff(previous_graph, graph)
     version_nr = (
         db.query(func.max(HcSchemaRevision.version_nr))
@@ -475,24 +729,23 @@ def create_schema_revision(
         version_nr=version_nr,
         bezeichnung=(body.bezeichnung or "").strip() or None,
         notiz=(body.notiz or "").strip() or None,
-        graph_json=json.dumps(graph, separators=(",", ":"), ensure_ascii=False),
-        # Ein gespeicherter Stand wird immer nochmals serverseitig gerechnet.
-        # So gehört zum Graph garantiert ein Ergebnis derselben Rechenversion,
-        # selbst wenn der Live-Request des Editors gerade noch unterwegs war.
-        calculation_json=json.dumps(calculation, separators=(",", ":"), ensure_ascii=False),
-        calculation_engine_version="hydraulik-v1",
+        calculation_engine_version=HYDRAULIK_ENGINE_VERSION,
         diff_json=json.dumps(diff, separators=(",", ":"), ensure_ascii=False),
         node_count=len(nodes),
         edge_count=len(edges),
         created_by=user.id,
         created_by_name=actor_name,
     )
-    db.add(revision)
-    db.flush()
+    # Ein gespeicherter Stand wird immer nochmals serverseitig gerechnet.
+    # So gehört zum Graph garantiert ein Ergebnis derselben Rechenversion,
+    # selbst wenn der Live-Request des Editors gerade noch unterwegs war.
+    graph_text = schema_revisionen.speichere(
+        db, revision, graph, calculation, vorher=previous, vorher_graph=previous_graph if previous else None,
+    )
 
     # Der explizite Stand und der aktuelle Arbeitsstand müssen exakt dieselbe
     # Geometrie tragen, auch wenn der 800-ms-Autosave noch nicht gelaufen ist.
-    schema.graph_json = revision.graph_json
+    schema.graph_json = graph_text
     if body.schema_name is not None:
         schema.name = body.schema_name.strip() or schema.name
     schema.updated_at = datetime.utcnow()
@@ -515,7 +768,7 @@ def create_schema_revision(
     ))
     db.commit()
     db.refresh(revision)
-    return _revision_out(revision, detail=True)
+    return _revision_out(revision, db=db, detail=True)
 
 
 @router.get(
@@ -529,7 +782,7 @@ def get_schema_revision(
     db: Session = Depends(get_db),
 ):
     schema = _require_schema(schema_id, user, db)
-    return _revision_out(_require_revision(revision_id, schema, db), detail=True)
+    return _revision_out(_require_revision(revision_id, schema, db), db=db, detail=True)
 
 
 @router.post("/schemas/{schema_id}/revisions/{revision_id}/restore", response_model=SchemaOut)
@@ -541,7 +794,7 @@ def restore_schema_revision(
 ):
     schema = _require_schema(schema_id, user, db)
     revision = _require_revision(revision_id, schema, db)
-    schema.graph_json = revision.graph_json
+    schema.graph_json = json.dumps(_stand_graph(db, revision), separators=(",", ":"), ensure_ascii=False)
     schema.updated_at = datetime.utcnow()
     db.add(HcAuditEvent(
         tenant_id=user.tenant_id,
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -232,6 +232,38 @@ class SchemaOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class SchemaSitzungCreate(BaseModel):
+    # Ungespeicherter Stand des Editors; ohne Angabe der gespeicherte Graph.
+    graph: Optional[dict] = None
+
+
+class SchemaPatchArt(str, Enum):
+    move = "move"
+    node_data = "node_data"
+    node_add = "node_add"
+    node_remove = "node_remove"
+    edge_add = "edge_add"
+    edge_remove = "edge_remove"
+    edge_update = "edge_update"
+    set = "set"
+
+
+class SchemaPatchOp(BaseModel):
+    op: SchemaPatchArt
+    id: Optional[str] = None
+    data: Optional[dict] = None       # node_data: Merge-Patch, null löscht
+    position: Optional[dict] = None   # move
+    node: Optional[dict] = None       # node_add
+    edge: Optional[dict] = None       # edge_add, edge_update
+    key: Optional[str] = None         # set: Ansichtsdaten neben nodes/edges
+    value: Any = None
+
+
+class SchemaSitzungPatch(BaseModel):
+    version: int
+    ops: List[SchemaPatchOp] = Field(default_factory=list, max_length=500)
+
+
 class SchemaRevisionCreate(BaseModel):
     bezeichnung: Optional[str] = Field(default=None, max_length=120)
     notiz: Optional[str] = Field(default=None, max_length=1000)
@@ -289,7 +321,11 @@ class UnderlayTransformIn(BaseModel):
 
 class UnderlayOut(BaseModel):
     mime: str
-    data: str
+    data: Optional[str] = None      # nicht mehr ausgeliefert; Bild über /underlay/bild
+    blob: Optional[str] = None      # SHA-256 im Blob-Speicher
+    groesse: Optional[int] = None
+    sha256: Optional[str] = None    # Bildversion: `?v=` der Kachel-URLs
+    kacheln: Optional[dict] = None  # {"kante": 256, "stufen": [[w, h], …]}
     name: Optional[str] = None
     w: float
     h: float
@@ -0,0 +1,209 @@
+"""LV-Originale und Underlay-Bilder im Blob-Speicher ablegen und lesen.
+
+Neue Uploads gehen direkt in den konfigurierten Speicher (`blob_store`):
+
+- LV-Import: `file_hash` ist schon der SHA-256 des Originals; `original_pdf`
+  bleibt leer.
+- Underlay: `underlay_json` hält `blob` (Hash) und `groesse`, die Spalte
+  `underlay_bild` bleibt leer; das Bild liefert `GET /schemas/{id}/underlay/bild`.
+
+Bestehende Zeilen mit eingebetteten Daten bleiben lesbar. Ausgelagert werden
+sie mit
+
+    python -m app.services.blob_ablage
+
+in kleinen Transaktionen; der Lauf kann jederzeit abgebrochen und wiederholt
+werden. Eine Zeile wird erst geleert, wenn der Blob mit demselben Hash im
+Speicher liegt. PostgreSQL gibt den Platz danach mit `VACUUM` frei.
+
+Gelöschte Schemas, Underlays und Projekte lassen ihre Blobs zurück — derselbe
+Hash kann noch an einer anderen Zeile hängen. Blobs, auf die keine Zeile mehr
+zeigt (`LvImport.file_hash`, Bild und Kacheln in `underlay_json`), entfernt
+
+    python -m app.services.blob_ablage aufraeumen
+
+Blobs jünger als `mindestalter` bleiben: ihre Zeile kann noch ungeschrieben sein.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import logging
+import sys
+import time
+from datetime import timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models.heizungscockpit import HcSchema
+from app.models.lv_import import LvImport
+from app.services import blob_store
+
+logger = logging.getLogger(__name__)
+
+BATCH = 20
+MINDESTALTER = timedelta(hours=24)
+
+
+def data_url_bytes(data: str) -> bytes:
+    """Die Bytes einer base64-Data-URL; ValueError, wenn sie keine ist."""
+    kopf, _, nutzlast = (data or "").partition(",")
+    if not kopf.startswith("data:") or not kopf.endswith(";base64"):
+        raise ValueError("Keine base64-Data-URL")
+    try:
+        return base64.b64decode(nutzlast, validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError("Data-URL nicht lesbar") from exc
+
+
+def underlay_auslagern(underlay: dict, speicher) -> dict:
+    """Underlay mit `blob`/`groesse` statt eingebetteter Data-URL."""
+    daten = data_url_bytes(underlay["data"])
+    sha256 = speicher.speichere(daten)
+    ohne = {k: v for k, v in underlay.items() if k != "data"}
+    return {**ohne, "blob": sha256, "groesse": len(daten)}
+
+
+def underlay_bild(underlay: dict) -> Optional[tuple[str, int, Callable[[int, int], bytes]]]:
+    """(ETag, Grösse, lese(start, laenge)) des Underlay-Bilds oder None."""
+    if underlay.get("blob"):
+        speicher = blob_store.get_speicher()
+        sha256 = underlay["blob"]
+        groesse = speicher.groesse(sha256) if speicher else None
+        if groesse is None:
+            return None
+        return sha256, groesse, lambda start, laenge: speicher.lese(sha256, start, laenge)
+    if underlay.get("data"):
+        daten = data_url_bytes(underlay["data"])
+        return blob_store.pruefsumme(daten), len(daten), lambda start, laenge: daten[start:start + laenge]
+    return None
+
+
+def original_lesen(imp: LvImport) -> bytes:
+    """Das LV-Original aus dem Speicher, sonst aus der Datenbankzeile."""
+    speicher = blob_store.get_speicher()
+    if speicher is not None and imp.file_hash and speicher.groesse(imp.file_hash) is not None:
+        return speicher.lese(imp.file_hash)
+    return imp.original_pdf or b""
+
+
+def _originale_auslagern(db: Session, speicher, batch: int) -> int:
+    anzahl, letzte_id = 0, 0
+    while True:
+        ids = [i for (i,) in db.query(LvImport.id)
+               .filter(LvImport.original_pdf.isnot(None), LvImport.id > letzte_id)
+               .order_by(LvImport.id).limit(batch)]
+        if not ids:
+            return anzahl
+        for imp in db.query(LvImport).filter(LvImport.id.in_(ids)):
+            sha256 = speicher.speichere(bytes(imp.original_pdf))
+            if sha256 != imp.file_hash:
+                # Hash passt nicht zum Original: Zeile unangetastet lassen.
+                logger.warning("LV-Import %s: file_hash weicht vom Original ab — nicht ausgelagert", imp.id)
+                continue
+            imp.original_pdf = None
+            anzahl += 1
+        db.commit()
+        db.expunge_all()
+        letzte_id = ids[-1]
+
+
+def _underlays_auslagern(db: Session, speicher, batch: int) -> int:
+    anzahl, letzte_id = 0, 0
+    while True:
+        ids = [i for (i,) in db.query(HcSchema.id)
+               .filter(or_(HcSchema.underlay_bild.isnot(None),
+                           HcSchema.underlay_json.like('%"data":"data:%')),
+                       HcSchema.id > letzte_id)
+               .order_by(HcSchema.id).limit(batch)]
+        if not ids:
+            return anzahl
+        for schema in db.query(HcSchema).filter(HcSchema.id.in_(ids)):
+            try:
+                underlay = json.loads(schema.underlay_json)
+                if schema.underlay_bild:
+                    underlay["data"] = schema.underlay_bild
+                underlay = underlay_auslagern(underlay, speicher)
+            except (TypeError, ValueError, KeyError):
+                logger.warning("Schema %s: Underlay nicht lesbar — nicht ausgelagert", schema.id)
+                continue
+            underlay.pop("sha256", None)
+            # updated_at bleibt: der Plan selbst hat sich nicht geändert.
+            schema.underlay_json = json.dumps(underlay, separators=(",", ":"), ensure_ascii=False)
+            schema.underlay_bild = None
+            schema.underlay_sha256 = underlay["blob"]
+            anzahl += 1
+        db.commit()
+        db.expunge_all()
+        letzte_id = ids[-1]
+
+
+def auslagern(db: Session, speicher=None, *, batch: int = BATCH) -> dict:
+    """Eingebettete Originale und Underlays in den Blob-Speicher verschieben."""
+    speicher = speicher or blob_store.get_speicher()
+    if speicher is None:
+        raise RuntimeError("Kein Blob-Speicher konfiguriert (BLOB_STORE_DIR oder BLOB_STORE_S3_BUCKET)")
+    return {
+        "lv_originale": _originale_auslagern(db, speicher, batch),
+        "underlays": _underlays_auslagern(db, speicher, batch),
+    }
+
+
+def _underlay_hashes(underlay: dict) -> set[str]:
+    hashes = {underlay.get("blob")} | set((underlay.get("dateien") or {}).values())
+    return {h for h in hashes if isinstance(h, str)}
+
+
+def referenzen(db: Session, *, batch: int = BATCH) -> set[str]:
+    """Alle Hashes, auf die noch eine Zeile zeigt."""
+    hashes = {h for (h,) in db.query(LvImport.file_hash).distinct() if h}
+    zeilen = (db.query(HcSchema.underlay_json)
+              .filter(HcSchema.underlay_json.like('%"blob":%')).yield_per(batch))
+    for (text,) in zeilen:
+        try:
+            hashes |= _underlay_hashes(json.loads(text))
+        except (TypeError, ValueError, AttributeError):
+            continue
+    return hashes
+
+
+def aufraeumen(db: Session, speicher=None, *, mindestalter: timedelta = MINDESTALTER) -> dict:
+    """Blobs löschen, auf die keine Zeile mehr zeigt und die älter als `mindestalter` sind."""
+    speicher = speicher or blob_store.get_speicher()
+    if speicher is None:
+        raise RuntimeError("Kein Blob-Speicher konfiguriert (BLOB_STORE_DIR oder BLOB_STORE_S3_BUCKET)")
+    # Erst die Referenzen, dann der Stichtag: was danach hochgeladen oder erneut
+    # gespeichert wird, ist jünger und bleibt.
+    behalten = referenzen(db)
+    grenze = time.time() - mindestalter.total_seconds()
+    geloescht = uebrig = 0
+    for sha256, zeitpunkt in list(speicher.eintraege()):
+        if sha256 in behalten or zeitpunkt >= grenze:
+            uebrig += 1
+            continue
+        speicher.loesche(sha256)
+        geloescht += 1
+    return {"geloescht": geloescht, "behalten": uebrig}
+
+
+def main() -> None:
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if sys.argv[1:] == ["aufraeumen"]:
+            ergebnis = aufraeumen(db)
+            print(f"[BLOBS] gelöscht: {ergebnis['geloescht']}, behalten: {ergebnis['behalten']}")
+            return
+        ergebnis = auslagern(db)
+    finally:
+        db.close()
+    print(f"[BLOBS] ausgelagert: {ergebnis['lv_originale']} LV-Originale, "
+          f"{ergebnis['underlays']} Underlays")
+
+
+if __name__ == "__main__":
+    main()
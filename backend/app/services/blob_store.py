@@ -0,0 +1,203 @@
+"""Inhaltsadressierter Blob-Speicher für grosse Binärdaten.
+
+LV-Originale (`LvImport.original_pdf`) und Underlay-Bilder (bisher als
+base64-Data-URL in `HcSchema.underlay_json`, bis ~12 MB) blähen Datenbank,
+Backups und jeden Zeilenabruf auf. Hier liegen sie als Dateien, adressiert
+über ihren SHA-256; die Zeilen behalten nur den Hash. Gleicher Inhalt liegt
+genau einmal im Speicher, egal wie oft er hochgeladen wird.
+
+Speicher (`BLOB_STORE`):
+
+    filesystem  – `BLOB_STORE_DIR/ab/cd/<sha256>`; Standard, wenn das
+                  Verzeichnis gesetzt ist
+    s3          – S3-kompatibler Bucket `BLOB_STORE_S3_BUCKET` (optional
+                  `BLOB_STORE_S3_ENDPOINT`, `BLOB_STORE_S3_PREFIX`); braucht
+                  `boto3`
+    db          – kein externer Speicher, Blobs bleiben in der Datenbank
+
+Ohne Konfiguration bleibt alles in der Datenbank: auf Railway ist das
+Container-Dateisystem flüchtig, ein Verzeichnis muss also ein Volume sein.
+
+Blobs werden nie überschrieben — Originale sind unveränderlich, und derselbe
+Hash kann von mehreren Zeilen geteilt werden. Gelöscht wird nur über
+`blob_ablage.aufraeumen`, wenn keine Zeile mehr auf den Hash zeigt. Damit ein
+Lauf keinen Blob erwischt, dessen Zeile gerade erst geschrieben wird, frischt
+`speichere` auch bei schon vorhandenem Inhalt den Zeitstempel auf; junge Blobs
+bleiben liegen.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_HASH = re.compile(r"^[0-9a-f]{64}$")
+
+
+def pruefsumme(daten: bytes) -> str:
+    return hashlib.sha256(daten).hexdigest()
+
+
+def _gueltig(sha256: str) -> str:
+    if not isinstance(sha256, str) or not _HASH.match(sha256):
+        raise ValueError("Ungültiger Blob-Hash")
+    return sha256
+
+
+class DateiBlobSpeicher:
+    """Eine Datei je Blob, auf zwei Ebenen verteilt (`ab/cd/<hash>`).
+
+    Schreiben erfolgt atomar über eine eigene Temp-Datei je Aufruf; parallele
+    Uploads desselben Inhalts (auch aus Threads desselben Prozesses) schreiben
+    dieselben Bytes und ersetzen sich gefahrlos."""
+
+    def __init__(self, verzeichnis: str | Path):
+        self.verzeichnis = Path(verzeichnis)
+        self.verzeichnis.mkdir(parents=True, exist_ok=True)
+
+    def _pfad(self, sha256: str) -> Path:
+        _gueltig(sha256)
+        return self.verzeichnis / sha256[:2] / sha256[2:4] / sha256
+
+    def speichere(self, daten: bytes) -> str:
+        sha256 = pruefsumme(daten)
+        pfad = self._pfad(sha256)
+        try:
+            os.utime(pfad)
+            return sha256
+        except FileNotFoundError:
+            pass
+        pfad.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=pfad.parent, prefix=f"{sha256}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as datei:
+                datei.write(daten)
+            os.replace(tmp, pfad)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        return sha256
+
+    def groesse(self, sha256: str) -> Optional[int]:
+        """Grösse in Bytes oder None, wenn der Blob fehlt."""
+        try:
+            return self._pfad(sha256).stat().st_size
+        except OSError:
+            return None
+
+    def lese(self, sha256: str, start: int = 0, laenge: Optional[int] = None) -> bytes:
+        with open(self._pfad(sha256), "rb") as datei:
+            datei.seek(start)
+            return datei.read() if laenge is None else datei.read(laenge)
+
+    def eintraege(self) -> Iterator[tuple[str, float]]:
+        """(Hash, Zeitstempel) aller Blobs; halbfertige Temp-Dateien nicht."""
+        for pfad in self.verzeichnis.glob("*/*/*"):
+            if _HASH.match(pfad.name):
+                try:
+                    yield pfad.name, pfad.stat().st_mtime
+                except OSError:
+                    continue
+
+    def loesche(self, sha256: str) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            self._pfad(sha256).unlink()
+
+
+class S3BlobSpeicher:
+    """Dieselbe Schnittstelle auf einem S3-kompatiblen Bucket (AWS, MinIO, R2)."""
+
+    def __init__(self, bucket: str, *, endpoint: Optional[str] = None, prefix: str = ""):
+        import boto3  # optional: nur für diesen Speicher nötig
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._client = boto3.client("s3", endpoint_url=endpoint or None)
+
+    def _schluessel(self, sha256: str) -> str:
+        _gueltig(sha256)
+        return f"{self.prefix}/{sha256}" if self.prefix else sha256
+
+    def speichere(self, daten: bytes) -> str:
+        sha256 = pruefsumme(daten)
+        schluessel = self._schluessel(sha256)
+        if self.groesse(sha256) is None:
+            self._client.put_object(Bucket=self.bucket, Key=schluessel, Body=daten)
+        else:
+            # Zeitstempel auffrischen (siehe Moduldoku); S3 kann das nur per Kopie.
+            self._client.copy_object(Bucket=self.bucket, Key=schluessel, MetadataDirective="REPLACE",
+                                     CopySource={"Bucket": self.bucket, "Key": schluessel})
+        return sha256
+
+    def groesse(self, sha256: str) -> Optional[int]:
+        try:
+            kopf = self._client.head_object(Bucket=self.bucket, Key=self._schluessel(sha256))
+        except Exception:  # botocore.ClientError (404) oder Netzwerk
+            return None
+        return int(kopf["ContentLength"])
+
+    def lese(self, sha256: str, start: int = 0, laenge: Optional[int] = None) -> bytes:
+        bereich = f"bytes={start}-" if laenge is None else f"bytes={start}-{start + laenge - 1}"
+        antwort = self._client.get_object(
+            Bucket=self.bucket, Key=self._schluessel(sha256), Range=bereich)
+        return antwort["Body"].read()
+
+    def eintraege(self) -> Iterator[tuple[str, float]]:
+        seiten = self._client.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket, Prefix=f"{self.prefix}/" if self.prefix else "")
+        for seite in seiten:
+            for objekt in seite.get("Contents", []):
+                name = objekt["Key"].rsplit("/", 1)[-1]
+                if _HASH.match(name):
+                    yield name, objekt["LastModified"].timestamp()
+
+    def loesche(self, sha256: str) -> None:
+        self._client.delete_object(Bucket=self.bucket, Key=self._schluessel(sha256))
+
+
+def _speicher_aus_env():
+    modus = os.getenv("BLOB_STORE", "").strip().lower()
+    verzeichnis = os.getenv("BLOB_STORE_DIR")
+    bucket = os.getenv("BLOB_STORE_S3_BUCKET")
+    if modus in {"db", "off", "0", "false", "no", "nein"}:
+        return None
+    if bucket and modus in {"", "s3"}:
+        try:
+            return S3BlobSpeicher(bucket, endpoint=os.getenv("BLOB_STORE_S3_ENDPOINT"),
+                                  prefix=os.getenv("BLOB_STORE_S3_PREFIX", ""))
+        except ImportError:
+            logger.warning("BLOB_STORE_S3_BUCKET gesetzt, aber boto3 fehlt — Blobs bleiben in der Datenbank")
+            return None
+    if verzeichnis and modus in {"", "filesystem"}:
+        try:
+            return DateiBlobSpeicher(verzeichnis)
+        except OSError as exc:
+            logger.warning("BLOB_STORE_DIR unbrauchbar (%s) — Blobs bleiben in der Datenbank", exc)
+    return None
+
+
+_speicher = None
+_speicher_geladen = False
+
+
+def get_speicher():
+    """Der konfigurierte Blob-Speicher (einmal pro Prozess angelegt) oder None."""
+    global _speicher, _speicher_geladen
+    if not _speicher_geladen:
+        _speicher = _speicher_aus_env()
+        _speicher_geladen = True
+    return _speicher
+
+
+def set_speicher(speicher) -> None:
+    """Speicher ersetzen (Tests, eigene Backends); None = Datenbank."""
+    global _speicher, _speicher_geladen
+    _speicher, _speicher_geladen = speicher, True
@@ -0,0 +1,287 @@
+"""Editor-Sitzungen: Arbeitsgraph serverseitig, Änderungen als kleine Patches.
+
+Ohne Sitzung schickt der Editor nach jeder Änderung den ganzen Graphen zweimal:
+an `/hydraulik/berechnen` und alle 800 ms an den Autosave. Bei grossen Schemata
+über schwache Baustellenverbindungen ist das der Engpass.
+
+Eine Sitzung hält den Graphen im Prozess. Der Editor schickt nur Operationen
+(Bauteildaten, Verschieben, Leitung hinzu/weg) samt Versionsnummer und erhält
+nur die Resultate zurück, die sich geändert haben. Gespeichert wird aus dem
+Sitzungsstand. Die Sitzungen leben im Speicher des einen Backend-Prozesses;
+eine unbekannte oder abgelaufene Sitzung eröffnet der Editor mit dem ganzen
+Graphen neu.
+"""
+from __future__ import annotations
+
+import copy
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from app.export.bauteil_infos import node_infos
+from app.services import hydraulik_cache
+
+DEFAULT_TTL_SECONDS = 1800
+DEFAULT_AUTOSAVE_SECONDS = 3.0
+MAX_SITZUNGEN = 200
+
+
+class PatchFehler(ValueError):
+    """Operation passt nicht zum Graphen der Sitzung."""
+
+
+class VersionsKonflikt(Exception):
+    """Der Editor hat auf einem veralteten Stand gepatcht."""
+
+
+def _ttl_seconds() -> float:
+    try:
+        return max(0.0, float(os.getenv("SCHEMA_SITZUNG_TTL_SECONDS", DEFAULT_TTL_SECONDS)))
+    except ValueError:
+        return DEFAULT_TTL_SECONDS
+
+
+def _autosave_seconds() -> float:
+    try:
+        return max(0.0, float(os.getenv("SCHEMA_SITZUNG_AUTOSAVE_SECONDS", DEFAULT_AUTOSAVE_SECONDS)))
+    except ValueError:
+        return DEFAULT_AUTOSAVE_SECONDS
+
+
+def berechne(graph: dict) -> dict:
+    """Hydraulik samt Kennwerten fürs Datenkästchen — Antwort von `/berechnen`."""
+    nodes, edges = hydraulik_cache.rechengraph(graph.get("nodes"), graph.get("edges"))
+    ergebnis = hydraulik_cache.berechne(nodes, edges)
+    return {**ergebnis, "node_infos": node_infos(nodes, ergebnis)}
+
+
+_FEHLT = object()
+
+
+def ergebnis_delta(alt: dict, neu: dict) -> dict:
+    """Nur was sich geändert hat.
+
+    `eintraege`: je Resultat-Dict (edge_flows, gruppe_results, node_infos …) die
+    geänderten oder neuen Einträge — beim Editor hineinmischen.
+    `entfernt`: je Resultat-Dict die verschwundenen Schlüssel.
+    `werte`: übrige Felder (Warnungslisten) vollständig ersetzen; `None`, wenn
+    das Feld ganz weggefallen ist.
+    """
+    eintraege, entfernt, werte = {}, {}, {}
+    for feld, wert in neu.items():
+        vorher = alt.get(feld, _FEHLT)
+        if isinstance(wert, dict) and isinstance(vorher, dict):
+            teil = {k: v for k, v in wert.items() if vorher.get(k, _FEHLT) != v}
+            weg = [k for k in vorher if k not in wert]
+            if teil:
+                eintraege[feld] = teil
+            if weg:
+                entfernt[feld] = weg
+        elif vorher is _FEHLT or vorher != wert:
+            werte[feld] = wert
+    for feld in alt:
+        if feld not in neu:
+            werte[feld] = None
+    return {"eintraege": eintraege, "entfernt": entfernt, "werte": werte}
+
+
+def _nach_id(items: list) -> dict:
+    """Reihenfolge bleibt; Einträge ohne id bleiben unangetastet erhalten."""
+    return {(item.get("id") if isinstance(item, dict) and item.get("id") is not None
+             else ("ohne_id", i)): item for i, item in enumerate(items)}
+
+
+def _mische(ziel: dict, aenderung: dict) -> dict:
+    """JSON-Merge-Patch (RFC 7386): `None` löscht den Schlüssel."""
+    for k, v in aenderung.items():
+        if v is None:
+            ziel.pop(k, None)
+        elif isinstance(v, dict) and isinstance(ziel.get(k), dict):
+            _mische(ziel[k], v)
+        else:
+            ziel[k] = copy.deepcopy(v)
+    return ziel
+
+
+def wende_an(graph: dict, ops: list) -> bool:
+    """Operationen auf den Graphen anwenden (ganz oder gar nicht).
+
+    Nur berührte Bauteile und Leitungen werden kopiert; bei einem Fehler bleibt
+    `graph` unverändert. Rückgabe: ob sich etwas geändert hat, das die Hydraulik
+    liest. Reines Verschieben oder Ansichtsdaten lassen die Resultate stehen.
+    """
+    knoten = _nach_id(graph.get("nodes") or [])
+    leitungen = _nach_id(graph.get("edges") or [])
+    kopiert: set = set()
+    weitere: dict = {}
+    rechnen = False
+
+    def schreibbar(index, schluessel, was):
+        if schluessel not in index:
+            raise PatchFehler(f"{was} {schluessel} nicht im Schema")
+        if (was, schluessel) not in kopiert:
+            index[schluessel] = copy.deepcopy(index[schluessel])
+            kopiert.add((was, schluessel))
+        return index[schluessel]
+
+    def neu(index, item, was, pflicht):
+        item = copy.deepcopy(item or {})
+        if not all(item.get(f) for f in pflicht):
+            raise PatchFehler(f"{was} braucht {', '.join(pflicht)}")
+        if item["id"] in index:
+            raise PatchFehler(f"{was} {item['id']} existiert bereits")
+        index[item["id"]] = item
+        kopiert.add((was, item["id"]))
+
+    for op in ops:
+        art = op.get("op")
+        if art == "move":
+            schreibbar(knoten, op.get("id"), "Bauteil")["position"] = copy.deepcopy(op.get("position") or {})
+        elif art == "node_data":
+            n = schreibbar(knoten, op.get("id"), "Bauteil")
+            n["data"] = _mische(n.get("data") or {}, op.get("data") or {})
+            rechnen = True
+        elif art == "node_add":
+            neu(knoten, op.get("node"), "Bauteil", ("id", "type"))
+            rechnen = True
+        elif art == "node_remove":
+            nid = op.get("id")
+            if nid not in knoten:
+                raise PatchFehler(f"Bauteil {nid} nicht im Schema")
+            del knoten[nid]
+            # Wie React Flow: angeschlossene Leitungen verschwinden mit.
+            for eid in [k for k, e in leitungen.items() if nid in (e.get("source"), e.get("target"))]:
+                del leitungen[eid]
+            rechnen = True
+        elif art == "edge_add":
+            neu(leitungen, op.get("edge"), "Leitung", ("id", "source", "target"))
+            rechnen = True
+        elif art == "edge_remove":
+            if op.get("id") not in leitungen:
+                raise PatchFehler(f"Leitung {op.get('id')} nicht im Schema")
+            del leitungen[op.get("id")]
+            rechnen = True
+        elif art == "edge_update":
+            # Handles, Farbe und Leitungsdaten (laenge_m, Ebene) als Merge-Patch.
+            aenderung = {k: v for k, v in (op.get("edge") or {}).items() if k != "id"}
+            _mische(schreibbar(leitungen, op.get("id"), "Leitung"), aenderung)
+            rechnen = True
+        elif art == "set":
+            schluessel = op.get("key")
+            if not schluessel or schluessel in ("nodes", "edges"):
+                raise PatchFehler("set ist nur für Ansichtsdaten neben nodes/edges")
+            weitere[schluessel] = copy.deepcopy(op.get("value"))
+        else:
+            raise PatchFehler(f"Unbekannte Operation: {art}")
+
+    graph["nodes"], graph["edges"] = list(knoten.values()), list(leitungen.values())
+    for schluessel, wert in weitere.items():
+        if wert is None:
+            graph.pop(schluessel, None)
+        else:
+            graph[schluessel] = wert
+    return rechnen
+
+
+class EditorSitzung:
+    """Arbeitsstand eines Editors für ein Schema."""
+
+    def __init__(self, schema_id: int, tenant_id: int, user_id: int, graph: dict,
+                 gespeichert_am=None, ungespeichert: bool = False):
+        self.id = uuid.uuid4().hex
+        self.schema_id = schema_id
+        self.tenant_id = tenant_id
+        self.user_id = user_id
+        self.graph = graph
+        self.version = 0
+        self.ergebnis = berechne(graph)
+        self.gespeichert_am = gespeichert_am     # updated_at des Schemas beim letzten Speichern
+        self.ungespeichert = ungespeichert
+        self.letztes_speichern = time.monotonic()
+        self.letzter_zugriff = time.monotonic()
+        self.lock = threading.Lock()
+
+    def patch(self, version: int, ops: list) -> dict:
+        """Operationen anwenden und die geänderten Resultate liefern."""
+        if version != self.version:
+            raise VersionsKonflikt(self.version)
+        graph = dict(self.graph)
+        rechnen = wende_an(graph, ops)
+        self.graph = graph
+        self.version += 1
+        self.ungespeichert = self.ungespeichert or bool(ops)
+        if not rechnen:
+            return {"eintraege": {}, "entfernt": {}, "werte": {}}
+        neu = berechne(graph)
+        delta = ergebnis_delta(self.ergebnis, neu)
+        self.ergebnis = neu
+        return delta
+
+    def speichern_faellig(self) -> bool:
+        return self.ungespeichert and time.monotonic() - self.letztes_speichern >= _autosave_seconds()
+
+    def gespeichert(self, updated_at) -> None:
+        self.gespeichert_am = updated_at
+        self.ungespeichert = False
+        self.letztes_speichern = time.monotonic()
+
+
+class SitzungsSpeicher:
+    """Offene Sitzungen im Prozess, begrenzt nach Anzahl und Leerlaufzeit."""
+
+    def __init__(self, max_sitzungen: int = MAX_SITZUNGEN):
+        self.max_sitzungen = max_sitzungen
+        self._sitzungen: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sitzungen)
+
+    def oeffne(self, sitzung: EditorSitzung) -> list:
+        """Sitzung aufnehmen; Rückgabe: verdrängte Sitzungen mit offenen Änderungen."""
+        with self._lock:
+            verdraengt = self._aufraeumen(platz_fuer=1)
+            self._sitzungen[sitzung.id] = sitzung
+            return verdraengt
+
+    def hole(self, sitzung_id: str, tenant_id: int, user_id: int) -> Optional[EditorSitzung]:
+        with self._lock:
+            sitzung = self._sitzungen.get(sitzung_id)
+            if sitzung is None or sitzung.tenant_id != tenant_id or sitzung.user_id != user_id:
+                return None
+            sitzung.letzter_zugriff = time.monotonic()
+            self._sitzungen.move_to_end(sitzung_id)
+            return sitzung
+
+    def schliesse(self, sitzung_id: str) -> None:
+        with self._lock:
+            self._sitzungen.pop(sitzung_id, None)
+
+    def abgelaufen(self) -> list:
+        with self._lock:
+            return self._aufraeumen()
+
+    def _aufraeumen(self, platz_fuer: int = 0) -> list:
+        grenze = time.monotonic() - _ttl_seconds()
+        weg = [s for s in self._sitzungen.values() if s.letzter_zugriff < grenze]
+        ueberzaehlig = len(self._sitzungen) - len(weg) + platz_fuer - self.max_sitzungen
+        if ueberzaehlig > 0:
+            weg += [s for s in self._sitzungen.values() if s not in weg][:ueberzaehlig]
+        for sitzung in weg:
+            del self._sitzungen[sitzung.id]
+        return [s for s in weg if s.ungespeichert]
+
+    def leeren(self) -> None:
+        with self._lock:
+            self._sitzungen.clear()
+
+
+_speicher = SitzungsSpeicher()
+
+
+def sitzungen() -> SitzungsSpeicher:
+    """Prozessweiter Sitzungsspeicher des Backends."""
+    return _speicher
@@ -0,0 +1,180 @@
+"""Hydraulik-Ergebnisse inhaltsadressiert — ein Cache für alle Aufrufer.
+
+`berechne_schema` lief bisher an vier Stellen unabhängig voneinander: im
+Editor-Endpunkt (eigener `lru_cache` über die vollen JSON-Strings, 128 grosse
+Graphen im Speicher), im PDF-Export, beim Speichern eines Schema-Stands und bei
+jedem Abruf des Projektstatus. Wer das Dashboard öffnet, exportiert und einen
+Stand speichert, rechnete denselben Graphen dreimal.
+
+Hier gibt es einen Schlüssel für alle: SHA-256 über den Rechengraphen — nur was
+der Kern liest (Bauteil id/type/data, Leitungsfelder wie in hc_hydraulik) —
+plus `HYDRAULIK_ENGINE_VERSION`. Verschieben eines Bauteils ändert ihn nicht.
+
+Zwei Stufen:
+
+- Prozess: LRU, begrenzt über die Grösse der gepickelten Resultate
+  (`HYDRAULIK_CACHE_MAX_MB`). Jeder Treffer ist eine eigene Kopie.
+- Datenbank (`hc_hydraulik_cache`): nur für Aufrufer mit DB-Session, also
+  gespeicherte Graphen (Status, Export, Schema-Stand) — nicht die
+  Zwischenstände des Editors. Abschaltbar mit `HYDRAULIK_CACHE_DB=false`,
+  Einträge verfallen nach `HYDRAULIK_CACHE_DB_TTL_DAYS`.
+
+Fehlschläge rechnen über `hydraulik_kreise`, also mit den Bauteil-Auslegungen
+unveränderter Kreise.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.byte_lru import ByteLRU, mb_aus_umgebung
+from app.calculations.hydraulik import HYDRAULIK_ENGINE_VERSION
+from app.calculations.hydraulik_kreise import berechne_inkrementell
+from app.models.heizungscockpit import HcHydraulikCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MB = 64
+DEFAULT_DB_TTL_DAYS = 30
+
+# Diese Leitungsfelder liest der Kern — dieselben wie GraphEdge in hc_hydraulik.
+LEITUNG_FELDER = ("id", "source", "target", "sourceHandle", "targetHandle", "stroke", "style", "data")
+
+
+def _max_bytes() -> int:
+    return mb_aus_umgebung("HYDRAULIK_CACHE_MAX_MB", DEFAULT_MAX_MB)
+
+
+def _db_stufe_aktiv() -> bool:
+    return os.getenv("HYDRAULIK_CACHE_DB", "true").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _db_ttl_days() -> float:
+    try:
+        return max(0.0, float(os.getenv("HYDRAULIK_CACHE_DB_TTL_DAYS", str(DEFAULT_DB_TTL_DAYS))))
+    except ValueError:
+        return DEFAULT_DB_TTL_DAYS
+
+
+def rechengraph(nodes: list, edges: list) -> tuple:
+    """Knoten und Leitungen so, wie `/hydraulik/berechnen` sie rechnet."""
+    return (
+        [{"id": n.get("id"), "type": n.get("type"), "data": n.get("data") or {}}
+         for n in nodes or [] if isinstance(n, dict)],
+        [{k: e.get(k) for k in LEITUNG_FELDER} for e in edges or [] if isinstance(e, dict)],
+    )
+
+
+def cache_key(nodes: list, edges: list) -> str:
+    """SHA-256 über den kanonischen Rechengraphen und den Rechenstand."""
+    material = json.dumps(
+        {"version": HYDRAULIK_ENGINE_VERSION, "nodes": nodes, "edges": edges},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ErgebnisCache(ByteLRU):
+    """Prozess-LRU der Hydraulik-Ergebnisse, begrenzt über die gepickelte Grösse."""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        super().__init__(max_bytes if max_bytes is not None else _max_bytes)
+
+    def hole(self, key: str) -> Optional[dict]:
+        daten = super().hole(key)
+        return None if daten is None else pickle.loads(daten)
+
+    def lege_ab(self, key: str, ergebnis: dict) -> None:
+        super().lege_ab(key, pickle.dumps(ergebnis, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+_cache = ErgebnisCache()
+
+
+def prozess_cache() -> ErgebnisCache:
+    return _cache
+
+
+# Die dauerhafte Stufe läuft in einer eigenen Session: der Aufrufer kann ein GET
+# ohne Commit sein oder hält (Schema-Stand) eine Zeilensperre, die kein Commit
+# lösen darf — und ein Cache-Fehler darf seine Transaktion nicht abbrechen.
+def _aus_db(db: Session, key: str) -> Optional[dict]:
+    leser = Session(bind=db.get_bind())
+    try:
+        text = (leser.query(HcHydraulikCache.ergebnis_json)
+                .filter(HcHydraulikCache.cache_key == key).scalar())
+    except SQLAlchemyError:
+        logger.warning("Hydraulik-Cache: Lesen aus der Datenbank fehlgeschlagen", exc_info=True)
+        return None
+    finally:
+        leser.close()
+    if text is None:
+        return None
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def _in_db(db: Session, key: str, ergebnis: dict) -> None:
+    schreiber = Session(bind=db.get_bind())
+    try:
+        grenze = datetime.utcnow() - timedelta(days=_db_ttl_days())
+        schreiber.query(HcHydraulikCache).filter(HcHydraulikCache.created_at < grenze).delete(
+            synchronize_session=False)
+        schreiber.add(HcHydraulikCache(
+            cache_key=key, engine_version=HYDRAULIK_ENGINE_VERSION,
+            ergebnis_json=json.dumps(ergebnis, ensure_ascii=False, separators=(",", ":")),
+        ))
+        schreiber.commit()
+    except IntegrityError:
+        # Ein paralleler Aufruf hat denselben Graphen schon abgelegt.
+        schreiber.rollback()
+    except SQLAlchemyError:
+        schreiber.rollback()
+        logger.warning("Hydraulik-Cache: Schreiben in die Datenbank fehlgeschlagen", exc_info=True)
+    finally:
+        schreiber.close()
+
+
+def nachschlagen(nodes: list, edges: list, db: Optional[Session] = None) -> Optional[dict]:
+    """Nur nachsehen, nicht rechnen — für Aufrufer, die selbst (im Pool) rechnen."""
+    nodes, edges = rechengraph(nodes, edges)
+    key = cache_key(nodes, edges)
+    ergebnis = _cache.hole(key)
+    if ergebnis is None and db is not None and _db_stufe_aktiv():
+        ergebnis = _aus_db(db, key)
+        if ergebnis is not None:
+            _cache.lege_ab(key, ergebnis)
+    return ergebnis
+
+
+def berechne(nodes: list, edges: list, db: Optional[Session] = None) -> dict:
+    """Ergebnis von `berechne_schema` für diesen Graphen, wenn möglich aus dem Cache.
+
+    Mit `db` wird auch die dauerhafte Stufe gelesen und gefüllt.
+    """
+    nodes, edges = rechengraph(nodes, edges)
+    key = cache_key(nodes, edges)
+    ergebnis = _cache.hole(key)
+    if ergebnis is not None:
+        return ergebnis
+    dauerhaft = db is not None and _db_stufe_aktiv()
+    if dauerhaft:
+        ergebnis = _aus_db(db, key)
+        if ergebnis is not None:
+            _cache.lege_ab(key, ergebnis)
+            return ergebnis
+    ergebnis = berechne_inkrementell(nodes, edges)
+    _cache.lege_ab(key, ergebnis)
+    if dauerhaft:
+        _in_db(db, key, ergebnis)
+    return ergebnis
@@ -0,0 +1,127 @@
+"""Inhaltsadressierter Cache der teuren LV-Importstufen.
+
+`upload_lv` berechnet den SHA-256 des Originals schon immer. Hier wird er zum
+Cache-Schlüssel: Wer dasselbe Angebot erneut hochlädt — oder dasselbe PDF in ein
+anderes Projekt — bekommt Extraktion, OCR, Klassifikation, Grobscan und
+visuelle Prüfung aus der Tabelle `lv_extraction_cache`, statt alles (inklusive
+der kostenpflichtigen LLM-Aufrufe) neu zu rechnen.
+
+Drei Einträge je Datei, jeweils mit eigenem Schlüssel:
+
+    extraction – Seitentexte, Wortboxen, Methode, Seitenklassen
+                 (Datei + PIPELINE_VERSION + Extraktor-Einstellungen)
+    triage     – KI-Grobscan (zusätzlich Modell, Reasoning, Seitenbudget)
+    visual     – visuelle Prüfung (zusätzlich Modell, Seitenauswahl und das
+                 kompakte Parserresultat, das mitgeschickt wird)
+
+Gespeichert werden nur erfolgreiche Maschinenergebnisse — nie Fehlversuche,
+nie Benutzerkorrekturen. Treffer und Fehlschläge landen im `debug_json` des
+Imports (`extraction_cache`). Jeder Eintrag ist mehrere MB gross; wer schreibt,
+räumt Einträge ab, die seit `LV_EXTRACTION_CACHE_TTL_DAYS` weder angelegt noch
+getroffen wurden.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.lv_import.pipeline import PIPELINE_VERSION
+from app.models.lv_import import LvExtractionCache
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION, TRIAGE, VISUAL = "extraction", "triage", "visual"
+
+DEFAULT_TTL_DAYS = 30
+
+
+def _ttl_days() -> float:
+    try:
+        return max(0.0, float(os.getenv("LV_EXTRACTION_CACHE_TTL_DAYS", str(DEFAULT_TTL_DAYS))))
+    except ValueError:
+        return DEFAULT_TTL_DAYS
+
+
+def cache_key(kind: str, file_hash: str, settings: dict | None = None) -> str:
+    """Stabiler Schlüssel aus Stufe, Datei, Pipelineversion und Einstellungen."""
+    material = json.dumps({
+        "kind": kind, "file_hash": file_hash, "version": PIPELINE_VERSION,
+        "settings": settings or {},
+    }, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Cache-Zugriff EINES Imports samt Treffer-/Fehlschlagzählern."""
+
+    def __init__(self, db: Session, file_hash: str | None):
+        self.db = db
+        self.file_hash = file_hash or ""
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self.stored: dict[str, int] = {}
+
+    def load(self, kind: str, settings: dict | None = None) -> dict | None:
+        if not self.file_hash:
+            return None
+        key = cache_key(kind, self.file_hash, settings)
+        entry = (
+            self.db.query(LvExtractionCache)
+            .filter(LvExtractionCache.cache_key == key)
+            .first()
+        )
+        payload = None
+        if entry is not None:
+            try:
+                payload = json.loads(entry.payload_json)
+            except (TypeError, ValueError):
+                payload = None
+        if payload is None:
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+            return None
+        entry.hits = (entry.hits or 0) + 1
+        entry.last_used_at = datetime.utcnow()
+        self.hits[kind] = self.hits.get(kind, 0) + 1
+        return payload
+
+    def store(self, kind: str, payload: dict, settings: dict | None = None) -> None:
+        """Ergebnis ablegen. Ein paralleler Import derselben Datei darf den
+        Eintrag schon geschrieben haben — dann gilt dessen Ergebnis."""
+        if not self.file_hash:
+            return
+        key = cache_key(kind, self.file_hash, settings)
+        grenze = datetime.utcnow() - timedelta(days=_ttl_days())
+        with self.db.begin_nested():
+            self.db.query(LvExtractionCache).filter(
+                LvExtractionCache.created_at < grenze,
+                or_(LvExtractionCache.last_used_at.is_(None), LvExtractionCache.last_used_at < grenze),
+            ).delete(synchronize_session=False)
+        try:
+            with self.db.begin_nested():
+                self.db.add(LvExtractionCache(
+                    cache_key=key, kind=kind, file_hash=self.file_hash,
+                    payload_json=json.dumps(payload, ensure_ascii=False),
+                ))
+        except IntegrityError:
+            logger.info("Extraktions-Cache %s für %s bereits vorhanden", kind, self.file_hash[:12])
+            return
+        self.stored[kind] = self.stored.get(kind, 0) + 1
+
+    def status(self) -> dict:
+        return {"extraction_cache": {
+            "version": PIPELINE_VERSION,
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "by_kind": {
+                kind: {"hits": self.hits.get(kind, 0), "misses": self.misses.get(kind, 0),
+                       "stored": self.stored.get(kind, 0)}
+                for kind in (EXTRACTION, TRIAGE, VISUAL)
+            },
+        }}
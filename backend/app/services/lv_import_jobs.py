@@ -0,0 +1,789 @@
+"""LV-Import als Hintergrundjob statt im Upload-Request.
+
+Der Upload speichert nur das Original und antwortet sofort mit `202`. Die
+eigentliche Extraktion — pypdf/pdfplumber/OCR, Seitentriage, visuelle KI-Prüfung,
+Norm-LV-Zuordnung und alle Zeilen — läuft in einem Worker. Der Import selbst ist
+der Job: `LvImport.status` und `LvImport.processing_stage` melden den Fortschritt,
+`GET /lv-imports/{id}/status` liest sie aus.
+
+Statusfolge:
+
+    uploaded → processing (extraction → parsing → ai_review → mapping →
+    persisting) → review | extracted | failed
+
+Das Ausführungs-Backend ist austauschbar (`LV_IMPORT_JOB_BACKEND`):
+
+    process  – Prozesspool (Standard). Die Pipeline ist CPU-lastig; ein eigener
+               Prozess hält den Event-Loop und die GIL der Webinstanz frei.
+    thread   – Threadpool, z.B. wenn Prozesse im Deployment nicht erlaubt sind.
+    inline   – sofort im aufrufenden Thread (Tests, Fehlersuche).
+
+Weitere Backends (z.B. eine externe Queue) werden über `register_backend`
+eingehängt; sie brauchen nur `submit(fn, *args)`.
+
+Jobs im Speicher überleben keinen Neustart. Ein Import, der länger als
+`LV_IMPORT_JOB_TIMEOUT_SECONDS` offen steht, gilt als verwaist und wird beim
+App-Start bzw. beim nächsten Statusabruf als `failed` abgeschlossen.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.lv_import import commercial, conditions_extract, systems
+from app.lv_import.cost_extract import cost_rows_from_positions
+from app.lv_import.cost_summary import has_cost_summary, parse_cost_summary, to_cost_rows
+from app.lv_import.feature_extract import extract_features
+from app.lv_import.feature_keys import FEATURE_DEFS, LV_IMPORT_FEATURE_KEYS
+from app.lv_import.llm import page_triage, visual_review
+from app.lv_import.llm import resolver as llm
+from app.lv_import.llm.budget import ImportLlmBudget
+from app.lv_import.pipeline import LvPipeline, extractor_settings
+from app.lv_import.positions import parse_positions
+from app.lv_import.project_extract import extract_project_data
+from app.lv_import.review_packet import build_review_packet
+from app.models.lv_import import (
+    LvImport, LvImportCondition, LvImportCost, LvImportFeature, LvImportStatus,
+    LvImportSystem,
+)
+from app.plan_features import Feature
+from app.services import blob_ablage
+from app.services import features as feature_service
+from app.services import lv_extraction_cache as cache_kinds
+from app.services.lv_extraction_cache import ExtractionCache
+from app import fachwerte
+
+logger = logging.getLogger(__name__)
+
+# Verarbeitungsstufen in Ausführungsreihenfolge.
+EXTRACTION = "extraction"    # Text, Wortkoordinaten, OCR, Seitenklassen
+PARSING = "parsing"          # Projektkopf, Kennwerte, Positionen, Kosten
+AI_REVIEW = "ai_review"      # Seitentriage + visuelle Prüfung
+MAPPING = "mapping"          # Konditionen + Norm-LV-Zuordnung offener Titel
+PERSISTING = "persisting"    # Review-Zeilen schreiben
+STAGES = (EXTRACTION, PARSING, AI_REVIEW, MAPPING, PERSISTING)
+
+# Noch nicht abgeschlossen — der Import ist dann nicht bearbeitbar.
+OFFEN = frozenset({LvImportStatus.uploaded.value, LvImportStatus.processing.value})
+
+DEFAULT_BACKEND = "process"
+DEFAULT_WORKERS = 2
+HARD_MAX_WORKERS = 8
+DEFAULT_JOB_TIMEOUT_SECONDS = 1800
+
+
+def _als_text(wert):
+    return None if wert in (None, "") else str(wert)[:255]
+
+
+def max_workers() -> int:
+    try:
+        configured = int(os.getenv("LV_IMPORT_WORKERS", str(DEFAULT_WORKERS)))
+    except ValueError:
+        configured = DEFAULT_WORKERS
+    return min(HARD_MAX_WORKERS, max(1, configured))
+
+
+def job_timeout_seconds() -> int:
+    try:
+        return max(1, int(os.getenv("LV_IMPORT_JOB_TIMEOUT_SECONDS", str(DEFAULT_JOB_TIMEOUT_SECONDS))))
+    except ValueError:
+        return DEFAULT_JOB_TIMEOUT_SECONDS
+
+
+def backend_name() -> str:
+    return os.getenv("LV_IMPORT_JOB_BACKEND", DEFAULT_BACKEND).strip().lower()
+
+
+# ── Verarbeitung ───────────────────────────────────────────────────────────
+
+def verarbeite(
+    db: Session, imp: LvImport, *, ki_erlaubt: bool,
+    stufe: Callable[[str], None] | None = None,
+) -> None:
+    """Einen gespeicherten Import vollständig extrahieren.
+
+    Schreibt Merkmale, Kosten, Konditionen und Systeme in die Session und setzt
+    den Endstatus. Committet nicht selbst — ausser über `stufe`, die der Worker
+    für den sichtbaren Fortschritt übergibt. Fehler dürfen den Import nicht
+    sprengen: sie enden im Status `failed` mit Debug-Bericht.
+    """
+    stufe = stufe or (lambda name: setattr(imp, "processing_stage", name))
+    pdf_bytes = blob_ablage.original_lesen(imp)
+
+    # B3 / P0 #1 / Punkt 29 — EINE Pipeline: Text, Wortkoordinaten, Seiten-
+    # klassifikation und alle Extraktoren laufen genau einmal und teilen ihre
+    # Zwischenergebnisse. Die Methode (spatial_pdf/text/ocr/image) wird
+    # festgehalten, damit im Review sichtbar bleibt, woher ein Wert stammt.
+    # Fehler dürfen den Import nicht sprengen.
+    # Dieselbe Datei schon einmal verarbeitet? Dann kommen Text, Wortboxen und
+    # Seitenklassen (und weiter unten Grobscan und visuelle Prüfung) aus dem
+    # inhaltsadressierten Cache.
+    stufe(EXTRACTION)
+    cache = ExtractionCache(db, imp.file_hash)
+    extraktion = extractor_settings()
+    snapshot = cache.load(cache_kinds.EXTRACTION, extraktion)
+    pipeline = (
+        LvPipeline.from_snapshot(pdf_bytes, snapshot) if snapshot
+        else LvPipeline(pdf_bytes)
+    )
+    imp.page_count = pipeline.page_count
+    imp.is_searchable = pipeline.is_searchable
+    imp.extract_method = pipeline.extraction_method
+    if snapshot is None and pipeline.page_count:
+        cache.store(cache_kinds.EXTRACTION, pipeline.snapshot(), extraktion)
+    try:
+        stufe(PARSING)
+        # Punkt 19 — Projektangaben aus dem Deckblatt vorschlagen (nur belegbare;
+        # EBF/Zertifizierung/Projektart werden NICHT geraten).
+        projekt = extract_project_data(pipeline.grunddaten_pages)
+        imp.projekt_name = (projekt.get("project_name") or {}).get("value")
+        imp.projekt_nummer = (projekt.get("project_number") or {}).get("value")
+        imp.ort = (projekt.get("location") or {}).get("value")
+        imp.unternehmer = (projekt.get("contractor") or {}).get("value")
+        imp.offert_datum = (projekt.get("offer_date") or {}).get("value")
+        imp.gewerk = "heizung"
+        imp.waehrung = "CHF"
+        if projekt.get("building_use"):
+            imp.gebaeudetyp = projekt["building_use"]["value"]
+        if projekt.get("project_type"):
+            imp.projektart = projekt["project_type"]["value"]
+        if projekt.get("units"):
+            imp.anzahl_einheiten = projekt["units"]["value"]
+
+        features = extract_features(pipeline.technik_pages, pipeline.technik_word_pages)
+        positions = parse_positions(pipeline.lv_pages)
+        # Punkt 13 — Kosten primär aus der Kostenzusammenstellung; nur wenn es
+        # keine gibt, werden die LV-Positionstotale ausgewertet.
+        summary = parse_cost_summary(pipeline.cost_summary_pages,
+                                     pipeline.cost_summary_word_pages)
+        if has_cost_summary(summary):
+            costs = to_cost_rows(summary)
+        else:
+            # Einzelpositionen bleiben einzeln sichtbar: Menge, Preis und Titel
+            # können so vom Menschen direkt in derselben Zeile geprüft werden.
+            costs = cost_rows_from_positions(
+                positions,
+                trust_detected_amounts=pipeline.extraction_method != "ocr",
+            )
+        # Die Detailprüfung erhält nicht mehr eine starre Acht-Seiten-Auswahl.
+        # Zuerst sichtet ein kompakter Grobscan den Index des ganzen Dokuments;
+        # danach werden seine relevanten/unsicheren Seiten zusammen mit den
+        # deterministischen Pflichtseiten hochauflösend geprüft.
+        review = build_review_packet(features, costs, positions)
+        summary_invalid = (
+            not has_cost_summary(summary)
+            or any(
+                item.get("validation_status") != "valid"
+                for item in (summary.get("group_totals") or {}).values()
+            )
+        )
+        # Gut geparste Kosten werden nicht nochmals als Seitenbild an OpenAI
+        # gesendet. Nur bei einem echten Summenkonflikt kommen die Kosten-
+        # zusammenstellungsseiten dazu. Konditionen werden im ganzen bereits
+        # geparsten Dokument gesucht, damit z.B. die Rabattseite 2 nicht wegen
+        # einer abweichenden Seitenklasse verloren geht.
+        priority_review_pages = {
+            p["page"] for p in pipeline.cost_summary_pages
+            if summary_invalid and p.get("page")
+        }
+        commercial_review_pages = visual_review.select_commercial_review_pages(
+            pipeline.pages, max_pages=2,
+        )
+        priority_review_pages.update(commercial_review_pages)
+        if summary_invalid:
+            priority_review_pages.update(
+                visual_review.select_cost_review_pages(
+                    pipeline.pages, max_pages=3,
+                )
+            )
+        # Der Projektkopf wird im selben sparsamen Visual-Review-Aufruf geprüft.
+        # Kein zusätzlicher API-Call; höchstens die erste Deckblattseite kommt
+        # zum bereits kleinen Seitenpaket hinzu.
+        priority_review_pages.update(
+            p["page"] for p in pipeline.grunddaten_pages[:1] if p.get("page")
+        )
+        technical_review_pages = visual_review.select_technical_review_pages(
+            pipeline.technik_pages, features,
+        )
+        review_pages = set(priority_review_pages)
+        review_pages.update(
+            (features.get(key) or {}).get("source_page")
+            for key in LV_IMPORT_FEATURE_KEYS
+            if (features.get(key) or {}).get("confidence") == "low"
+            and (features.get(key) or {}).get("source_page")
+        )
+        # Vollständig fehlende Kennwerte hatten bisher keine source_page und
+        # gelangten deshalb nie zur visuellen KI-Prüfung. Aus den bereits
+        # geparsten Technikseiten werden dafür wenige starke Stichworttreffer
+        # ergänzt; das PDF wird nicht nochmals ausgelesen.
+        review_pages.update(technical_review_pages)
+        for check in review["deterministic_checks"]:
+            if check.get("severity") != "warning":
+                continue
+            review_pages.update(
+                f.get("source_page") for f in features.values()
+                if isinstance(f, dict) and f.get("source_page")
+            )
+        if pipeline.extraction_method == "image" and not review_pages:
+            # Ohne Textebene sind nur ein kleiner Anfangs-/Endseiten-Sample
+            # vertretbar; der Import bleibt andernfalls zur manuellen Prüfung.
+            all_pages = list(range(1, pipeline.page_count + 1))
+            review_pages.update(
+                all_pages if len(all_pages) <= 6 else all_pages[:2] + all_pages[-4:]
+            )
+        prioritized = sorted(priority_review_pages)
+        required_review_pages = (
+            prioritized
+            + [page for page in technical_review_pages if page not in priority_review_pages]
+            + [page for page in sorted(review_pages)
+               if page not in priority_review_pages and page not in technical_review_pages]
+        )
+        budget = ImportLlmBudget.from_env()
+        stufe(AI_REVIEW)
+        triage_settings = page_triage.cache_settings()
+        triage = (
+            cache.load(cache_kinds.TRIAGE, triage_settings) if ki_erlaubt else {
+                "called": False, "document_quality": None, "issues": [],
+                "pages": [], "selected_pages": [], "page_index": [],
+            }
+        )
+        if triage is None:
+            triage = page_triage.triage(
+                pipeline.pages, pipeline.classification,
+                pipeline.extraction_method, budget=budget,
+            )
+            # Nur eine echte KI-Auswahl ist es wert, gespeichert zu werden.
+            if triage.get("called"):
+                cache.store(cache_kinds.TRIAGE, triage, triage_settings)
+        review_pages, review_page_reasons = page_triage.select_detail_pages(
+            triage, required_review_pages,
+        )
+        if not ki_erlaubt:
+            review_pages = []
+            review_page_reasons = []
+        parser_context = {
+            "features": review["packet"]["features"],
+            "costs": (
+                review["packet"]["costs"] if summary_invalid else []
+            ),
+            "trade_total": summary.get("trade_total"),
+            "checks": review["packet"]["checks"],
+            "costs_valid": not summary_invalid,
+        }
+        # Gleiche Seiten + gleiches Parserresultat + gleiches Modell ergeben
+        # denselben Auftrag an die KI — das Ergebnis darf wiederverwendet werden.
+        visual_settings = {
+            **visual_review.cache_settings(), "pages": sorted(review_pages),
+            "parser_context": parser_context, "require_costs": summary_invalid,
+        }
+        visual = cache.load(cache_kinds.VISUAL, visual_settings) if review_pages else None
+        if visual is None:
+            visual = (
+                visual_review.review(
+                    pipeline.document, page_numbers=review_pages, budget=budget,
+                    parser_context=parser_context,
+                    require_costs=summary_invalid,
+                    # Der zweite visuelle Call übertrug bisher dieselben hoch-
+                    # aufgelösten PDF-Seiten nochmals. Bei korrekten Parserkosten
+                    # bleibt ein unsicherer KI-Wert stattdessen manuell prüfbar.
+                    allow_correction=summary_invalid,
+                )
+                if review_pages else {
+                    "called": False, "success": True, "attempts": 0, "result": {},
+                    "issues": [], "reviewed_pages": [], **budget.status(),
+                    **visual_review.status(),
+                }
+            )
+            if review_pages and visual.get("success"):
+                cache.store(cache_kinds.VISUAL, visual, visual_settings)
+        vorhandene_konditionen = 0
+        konditionen_quelle = "keine"
+        visual_apply = {
+            "visual_review_features_applied": 0,
+            "visual_review_costs_applied": 0,
+            "visual_review_warnings": [],
+        }
+        if visual.get("result"):
+            # Eigene Kopie: das Ergebnis kann aus einem Cache stammen.
+            visual["result"] = dict(visual["result"])
+            if (
+                visual["result"].get("trade_total") is None
+                and summary.get("trade_total") is not None
+            ):
+                visual["result"]["trade_total"] = summary["trade_total"]
+            visual_costs, visual_apply = visual_review.apply_result(
+                features, visual["result"],
+            )
+            visual_project = visual_apply.get("project_data") or {}
+            for field, attr in (
+                ("project_name", "projekt_name"),
+                ("project_number", "projekt_nummer"),
+                ("location", "ort"),
+                ("contractor", "unternehmer"),
+                ("offer_date", "offert_datum"),
+            ):
+                if visual_project.get(field):
+                    setattr(imp, attr, visual_project[field])
+            for field, attr, registry in (
+                ("building_use", "gebaeudetyp", "building_uses"),
+                ("project_type", "projektart", "project_types"),
+            ):
+                code = fachwerte.normalize(registry, visual_project.get(field))
+                if code:
+                    setattr(imp, attr, code)
+            # Ein fehlerfreier Parser bleibt Kostenquelle. KI-Kosten ersetzen ihn
+            # nur, wenn Positionen/Summen fehlen oder widersprüchlich sind.
+            visual_costs_complete = bool(
+                visual_costs
+                and (visual.get("result") or {}).get("group_totals")
+                and (visual.get("result") or {}).get("trade_total") is not None
+            )
+            if summary_invalid and visual_costs_complete:
+                # Ein kleiner Summenkonflikt (typisch: schwer lesbare
+                # Handschrift) darf nicht dazu führen, dass wir stattdessen
+                # offensichtlich falsche OCR-Zahlen aus Detailseiten zeigen.
+                # Die visuell gelesenen Werte bleiben sichtbar, aber der ganze
+                # Satz bleibt bis zur Bestätigung ein Prüffall.
+                if not visual["success"]:
+                    for row in visual_costs:
+                        row["requires_review"] = True
+                        row["confidence"] = "medium"
+                        row["validation_status"] = "mismatch"
+                costs = visual_costs
+            commercial_result = visual_apply.get("commercial") or {}
+        # Konditionen: der Text wird IMMER deterministisch gelesen. Bisher gab
+        # es dafür nur die visuelle KI-Prüfung — ohne Schlüssel oder nach einem
+        # Timeout blieb die Konditionsliste leer und die Bruttosumme auf 0,
+        # obwohl Rabatt, Skonto und MWST lesbar im Dokument stehen. Die KI
+        # ergänzt jetzt nur noch, was der Parser nicht gefunden hat.
+        kommerzielle_nummern = set(commercial_review_pages)
+        konditionen_seiten = [
+            page for page in pipeline.pages
+            if page.get("page") in kommerzielle_nummern
+        ]
+        konditionen_seiten += [
+            page for page in pipeline.cost_summary_pages
+            if page.get("page") not in {p.get("page") for p in konditionen_seiten}
+        ]
+        konditionen_seiten = konditionen_seiten or pipeline.pages[-3:]
+        geparste_konditionen = conditions_extract.parse_conditions(konditionen_seiten)
+        visual_commercial = visual_apply.get("commercial") or {}
+        merged_conditions = commercial.merge_conditions(
+            visual_commercial.get("conditions") or [],
+            geparste_konditionen.get("conditions") or [],
+        )
+        basis = visual_commercial.get("base_amount")
+        if basis is None:
+            basis = geparste_konditionen.get("base_amount")
+        if basis is None:
+            basis = summary.get("trade_total")
+        vat_rate = visual_commercial.get("vat_rate")
+        if vat_rate is None:
+            vat_rate = geparste_konditionen.get("vat_rate")
+        kette, konditions_hinweise = commercial.validate(
+            basis, merged_conditions, vat_rate, None,
+            geparste_konditionen.get("stated_vat_amount"),
+            geparste_konditionen.get("stated_total_incl_vat"),
+        )
+        for item in kette.get("conditions") or []:
+            db.add(LvImportCondition(
+                lv_import_id=imp.id,
+                original_label=str(item.get("label") or "")[:255],
+                kind=item["kind"], direction=item["direction"],
+                rate_percent=item.get("rate_percent"),
+                amount=item.get("amount"), basis_amount=item.get("basis_amount"),
+                calculated_amount=item.get("calculated_amount"),
+                running_total=item.get("running_total"),
+                order_index=int(item.get("order") or 0),
+                source_page=item.get("source_page"),
+                status=item.get("status") or "priced",
+            ))
+        vorhandene_konditionen = len(kette.get("conditions") or [])
+        visual_apply["commercial"] = {"base_amount": basis, **kette}
+        if visual_commercial.get("conditions") and geparste_konditionen.get("conditions"):
+            konditionen_quelle = "visual_ai_pdf+parser"
+        elif visual_commercial.get("conditions"):
+            konditionen_quelle = "visual_ai_pdf"
+        elif conditions_extract.has_conditions(geparste_konditionen):
+            konditionen_quelle = "parser"
+
+        # Erst nach der autoritativen visuellen Auswertung offene Titel gegen
+        # das geschlossene Norm-LV auflösen.
+        stufe(MAPPING)
+        llm_stat = (
+            llm.apply_to_rows(costs, budget=budget) if ki_erlaubt
+            else {"sent": 0, "mapped": 0}
+        )
+        # Ein Import zählt als EIN Vorgang, auch wenn er intern mehrere
+        # LLM-Aufrufe macht. Gezählt wird erst, wenn tatsächlich einer lief.
+        if ki_erlaubt and budget.calls > 0:
+            feature_service.zaehle_nutzung(
+                db, imp.tenant_id, Feature.LV_AI_REVIEW.value,
+                amount=budget.estimated_cost_usd or None,
+            )
+        feature_service.zaehle_nutzung(db, imp.tenant_id, Feature.LV_IMPORT.value)
+        stufe(PERSISTING)
+        # ALLE kanonischen Features anlegen (auch nicht erkannte) → der Nutzer
+        # sieht die vollständige Checkliste und kann fehlende Werte ergänzen.
+        for key in LV_IMPORT_FEATURE_KEYS:
+            f = features.get(key)
+            val = f.get("value") if f else None
+            bbox = (f or {}).get("source_bbox")
+            db.add(LvImportFeature(
+                lv_import_id=imp.id, key=key,
+                value=None if val is None else str(val),
+                unit=FEATURE_DEFS.get(key, {}).get("einheit"),
+                confidence=f.get("confidence") if f else None,
+                source_page=f.get("source_page") if f else None,
+                source_text=f.get("source_text") if f else None,
+                source_excerpt=f.get("source_excerpt") if f else None,
+                source_bbox=",".join(str(round(v, 1)) for v in bbox) if bbox else None,
+                derived_from=f.get("derived_from") if f else None,
+                printed_value=_als_text((f or {}).get("printed_value")),
+                corrected_value=_als_text((f or {}).get("corrected_value")),
+                selected_source=(f or {}).get("selected_source"),
+                requires_review=bool((f or {}).get("requires_review", False)),
+            ))
+        for c in costs:
+            db.add(LvImportCost(
+                lv_import_id=imp.id, bkp_nr=c["bkp_nr"],
+                original_position=c.get("original_position"),
+                original_title=c.get("original_title"),
+                section_path=c.get("section_path"),
+                canonical_key=c.get("canonical_key"),
+                original_amount=c.get("detected_amount"),
+                mapping_method=c.get("mapping_method"),
+                mapping_confidence=c.get("mapping_confidence"),
+                mapping_reason=c.get("mapping_reason"),
+                is_group_total=bool(c.get("is_group_total", False)),
+                validation_status=c.get("validation_status"),
+                source=c.get("source"),
+                detected_amount=c.get("detected_amount"), confidence=c.get("confidence"),
+                source_page=c.get("source_page"), source_text=c.get("source_text"),
+                positionen=c.get("positionen", 1),
+                source_parent_bkp=c.get("source_parent_bkp")
+                or (str(c.get("bkp_nr") or "").split(".")[0] or None),
+                source_scope_summary=c.get("source_scope_summary"),
+                included_norm_keys=c.get("included_norm_keys"),
+                amount_allocation=c.get("amount_allocation"),
+                requires_review=bool(c.get("requires_review", False)),
+            ))
+        # Anlagensysteme: Wärmeabgabe und Wärmeerzeugung. Der Parser findet sie
+        # in born-digital LVs, die visuelle Prüfung in Scans — beide Wege enden
+        # in derselben Struktur.
+        visuelle_systeme = systems.filter_visual_generators_by_page_evidence(
+            visual_apply.get("systems") or [], pipeline.pages,
+            text_available=pipeline.extraction_method != "image",
+        )
+        systeme = systems.merge(
+            systems.detect(pipeline.technik_pages, systems.HEAT_EMISSION)
+            + systems.detect(pipeline.technik_pages, systems.HEAT_GENERATION),
+            visuelle_systeme,
+        )
+        for eintrag in systeme:
+            db.add(LvImportSystem(lv_import_id=imp.id, **eintrag))
+        # Punkt 25/30 — Verarbeitungsbericht: was wurde erkannt, was muss geprüft
+        # werden. Speist die Import-Zusammenfassung und den Debug-Dump.
+        erkannte = [
+            k for k in LV_IMPORT_FEATURE_KEYS
+            if (features.get(k) or {}).get("value") is not None
+        ]
+        pruefen = [c["bkp_nr"] for c in costs if not c.get("canonical_key")
+                   and not c.get("is_group_total")]
+        imp.debug_json = json.dumps({
+            **pipeline.debug_dump(),
+            "cost_source": (
+                "cost_summary" if has_cost_summary(summary)
+                else "visual_ai_pdf" if visual_apply.get("visual_review_costs_applied")
+                else "lv_positions"
+            ),
+            "features_erkannt": len(erkannte),
+            "features_total": len(LV_IMPORT_FEATURE_KEYS),
+            "feature_keys_erkannt": erkannte,
+            "kostenpositionen": len([c for c in costs if not c.get("is_group_total")]),
+            "gruppentotale": len([c for c in costs if c.get("is_group_total")]),
+            "kosten_ohne_zuordnung": len(pruefen),
+            "llm_positions_sent": llm_stat["sent"],
+            "llm_positions_mapped": llm_stat["mapped"],
+            "parser_first": True,
+            "llm_review_characters": review["characters"],
+            "llm_review_estimated_tokens": review["estimated_tokens"],
+            "llm_review_positions_sent": review["positions_sent"],
+            "deterministic_checks": review["deterministic_checks"],
+            "parsed_positions": len(positions),
+            "visual_review_called": visual["called"],
+            "visual_review_success": visual["success"],
+            "visual_review_attempts": visual["attempts"],
+            "visual_review_issues": visual["issues"],
+            "visual_review_pages": visual.get("reviewed_pages") or [],
+            "visual_review_focused_pages": visual.get("focused_pages") or [],
+            "page_triage_called": triage.get("called", False),
+            "page_triage_document_quality": triage.get("document_quality"),
+            "page_triage_issues": triage.get("issues") or [],
+            "page_triage_selected": review_page_reasons,
+            "page_triage_page_count": len(triage.get("page_index") or []),
+            "page_triage_detail_limit": page_triage.max_detail_pages(),
+            "systeme_waermeabgabe": len(systems.delivery_codes(systeme)),
+            "systeme_waermeerzeugung": len(systems.generator_codes(systeme)),
+            "handschrift_offen": len(visual_apply.get("handwritten_open") or []),
+            "konditionen_erkannt": vorhandene_konditionen,
+            "konditionen_quelle": konditionen_quelle,
+            "konditionen_hinweise": konditions_hinweise,
+            "kosten_pruefen": len([c for c in costs if c.get("requires_review")]),
+            **budget.status(),
+            **visual_review.status(),
+            **visual_apply,
+            **llm.status(),
+            "gruppen_validierung": {
+                g: i.get("validation_status")
+                for g, i in (summary.get("group_totals") or {}).items()},
+            "trade_total": summary.get("trade_total"),
+            "commercial": visual_apply.get("commercial") or {},
+            "projekt_erkannt": sorted(projekt.keys()),
+            **cache.status(),
+        }, ensure_ascii=False)
+        quality_ready = visual["success"] or not visual_review.required()
+        imp.status = (
+            LvImportStatus.review.value
+            if quality_ready else LvImportStatus.extracted.value
+        )
+    except Exception as exc:
+        imp.status = LvImportStatus.failed.value
+        imp.debug_json = json.dumps({
+            **pipeline.debug_dump(),
+            "parser_first": False,
+            "error_stage": "extract_and_normalize",
+            "processing_stage": imp.processing_stage,
+            "error_type": type(exc).__name__,
+            "error": str(exc)[:400],
+            **visual_review.status(),
+            **cache.status(),
+        }, ensure_ascii=False)
+    finally:
+        pipeline.document.close()
+
+
+def _stufe_melden(db: Session, imp: LvImport) -> Callable[[str], None]:
+    def melden(name: str) -> None:
+        imp.processing_stage = name
+        db.commit()
+    return melden
+
+
+def run_job(import_id: int, ki_erlaubt: bool, session_factory=None) -> str | None:
+    """Worker-Einstieg: Import laden, verarbeiten, Endstatus committen.
+
+    Läuft im Worker-Prozess mit einer eigenen Session. Liefert den Endstatus
+    (oder None, wenn der Import inzwischen gelöscht wurde).
+    """
+    if session_factory is None:
+        from app.database import SessionLocal
+        session_factory = SessionLocal
+    db = session_factory()
+    try:
+        imp = db.get(LvImport, import_id)
+        if imp is None:
+            return None
+        if imp.status not in OFFEN:
+            # Doppelt eingereicht oder bereits fertig — nichts überschreiben.
+            return imp.status
+        imp.status = LvImportStatus.processing.value
+        imp.processing_started_at = datetime.utcnow()
+        db.commit()
+        verarbeite(db, imp, ki_erlaubt=ki_erlaubt, stufe=_stufe_melden(db, imp))
+        imp.processing_stage = None
+        imp.processing_finished_at = datetime.utcnow()
+        db.commit()
+        return imp.status
+    except Exception:
+        db.rollback()
+        logger.exception("LV-Import %s: Job abgebrochen", import_id)
+        _als_fehlgeschlagen_markieren(db, import_id, "job_crashed")
+        return LvImportStatus.failed.value
+    finally:
+        db.close()
+
+
+def _als_fehlgeschlagen_markieren(db: Session, import_id: int, grund: str) -> None:
+    imp = db.get(LvImport, import_id)
+    if imp is None or imp.status not in OFFEN:
+        return
+    try:
+        report = json.loads(imp.debug_json) if imp.debug_json else {}
+    except (TypeError, ValueError):
+        report = {}
+    imp.status = LvImportStatus.failed.value
+    imp.processing_finished_at = datetime.utcnow()
+    imp.debug_json = json.dumps({
+        **report, "parser_first": False, "error_stage": grund,
+        "processing_stage": imp.processing_stage,
+    }, ensure_ascii=False)
+    db.commit()
+
+
+def _verwaist(imp: LvImport, jetzt: datetime) -> bool:
+    if imp.status not in OFFEN:
+        return False
+    # `uploaded` hat noch keinen Startzeitpunkt — dann zählt der Upload.
+    seit = imp.processing_started_at or imp.created_at
+    return seit is not None and jetzt - seit > timedelta(seconds=job_timeout_seconds())
+
+
+def verwaist_abschliessen(db: Session, imp: LvImport, jetzt: datetime | None = None) -> bool:
+    """Offenen Import nach Ablauf des Timeouts als fehlgeschlagen abschliessen.
+
+    Fängt Jobs ab, deren Worker mit dem Webprozess verschwunden ist — sonst
+    bliebe der Import für Polling und Review für immer gesperrt.
+    """
+    if not _verwaist(imp, jetzt or datetime.utcnow()):
+        return False
+    logger.warning("LV-Import %s: seit %s offen, als verwaist abgeschlossen",
+                   imp.id, imp.processing_started_at or imp.created_at)
+    _als_fehlgeschlagen_markieren(db, imp.id, "job_abandoned")
+    db.refresh(imp)
+    return True
+
+
+def verwaiste_jobs_aufraeumen(db: Session, jetzt: datetime | None = None) -> int:
+    """Beim App-Start: alle verwaisten Imports abschliessen. Liefert die Anzahl."""
+    jetzt = jetzt or datetime.utcnow()
+    offen = db.query(LvImport).filter(LvImport.status.in_(OFFEN)).all()
+    return sum(verwaist_abschliessen(db, imp, jetzt) for imp in offen)
+
+
+# ── Ausführungs-Backends ───────────────────────────────────────────────────
+
+class InlineBackend:
+    """Führt den Job sofort im aufrufenden Thread aus."""
+
+    def submit(self, fn, *args) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:  # pragma: no cover — run_job fängt selbst
+            future.set_exception(exc)
+        return future
+
+    def shutdown(self) -> None:
+        pass
+
+
+class PoolBackend:
+    """Gemeinsame Hülle für Prozess- und Threadpool; der Pool entsteht lazy."""
+
+    def __init__(self, factory: Callable[[int], Executor]):
+        self._factory = factory
+        self._executor: Executor | None = None
+
+    def submit(self, fn, *args) -> Future:
+        if self._executor is None:
+            self._executor = self._factory(max_workers())
+        return self._executor.submit(fn, *args)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _process_pool(workers: int) -> Executor:
+    # `spawn` statt `fork`: der Worker baut Engine und Verbindungspool selbst
+    # auf, statt offene DB-Verbindungen und Threads des Webprozesses zu erben.
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def _thread_pool(workers: int) -> Executor:
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lv-import")
+
+
+BACKENDS: dict[str, Callable[[], object]] = {
+    "process": lambda: PoolBackend(_process_pool),
+    "thread": lambda: PoolBackend(_thread_pool),
+    "inline": InlineBackend,
+}
+_backends: dict[str, object] = {}
+
+
+def register_backend(name: str, factory: Callable[[], object]) -> None:
+    """Weiteres Backend einhängen (z.B. eine externe Queue)."""
+    BACKENDS[name] = factory
+    _backends.pop(name, None)
+
+
+def get_backend(name: str | None = None):
+    """Backend aus der Konfiguration; unbekannter Name → Prozesspool."""
+    name = name or backend_name()
+    if name not in BACKENDS:
+        logger.warning("Unbekanntes LV_IMPORT_JOB_BACKEND '%s', nutze '%s'", name, DEFAULT_BACKEND)
+        name = DEFAULT_BACKEND
+    if name not in _backends:
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
+
+
+def submit(import_id: int, *, ki_erlaubt: bool, backend=None, session_factory=None) -> Future:
+    """Job für einen bereits committeten Import einreichen.
+
+    Stirbt der Worker ausserhalb von `run_job` (z.B. Prozessabbruch), markiert
+    der Callback den Import als fehlgeschlagen, statt ihn ewig in
+    `processing` stehen zu lassen. Scheitert schon das Einreichen, wird der
+    Import sofort als `failed` abgeschlossen und die Future trägt den Fehler.
+    """
+    def _markieren(grund: str) -> None:
+        if session_factory is None:
+            from app.database import SessionLocal
+            db = SessionLocal()
+        else:
+            db = session_factory()
+        try:
+            _als_fehlgeschlagen_markieren(db, import_id, grund)
+        finally:
+            db.close()
+
+    try:
+        backend = backend or get_backend()
+        future = backend.submit(run_job, import_id, ki_erlaubt, session_factory)
+    except Exception as exc:
+        logger.exception("LV-Import %s: Job konnte nicht eingereicht werden", import_id)
+        _markieren("submit_failed")
+        future = Future()
+        future.set_exception(exc)
+        return future
+
+    def _fertig(done: Future) -> None:
+        if done.cancelled() or done.exception() is None:
+            return
+        _markieren("worker_crashed")
+
+    future.add_done_callback(_fertig)
+    return future
+
+
+def status(imp: LvImport) -> dict:
+    """Kompakter Jobzustand für den Statusendpunkt und das Polling im UI."""
+    stage = imp.processing_stage
+    fertig = imp.status not in OFFEN
+    try:
+        report = json.loads(imp.debug_json) if fertig and imp.debug_json else {}
+    except (TypeError, ValueError):
+        report = {}
+    return {
+        "id": imp.id, "job_id": imp.id,
+        "status": imp.status, "stage": stage,
+        "stage_index": STAGES.index(stage) if stage in STAGES else None,
+        "stages": list(STAGES),
+        "done": fertig,
+        "started_at": imp.processing_started_at.isoformat() if imp.processing_started_at else None,
+        "finished_at": imp.processing_finished_at.isoformat() if imp.processing_finished_at else None,
+        "error": report.get("error") if imp.status == LvImportStatus.failed.value else None,
+    }
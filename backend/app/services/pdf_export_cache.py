@@ -0,0 +1,38 @@
+"""Gerenderte PDF-Abschnitte wiederverwenden.
+
+Vor Kundenterminen wird dasselbe Schema oft mehrmals exportiert, und jeder
+Export renderte Deckblatt, Plan, Legende und Berechnungen neu. `erzeuge_pdf`
+legt darum mit diesem Cache jeden Abschnitt als eigenes PDF ab, Schlüssel ist
+der Inhalt, von dem der Abschnitt abhängt:
+
+- Deckblatt: Projekt, Schema, Plankopf, Inhalt, Marke, Datum
+- Plan (A3 ohne Plankopf): Graph und Rechenergebnis
+- Plankopf: Projekt, Schema, Plankopf, Datum
+- Legende und Berechnungen: Graph, Rechenergebnis, Projekt, Marke
+
+Eine neue Revisionsnummer rendert so nur Deckblatt und Plankopf; der Plan wird
+aus dem Cache unterlegt. Prozesslokal, begrenzt in Bytes
+(`PDF_EXPORT_CACHE_MB`, Standard 32).
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from app.byte_lru import ByteLRU, mb_aus_umgebung
+
+DEFAULT_CACHE_MB = 32
+
+
+class AbschnittCache(ByteLRU):
+    """LRU der Abschnitt-PDFs, begrenzt in Bytes."""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        super().__init__(max_bytes if max_bytes is not None
+                         else lambda: mb_aus_umgebung("PDF_EXPORT_CACHE_MB", DEFAULT_CACHE_MB))
+
+
+_cache = AbschnittCache()
+
+
+def prozess_cache() -> AbschnittCache:
+    return _cache
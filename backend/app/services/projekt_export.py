@@ -0,0 +1,346 @@
+"""Projekt-Export: alle Schemas, Grobkostenschätzung und Journal als ein ZIP.
+
+Vor Übergaben exportierten Planer jedes Schema einzeln und die
+Grobkostenschätzung dazu — bei grossen Projekten dutzende Downloads, die
+nacheinander gerendert wurden. Hier wird jede Datei ein `Teil`:
+
+- die Daten sammelt der Router im Anfrage-Thread (DB, Rechte, Plankopf),
+- gerendert wird im Prozesspool, jeder Teil unabhängig,
+- das ZIP fliesst zum Client, sobald ein Teil fertig ist, in der Reihenfolge
+  des Fertigwerdens. Nichts davon liegt je ganz im Speicher.
+
+Ein Teil, der scheitert, bricht den Export nicht ab; er steht mit Grund in
+`Hinweise.txt` im ZIP, ebenso alles, was der Router bewusst weggelassen hat.
+PDF und Excel sind schon komprimiert und werden nur abgelegt.
+
+Für sehr grosse Projekte gibt es dieselbe Arbeit als Job: ein Hintergrund-
+Thread schreibt das ZIP in eine temporäre Datei, der Status zählt fertige
+Teile. Jobs sind prozesslokal und verfallen nach
+`PROJEKT_EXPORT_JOB_TTL_SECONDS` (Standard 3600) samt Datei.
+
+Worker-Anzahl: `PROJEKT_EXPORT_WORKERS` (Standard bis 4, höchstens 8;
+`1` rendert im Anfrageprozess). Kann kein Pool gestartet werden oder bricht
+er weg, rendert derselbe Code die übrigen Teile sequenziell.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Iterator, List, Optional
+
+from app.export.grobkostenschaetzung import (
+    erzeuge_grobkostenschaetzung_excel,
+    erzeuge_grobkostenschaetzung_pdf,
+)
+from app import prozesspools
+from app.export.pdf import erzeuge_pdf
+from app.services import hydraulik_cache, pdf_export_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_TTL_SECONDS = 3600
+
+SCHEMA = "schema"
+KOSTEN_PDF = "kosten_pdf"
+KOSTEN_XLSX = "kosten_xlsx"
+JOURNAL = "journal"
+
+LAEUFT = "laeuft"
+FERTIG = "fertig"
+FEHLER = "fehler"
+
+_pool = prozesspools.Prozesspool("projekt-export")
+
+
+@dataclass(frozen=True)
+class Teil:
+    """Eine Datei im ZIP; `art` wählt den Renderer, `daten` sind seine Eingaben."""
+
+    name: str
+    art: str
+    daten: dict
+
+
+def export_workers(workers: Optional[int] = None) -> int:
+    return prozesspools.workers_aus_umgebung("PROJEKT_EXPORT_WORKERS", workers)
+
+
+def job_ttl_seconds() -> float:
+    try:
+        return max(0.0, float(os.getenv("PROJEKT_EXPORT_JOB_TTL_SECONDS", str(DEFAULT_JOB_TTL_SECONDS))))
+    except ValueError:
+        return float(DEFAULT_JOB_TTL_SECONDS)
+
+
+# ── Rendern (läuft im Worker) ──────────────────────────────────────────────
+
+def journal_text(projekt_name: str, eintraege: List[dict], stand: Optional[date] = None) -> str:
+    """Journal als Klartext: offene Pendenzen zuerst, danach alle Einträge.
+
+    `eintraege` in der Form des Journal-Routers (kind, titel, text,
+    faellig_am, erledigt_at, autor_name, created_at; Daten als ISO-Text).
+    """
+    def kopf(e: dict) -> str:
+        teile = [(e.get("created_at") or "")[:10], e.get("kind") or "notiz", e.get("titel") or "—"]
+        if e.get("autor_name"):
+            teile.append(e["autor_name"])
+        return " · ".join(t for t in teile if t)
+
+    def text(e: dict) -> List[str]:
+        return [f"    {zeile}" for zeile in (e.get("text") or "").strip().splitlines()]
+
+    offen = [e for e in eintraege if e.get("kind") == "aufgabe" and not e.get("erledigt_at")]
+    offen.sort(key=lambda e: (e.get("faellig_am") is None, e.get("faellig_am") or ""))
+
+    zeilen = [f"Projektjournal — {projekt_name}", f"Stand {(stand or date.today()).isoformat()}", ""]
+    zeilen.append(f"Offene Pendenzen ({len(offen)})")
+    for e in offen:
+        faellig = f" — fällig {e['faellig_am']}" if e.get("faellig_am") else ""
+        zeilen.append(f"  - {e.get('titel') or '—'}{faellig}")
+    zeilen += ["", f"Alle Einträge ({len(eintraege)})"]
+    for e in sorted(eintraege, key=lambda e: e.get("created_at") or ""):
+        erledigt = " [erledigt]" if e.get("erledigt_at") else ""
+        zeilen.append(f"  {kopf(e)}{erledigt}")
+        zeilen += text(e)
+    return "\n".join(zeilen) + "\n"
+
+
+def rendere(teil: Teil) -> bytes:
+    """Einen Teil zu Dateiinhalt rendern — rein, ohne DB, darum poolfähig."""
+    d = teil.daten
+    if teil.art == SCHEMA:
+        results = d.get("results")
+        if results is None:
+            results = hydraulik_cache.berechne(d["nodes"], d["edges"])
+        return erzeuge_pdf(
+            d["projekt_name"], d["schema_name"], d.get("inhalt", "beides"),
+            d["nodes"], d["edges"], results, d["plankopf"],
+            marke=d["marke"], cache=pdf_export_cache.prozess_cache(),
+            workers=1,   # läuft schon im Pool des Projekt-Exports
+        )
+    if teil.art in (KOSTEN_PDF, KOSTEN_XLSX):
+        erzeuge = erzeuge_grobkostenschaetzung_pdf if teil.art == KOSTEN_PDF else erzeuge_grobkostenschaetzung_excel
+        return erzeuge(d["projekt_name"], d["inputs"], d["result"], d["variante"])
+    if teil.art == JOURNAL:
+        return journal_text(d["projekt_name"], d["eintraege"]).encode("utf-8")
+    raise ValueError(f"Unbekannte Teil-Art: {teil.art}")
+
+
+def _inline(teil: Teil):
+    try:
+        return teil, rendere(teil), None
+    except Exception as exc:
+        logger.warning("Exportteil %s fehlgeschlagen: %s", teil.name, exc)
+        return teil, None, exc
+
+
+def fertige_teile(teile: List[Teil], workers: Optional[int] = None) -> Iterator[tuple]:
+    """(teil, daten, fehler) je Teil, sobald er fertig ist — `daten` oder `fehler` ist None."""
+    n = export_workers(workers)
+    offen: dict = {}
+    if n > 1 and len(teile) > 1:
+        try:
+            pool = _pool.hole(n)
+            offen = {pool.submit(rendere, teil): teil for teil in teile}
+        except (BrokenProcessPool, OSError) as exc:
+            logger.warning("Projekt-Export parallel nicht möglich (%s) — sequenziell", exc)
+            _pool.verwerfen()
+            offen = {}
+        if offen:
+            try:
+                for future in as_completed(list(offen)):
+                    teil = offen.pop(future)
+                    try:
+                        ergebnis = (teil, future.result(), None)
+                    except BrokenProcessPool as exc:
+                        logger.warning("Projekt-Export: Pool weggebrochen (%s) — Rest sequenziell", exc)
+                        _pool.verwerfen()
+                        rest = [teil, *offen.values()]
+                        offen = {}
+                        for teil in rest:
+                            yield _inline(teil)
+                        return
+                    except Exception as exc:
+                        logger.warning("Exportteil %s fehlgeschlagen: %s", teil.name, exc)
+                        ergebnis = (teil, None, exc)
+                    yield ergebnis
+            finally:
+                # Abgebrochener Download: nicht für niemanden weiterrendern.
+                for future in offen:
+                    future.cancel()
+            return
+    for teil in teile:
+        yield _inline(teil)
+
+
+# ── ZIP ────────────────────────────────────────────────────────────────────
+
+class _ZipPuffer(io.RawIOBase):
+    """Nicht suchbarer Schreibpuffer: `zipfile` schreibt dann Datendeskriptoren
+    und wir können nach jedem Eintrag abholen, was bisher geschrieben ist."""
+
+    def __init__(self):
+        self._teile: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._teile.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def abholen(self) -> bytes:
+        daten = b"".join(self._teile)
+        self._teile.clear()
+        return daten
+
+
+def _komprimierung(name: str) -> int:
+    return zipfile.ZIP_STORED if name.lower().endswith((".pdf", ".xlsx")) else zipfile.ZIP_DEFLATED
+
+
+def zip_strom(teile: List[Teil], hinweise: Optional[List[str]] = None, *,
+              workers: Optional[int] = None,
+              fortschritt: Optional[Callable[[int], None]] = None,
+              geschrieben: Optional[Callable[[List[Teil]], None]] = None) -> Iterator[bytes]:
+    """ZIP aller Teile als Byte-Stücke, ein Stück je fertigem Teil.
+
+    `hinweise`: was der Aufrufer bewusst weggelassen hat; kommt zusammen mit
+    gescheiterten Teilen in `Hinweise.txt`. `fortschritt(n)` nach jedem Teil.
+    `geschrieben(teile)` erst, wenn das letzte Stück abgeholt ist — mit den
+    Teilen, die wirklich im ZIP stehen. Ein abgebrochener Download ruft es nie.
+    """
+    notizen = list(hinweise or [])
+    im_zip: List[Teil] = []
+    puffer = _ZipPuffer()
+    with zipfile.ZipFile(puffer, "w") as zf:
+        for zahl, (teil, daten, fehler) in enumerate(fertige_teile(teile, workers), start=1):
+            if fehler is not None:
+                notizen.append(f"{teil.name}: nicht erzeugt ({type(fehler).__name__}: {fehler})")
+            else:
+                zf.writestr(zipfile.ZipInfo(teil.name, time.localtime()[:6]), daten,
+                            compress_type=_komprimierung(teil.name))
+                im_zip.append(teil)
+            if fortschritt is not None:
+                fortschritt(zahl)
+            stueck = puffer.abholen()
+            if stueck:
+                yield stueck
+        if notizen:
+            zf.writestr("Hinweise.txt", "\n".join(notizen) + "\n", compress_type=zipfile.ZIP_DEFLATED)
+    yield puffer.abholen()
+    if geschrieben is not None:
+        try:
+            geschrieben(im_zip)
+        except Exception:
+            # Das ZIP ist ausgeliefert; ein Fehler danach darf es nicht abbrechen.
+            logger.exception("Projekt-Export: Abschluss nach dem ZIP fehlgeschlagen")
+
+
+# ── Jobs ───────────────────────────────────────────────────────────────────
+
+@dataclass
+class ExportJob:
+    id: str
+    tenant_id: int
+    dateiname: str
+    gesamt: int
+    fertig: int = 0
+    status: str = LAEUFT
+    fehler: Optional[str] = None
+    pfad: Optional[str] = None
+    erstellt: float = field(default_factory=time.monotonic)
+
+    def als_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "fertig": self.fertig,
+            "gesamt": self.gesamt,
+            "dateiname": self.dateiname,
+            "fehler": self.fehler,
+        }
+
+
+_jobs: dict = {}
+_jobs_lock = threading.Lock()
+
+
+def _datei_entfernen(pfad: Optional[str]) -> None:
+    if pfad:
+        try:
+            os.unlink(pfad)
+        except OSError:
+            pass
+
+
+def _aufraeumen() -> None:
+    grenze = time.monotonic() - job_ttl_seconds()
+    with _jobs_lock:
+        alt = [j for j in _jobs.values() if j.status != LAEUFT and j.erstellt < grenze]
+        for job in alt:
+            del _jobs[job.id]
+    for job in alt:
+        _datei_entfernen(job.pfad)
+
+
+def _job_ausfuehren(job: ExportJob, teile: List[Teil], hinweise: List[str], workers: Optional[int],
+                    geschrieben: Optional[Callable[[List[Teil]], None]] = None) -> None:
+    def weiter(n: int) -> None:
+        job.fertig = n
+
+    try:
+        with open(job.pfad, "wb") as f:
+            for stueck in zip_strom(teile, hinweise, workers=workers, fortschritt=weiter,
+                                    geschrieben=geschrieben):
+                f.write(stueck)
+        job.status = FERTIG
+    except Exception as exc:
+        logger.exception("Projekt-Export-Job %s fehlgeschlagen", job.id)
+        job.fehler = str(exc)
+        job.status = FEHLER
+        _datei_entfernen(job.pfad)
+        job.pfad = None
+
+
+def starte_job(teile: List[Teil], tenant_id: int, dateiname: str,
+               hinweise: Optional[List[str]] = None, *, workers: Optional[int] = None,
+               geschrieben: Optional[Callable[[List[Teil]], None]] = None) -> ExportJob:
+    """Export im Hintergrund starten; das ZIP landet in einer temporären Datei.
+
+    `geschrieben` wie bei `zip_strom`, sobald die Datei vollständig ist."""
+    _aufraeumen()
+    fd, pfad = tempfile.mkstemp(prefix="projekt-export-", suffix=".zip")
+    os.close(fd)
+    job = ExportJob(id=uuid.uuid4().hex, tenant_id=tenant_id, dateiname=dateiname,
+                    gesamt=len(teile), pfad=pfad)
+    with _jobs_lock:
+        _jobs[job.id] = job
+    threading.Thread(target=_job_ausfuehren, args=(job, teile, list(hinweise or []), workers, geschrieben),
+                     name=f"projekt-export-{job.id[:8]}", daemon=True).start()
+    return job
+
+
+def hole_job(job_id: str, tenant_id: int) -> Optional[ExportJob]:
+    """Job des eigenen Mandanten; fremde und verfallene Jobs gibt es nicht."""
+    _aufraeumen()
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None or job.tenant_id != tenant_id:
+        return None
+    return job
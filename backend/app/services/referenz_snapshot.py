@@ -0,0 +1,212 @@
+"""Spaltenförmiger Schnappschuss der Referenzprojekte je Firma.
+
+Die Grobkostenschätzung rechnet bei jedem Tastendruck im Formular neu. Bisher
+lud jeder `/schaetzen`-Aufruf alle Referenzprojekte der Firma, dazu je Referenz
+`gewerke` und `kostenzeilen` einzeln (N+1), normalisierte die Fachwerte erneut
+und baute die Brutto- und Netto-Positionslisten jedes Mal neu.
+
+Der Schnappschuss macht das einmal je Firma:
+
+- drei Abfragen (Referenzen, Gewerke, Kostenzeilen) statt 1 + 2·N
+- Adapter (`_ref_to_calc_dict` im Router) einmal je Referenz
+- Referenzlisten je Variante fertig mit `positionen`
+- aktive Korrekturfaktoren und Bauindex
+
+Die Positionsmatrix der Schätzung (`grobkostenschaetzung_matrix`) entsteht
+erst je Anfrage aus dem gefilterten, nach Rang sortierten Segment.
+
+Ungültig wird der Schnappschuss, sobald eine Sitzung RefProjekt, RefKostenzeile,
+RefProjektGewerk, Korrekturfaktor oder BauindexEintrag der Firma schreibt
+(SQLAlchemy-Ereignisse `after_flush`/`after_commit`). Massen-Updates/-Löschungen
+über `query().update()/delete()` verwerfen alle Schnappschüsse der Datenbank.
+Änderungen an der Datenbank vorbei (anderer Prozess, direktes SQL) fängt die
+Lebensdauer `KV_REFERENZ_SNAPSHOT_TTL_SECONDS` (Standard 300, `0` = aus) ab.
+
+Der Berechnungskern verändert seine Eingaben nicht; der Schnappschuss wird
+darum ohne Kopie an alle Anfragen gereicht und darf nicht verändert werden.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.grobkostenschaetzung import Korrekturfaktor
+from app.models.kv import BauindexEintrag, RefKostenzeile, RefProjekt, RefProjektGewerk
+
+DEFAULT_TTL_SECONDS = 300
+
+VARIANTEN = {"brutto": "positionen_brutto", "netto": "positionen_netto"}
+
+_BEOBACHTET = (RefProjekt, RefKostenzeile, RefProjektGewerk, Korrekturfaktor, BauindexEintrag)
+
+
+@dataclass(eq=False)
+class ReferenzSnapshot:
+    """Unveränderlicher Stand der Referenzdaten einer Firma."""
+
+    tenant_id: int | None
+    referenzen: list
+    referenzen_je_variante: dict
+    faktoren: list
+    bauindex: list
+    erstellt: float = field(default_factory=time.monotonic)
+
+    def __len__(self) -> int:
+        return len(self.referenzen)
+
+
+def baue_snapshot(db: Session, tenant_id, adapter: Callable[[RefProjekt], dict]) -> ReferenzSnapshot:
+    """Schnappschuss ohne Cache frisch aus der Datenbank aufbauen."""
+    refs = (
+        db.query(RefProjekt)
+        .options(selectinload(RefProjekt.gewerke), selectinload(RefProjekt.kostenzeilen))
+        .filter(RefProjekt.tenant_id == tenant_id)
+        .all()
+    )
+    referenzen = [adapter(r) for r in refs]
+    faktoren = [
+        {"name": f.name, "faktor": f.faktor, "aktiv": f.aktiv}
+        for f in db.query(Korrekturfaktor)
+        .filter(Korrekturfaktor.tenant_id == tenant_id, Korrekturfaktor.aktiv == True)  # noqa: E712
+        .all()
+    ]
+    bauindex = [
+        {"periode": e.periode, "wert": e.wert}
+        for e in db.query(BauindexEintrag).filter(BauindexEintrag.tenant_id == tenant_id).all()
+    ]
+    return ReferenzSnapshot(
+        tenant_id=tenant_id,
+        referenzen=referenzen,
+        referenzen_je_variante={
+            variante: [{**r, "positionen": r[quelle]} for r in referenzen]
+            for variante, quelle in VARIANTEN.items()
+        },
+        faktoren=faktoren,
+        bauindex=bauindex,
+    )
+
+
+# ── Cache je Datenbank und Firma ────────────────────────────────────────────
+
+class _Eintraege:
+    """Schnappschüsse EINER Datenbank; die Generation verhindert, dass ein
+    während einer Änderung gebauter Stand danach noch abgelegt wird."""
+
+    def __init__(self):
+        self.snapshots: dict = {}
+        self.generation: dict = {}
+        self.lock = threading.Lock()
+
+
+_caches: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def ttl_seconds() -> float:
+    try:
+        return max(0.0, float(os.getenv("KV_REFERENZ_SNAPSHOT_TTL_SECONDS", str(DEFAULT_TTL_SECONDS))))
+    except ValueError:
+        return DEFAULT_TTL_SECONDS
+
+
+def _eintraege(bind) -> _Eintraege:
+    with _caches_lock:
+        eintraege = _caches.get(bind)
+        if eintraege is None:
+            eintraege = _caches[bind] = _Eintraege()
+        return eintraege
+
+
+def _bind_von(db: Session):
+    """Engine der Sitzung; None, wenn sie (noch) an keine gebunden ist."""
+    try:
+        bind = db.get_bind()
+    except Exception:  # UnboundExecutionError — dann lieber alles verwerfen
+        return None
+    return getattr(bind, "engine", bind)
+
+
+def snapshot_fuer(db: Session, tenant_id, adapter: Callable[[RefProjekt], dict]) -> ReferenzSnapshot:
+    """Gültigen Schnappschuss der Firma liefern, bei Bedarf neu aufbauen."""
+    bind = _bind_von(db)
+    if bind is None:
+        return baue_snapshot(db, tenant_id, adapter)
+    eintraege = _eintraege(bind)
+    ttl = ttl_seconds()
+    with eintraege.lock:
+        snapshot = eintraege.snapshots.get(tenant_id)
+        generation = eintraege.generation.get(tenant_id, 0)
+    if snapshot is not None and ttl and time.monotonic() - snapshot.erstellt <= ttl:
+        return snapshot
+    snapshot = baue_snapshot(db, tenant_id, adapter)
+    with eintraege.lock:
+        if ttl and eintraege.generation.get(tenant_id, 0) == generation:
+            eintraege.snapshots[tenant_id] = snapshot
+    return snapshot
+
+
+def invalidiere(tenant_id=None, *, bind=None) -> None:
+    """Schnappschüsse verwerfen — einer Firma oder aller, einer Datenbank oder aller."""
+    with _caches_lock:
+        ziele = [_caches[bind]] if bind is not None and bind in _caches else (
+            [] if bind is not None else list(_caches.values()))
+    for eintraege in ziele:
+        with eintraege.lock:
+            tenants = [tenant_id] if tenant_id is not None else list(
+                set(eintraege.snapshots) | set(eintraege.generation))
+            for t in tenants:
+                eintraege.snapshots.pop(t, None)
+                eintraege.generation[t] = eintraege.generation.get(t, 0) + 1
+
+
+# ── Invalidierung über SQLAlchemy-Ereignisse ────────────────────────────────
+
+_INFO_KEY = "kv_referenz_snapshot_tenants"
+
+
+@event.listens_for(Session, "after_flush")
+def _nach_flush(session, flush_context):
+    tenants = {
+        obj.tenant_id
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, _BEOBACHTET)
+    }
+    if not tenants:
+        return
+    bind = _bind_von(session)
+    for tenant_id in tenants:
+        invalidiere(tenant_id, bind=bind)
+    # Ein während der offenen Transaktion gebauter Stand sähe ungespeicherte
+    # Zeilen — nach Commit bzw. Rollback darum noch einmal verwerfen.
+    session.info.setdefault(_INFO_KEY, set()).update(tenants)
+
+
+@event.listens_for(Session, "after_commit")
+def _nach_commit(session):
+    tenants = session.info.pop(_INFO_KEY, None)
+    if not tenants:
+        return
+    bind = _bind_von(session)
+    for tenant_id in tenants:
+        invalidiere(tenant_id, bind=bind)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _nach_rollback(session, previous_transaction):
+    _nach_commit(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _massenaenderung(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, _BEOBACHTET):
+        invalidiere(bind=_bind_von(orm_execute_state.session))
@@ -0,0 +1,349 @@
+"""Schema-Stände platzsparend ablegen und bei Bedarf wieder zusammensetzen.
+
+Bisher trug jeder Stand den vollen Graphen und das volle Rechenergebnis im
+Klartext. Bei Schemas mit Hunderten Ständen war das mehr Speicher als der Rest
+des Projekts, und schon die Versionsliste las alle Blobs mit.
+
+Jetzt:
+
+- Graph: jeder `SNAPSHOT_ABSTAND`-te Stand ist ein Vollstand, dazwischen liegt
+  nur das Delta zum vorherigen Stand — Bauteile und Leitungen über ihre `id`,
+  alles andere als ganze Werte. Beides zlib-komprimiert in `graph_daten`. Wird
+  das Delta nicht deutlich kleiner als ein Vollstand, gibt es einen Vollstand.
+- Berechnung: inhaltsadressiert in `hc_revision_berechnungen`; Stände, die sich
+  nur in Lage oder Beschriftung unterscheiden, teilen dasselbe Ergebnis.
+- Lesen: vom nächsten Vollstand (oder gecachten Stand) aus die Deltas anwenden.
+  Zusammengesetzte Graphen liegen in einem Prozess-LRU
+  (`SCHEMA_REVISION_CACHE_MB`, Standard 32).
+
+Ältere Stände im Klartext (`graph_art` leer) bleiben lesbar und dienen auch als
+Basis für Deltas. Verdichten: `python -m app.services.schema_revisionen`.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import zlib
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.byte_lru import ByteLRU, mb_aus_umgebung
+from app.models.heizungscockpit import HcRevisionBerechnung, HcSchemaRevision
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_ABSTAND = 20
+DEFAULT_CACHE_MB = 32
+# Ein Delta lohnt sich nur, wenn es höchstens halb so gross ist wie ein Vollstand.
+DELTA_ANTEIL = 0.5
+
+VOLL = "voll"
+DELTA = "delta"
+LISTEN = ("nodes", "edges")
+
+
+def _text(wert) -> str:
+    return json.dumps(wert, separators=(",", ":"), ensure_ascii=False)
+
+
+def _packen(wert) -> bytes:
+    return zlib.compress(_text(wert).encode("utf-8"), 6)
+
+
+def _entpacken(daten: bytes):
+    return json.loads(zlib.decompress(daten).decode("utf-8"))
+
+
+# ---------------------------------------------------------------------------
+# Delta zwischen zwei Graphen
+# ---------------------------------------------------------------------------
+
+def _ids(liste) -> Optional[list]:
+    """ids der Einträge, wenn jeder ein dict mit eindeutiger id ist — sonst None."""
+    if not isinstance(liste, list):
+        return None
+    ids = []
+    for eintrag in liste:
+        if not isinstance(eintrag, dict):
+            return None
+        ident = eintrag.get("id")
+        if isinstance(ident, bool) or not isinstance(ident, (str, int)):
+            return None
+        ids.append(ident)
+    return ids if len(set(ids)) == len(ids) else None
+
+
+def _listen_delta(alt: list, alt_ids: list, neu: list, neu_ids: list) -> dict:
+    alt_nach_id = dict(zip(alt_ids, alt))
+    neu_menge = set(neu_ids)
+    setzen = [e for i, e in zip(neu_ids, neu) if alt_nach_id.get(i) != e]
+    entfernen = [i for i in alt_ids if i not in neu_menge]
+    delta = {}
+    if setzen:
+        delta["setzen"] = setzen
+    if entfernen:
+        delta["entfernen"] = entfernen
+    # Natürliche Reihenfolge: bleibende Einträge wie bisher, neue hinten an.
+    natuerlich = [i for i in alt_ids if i in neu_menge] + [i for i in neu_ids if i not in alt_nach_id]
+    if natuerlich != neu_ids:
+        delta["reihenfolge"] = neu_ids
+    return delta
+
+
+def graph_delta(alt: dict, neu: dict) -> dict:
+    """Delta, mit dem `delta_anwenden(alt, delta)` genau `neu` ergibt."""
+    delta: dict = {"listen": {}, "sonst": {}, "weg": []}
+    for key, wert in neu.items():
+        if key in LISTEN and key in alt:
+            alt_ids, neu_ids = _ids(alt[key]), _ids(wert)
+            if alt_ids is not None and neu_ids is not None:
+                teil = _listen_delta(alt[key], alt_ids, wert, neu_ids)
+                if teil:
+                    delta["listen"][key] = teil
+                continue
+        if key not in alt or alt[key] != wert:
+            delta["sonst"][key] = wert
+    delta["weg"] = [key for key in alt if key not in neu]
+    natuerlich = [key for key in alt if key in neu] + [key for key in neu if key not in alt]
+    if natuerlich != list(neu):
+        delta["schluessel"] = list(neu)
+    return {k: v for k, v in delta.items() if v}
+
+
+def delta_anwenden(alt: dict, delta: dict) -> dict:
+    weg = set(delta.get("weg", ()))
+    neu = {key: wert for key, wert in alt.items() if key not in weg}
+    for key, teil in delta.get("listen", {}).items():
+        liste = alt.get(key) or []
+        nach_id = {e["id"]: e for e in liste}
+        for eintrag in teil.get("setzen", ()):
+            nach_id[eintrag["id"]] = eintrag
+        entfernt = set(teil.get("entfernen", ()))
+        reihenfolge = teil.get("reihenfolge")
+        if reihenfolge is None:
+            bekannt = {e["id"] for e in liste}
+            reihenfolge = [e["id"] for e in liste if e["id"] not in entfernt]
+            reihenfolge += [e["id"] for e in teil.get("setzen", ()) if e["id"] not in bekannt]
+        neu[key] = [nach_id[ident] for ident in reihenfolge]
+    neu.update(delta.get("sonst", {}))
+    if "schluessel" in delta:
+        neu = {key: neu[key] for key in delta["schluessel"]}
+    return neu
+
+
+# ---------------------------------------------------------------------------
+# Prozess-Cache zusammengesetzter Graphen
+# ---------------------------------------------------------------------------
+
+class _GraphCache(ByteLRU):
+    """LRU der Graph-Texte, begrenzt in Bytes.
+
+    Schlüssel ist (id, created_at): ein Stand ist unveränderlich, und der
+    Zeitstempel schützt vor wiederverwendeten ids (SQLite, Testdatenbanken).
+    """
+
+    def __init__(self):
+        super().__init__(lambda: mb_aus_umgebung("SCHEMA_REVISION_CACHE_MB", DEFAULT_CACHE_MB))
+
+
+_cache = _GraphCache()
+
+
+def prozess_cache() -> _GraphCache:
+    return _cache
+
+
+def _cache_key(revision_id: int, created_at) -> tuple:
+    return (revision_id, created_at.isoformat() if created_at else None)
+
+
+# ---------------------------------------------------------------------------
+# Schreiben
+# ---------------------------------------------------------------------------
+
+def berechnung_sha256(calculation) -> str:
+    material = json.dumps(calculation, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _berechnung_ablegen(db: Session, calculation) -> str:
+    sha = berechnung_sha256(calculation)
+    if db.query(HcRevisionBerechnung.id).filter(HcRevisionBerechnung.sha256 == sha).first():
+        return sha
+    try:
+        with db.begin_nested():
+            db.add(HcRevisionBerechnung(sha256=sha, daten=_packen(calculation)))
+    except IntegrityError:
+        pass   # parallel schon abgelegt — derselbe Inhalt
+    return sha
+
+
+def _graph_setzen(revision: HcSchemaRevision, graph: dict, vorher_nr: Optional[int],
+                  vorher_graph: Optional[dict]) -> None:
+    voll = _packen(graph)
+    art, daten, basis = VOLL, voll, None
+    if vorher_graph is not None and revision.version_nr % SNAPSHOT_ABSTAND != 1:
+        delta = _packen(graph_delta(vorher_graph, graph))
+        if len(delta) < DELTA_ANTEIL * len(voll):
+            art, daten, basis = DELTA, delta, vorher_nr
+    revision.graph_json = ""
+    revision.graph_art = art
+    revision.graph_basis_nr = basis
+    revision.graph_daten = daten
+
+
+def speichere(db: Session, revision: HcSchemaRevision, graph: dict, calculation: Optional[dict],
+              vorher: Optional[HcSchemaRevision] = None, vorher_graph: Optional[dict] = None) -> str:
+    """Graph und Berechnung eines neuen Stands setzen, Stand anlegen (flush).
+
+    `vorher` ist der bisher letzte Stand des Schemas, `vorher_graph` sein Graph
+    (wenn schon gelesen). Liefert den Graph-Text, wie ihn auch `graph_text`
+    später zusammensetzt.
+    """
+    if vorher is not None and vorher_graph is None:
+        vorher_graph = graph_dict(db, vorher)
+    _graph_setzen(revision, graph, vorher.version_nr if vorher is not None else None,
+                  vorher_graph if vorher is not None else None)
+    revision.calculation_json = None
+    revision.calculation_sha256 = _berechnung_ablegen(db, calculation) if calculation is not None else None
+    db.add(revision)
+    db.flush()
+    text = _text(graph)
+    _cache.lege_ab(_cache_key(revision.id, revision.created_at), text)
+    return text
+
+
+# ---------------------------------------------------------------------------
+# Lesen
+# ---------------------------------------------------------------------------
+
+def graph_text(db: Session, revision: HcSchemaRevision) -> str:
+    """Graph des Stands als kompakter JSON-Text.
+
+    ValueError, wenn die Kette zum Vollstand unterbrochen ist.
+    """
+    key = _cache_key(revision.id, revision.created_at)
+    text = _cache.hole(key)
+    if text is not None:
+        return text
+    if revision.graph_art is None:
+        return revision.graph_json or "{}"
+
+    meta = {
+        row.version_nr: row
+        for row in db.query(
+            HcSchemaRevision.id, HcSchemaRevision.version_nr, HcSchemaRevision.graph_art,
+            HcSchemaRevision.graph_basis_nr, HcSchemaRevision.created_at,
+        ).filter(
+            HcSchemaRevision.schema_id == revision.schema_id,
+            HcSchemaRevision.version_nr <= revision.version_nr,
+        )
+    }
+    # Rückwärts bis zu einem Vollstand, Klartext-Stand oder gecachten Stand.
+    kette, basis_text = [], None
+    zeile = meta.get(revision.version_nr)
+    while True:
+        if zeile is None:
+            raise ValueError(f"Schema-Stand {revision.version_nr}: Basis fehlt")
+        if kette:
+            basis_text = _cache.hole(_cache_key(zeile.id, zeile.created_at))
+            if basis_text is not None:
+                break
+        kette.append(zeile)
+        if zeile.graph_art != DELTA:
+            break
+        zeile = meta.get(zeile.graph_basis_nr)
+
+    daten = dict(
+        db.query(HcSchemaRevision.id, HcSchemaRevision.graph_daten)
+        .filter(HcSchemaRevision.id.in_([z.id for z in kette]))
+    )
+    graph = json.loads(basis_text) if basis_text is not None else None
+    for zeile in reversed(kette):
+        if zeile.graph_art is None:
+            graph = json.loads(
+                db.query(HcSchemaRevision.graph_json).filter(HcSchemaRevision.id == zeile.id).scalar() or "{}")
+        elif zeile.graph_art == VOLL:
+            graph = _entpacken(daten[zeile.id])
+        else:
+            graph = delta_anwenden(graph, _entpacken(daten[zeile.id]))
+        text = _text(graph)
+        _cache.lege_ab(_cache_key(zeile.id, zeile.created_at), text)
+    return text
+
+
+def graph_dict(db: Session, revision: HcSchemaRevision) -> dict:
+    try:
+        graph = json.loads(graph_text(db, revision))
+    except ValueError:
+        logger.warning("Schema-Stand %s nicht lesbar", revision.id, exc_info=True)
+        return {}
+    return graph if isinstance(graph, dict) else {}
+
+
+def berechnung(db: Session, revision: HcSchemaRevision) -> Optional[dict]:
+    if revision.calculation_sha256:
+        daten = (db.query(HcRevisionBerechnung.daten)
+                 .filter(HcRevisionBerechnung.sha256 == revision.calculation_sha256).scalar())
+        wert = _entpacken(daten) if daten is not None else None
+    elif revision.calculation_json:
+        try:
+            wert = json.loads(revision.calculation_json)
+        except ValueError:
+            wert = None
+    else:
+        wert = None
+    return wert if isinstance(wert, dict) else None
+
+
+# ---------------------------------------------------------------------------
+# Bestehende Klartext-Stände verdichten
+# ---------------------------------------------------------------------------
+
+def verdichten(db: Session) -> dict:
+    """Alle Klartext-Stände ins neue Format bringen; je Schema ein Commit.
+
+    Mehrfach ausführbar: schon verdichtete Stände bleiben unverändert.
+    """
+    zaehler = {"staende": 0, "berechnungen": 0}
+    schema_ids = [sid for (sid,) in db.query(HcSchemaRevision.schema_id)
+                  .filter(HcSchemaRevision.graph_art.is_(None)).distinct()]
+    for schema_id in schema_ids:
+        staende = (db.query(HcSchemaRevision)
+                   .filter(HcSchemaRevision.schema_id == schema_id)
+                   .order_by(HcSchemaRevision.version_nr).all())
+        vorher, vorher_graph = None, None
+        for revision in staende:
+            graph = graph_dict(db, revision)
+            if revision.graph_art is None:
+                _graph_setzen(revision, graph, vorher.version_nr if vorher else None, vorher_graph)
+                zaehler["staende"] += 1
+            if revision.calculation_json and not revision.calculation_sha256:
+                calculation = berechnung(db, revision)
+                if calculation is not None:
+                    revision.calculation_sha256 = _berechnung_ablegen(db, calculation)
+                    zaehler["berechnungen"] += 1
+                revision.calculation_json = None
+            vorher, vorher_graph = revision, graph
+        db.commit()
+        for revision in staende:
+            db.expunge(revision)
+    return zaehler
+
+
+def main() -> None:   # pragma: no cover — Betriebswerkzeug
+    from app.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        logger.info("Schema-Stände verdichtet: %s", verdichten(db))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":   # pragma: no cover
+    main()
@@ -0,0 +1,185 @@
+"""Blob-Speicher: Originale und Underlays als Dateien, die Zeilen nur mit Hash."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.auth import get_current_user
+from app.database import get_db
+from app.models.heizungscockpit import HcSchema
+from app.models.lv_import import LvImport
+from app.routers import hc_lv_import, hc_schema
+from app.routers.hc_schema import get_schema_underlay, patch_schema_underlay, set_schema_underlay
+from app.schemas.hc_schemas import UnderlayTransformIn
+from app.services import blob_ablage, blob_store, lv_import_jobs
+from tests.test_lv_import_jobs import _session_factory
+from tests.test_schema_underlay import _MINI_PNG, _underlay_in, _umgebung
+
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 8
+PNG = blob_ablage.data_url_bytes(_MINI_PNG)
+
+
+@pytest.fixture()
+def speicher(tmp_path, monkeypatch):
+    lager = blob_store.DateiBlobSpeicher(tmp_path / "blobs")
+    monkeypatch.setattr(blob_store, "_speicher", lager)
+    monkeypatch.setattr(blob_store, "_speicher_geladen", True)
+    return lager
+
+
+def _get(db, user, router, pfad, headers=None):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    async def _lauf():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await client.get(pfad, headers=headers or {})
+    return asyncio.run(_lauf())
+
+
+def test_dateispeicher_dedupliziert_und_liest_bereiche(speicher):
+    sha = speicher.speichere(PDF)
+    assert speicher.speichere(PDF) == sha == blob_store.pruefsumme(PDF)
+    assert len([p for p in speicher.verzeichnis.rglob("*") if p.is_file()]) == 1
+    assert speicher.groesse(sha) == len(PDF)
+    assert speicher.lese(sha, 9, 4) == PDF[9:13]
+    assert speicher.groesse("0" * 64) is None
+    with pytest.raises(ValueError):
+        speicher.groesse("../../etc/passwd")
+
+
+def test_gleichzeitiges_speichern_aus_threads(speicher):
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        hashes = set(pool.map(speicher.speichere, [PDF] * 32))
+    assert hashes == {blob_store.pruefsumme(PDF)}
+    dateien = [p for p in speicher.verzeichnis.rglob("*") if p.is_file()]
+    assert [p.name for p in dateien] == [blob_store.pruefsumme(PDF)]
+    assert dateien[0].read_bytes() == PDF
+
+
+def test_ohne_konfiguration_bleibt_alles_in_der_datenbank(monkeypatch):
+    for name in ("BLOB_STORE", "BLOB_STORE_DIR", "BLOB_STORE_S3_BUCKET"):
+        monkeypatch.delenv(name, raising=False)
+    assert blob_store._speicher_aus_env() is None
+    monkeypatch.setenv("BLOB_STORE_S3_BUCKET", "plaene")
+    monkeypatch.setitem(__import__("sys").modules, "boto3", None)   # boto3 fehlt
+    assert blob_store._speicher_aus_env() is None
+
+
+def test_lv_upload_behaelt_nur_den_hash_und_der_worker_liest_den_speicher(speicher, monkeypatch):
+    factory = _session_factory()
+    monkeypatch.setattr(lv_import_jobs, "submit", lambda import_id, ki_erlaubt: None)
+    datei = SimpleNamespace(filename="lv.pdf")
+
+    async def lesen():
+        return PDF
+
+    datei.read = lesen
+    user = SimpleNamespace(id=1, tenant_id=1, name="Dominic", email="d@x.ch", role="admin")
+    db = factory()
+    res = asyncio.run(hc_lv_import.upload_lv(file=datei, project_id=None, user=user, db=db))
+
+    imp = db.get(LvImport, res["id"])
+    assert imp.original_pdf is None and imp.file_hash == blob_store.pruefsumme(PDF)
+    assert blob_ablage.original_lesen(imp) == PDF
+
+    pfad = f"/api/v1/lv-imports/{imp.id}/original"
+    teil = _get(db, user, hc_lv_import.router, pfad, {"Range": "bytes=9-12"})
+    assert teil.status_code == 206 and teil.content == PDF[9:13]
+    assert teil.headers["etag"] == f'"{imp.file_hash}"'
+    assert _get(db, user, hc_lv_import.router, pfad,
+                {"If-None-Match": f'"{imp.file_hash}"'}).status_code == 304
+
+
+def test_underlay_im_speicher_mit_etag(speicher):
+    db = _session_factory()()
+    user, fremd, _, schema = _umgebung(db)
+    out = set_schema_underlay(schema.id, _underlay_in(), user, db)
+    assert "data" not in out and out["blob"] == blob_store.pruefsumme(PNG)
+    assert '"data"' not in db.get(HcSchema, schema.id).underlay_json
+    # Lage ändern lässt das Bild im Speicher.
+    assert patch_schema_underlay(schema.id, UnderlayTransformIn(x=5), user, db)["blob"] == out["blob"]
+    assert get_schema_underlay(schema.id, user, db)["groesse"] == len(PNG)
+
+    pfad = f"/api/v1/schemas/{schema.id}/underlay/bild"
+    bild = _get(db, user, hc_schema.router, pfad)
+    assert bild.status_code == 200 and bild.content == PNG
+    assert bild.headers["content-type"] == "image/png"
+    assert _get(db, user, hc_schema.router, pfad,
+                {"If-None-Match": f'"{out["blob"]}"'}).status_code == 304
+    assert _get(db, fremd, hc_schema.router, pfad).status_code == 404
+
+
+def test_eingebettetes_underlay_ist_ueber_bild_abrufbar():
+    db = _session_factory()()
+    user, _, _, schema = _umgebung(db)
+    set_schema_underlay(schema.id, _underlay_in(), user, db)
+    bild = _get(db, user, hc_schema.router, f"/api/v1/schemas/{schema.id}/underlay/bild")
+    assert bild.status_code == 200 and bild.content == PNG
+
+
+def test_auslagern_verschiebt_bestehende_zeilen_einmal(speicher):
+    db = _session_factory()()
+    schema_id = _umgebung(db)[3].id
+    # Stand vor dem Blob-Speicher: Data-URL eingebettet.
+    db.get(HcSchema, schema_id).underlay_json = json.dumps(
+        {"mime": "image/png", "data": _MINI_PNG, "w": 1, "h": 1, "x": 0, "y": 0},
+        separators=(",", ":"))
+    db.add_all([
+        LvImport(tenant_id=1, filename="a.pdf", file_hash=blob_store.pruefsumme(PDF), original_pdf=PDF),
+        LvImport(tenant_id=1, filename="b.pdf", file_hash=blob_store.pruefsumme(PDF), original_pdf=PDF),
+        LvImport(tenant_id=1, filename="kaputt.pdf", file_hash="falsch", original_pdf=b"x"),
+    ])
+    db.commit()
+
+    assert blob_ablage.auslagern(db, batch=2) == {"lv_originale": 2, "underlays": 1}
+    assert blob_ablage.auslagern(db, batch=2) == {"lv_originale": 0, "underlays": 0}
+
+    verbleibend = db.query(LvImport.filename).filter(LvImport.original_pdf.isnot(None)).all()
+    assert verbleibend == [("kaputt.pdf",)]
+    underlay = json.loads(db.get(HcSchema, schema_id).underlay_json)
+    assert "data" not in underlay and speicher.lese(underlay["blob"]) == PNG
+    assert blob_ablage.original_lesen(db.query(LvImport).filter_by(filename="a.pdf").one()) == PDF
+
+
+def test_aufraeumen_loescht_nur_alte_verwaiste_blobs(speicher):
+    import os
+    from datetime import timedelta
+
+    from app.routers.hc_schema import delete_schema_underlay
+
+    db = _session_factory()()
+    user, _, _, schema = _umgebung(db)
+    set_schema_underlay(schema.id, _underlay_in(), user, db)
+    db.add(LvImport(tenant_id=1, filename="a.pdf", file_hash=speicher.speichere(PDF)))
+    db.commit()
+    verwaist = speicher.speichere(b"geloeschtes Projekt")
+    for pfad in speicher.verzeichnis.rglob("*"):
+        if pfad.is_file():
+            os.utime(pfad, (0, 0))
+    referenziert = blob_ablage.referenzen(db)
+    assert blob_store.pruefsumme(PDF) in referenziert and blob_store.pruefsumme(PNG) in referenziert
+    jung = speicher.speichere(b"gerade hochgeladen")
+
+    ergebnis = blob_ablage.aufraeumen(db, mindestalter=timedelta(hours=1))
+
+    hashes = {h for h, _ in speicher.eintraege()}
+    assert ergebnis["geloescht"] == 1 and verwaist not in hashes
+    assert jung in hashes and referenziert <= hashes
+
+    # Nach dem Entfernen des Underlays gehören Bild und Kacheln niemandem mehr —
+    # erneutes Speichern frischt einen alten Blob aber wieder auf.
+    delete_schema_underlay(schema.id, user, db)
+    speicher.speichere(PNG)
+    blob_ablage.aufraeumen(db, mindestalter=timedelta(hours=1))
+    hashes = {h for h, _ in speicher.eintraege()}
+    assert blob_store.pruefsumme(PNG) in hashes
+    assert hashes == {blob_store.pruefsumme(PDF), blob_store.pruefsumme(PNG), jung}
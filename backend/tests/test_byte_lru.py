@@ -0,0 +1,32 @@
+"""Gemeinsamer Byte-LRU der Prozess-Caches."""
+from app.byte_lru import ByteLRU, mb_aus_umgebung
+
+
+def test_verdraengt_die_aeltesten_bis_zur_grenze():
+    cache = ByteLRU(10)
+    cache.lege_ab("a", b"xxxx")
+    cache.lege_ab("b", b"xxxx")
+    assert cache.hole("a") == b"xxxx"          # a ist jetzt der jüngste
+    cache.lege_ab("c", b"xxxx")
+    assert cache.hole("b") is None and cache.hole("a") and cache.hole("c")
+    assert cache.belegt_bytes == 8 and (cache.treffer, cache.fehlschlaege) == (3, 1)
+
+
+def test_zu_grosse_eintraege_nur_mit_behalte_neuesten():
+    cache = ByteLRU(4)
+    cache.lege_ab("gross", b"x" * 5)
+    assert len(cache) == 0
+
+    pyramiden = ByteLRU(4, behalte_neuesten=True)
+    pyramiden.lege_ab("a", b"xx")
+    pyramiden.lege_ab("gross", b"x" * 5)
+    assert pyramiden.hole("gross") and pyramiden.hole("a") is None
+
+
+def test_grenze_aus_der_umgebung_gilt_ohne_neustart(monkeypatch):
+    cache = ByteLRU(lambda: mb_aus_umgebung("TEST_LRU_MB", 1))
+    monkeypatch.setenv("TEST_LRU_MB", "0")
+    cache.lege_ab("a", b"x")
+    assert len(cache) == 0
+    monkeypatch.setenv("TEST_LRU_MB", "kaputt")
+    assert cache.max_bytes == 1024 * 1024
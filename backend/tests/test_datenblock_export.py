@@ -14,6 +14,7 @@ from app.export.schema_svg import (
     node_groesse,
     zeichne_datenblock,
 )
+from app.export.zeichenziele import SvgZiel
 
 
 def _pumpe(**daten):
@@ -36,22 +37,22 @@ def test_nur_ein_ausdrueckliches_true_blendet_aus():
 
 
 def test_ausgeblendeter_block_wird_nicht_gezeichnet():
-    parts = []
-    zeichne_datenblock(parts, _pumpe(caption_hidden=True), {})
-    assert parts == []
+    ziel = SvgZiel()
+    zeichne_datenblock(ziel, _pumpe(caption_hidden=True), {})
+    assert ziel.teile == []
 
 
 def test_eingeblendeter_block_wird_gezeichnet():
-    parts = []
-    zeichne_datenblock(parts, _pumpe(), {})
-    assert parts, "Ein sichtbarer Block muss SVG erzeugen"
+    ziel = SvgZiel()
+    zeichne_datenblock(ziel, _pumpe(), {})
+    assert ziel.teile, "Ein sichtbarer Block muss SVG erzeugen"
 
 
 def test_bauteil_ohne_nummer_hat_keinen_block():
-    parts = []
+    ziel = SvgZiel()
     ohne_nr = {"id": "x", "type": "pump", "position": {"x": 0, "y": 0}, "data": {}}
-    zeichne_datenblock(parts, ohne_nr, {})
-    assert parts == []
+    zeichne_datenblock(ziel, ohne_nr, {})
+    assert ziel.teile == []
 
 
 # ── Lage ───────────────────────────────────────────────────────────────────
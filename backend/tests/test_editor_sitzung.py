@@ -0,0 +1,173 @@
+"""Editor-Sitzung: Graph serverseitig, Patches hin, geänderte Resultate zurück."""
+import copy
+import json
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.auth import Firma, Role, User
+from app.models.heizungscockpit import HcProject, HcSchema
+from app.models.subscription import SubscriptionPlan  # noqa: F401 — FK-Ziel
+from app.routers.hc_hydraulik import GraphInput, hydraulik_berechnen
+from app.routers.hc_schema import (
+    close_schema_sitzung,
+    open_schema_sitzung,
+    patch_schema_sitzung,
+    save_schema_sitzung,
+)
+from app.schemas.hc_schemas import SchemaSitzungCreate, SchemaSitzungPatch
+from app.services import editor_sitzungen
+from tests.test_hydraulik_kreise import _schema_mit_bww
+
+
+@pytest.fixture()
+def umgebung():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    firma = Firma(name="Planer AG")
+    db.add(firma)
+    db.flush()
+    user = User(tenant_id=firma.id, email="planer@example.com", password_hash="x",
+                role=Role.user, is_verified=True)
+    db.add(user)
+    db.flush()
+    projekt = HcProject(tenant_id=firma.id, name="Heizzentrale", erstellt_von=user.id)
+    db.add(projekt)
+    db.flush()
+    nodes, edges = _schema_mit_bww()
+    schema = HcSchema(tenant_id=firma.id, project_id=projekt.id, name="Prinzip",
+                      graph_json=json.dumps({"nodes": nodes, "edges": edges, "viewport": {"zoom": 1}}))
+    db.add(schema)
+    db.commit()
+    editor_sitzungen.sitzungen().leeren()
+    yield db, user, schema
+    editor_sitzungen.sitzungen().leeren()
+    db.close()
+
+
+def _oeffne(db, user, schema, graph=None):
+    return open_schema_sitzung(schema.id, SchemaSitzungCreate(graph=graph), user, db)
+
+
+def _patch(db, user, sitzung_id, version, *ops):
+    return patch_schema_sitzung(sitzung_id, SchemaSitzungPatch(version=version, ops=list(ops)), user, db)
+
+
+def _mit_delta(ergebnis, antwort):
+    neu = copy.deepcopy(ergebnis)
+    for feld, eintraege in antwort["eintraege"].items():
+        neu[feld].update(eintraege)
+    for feld, schluessel in antwort["entfernt"].items():
+        for k in schluessel:
+            del neu[feld][k]
+    for feld, wert in antwort["werte"].items():
+        if wert is None:
+            neu.pop(feld, None)
+        else:
+            neu[feld] = wert
+    return neu
+
+
+def _berechnet(graph):
+    return hydraulik_berechnen(GraphInput(nodes=graph["nodes"], edges=graph["edges"]))
+
+
+def test_patch_liefert_nur_geaenderte_resultate(umgebung):
+    db, user, schema = umgebung
+    offen = _oeffne(db, user, schema)
+    graph = json.loads(schema.graph_json)
+    assert offen["ergebnis"] == _berechnet(graph)
+
+    antwort = _patch(db, user, offen["sitzung_id"], 0,
+                     {"op": "node_data", "id": "g2", "data": {"q_kw": 30}})
+    assert antwort["version"] == 1
+    assert set(antwort["eintraege"]["gruppe_results"]) == {"g2"}
+    assert "bww_results" not in antwort["eintraege"]
+    next(n for n in graph["nodes"] if n["id"] == "g2")["data"]["q_kw"] = 30
+    assert _mit_delta(offen["ergebnis"], antwort) == _berechnet(graph)
+
+    verschoben = _patch(db, user, offen["sitzung_id"], 1,
+                        {"op": "move", "id": "g2", "position": {"x": 50, "y": 80}})
+    assert verschoben["version"] == 2
+    assert verschoben["eintraege"] == {} and verschoben["werte"] == {}
+
+
+def test_leitung_und_bauteil_entfernen(umgebung):
+    db, user, schema = umgebung
+    offen = _oeffne(db, user, schema)
+    antwort = _patch(db, user, offen["sitzung_id"], 0,
+                     {"op": "node_remove", "id": "g3"},
+                     {"op": "edge_update", "id": "g0v", "edge": {"data": {"laenge_m": 25}}})
+    assert "g3" in antwort["entfernt"]["gruppe_results"]
+    assert {"g3v", "g3r"} <= set(antwort["entfernt"]["edge_flows"])
+    sitzung = editor_sitzungen.sitzungen().hole(offen["sitzung_id"], user.tenant_id, user.id)
+    assert not any("g3" in (e["source"], e["target"]) for e in sitzung.graph["edges"])
+    assert next(e for e in sitzung.graph["edges"] if e["id"] == "g0v")["data"] == {"laenge_m": 25}
+
+
+def test_veralteter_stand_und_fehlerhafte_operation(umgebung):
+    db, user, schema = umgebung
+    offen = _oeffne(db, user, schema)
+    with pytest.raises(HTTPException) as konflikt:
+        _patch(db, user, offen["sitzung_id"], 3, {"op": "move", "id": "g0", "position": {}})
+    assert konflikt.value.status_code == 409
+    assert konflikt.value.detail["version"] == 0
+
+    with pytest.raises(HTTPException) as fehler:
+        _patch(db, user, offen["sitzung_id"], 0,
+               {"op": "node_data", "id": "g0", "data": {"q_kw": 99}},
+               {"op": "edge_remove", "id": "gibt-es-nicht"})
+    assert fehler.value.status_code == 422
+    sitzung = editor_sitzungen.sitzungen().hole(offen["sitzung_id"], user.tenant_id, user.id)
+    assert sitzung.version == 0
+    assert next(n for n in sitzung.graph["nodes"] if n["id"] == "g0")["data"]["q_kw"] == 5
+
+
+def test_autosave_aus_dem_sitzungsstand(umgebung, monkeypatch):
+    db, user, schema = umgebung
+    offen = _oeffne(db, user, schema)
+    monkeypatch.setenv("SCHEMA_SITZUNG_AUTOSAVE_SECONDS", "0")
+    antwort = _patch(db, user, offen["sitzung_id"], 0,
+                     {"op": "node_data", "id": "g1", "data": {"q_kw": 12, "vl_temp": None}},
+                     {"op": "set", "key": "viewport", "value": {"zoom": 2}})
+    assert antwort["gespeichert"] and not antwort["konflikt"]
+    gespeichert = json.loads(db.get(HcSchema, schema.id).graph_json)
+    g1 = next(n for n in gespeichert["nodes"] if n["id"] == "g1")
+    assert g1["data"]["q_kw"] == 12 and "vl_temp" not in g1["data"]
+    assert gespeichert["viewport"] == {"zoom": 2}
+
+    # Anderweitig gespeichert: der Autosave überschreibt nicht.
+    schema = db.get(HcSchema, schema.id)
+    schema.name = "Anderer Tab"
+    schema.graph_json = '{"nodes":[],"edges":[]}'
+    schema.updated_at = schema.updated_at.replace(year=schema.updated_at.year + 1)
+    db.commit()
+    antwort = _patch(db, user, offen["sitzung_id"], 1, {"op": "move", "id": "g1", "position": {"x": 1}})
+    assert antwort["konflikt"] and not antwort["gespeichert"]
+    assert db.get(HcSchema, schema.id).graph_json == '{"nodes":[],"edges":[]}'
+    with pytest.raises(HTTPException) as konflikt:
+        save_schema_sitzung(offen["sitzung_id"], user, db)
+    assert konflikt.value.status_code == 409
+
+
+def test_schliessen_und_ablauf_speichern_offene_aenderungen(umgebung, monkeypatch):
+    db, user, schema = umgebung
+    erste = _oeffne(db, user, schema)
+    _patch(db, user, erste["sitzung_id"], 0, {"op": "node_data", "id": "g0", "data": {"q_kw": 7}})
+    close_schema_sitzung(erste["sitzung_id"], user, db)
+    assert editor_sitzungen.sitzungen().hole(erste["sitzung_id"], user.tenant_id, user.id) is None
+    assert '"q_kw":7' in db.get(HcSchema, schema.id).graph_json
+
+    zweite = _oeffne(db, user, db.get(HcSchema, schema.id))
+    _patch(db, user, zweite["sitzung_id"], 0, {"op": "node_data", "id": "g0", "data": {"q_kw": 8}})
+    monkeypatch.setenv("SCHEMA_SITZUNG_TTL_SECONDS", "0")
+    dritte = _oeffne(db, user, db.get(HcSchema, schema.id))  # räumt die abgelaufene auf
+    assert '"q_kw":8' in db.get(HcSchema, schema.id).graph_json
+    assert editor_sitzungen.sitzungen().hole(dritte["sitzung_id"], user.tenant_id, user.id)
+    with pytest.raises(HTTPException) as weg:
+        _patch(db, user, zweite["sitzung_id"], 1, {"op": "move", "id": "g0", "position": {}})
+    assert weg.value.status_code == 404
@@ -162,6 +162,20 @@ def test_unlesbares_latex_faellt_auf_den_klartext_zurueck():
     assert formel("\\frac{", groesse=8, fallback="Q / t").breite > 0
 
 
+def test_gleiche_formel_wird_einmal_gesetzt():
+    # Jeder Heizkreis bringt dieselben Formeln — gesetzt wird nur die erste.
+    latex = r"\dot{V} = \frac{Q}{c \cdot \rho \cdot \Delta T}"
+    erste = formel(latex, groesse=8.5, fallback="V = Q / (c · ρ · ΔT)", max_breite=248)
+    assert formel(latex, groesse=8.5, fallback="V = Q / (c · ρ · ΔT)", max_breite=248) is erste
+    assert formel(latex, groesse=8.5, fallback="V = Q / (c · ρ · ΔT)", max_breite=40) is not erste
+    assert formel(latex, groesse=8.0, fallback="V = Q / (c · ρ · ΔT)", max_breite=248) is not erste
+    # Der Klartext gehört zum Schlüssel: ohne LaTeX steht er im PDF.
+    stift = Stift()
+    formel(None, groesse=8, fallback="Q / t").zeichne(stift, 0, 0)
+    formel(None, groesse=8, fallback="P / t").zeichne(stift, 0, 0)
+    assert [t[2] for t in stift.texte] == ["Q / t", "P / t"]
+
+
 def test_jeder_rechenschritt_von_erdsonden_und_bww_ist_setzbar():
     """Kein Schritt der beiden Auslegungen darf im Export leer bleiben."""
     solekreis = sole_druckverlust(
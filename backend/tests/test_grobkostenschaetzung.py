@@ -758,3 +758,58 @@ def test_berechne_laesst_unvollstaendigen_quercheck_weg():
     # Die Referenzen enthalten nicht jede Position der Zielgruppe. Diese
     # fehlenden Angaben dürfen im CHF/Einheit-Quercheck nicht als 0 einfliessen.
     assert g243["quercheck_einheit"] is None
+
+
+# ── Matrix-Rechenweg (grobkostenschaetzung_matrix) ──────────────────────────
+
+def _zufalls_segment(seed, n=60):
+    import random
+
+    rng = random.Random(seed)
+    nrs = ["241.14", "242.3", "243.1", "243.21", "243.31", "248.2", "249.2"]
+    refs = []
+    for i in range(n):
+        refs.append(_ref(
+            f"R{i}", rng.choice([None, 0, rng.randint(200, 3000), rng.uniform(200, 3000)]),
+            rng.uniform(10, 120),
+            {nr: rng.choice([None, 0, -1, rng.randint(1000, 90000)] + [rng.uniform(1000, 90000)] * 4)
+             for nr in rng.sample(nrs, rng.randint(0, len(nrs)))},
+            datum=rng.choice([None, date(rng.randint(2016, 2026), rng.randint(1, 12), 1)]),
+            id=i, anzahl_ne=rng.choice([None, 0] + [rng.randint(1, 30)] * 3),
+            zertifizierung=rng.choice([None, "minergie"]),
+            bww_bei_heizung=rng.choice([None, True, False]),
+            abgabe_klassen=set(rng.sample(["flaeche", "koerper", "luft"], rng.randint(0, 2))),
+            hat_erdsonden=rng.random() < 0.9,
+        ))
+    return refs, nrs
+
+
+def test_matrix_segment_und_positionen_bitgleich_mit_skalaren_funktionen():
+    from app.calculations.grobkostenschaetzung_matrix import segment_und_matrix
+
+    heute = date(2026, 7, 14)
+    for seed in range(5):
+        refs, nrs = _zufalls_segment(seed)
+        ziel = {**_ZIEL, "anzahl_ne": 10, "zertifizierung": "minergie", "waermeabgabe": ["FBH"]}
+        segment, matrix = segment_und_matrix(refs, ziel, heute)
+        assert repr(segment) == repr(finde_referenzen(refs, ziel, top_n=None, heute=heute))
+        positionen = [
+            {**_pos(nr), "abgabe": "flaeche" if nr.startswith("243.2") else None} for nr in nrs
+        ]
+        erwartet = [schaetze_position(p, segment, ziel) for p in positionen]
+        assert repr(matrix.schaetze(positionen)) == repr(erwartet)
+        for anzahl in (1, 2):
+            gruppe = [{"bkp_nr": p["bkp_nr"], "betrag": 1000.0 + i} for i, p in enumerate(positionen[:anzahl])]
+            quercheck = quercheck_chf_pro_einheit(gruppe, segment, ziel, 1.1)
+            assert anzahl == 2 or quercheck is not None
+            assert matrix.quercheck(gruppe, 1.1) == quercheck
+
+
+def test_matrix_ohne_segment_und_ohne_positionen():
+    from app.calculations.grobkostenschaetzung_matrix import segment_und_matrix
+
+    segment, matrix = segment_und_matrix([], _ZIEL)
+    assert segment == [] and matrix.schaetze([]) == []
+    leer = matrix.schaetze([_pos()])[0]
+    assert leer == schaetze_position(_pos(), [], _ZIEL)
+    assert leer["kennwert"] is None and leer["herkunft"] == []
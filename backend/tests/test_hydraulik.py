@@ -3,6 +3,7 @@ import pytest
 
 from app.calculations.heizgruppen import berechne_volumenstrom
 from app.calculations.hydraulik import (
+    _Schemagraph,
     _stroke,
     berechne_schema,
     berechne_verteiler_gruppen,
@@ -316,3 +317,42 @@ def test_neue_verbraucher_rechnen_wie_heizkreis(typ):
     result = berechne_schema(nodes, edges)
     assert result["node_flows"]["v"] == pytest.approx(8.5 / (1.163 * 10), abs=0.001)
     assert result["edge_flows"]["e"] == pytest.approx(result["node_flows"]["v"])
+
+
+def test_graph_index_nachbarn_in_leitungsreihenfolge():
+    edges = [
+        {"id": "a", "source": "x", "sourceHandle": "left", "target": "y", "stroke": RL},
+        {"id": "b", "source": "z", "target": "x", "targetHandle": "top", "stroke": VL},
+        {"id": "s", "source": "x", "sourceHandle": "right", "target": "x"},
+        {"id": "virt_vl_x_q", "source": "x", "target": "q", "stroke": VL},
+        {"id": "c", "source": "y", "target": "x", "targetHandle": "bottom",
+         "data": {"layer_id": "heizung_rl"}},
+    ]
+    g = _Schemagraph(edges, {})
+    alle = [(e["id"], other, handle) for e, other, handle in g.nachbarn("x")]
+    # Schlaufe nur einmal, Handle immer am abgefragten Knoten
+    assert alle == [("a", "y", "left"), ("b", "z", "top"), ("s", "x", "right"),
+                    ("virt_vl_x_q", "q", None), ("c", "y", "bottom")]
+    assert [e["id"] for e, _, _ in g.nachbarn("x", rl=True)] == ["a", "c"]
+    assert [e["id"] for e, _, _ in g.nachbarn("x", rl=False, echt=True)] == ["b", "s"]
+    assert [e["id"] for e, _, _ in g.am_handle("x", ("top", "bottom"))] == ["b", "c"]
+    assert g.nachbarn("unbekannt") == []
+    assert g.arten == ["rl", "vl", None, "vl", "rl"]
+
+
+def test_grosses_schema_kreise_unabhaengig():
+    """60 gleiche Verteilerkreise in einem Schema (~500 Leitungen) rechnen
+    je Kreis exakt wie der Kreis allein — der Index verbindet nichts quer."""
+    einzeln = berechne_schema(*_graph_3_kreise())
+    nodes, edges = [], []
+    for k in range(60):
+        n_k, e_k = _graph_3_kreise()
+        nodes += [{**n, "id": f"{k}_{n['id']}"} for n in n_k]
+        edges += [{**e, "id": f"{k}_{e['id']}", "source": f"{k}_{e['source']}",
+                   "target": f"{k}_{e['target']}"} for e in e_k]
+    r = berechne_schema(nodes, edges)
+    for k in (0, 31, 59):
+        assert r["verteiler_results"][f"{k}_vt"] == einzeln["verteiler_results"]["vt"]
+        assert {eid[len(f"{k}_"):]: v for eid, v in r["edge_flows"].items()
+                if eid.startswith(f"{k}_")} == einzeln["edge_flows"]
+        assert r["gruppe_results"][f"{k}_g2"] == einzeln["gruppe_results"]["g2"]
@@ -0,0 +1,102 @@
+"""Gemeinsamer Hydraulik-Ergebnis-Cache: ein Schlüssel für Editor, Export, Stand und Status."""
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.calculations.hydraulik import berechne_schema
+from app.database import Base
+from app.models.auth import User  # noqa: F401 — Mapper der Beziehungen
+from app.models.heizungscockpit import HcHydraulikCache
+from app.project_status import _schema_warnungen
+from app.routers.hc_hydraulik import GraphInput, hydraulik_berechnen
+from app.services import hydraulik_cache
+from tests.test_hydraulik_kreise import _schema_mit_bww
+
+
+@pytest.fixture()
+def leerer_cache():
+    hydraulik_cache.prozess_cache().leeren()
+    yield hydraulik_cache.prozess_cache()
+    hydraulik_cache.prozess_cache().leeren()
+
+
+@pytest.fixture()
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(bind=engine, tables=[HcHydraulikCache.__table__])
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _nicht_rechnen(monkeypatch):
+    monkeypatch.setattr(hydraulik_cache, "berechne_inkrementell",
+                        lambda *a: pytest.fail("neu gerechnet"))
+
+
+def test_schluessel_nur_aus_dem_rechengraphen(monkeypatch):
+    nodes, edges = _schema_mit_bww()
+    basis = hydraulik_cache.cache_key(*hydraulik_cache.rechengraph(nodes, edges))
+
+    nodes[0]["position"] = {"x": 500, "y": 500}
+    nodes[0]["selected"] = True
+    edges[0]["animated"] = True
+    assert hydraulik_cache.cache_key(*hydraulik_cache.rechengraph(nodes, edges)) == basis
+
+    nodes[0]["data"]["leistung_kw"] = 41
+    geaendert = hydraulik_cache.cache_key(*hydraulik_cache.rechengraph(nodes, edges))
+    assert geaendert != basis
+
+    monkeypatch.setattr(hydraulik_cache, "HYDRAULIK_ENGINE_VERSION", "hydraulik-v2")
+    assert hydraulik_cache.cache_key(*hydraulik_cache.rechengraph(nodes, edges)) != geaendert
+
+
+def test_prozess_cache_begrenzt_bytes_und_liefert_kopien():
+    cache = hydraulik_cache.ErgebnisCache(max_bytes=600)
+    cache.lege_ab("a", {"x": "a" * 200})
+    cache.lege_ab("b", {"x": "b" * 200})
+    assert cache.hole("a") is not None          # a ist jetzt zuletzt genutzt
+    cache.lege_ab("c", {"x": "c" * 200})
+    assert cache.hole("b") is None and len(cache) == 2
+    assert cache.belegt_bytes <= 600
+    cache.lege_ab("gross", {"x": "g" * 1000})
+    assert cache.hole("gross") is None
+
+    kopie = cache.hole("a")
+    kopie["x"] = "verändert"
+    assert cache.hole("a")["x"] == "a" * 200
+
+
+def test_aufrufer_teilen_ein_ergebnis(leerer_cache, monkeypatch):
+    nodes, edges = _schema_mit_bww()
+    warnungen = _schema_warnungen(json.dumps({"nodes": nodes, "edges": edges}))
+    assert warnungen == len(berechne_schema(nodes, edges)["warnungen"])
+
+    _nicht_rechnen(monkeypatch)
+    antwort = hydraulik_berechnen(GraphInput(nodes=nodes, edges=edges))
+    assert leerer_cache.treffer == 1
+    assert {k: v for k, v in antwort.items() if k != "node_infos"} == berechne_schema(nodes, edges)
+
+
+def test_dauerhafte_stufe_ueberlebt_den_prozess_cache(leerer_cache, db, monkeypatch):
+    nodes, edges = _schema_mit_bww()
+    erwartet = hydraulik_cache.berechne(nodes, edges, db)
+    assert db.query(HcHydraulikCache).count() == 1
+
+    leerer_cache.leeren()
+    _nicht_rechnen(monkeypatch)
+    assert hydraulik_cache.berechne(nodes, edges, db) == erwartet
+
+    # Zwischenstände des Editors (ohne DB-Session) landen nicht in der Tabelle.
+    monkeypatch.undo()
+    nodes[1]["data"]["sonden_anzahl"] = 6
+    hydraulik_cache.berechne(nodes, edges)
+    assert db.query(HcHydraulikCache).count() == 1
+
+    monkeypatch.setenv("HYDRAULIK_CACHE_DB", "false")
+    hydraulik_cache.berechne(nodes, edges, db)
+    assert db.query(HcHydraulikCache).count() == 1
@@ -0,0 +1,90 @@
+"""Inkrementelle Hydraulik: Kreise zerlegen, Auslegungen je Kreis wiederverwenden."""
+import copy
+
+from app.calculations.hydraulik import berechne_schema
+from app.calculations.hydraulik_kreise import KreisCache, berechne_inkrementell, zerlege_in_kreise
+from tests.test_solekreis_verknuepfung import RL, VL, _kante, _schema
+
+
+def _schema_mit_bww(gruppen=4):
+    nodes, edges = _schema()
+    nodes = [n for n in nodes if n["id"] != "g1"]
+    edges = [e for e in edges if "g1" not in (e["source"], e["target"])]
+    nodes += [
+        {"id": "bww", "type": "bww", "data": {"bww_personen": 40, "speicher_liter": 800}},
+        {"id": "exp", "type": "expansion", "data": {"anlageninhalt_l": 900}},
+    ]
+    edges += [_kante("b1", "sp", "bww", VL), _kante("b2", "bww", "sp", RL),
+              _kante("x1", "exp", "sp", RL)]
+    for g in range(gruppen):
+        gid = f"g{g}"
+        nodes.append({"id": gid, "type": "gruppe", "data": {
+            "q_kw": 5 + g, "vl_temp": 35, "rl_temp": 28, "dp_kpa": 12}})
+        edges += [_kante(f"{gid}v", "vt", gid, VL, f"vl-{g + 1}"),
+                  _kante(f"{gid}r", gid, "vt", RL, None, f"rl-{g + 1}")]
+    return nodes, edges
+
+
+def _gruppe(nodes, gid):
+    return next(n for n in nodes if n["id"] == gid)
+
+
+def test_zerlegung_trennt_an_speicher_und_verteiler():
+    nodes, edges = _schema_mit_bww()
+    kreise = {k.knoten: k for k in zerlege_in_kreise(nodes, edges)}
+    # Trennstellen sind eigene Kreise.
+    for trennstelle in ("sp", "vt", "bww"):
+        assert (trennstelle,) in kreise
+    # Erzeuger mit Solekreis hängt zusammen und grenzt an den Speicher.
+    erzeuger = next(k for k in kreise.values() if "wp" in k.knoten)
+    assert set(erzeuger.knoten) == {"wp", "ews", "solepumpe"}
+    assert erzeuger.grenzen == ("sp",)
+    # Jede Heizgruppe ist ein eigener Kreis hinter dem Verteiler.
+    assert kreise[("g2",)].grenzen == ("vt",)
+    assert {e["id"] for e in kreise[("g2",)].leitungen} == {"g2v", "g2r"}
+
+
+def test_heizkreis_aendern_rechnet_bww_und_erdsonden_nicht_neu():
+    nodes, edges = _schema_mit_bww()
+    cache = KreisCache()
+    erste = cache.auslegungen(nodes, edges)
+    berechne_schema(nodes, edges, auslegungen=erste)
+    assert len(erste.schmutzig) == len(erste.kreise)
+    assert {art for art, _ in erste.gerechnet} >= {"bww", "erdsonden", "waermepumpe", "expansion"}
+
+    geaendert = copy.deepcopy(nodes)
+    _gruppe(geaendert, "g2")["data"]["q_kw"] = 30
+    zweite = cache.auslegungen(geaendert, edges)
+    ergebnis = berechne_schema(geaendert, edges, auslegungen=zweite)
+    assert [k.knoten for k in zweite.schmutzig] == [("g2",)]
+    gerechnet = {art for art, _ in zweite.gerechnet}
+    assert "bww" not in gerechnet and "erdsonden" not in gerechnet
+    assert {art for art, _ in zweite.wiederverwendet} >= {"bww", "erdsonden", "waermepumpe"}
+    # Der Speicher hängt an der Verbraucherleistung — er muss neu ausgelegt werden.
+    assert ("speicher", "sp") in zweite.gerechnet
+    assert ergebnis == berechne_schema(geaendert, edges)
+
+
+def test_inkrementell_gleich_vollstaendig_und_kopien_unabhaengig():
+    nodes, edges = _schema_mit_bww()
+    cache = KreisCache()
+    erstes = berechne_inkrementell(nodes, edges, cache)
+    erstes["bww_results"]["bww"]["veraendert"] = True
+    zweites = berechne_inkrementell(nodes, edges, cache)
+    assert "veraendert" not in zweites["bww_results"]["bww"]
+    assert zweites == berechne_schema(nodes, edges)
+
+    vorher = cache.auslegungen(nodes, edges)
+    assert vorher.schmutzig  # Heizgruppen ohne Auslegung waren noch nie gehasht
+    _gruppe(nodes, "g0")["position"] = {"x": 999, "y": 0}
+    assert cache.auslegungen(nodes, edges).schmutzig == []
+
+
+def test_cache_begrenzt_anzahl_kreise():
+    nodes, edges = _schema_mit_bww()
+    cache = KreisCache(max_kreise=3)
+    for q in (10, 20, 30):
+        _gruppe(nodes, "g0")["data"]["q_kw"] = q
+        berechne_inkrementell(nodes, edges, cache)
+    assert len(cache) <= 3
+    assert berechne_inkrementell(nodes, edges, cache) == berechne_schema(nodes, edges)
@@ -0,0 +1,82 @@
+"""Variantenvergleich: Basisgraph plus Überschreibungen, nur Abweichungen zurück."""
+import copy
+
+import pytest
+from fastapi import HTTPException
+
+from app.calculations import hydraulik_varianten
+from app.calculations.hydraulik import berechne_schema
+from app.calculations.hydraulik_varianten import vergleiche_varianten, vergleichszeile
+from app.routers.hc_hydraulik import VariantenInput, hydraulik_varianten as varianten_endpunkt
+from tests.test_hydraulik_kreise import _gruppe, _schema_mit_bww
+
+VARIANTEN = [
+    {"g2": {"q_kw": 30}},
+    {"ews": {"sonden_anzahl": 6}},
+    {"g2": {"q_kw": 30}},
+    {},
+]
+
+
+def _direkt(nodes, edges, aenderungen):
+    geaendert = copy.deepcopy(nodes)
+    for nid, felder in aenderungen.items():
+        _gruppe(geaendert, nid)["data"].update(felder)
+    return vergleichszeile(berechne_schema(geaendert, edges))
+
+
+def test_varianten_wie_einzelrechnung_nur_abweichungen():
+    nodes, edges = _schema_mit_bww()
+    vorher = copy.deepcopy(nodes)
+    vergleich = vergleiche_varianten(nodes, edges, VARIANTEN, workers=1)
+    assert nodes == vorher
+    assert vergleich["basis"] == _direkt(nodes, edges, {})
+    assert vergleich["gerechnet"] == 3 and vergleich["prozesse"] == 1
+
+    gruppe, sonden, doppelt, leer = vergleich["varianten"]
+    assert doppelt == gruppe
+    assert set(gruppe["gruppen"]) == {"g2"}
+    assert gruppe["gruppen"]["g2"] == _direkt(nodes, edges, VARIANTEN[0])["gruppen"]["g2"]
+    assert "bww" not in gruppe["erdsonden"] and gruppe["erdsonden"] == {}
+    assert set(sonden["erdsonden"]) == {"ews"}
+    assert sonden["erdsonden"]["ews"] == _direkt(nodes, edges, VARIANTEN[1])["erdsonden"]["ews"]
+    assert all(werte == {} for k, werte in leer.items() if k != "warnungen")
+
+
+def test_pool_liefert_dasselbe_wie_sequenziell(monkeypatch):
+    nodes, edges = _schema_mit_bww()
+    varianten = [{"g1": {"q_kw": kw}} for kw in range(6, 12)]
+    sequenziell = vergleiche_varianten(nodes, edges, varianten, workers=1)
+    monkeypatch.setattr(hydraulik_varianten, "MIN_SEKUNDEN_PARALLEL", 0)
+    try:
+        parallel = vergleiche_varianten(nodes, edges, varianten, workers=2)
+    finally:
+        hydraulik_varianten._pool.verwerfen()
+    assert parallel["prozesse"] == 2
+    assert parallel["varianten"] == sequenziell["varianten"]
+
+
+def test_ohne_pool_sequenziell(monkeypatch):
+    nodes, edges = _schema_mit_bww()
+
+    def kein_pool(workers):
+        raise OSError("keine Prozesse")
+
+    monkeypatch.setattr(hydraulik_varianten, "MIN_SEKUNDEN_PARALLEL", 0)
+    monkeypatch.setattr(hydraulik_varianten._pool, "hole", kein_pool)
+    vergleich = vergleiche_varianten(nodes, edges, VARIANTEN, workers=4)
+    assert vergleich["prozesse"] == 1
+    assert vergleich["varianten"] == vergleiche_varianten(nodes, edges, VARIANTEN, workers=1)["varianten"]
+
+
+def test_endpunkt_benennt_varianten_und_lehnt_unbekannte_bauteile_ab():
+    nodes, edges = _schema_mit_bww()
+    antwort = varianten_endpunkt(VariantenInput(nodes=nodes, edges=edges, varianten=[
+        {"name": "g2 grösser", "aenderungen": VARIANTEN[0]}, {"aenderungen": VARIANTEN[1]}]))
+    assert [v["name"] for v in antwort["varianten"]] == ["g2 grösser", "Variante 2"]
+    assert set(antwort["varianten"][0]["gruppen"]) == {"g2"}
+
+    with pytest.raises(HTTPException) as fehler:
+        varianten_endpunkt(VariantenInput(nodes=nodes, edges=edges, varianten=[
+            {"aenderungen": {"gibt-es-nicht": {"q_kw": 1}}}]))
+    assert fehler.value.status_code == 422
@@ -219,6 +219,37 @@ def test_norm_lv_hat_frischwasserstation_und_brauchwarmwasser():
     assert norm_lv.covered_keys("Speicher / Frischwasserstation", "243") == ["243.10"]
 
 
+def test_automat_findet_teilzeichenketten_wie_in():
+    """Der kompilierte Abgleich muss exakt `begriff in titel` entsprechen —
+    auch überlappend und mitten im Wort."""
+    automat = norm_lv._Automat(["erdsonde", "erdsonden", "sonden", "wp", "bohr"])
+    titel = norm_lv.falte("Erdsonden-Bohrungen SWP")
+    assert automat.finde(titel) == {w for w in ["erdsonde", "erdsonden", "sonden", "wp", "bohr"]
+                                    if w in titel}
+    assert automat.finde("") == set()
+
+
+def test_batch_zuordnung_gleich_wie_einzeln():
+    eintraege = [
+        ("Rohrleitungen Primärkreis EWS", "241"), ("Transport, Montage", "243"),
+        ("Rohrleitungen Primärkreis EWS", "241"), ("Wärmemessung", None),
+        ("Diverse Nebenarbeiten", "249"), ("", "243"),
+    ]
+    batch = norm_lv.match_titles(eintraege)
+    assert batch == [norm_lv.match_title(t, g) for t, g in eintraege]
+    batch[0]["canonical_key"] = "verändert"
+    assert batch[2]["canonical_key"] == "241.11"
+
+
+def test_kandidaten_bevorzugen_gruppe_und_fuellen_nach_schluessel_auf():
+    treffer = norm_lv.candidates("Rohrleitungen", "243", limit=8)
+    assert len(treffer) == 8
+    assert treffer[0]["group"] == "243"
+    # Ohne Gruppe und Wortüberschneidung: alphabetisch kleinste Schlüssel.
+    keys = sorted(p["key"] for p in norm_lv.NORM_POSITIONS)
+    assert [c["key"] for c in norm_lv.candidates("xyz", None, limit=3)] == keys[:3]
+
+
 # ── Punkt 18 — keine aggressive Fuzzy-Zuordnung ───────────────────────────
 
 def test_unbekannter_titel_bleibt_ohne_zuordnung():
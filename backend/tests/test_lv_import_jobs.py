@@ -0,0 +1,309 @@
+"""LV-Import als Hintergrundjob — Upload antwortet sofort, der Worker setzt
+Status und Stufe (uploaded → processing → review/extracted/failed)."""
+import asyncio
+import json
+import io
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models.auth import User  # noqa: F401 — registriert hc_users
+from app.models.subscription import SubscriptionPlan  # noqa: F401 — FK-Ziel
+from app.models.heizungscockpit import HcProject  # noqa: F401 — FK-Ziel project_id
+from app.models.lv_import import LvImport, LvImportStatus
+from app.services import lv_import_jobs
+
+
+def _session_factory():
+    """Eine In-Memory-DB für mehrere Sessions (Request + Worker)."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _digital_pdf_bytes(text: str = "Waermepumpe Sole 82 kW") -> bytes:
+    from reportlab.pdfgen import canvas
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf)
+    c.drawString(100, 700, text)
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def _import(factory, pdf: bytes, status=LvImportStatus.uploaded.value) -> int:
+    db = factory()
+    imp = LvImport(tenant_id=1, filename="lv.pdf", file_hash="h",
+                   original_pdf=pdf, status=status)
+    db.add(imp)
+    db.commit()
+    import_id = imp.id
+    db.close()
+    return import_id
+
+
+def test_job_durchlaeuft_alle_stufen_und_setzt_endstatus(monkeypatch):
+    factory = _session_factory()
+    import_id = _import(factory, _digital_pdf_bytes())
+    gesehen = []
+    original = lv_import_jobs._stufe_melden
+
+    def mitschreiben(db, imp):
+        melden = original(db, imp)
+        return lambda name: (gesehen.append(name), melden(name))
+
+    monkeypatch.setattr(lv_import_jobs, "_stufe_melden", mitschreiben)
+    status = lv_import_jobs.run_job(import_id, False, factory)
+
+    assert gesehen == list(lv_import_jobs.STAGES)
+    db = factory()
+    imp = db.get(LvImport, import_id)
+    assert status == imp.status
+    assert imp.status in (LvImportStatus.review.value, LvImportStatus.extracted.value)
+    assert imp.processing_stage is None
+    assert imp.processing_started_at and imp.processing_finished_at
+    assert imp.page_count == 1 and imp.extract_method
+    assert lv_import_jobs.status(imp)["done"] is True
+
+
+def test_parserfehler_endet_als_failed_mit_stufe(monkeypatch):
+    factory = _session_factory()
+    import_id = _import(factory, _digital_pdf_bytes())
+
+    def kaputt(pages):
+        raise ValueError("Deckblatt unlesbar")
+
+    monkeypatch.setattr(lv_import_jobs, "extract_project_data", kaputt)
+    assert lv_import_jobs.run_job(import_id, False, factory) == LvImportStatus.failed.value
+    imp = factory().get(LvImport, import_id)
+    assert imp.processing_finished_at is not None
+    job = lv_import_jobs.status(imp)
+    assert job["done"] is True and job["status"] == "failed"
+    assert job["error"] == "Deckblatt unlesbar"
+    assert json.loads(imp.debug_json)["processing_stage"] == lv_import_jobs.PARSING
+
+
+def test_absturz_ausserhalb_der_pipeline_markiert_failed(monkeypatch):
+    factory = _session_factory()
+    import_id = _import(factory, b"kein pdf")
+
+    def absturz(pdf_bytes):
+        raise MemoryError("zu gross")
+
+    monkeypatch.setattr(lv_import_jobs, "LvPipeline", absturz)
+    future = lv_import_jobs.submit(
+        import_id, ki_erlaubt=False,
+        backend=lv_import_jobs.InlineBackend(), session_factory=factory,
+    )
+    assert future.result() == LvImportStatus.failed.value
+    imp = factory().get(LvImport, import_id)
+    assert imp.status == LvImportStatus.failed.value
+    assert json.loads(imp.debug_json)["processing_stage"] == lv_import_jobs.EXTRACTION
+
+
+def test_fertiger_import_wird_nicht_erneut_verarbeitet():
+    factory = _session_factory()
+    import_id = _import(factory, b"", status=LvImportStatus.approved.value)
+    assert lv_import_jobs.run_job(import_id, False, factory) == LvImportStatus.approved.value
+    assert factory().get(LvImport, import_id).processing_started_at is None
+
+
+def test_status_meldet_stufe_waehrend_der_verarbeitung():
+    imp = LvImport(id=7, status=LvImportStatus.processing.value,
+                   processing_stage=lv_import_jobs.AI_REVIEW)
+    job = lv_import_jobs.status(imp)
+    assert job["job_id"] == 7
+    assert job["done"] is False
+    assert job["stage_index"] == lv_import_jobs.STAGES.index("ai_review")
+    assert job["error"] is None
+
+
+def test_unbekannter_backend_name_nutzt_prozesspool():
+    # Tippfehler in der Konfiguration fällt auf den Prozesspool zurück.
+    assert isinstance(lv_import_jobs.get_backend("gibtsnicht"), lv_import_jobs.PoolBackend)
+
+
+def test_upload_antwortet_sofort_und_reicht_job_ein(monkeypatch):
+    from app.routers import hc_lv_import
+
+    factory = _session_factory()
+    eingereicht = []
+    monkeypatch.setattr(lv_import_jobs, "submit",
+                        lambda import_id, ki_erlaubt: eingereicht.append((import_id, ki_erlaubt)))
+    datei = SimpleNamespace(filename="lv.pdf")
+
+    async def lesen():
+        return _digital_pdf_bytes()
+
+    datei.read = lesen
+    user = SimpleNamespace(id=1, tenant_id=1, name="Dominic", email="d@x.ch", role="admin")
+    db = factory()
+    res = asyncio.run(hc_lv_import.upload_lv(file=datei, project_id=None, user=user, db=db))
+
+    assert res["status"] == LvImportStatus.uploaded.value
+    assert res["job_id"] == res["id"]
+    assert res["status_url"].endswith(f"/{res['id']}/status")
+    assert eingereicht == [(res["id"], True)]
+
+
+def test_freigabe_waehrend_verarbeitung_ist_gesperrt():
+    from fastapi import HTTPException
+    from app.routers.hc_lv_import import approve_lv
+
+    factory = _session_factory()
+    import_id = _import(factory, b"", status=LvImportStatus.processing.value)
+    user = SimpleNamespace(id=1, tenant_id=1, name="Dominic", email="d@x.ch")
+    with pytest.raises(HTTPException) as err:
+        approve_lv(import_id, user=user, db=factory())
+    assert err.value.status_code == 409
+
+
+def test_verwaiste_jobs_werden_nach_timeout_abgeschlossen(monkeypatch):
+    monkeypatch.setenv("LV_IMPORT_JOB_TIMEOUT_SECONDS", "600")
+    factory = _session_factory()
+    haengt = _import(factory, b"", status=LvImportStatus.processing.value)
+    frisch = _import(factory, b"", status=LvImportStatus.processing.value)
+    fertig = _import(factory, b"", status=LvImportStatus.review.value)
+    db = factory()
+    db.get(LvImport, haengt).processing_started_at = datetime.utcnow() - timedelta(hours=1)
+    db.get(LvImport, fertig).created_at = datetime.utcnow() - timedelta(hours=1)
+    db.commit()
+
+    assert lv_import_jobs.verwaiste_jobs_aufraeumen(db) == 1
+    imp = factory().get(LvImport, haengt)
+    assert imp.status == LvImportStatus.failed.value
+    assert json.loads(imp.debug_json)["error_stage"] == "job_abandoned"
+    assert factory().get(LvImport, frisch).status == LvImportStatus.processing.value
+    assert factory().get(LvImport, fertig).status == LvImportStatus.review.value
+
+
+def test_statusabruf_beendet_verwaisten_upload(monkeypatch):
+    from app.routers.hc_lv_import import lv_status
+
+    monkeypatch.setenv("LV_IMPORT_JOB_TIMEOUT_SECONDS", "600")
+    factory = _session_factory()
+    import_id = _import(factory, b"")
+    db = factory()
+    db.get(LvImport, import_id).created_at = datetime.utcnow() - timedelta(hours=1)
+    db.commit()
+    user = SimpleNamespace(id=1, tenant_id=1, name="Dominic", email="d@x.ch")
+    job = lv_status(import_id, user=user, db=db)
+    assert job["done"] is True and job["status"] == LvImportStatus.failed.value
+
+
+def test_gescheitertes_einreichen_markiert_failed():
+    factory = _session_factory()
+    import_id = _import(factory, b"")
+
+    class KaputtesBackend:
+        def submit(self, fn, *args):
+            raise RuntimeError("Pool nicht verfügbar")
+
+    future = lv_import_jobs.submit(import_id, ki_erlaubt=False,
+                                   backend=KaputtesBackend(), session_factory=factory)
+    assert isinstance(future.exception(), RuntimeError)
+    imp = factory().get(LvImport, import_id)
+    assert imp.status == LvImportStatus.failed.value
+    assert json.loads(imp.debug_json)["error_stage"] == "submit_failed"
+
+
+# ── Extraktions-Cache (gleiche Datei erneut importiert) ─────────────────────
+
+def _zweimal(factory, pdf: bytes) -> tuple[int, int]:
+    erster = _import(factory, pdf)
+    zweiter = _import(factory, pdf)
+    return erster, zweiter
+
+
+def test_zweiter_import_derselben_datei_liest_aus_dem_cache(monkeypatch):
+    from app.lv_import.pipeline import LvPipeline
+
+    factory = _session_factory()
+    erster, zweiter = _zweimal(factory, _digital_pdf_bytes())
+    lv_import_jobs.run_job(erster, False, factory)
+
+    neu_geparst = []
+    original_init = LvPipeline.__init__
+
+    def init(self, pdf_bytes):
+        neu_geparst.append(1)
+        original_init(self, pdf_bytes)
+
+    monkeypatch.setattr(LvPipeline, "__init__", init)
+    monkeypatch.setattr(LvPipeline, "_digital_pages", property(
+        lambda self: pytest.fail("Text wurde trotz Cache neu extrahiert")))
+    lv_import_jobs.run_job(zweiter, False, factory)
+
+    db = factory()
+    a, b = db.get(LvImport, erster), db.get(LvImport, zweiter)
+    assert (b.status, b.page_count, b.extract_method) == (a.status, a.page_count, a.extract_method)
+    assert [f.key for f in b.features] == [f.key for f in a.features]
+    cache = json.loads(b.debug_json)["extraction_cache"]
+    assert cache["by_kind"]["extraction"] == {"hits": 1, "misses": 0, "stored": 0}
+    assert json.loads(a.debug_json)["extraction_cache"]["by_kind"]["extraction"]["stored"] == 1
+    assert len(neu_geparst) == 1  # from_snapshot legt die Hülle an, ohne zu parsen
+
+
+def test_ki_ergebnisse_werden_fuer_dieselbe_datei_wiederverwendet(monkeypatch):
+    from app.lv_import.llm import page_triage, visual_review
+
+    factory = _session_factory()
+    erster, zweiter = _zweimal(factory, _digital_pdf_bytes())
+    aufrufe = {"triage": 0, "visual": 0}
+
+    def triage(pages, classification, extraction_method, *, budget=None, **kw):
+        aufrufe["triage"] += 1
+        return {"called": True, "document_quality": "high", "issues": [],
+                "pages": [], "selected_pages": [1], "page_index": [{"page": 1}]}
+
+    def review(pdf, *, page_numbers=None, **kw):
+        aufrufe["visual"] += 1
+        return {"called": True, "success": True, "attempts": 1, "result": {},
+                "issues": [], "reviewed_pages": sorted(page_numbers or [])}
+
+    monkeypatch.setattr(page_triage, "triage", triage)
+    monkeypatch.setattr(visual_review, "review", review)
+    lv_import_jobs.run_job(erster, True, factory)
+    lv_import_jobs.run_job(zweiter, True, factory)
+
+    assert aufrufe == {"triage": 1, "visual": 1}
+    cache = json.loads(factory().get(LvImport, zweiter).debug_json)["extraction_cache"]
+    assert cache["hits"] == 3 and cache["misses"] == 0
+
+
+def test_cache_schluessel_haengt_an_version_und_einstellungen():
+    from app.services.lv_extraction_cache import cache_key
+
+    basis = cache_key("extraction", "abc", {"ocr_dpi": 200})
+    assert basis == cache_key("extraction", "abc", {"ocr_dpi": 200})
+    assert basis != cache_key("extraction", "abc", {"ocr_dpi": 300})
+    assert basis != cache_key("visual", "abc", {"ocr_dpi": 200})
+    assert basis != cache_key("extraction", "abd", {"ocr_dpi": 200})
+
+
+def test_schreiben_raeumt_abgelaufene_cache_eintraege_ab(monkeypatch):
+    from app.models.lv_import import LvExtractionCache
+    from app.services.lv_extraction_cache import ExtractionCache
+
+    monkeypatch.setenv("LV_EXTRACTION_CACHE_TTL_DAYS", "30")
+    db = _session_factory()()
+    alt = datetime.utcnow() - timedelta(days=40)
+    db.add_all([
+        LvExtractionCache(cache_key="a" * 64, kind="extraction", file_hash="alt",
+                          payload_json="{}", created_at=alt),
+        LvExtractionCache(cache_key="b" * 64, kind="extraction", file_hash="genutzt",
+                          payload_json="{}", created_at=alt, last_used_at=datetime.utcnow()),
+    ])
+    db.commit()
+
+    ExtractionCache(db, "neu").store("extraction", {"pages": []})
+    db.commit()
+
+    assert sorted(e.file_hash for e in db.query(LvExtractionCache)) == ["genutzt", "neu"]
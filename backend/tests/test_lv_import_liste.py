@@ -0,0 +1,103 @@
+"""LV-Importliste ohne Blobs, seitenweise; Original-PDF stückweise mit Range."""
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Response
+from sqlalchemy import event
+
+from app import http_range
+from app.auth import get_current_user
+from app.database import get_db
+from app.models.lv_import import LvImport
+from app.routers.hc_lv_import import list_lv, router
+from tests.test_lv_import_jobs import _session_factory
+
+PDF = bytes(range(256)) * 40          # 10 240 Bytes
+
+
+class _Nutzer:
+    tenant_id = 1
+
+
+@pytest.fixture()
+def db():
+    factory = _session_factory()
+    session = factory()
+    zeit = datetime(2026, 10, 1, 8, 0)
+    for i in range(5):
+        # Zwei Imports mit gleicher Zeit: der Cursor muss über die id trennen.
+        session.add(LvImport(tenant_id=1, filename=f"lv{i}.pdf", file_hash=f"h{i}",
+                             original_pdf=PDF, debug_json='{"x": 1}',
+                             created_at=zeit.replace(hour=8 + min(i, 3))))
+    session.add(LvImport(tenant_id=2, filename="fremd.pdf", file_hash="f", original_pdf=PDF))
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def test_liste_laedt_weder_original_noch_bericht(db):
+    db.expire_all()
+    abfragen = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, sql, *a: abfragen.append(sql))
+    liste = list_lv(Response(), None, None, _Nutzer(), db)
+    assert len(liste) == 5
+    assert abfragen and not any("original_pdf" in sql or "debug_json" in sql for sql in abfragen)
+
+
+def test_keyset_seiten_ergeben_die_ganze_liste(db):
+    alle = [imp["id"] for imp in list_lv(Response(), None, None, _Nutzer(), db)]
+    gesehen, cursor = [], None
+    while True:
+        antwort = Response()
+        seite = list_lv(antwort, 2, cursor, _Nutzer(), db)
+        gesehen += [imp["id"] for imp in seite]
+        cursor = antwort.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert gesehen == alle
+
+    with pytest.raises(HTTPException) as fehler:
+        list_lv(Response(), 2, "kein-cursor", _Nutzer(), db)
+    assert fehler.value.status_code == 422
+
+
+def _get(db, pfad, headers=None):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: _Nutzer()
+
+    async def _lauf():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await client.get(pfad, headers=headers or {})
+    return asyncio.run(_lauf())
+
+
+def test_original_ganz_und_in_bereichen(db, monkeypatch):
+    monkeypatch.setattr(http_range, "STUECK_BYTES", 1000)
+    imp = db.query(LvImport).filter(LvImport.filename == "lv0.pdf").one()
+    pfad = f"/api/v1/lv-imports/{imp.id}/original"
+
+    ganz = _get(db, pfad)
+    assert ganz.status_code == 200 and ganz.content == PDF
+    assert ganz.headers["accept-ranges"] == "bytes" and ganz.headers["etag"] == '"h0"'
+
+    teil = _get(db, pfad, {"Range": "bytes=1000-2999"})
+    assert teil.status_code == 206 and teil.content == PDF[1000:3000]
+    assert teil.headers["content-range"] == f"bytes 1000-2999/{len(PDF)}"
+    assert _get(db, pfad, {"Range": "bytes=-10"}).content == PDF[-10:]
+    assert _get(db, pfad, {"Range": "bytes=10000-"}).content == PDF[10000:]
+
+    assert _get(db, pfad, {"Range": f"bytes={len(PDF)}-"}).status_code == 416
+    assert _get(db, pfad, {"If-None-Match": '"h0"'}).status_code == 304
+    # Geänderte Datei (anderes ETag): If-Range liefert das Ganze.
+    assert _get(db, pfad, {"Range": "bytes=0-9", "If-Range": '"alt"'}).status_code == 200
+
+    fremd = db.query(LvImport).filter(LvImport.tenant_id == 2).one()
+    assert _get(db, f"/api/v1/lv-imports/{fremd.id}/original").status_code == 404
@@ -0,0 +1,160 @@
+"""Antwort-Cache der LV-LLM-Aufrufe: gleicher Auftrag → kein zweiter Aufruf."""
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.lv_import.llm import page_triage, resolver, response_cache, visual_review
+from app.lv_import.llm.budget import ImportLlmBudget
+from app.lv_import.llm.openai_provider import OpenAICostMapper
+from tests.test_lv_visual_review import _valid
+
+
+@pytest.fixture(autouse=True)
+def frischer_cache():
+    response_cache.set_store(response_cache.MemoryStore(ttl_seconds=3600, max_entries=100))
+    yield
+    response_cache.set_store(None)
+
+
+class FakeResponses:
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = []
+        self.responses = SimpleNamespace(create=self._create)
+
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(output_text=json.dumps(self.payload), usage=None)
+
+
+class FakeOpenAI:
+    def __init__(self, antwort):
+        self.antwort = antwort
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kw):
+        self.calls.append(kw)
+        gesendet = json.loads(kw["messages"][1]["content"])["positions"]
+        mappings = [{**self.antwort, "source_id": p["source_id"]} for p in gesendet]
+        msg = SimpleNamespace(content=json.dumps({"mappings": mappings}), refusal=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+
+# ── Speicher ────────────────────────────────────────────────────────────────
+
+def test_memory_store_verdraengt_aeltesten_und_verfaellt(monkeypatch):
+    store = response_cache.MemoryStore(ttl_seconds=60, max_entries=2)
+    store.put("a", {"x": 1})
+    store.put("b", {"x": 2})
+    assert store.get("a") == {"x": 1}  # a ist jetzt zuletzt gelesen
+    store.put("c", {"x": 3})
+    assert store.get("b") is None
+    assert len(store) == 2
+    jetzt = time.time()
+    monkeypatch.setattr(response_cache.time, "time", lambda: jetzt + 61)
+    assert store.get("a") is None
+
+
+def test_memory_store_gibt_kopien_heraus():
+    store = response_cache.MemoryStore(ttl_seconds=60, max_entries=2)
+    antwort = {"result": {"trade_total": None}}
+    store.put("a", antwort)
+    antwort["result"]["trade_total"] = 1
+    treffer = store.get("a")
+    treffer["result"]["trade_total"] = 2
+    assert store.get("a") == {"result": {"trade_total": None}}
+
+
+def test_directory_store_ueberlebt_neue_instanz_und_begrenzt(tmp_path):
+    store = response_cache.DirectoryStore(tmp_path, ttl_seconds=60, max_entries=2)
+    for i, key in enumerate(["a", "b", "c"]):
+        store.put(key, {"i": i})
+        os.utime(tmp_path / f"{key}.json", (i, i))
+    store._evict()
+    neu = response_cache.DirectoryStore(tmp_path, ttl_seconds=60, max_entries=2)
+    assert neu.get("a") is None
+    assert neu.get("c") == {"i": 2}
+    assert len(neu) == 2
+
+
+def test_schluessel_haengt_an_modell_prompt_und_eingabe():
+    basis = dict(model="m", prompt_version="p1", schema={"s": 1}, payload={"t": "x"})
+    key = response_cache.cache_key(**basis)
+    assert key == response_cache.cache_key(**basis)
+    for aenderung in ({"model": "n"}, {"prompt_version": "p2"}, {"payload": {"t": "y"}}):
+        assert response_cache.cache_key(**{**basis, **aenderung}) != key
+
+
+def test_umgebung_waehlt_speicher(monkeypatch, tmp_path):
+    monkeypatch.setenv("LV_LLM_CACHE", "off")
+    assert response_cache._store_from_env() is None
+    monkeypatch.setenv("LV_LLM_CACHE", "")
+    monkeypatch.setenv("LV_LLM_CACHE_DIR", str(tmp_path))
+    assert isinstance(response_cache._store_from_env(), response_cache.DirectoryStore)
+
+
+def test_treffer_kostet_nichts_und_zaehlt_nicht_aufs_limit():
+    budget = ImportLlmBudget(max_calls=1)
+    response_cache.remember("k", {"ok": True})
+    assert response_cache.lookup("k", budget=budget, model="m") == {"ok": True}
+    status = budget.status()
+    assert status["llm_cache_hits"] == 1
+    assert budget.calls == 0 and budget.answered == 1
+    assert budget.may_call(100) is True
+    # Leere Antworten (Fehlschläge) werden nie gespeichert.
+    response_cache.remember("leer", {})
+    assert response_cache.lookup("leer") is None
+
+
+# ── Aufrufer ────────────────────────────────────────────────────────────────
+
+def test_grobscan_fragt_gleichen_seitenindex_nur_einmal(monkeypatch):
+    monkeypatch.setenv("LV_LLM_ENABLED", "true")
+    fake = FakeResponses({"document_quality": "high", "issues": [], "pages": [
+        {"page": 2, "categories": ["costs"], "uncertainty": "low", "reason": "Preise"},
+    ]})
+    pages = [{"page": 1, "text": "Offerte"}, {"page": 2, "text": "BKP 241 Total 1000.00"}]
+    aufruf = dict(client=fake, model="test", use_cache=True)
+    erster = page_triage.triage(pages, [], "text", budget=ImportLlmBudget(), **aufruf)
+    budget = ImportLlmBudget()
+    zweiter = page_triage.triage(pages, [], "text", budget=budget, **aufruf)
+    assert len(fake.calls) == 1
+    assert zweiter["selected_pages"] == erster["selected_pages"] == [2]
+    assert budget.status()["llm_cache_hits"] == 1
+
+
+def test_visuelle_pruefung_aus_cache(monkeypatch):
+    monkeypatch.setenv("LV_LLM_ENABLED", "true")
+    fake = FakeResponses(_valid())
+    erster = visual_review.review(b"%PDF-test", client=fake, model="test", use_cache=True)
+    zweiter = visual_review.review(b"%PDF-test", client=fake, model="test", use_cache=True)
+    assert len(fake.calls) == 1
+    assert zweiter["success"] is True
+    assert zweiter["result"] == erster["result"]
+    # Injizierter Client ohne ausdrückliches use_cache: Provider wird gefragt.
+    visual_review.review(b"%PDF-test", client=fake, model="test")
+    assert len(fake.calls) == 2
+
+
+def test_zuordnung_cached_je_position_ueber_offerten_hinweg():
+    client = FakeOpenAI({"canonical_key": "243.6", "confidence": 0.96,
+                         "reason": "Regelung Verteilung"})
+    provider = OpenAICostMapper(model="test-model", client=client)
+    erste = resolver.resolve(
+        [{"source_id": "1", "title": "Regelung Verteilung", "group": "243"}],
+        provider=provider, use_cache=True)
+    zweite = resolver.resolve([
+        {"source_id": "77", "title": "Regelung Verteilung", "group": "243"},
+        {"source_id": "78", "title": "Regelung Verteilung Nebenbau", "group": "243"},
+    ], provider=provider, use_cache=True)
+    assert erste["1"]["canonical_key"] == "243.6"
+    assert zweite["77"]["canonical_key"] == "243.6"
+    assert "78" in zweite
+    # Zweiter Aufruf schickt nur die neue Position.
+    assert len(client.calls) == 2
+    gesendet = json.loads(client.calls[1]["messages"][1]["content"])["positions"]
+    assert [p["source_id"] for p in gesendet] == ["78"]
@@ -3,6 +3,7 @@
 Die Fixtures sind sanitisierte Strukturmuster eines echten Unternehmerangebots
 (Punkt 26) — keine echten Namen, Adressen oder Offertdaten.
 """
+import json
 from pathlib import Path
 
 from app.lv_import import page_classifier as pc
@@ -189,3 +190,42 @@ def test_words_to_pages_stellt_lesbare_reihenfolge_her():
     assert pages[0]["page"] == 2
     assert pages[0]["text"].splitlines()[0] == "Länge/Sonde 150"
     assert pages[0]["text"].splitlines()[1] == "Total Sonden 6"
+
+
+def test_zeilenmitte_laeuft_mit_und_driftet_wie_bisher():
+    """Die laufende Zeilenmitte entscheidet — nicht nur das erste Wort."""
+    words = [_wort("a", 10, 100), _wort("b", 30, 102.5), _wort("c", 50, 104),
+             _wort("d", 70, 106.5)]
+    zeilen = group_words_to_rows(words)
+    # Mitte nach a,b = 105.75: c (108.5) passt. d (111) liegt nahe bei c, aber
+    # mehr als 3 pt über der Zeilenmitte 106.67 → neue Zeile.
+    assert [[w["text"] for w in z] for z in zeilen] == [["a", "b", "c"], ["d"]]
+
+
+def test_zeilenindex_einmal_je_wortseite(monkeypatch):
+    from app.lv_import import spatial
+    word_pages = spatial.wortseiten([{"page": 4, "words": [
+        _wort("Total", 60, 100), _wort("Sonden", 110, 100), _wort("6", 300, 100),
+        _wort("Länge/Sonde", 60, 130), _wort("m", 250, 130), _wort("150", 300, 130),
+    ]}])
+    index = spatial.row_index(word_pages[0])
+    assert index.texts == ["Total Sonden 6", "Länge/Sonde m 150"]
+    assert index.tokens["sonden"] == [0]
+    assert index.rows_containing("total sonden 6") == [0]
+    assert index.bboxes[1] == [60.0, 130.0, 315.0, 139.0]
+
+    aufrufe = []
+    original = spatial._gruppieren
+    monkeypatch.setattr(spatial, "_gruppieren", lambda w: aufrufe.append(1) or original(w))
+    assert find_value_right_of_label(word_pages, "Total Sonden")["value"] == 6
+    assert find_value_right_of_label(word_pages, "Länge/Sonde", einheit="m")["value"] == 150
+    assert spatial.find_labeled_rows(word_pages, ["sonde"])[1]["ausmass"] == 150
+    assert aufrufe == []
+    # Neue Wortliste → neuer Index; ein gewöhnliches dict hält keinen.
+    word_pages[0]["words"] = list(word_pages[0]["words"])
+    spatial.row_index(word_pages[0])
+    spatial.row_index(word_pages[0])
+    assert aufrufe == [1]
+    spatial.row_index(dict(word_pages[0]))
+    assert aufrufe == [1, 1]
+    assert json.loads(json.dumps(word_pages)) == [dict(word_pages[0])]
@@ -0,0 +1,85 @@
+"""PdfDocument — ein Parse pro Import für Text, Wortboxen und Teil-PDFs."""
+import io
+
+import pypdf
+
+from app.lv_import.pdf_document import PdfDocument, als_dokument
+from app.lv_import.pipeline import LvPipeline
+
+
+def _pdf(*seiten: str) -> bytes:
+    from reportlab.pdfgen import canvas
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf)
+    for text in seiten:
+        c.drawString(100, 700, text)
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def test_text_und_woerter_wie_die_einzelextraktion():
+    raw = _pdf("Pos. 241 Waermepumpe 82 kW", "Erdsonden 4 x 180 m")
+    dok = PdfDocument(raw)
+    reader = pypdf.PdfReader(io.BytesIO(raw))
+    assert dok.text_pages() == [
+        {"page": i, "text": p.extract_text() or ""}
+        for i, p in enumerate(reader.pages, start=1)
+    ]
+    woerter = dok.word_pages()
+    assert [sp["page"] for sp in woerter] == [1, 2]
+    assert [w["text"] for w in woerter[1]["words"]] == ["Erdsonden", "4", "x", "180", "m"]
+    assert set(woerter[0]["words"][0]) == {"text", "x0", "x1", "top", "bottom"}
+
+
+def test_pipeline_und_teil_pdfs_parsen_nur_einmal(monkeypatch):
+    raw = _pdf("Seite eins", "Seite zwei", "Seite drei")
+    gelesen = []
+    original = pypdf.PdfReader
+
+    def zaehlen(*args, **kwargs):
+        gelesen.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(pypdf, "PdfReader", zaehlen)
+    pipeline = LvPipeline(raw)
+    assert pipeline.page_count == 3
+    teil = pipeline.document.subset([3, 1, 3])
+    assert pipeline.document.subset([1, 3]) is teil
+    assert len(gelesen) == 1
+    monkeypatch.setattr(pypdf, "PdfReader", original)
+    assert len(pypdf.PdfReader(io.BytesIO(teil)).pages) == 2
+
+
+def test_defektes_pdf_und_leere_auswahl_bleiben_harmlos():
+    dok = als_dokument(b"kein pdf")
+    assert dok.text_pages() == []
+    assert dok.word_pages() == []
+    assert dok.subset([1]) == b"kein pdf"
+    assert als_dokument(dok) is dok
+    assert PdfDocument(b"").subset(None) == b""
+
+
+# ── Seitenparallele Extraktion ──────────────────────────────────────────────
+
+def test_seitenparallele_woerter_gleich_und_in_seitenreihenfolge():
+    from app.lv_import import parallel
+    raw = _pdf(*[f"Seite {i} Pos. 241.{i} Menge {i} Stk" for i in range(1, parallel.MIN_PAGES_PARALLEL + 2)])
+    sequenziell = PdfDocument(raw).word_pages(workers=1)
+    parallel_ = PdfDocument(raw).word_pages(workers=2)
+    assert parallel_ == sequenziell
+    assert [sp["words"][1]["text"] for sp in parallel_] == [
+        str(i) for i in range(1, parallel.MIN_PAGES_PARALLEL + 2)]
+
+
+def test_bloecke_und_workeranzahl(monkeypatch):
+    from app import prozesspools
+    from app.lv_import import parallel
+    assert prozesspools.aufteilen(list(range(1, 8)), 3) == [[1, 2, 3], [4, 5], [6, 7]]
+    assert prozesspools.aufteilen([1, 2], 4) == [[1], [2]]
+    monkeypatch.setenv("LV_PAGE_WORKERS", "99")
+    assert parallel.page_workers() == prozesspools.HARD_MAX_WORKERS
+    monkeypatch.setenv("LV_PAGE_WORKERS", "1")
+    assert parallel.lohnt_parallel(500) is False
+    # Unterhalb der Schwelle läuft alles im aufrufenden Prozess.
+    assert parallel.map_pages(lambda raw, seiten: [s * 2 for s in seiten], b"", [1, 2]) == [2, 4]
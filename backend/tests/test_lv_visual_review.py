@@ -304,3 +304,111 @@ def test_fokussierte_kostenkorrektur_loescht_andere_befunde_nicht():
     assert merged["conditions"] == original["conditions"]
     assert merged["heat_emission_systems"] == original["heat_emission_systems"]
     assert merged["project_data"] == original["project_data"]
+
+
+# ── Parallele Teilpakete ────────────────────────────────────────────────────
+
+def _pdf(seiten: int) -> bytes:
+    import io
+    from reportlab.pdfgen import canvas
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf)
+    for i in range(1, seiten + 1):
+        c.drawString(100, 700, f"Seite {i}")
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+class FakeTeilpakete:
+    """Antwortet je Teilpaket mit dem Befund der enthaltenen Originalseiten."""
+
+    def __init__(self, befund_je_seite):
+        import threading
+        self.befund_je_seite = befund_je_seite
+        self.calls = []
+        self.gleichzeitig = self.max_gleichzeitig = 0
+        self._lock = threading.Lock()
+        self.responses = SimpleNamespace(create=self._create)
+
+    def _create(self, **kwargs):
+        import re
+        import time
+        with self._lock:
+            self.calls.append(kwargs)
+            self.gleichzeitig += 1
+            self.max_gleichzeitig = max(self.max_gleichzeitig, self.gleichzeitig)
+        time.sleep(0.05)
+        task = kwargs["input"][1]["content"][1]["text"]
+        seiten = [int(s) for s in re.findall(r"Originalseite (\d+)", task)]
+        befund = {key: ([] if isinstance(value, list) else None)
+                  for key, value in _valid().items()}
+        befund["project_data"] = {k: None for k in _valid()["project_data"]}
+        for seite in seiten:
+            for key, value in (self.befund_je_seite.get(seite) or {}).items():
+                if isinstance(value, list):
+                    befund[key] = befund[key] + value
+                elif isinstance(value, dict):
+                    befund[key] = {**befund[key], **value}
+                else:
+                    befund[key] = value
+        with self._lock:
+            self.gleichzeitig -= 1
+        return SimpleNamespace(output_text=json.dumps(befund))
+
+
+def _befund_verteilt():
+    valid = _valid()
+    return {
+        2: {"project_data": valid["project_data"]},
+        9: {"features": valid["features"]},
+        14: {"costs": valid["costs"][:1]},
+        15: {"costs": valid["costs"][1:], "group_totals": valid["group_totals"],
+             "trade_total": valid["trade_total"]},
+    }
+
+
+def test_grosse_auswahl_wird_parallel_in_teilpaketen_geprueft():
+    fake = FakeTeilpakete(_befund_verteilt())
+    budget = visual_review.ImportLlmBudget(max_calls=5)
+    result = visual_review.review(
+        _pdf(20), page_numbers=list(range(1, 19)), client=fake, model="test",
+        budget=budget, chunk_size=6, workers=3,
+    )
+    # 5 Aufrufe − 2 Reserve (Korrektur, Zuordnung) = 3 Teilpakete à 6 Seiten.
+    assert result["review_chunks"] == [list(range(1, 7)), list(range(7, 13)),
+                                       list(range(13, 19))]
+    assert len(fake.calls) == 3
+    assert fake.max_gleichzeitig > 1
+    assert result["success"] is True, result["issues"]
+    assert result["attempts"] == 3
+    assert result["result"]["project_data"]["project_number"] == "23033"
+    # Zusammengeführt über die Paketgrenze hinweg: 241.10 (S. 14) + 241.11 (S. 15).
+    costs, metrics = visual_review.apply_result({}, result["result"])
+    assert sum(c["detected_amount"] for c in costs if not c["is_group_total"]) == 3817
+    assert metrics["visual_review_costs_applied"] == 2
+
+
+def test_teilpakete_nur_soweit_das_budget_reicht():
+    budget = visual_review.ImportLlmBudget(max_calls=5, calls=1)
+    seiten = list(range(1, 25))
+    plan = visual_review.chunk_plan(seiten, budget, size=8)
+    assert [len(p) for p in plan] == [12, 12]
+    assert sum(plan, []) == seiten
+    budget.calls = 2
+    assert visual_review.chunk_plan(seiten, budget, size=8) == [seiten]
+    assert visual_review.chunk_plan([3, 1], budget, size=8) == [[1, 3]]
+
+
+def test_zusammenfuehrung_behaelt_beste_werte_und_meldet_widersprueche():
+    a, b = _valid(), _valid()
+    b["features"][0] = {**b["features"][0], "value": 7, "confidence": 0.5}
+    b["trade_total"] = 4000
+    b["project_data"] = {k: None for k in a["project_data"]}
+    merged = visual_review._merge_chunks([a, b])
+    assert merged["features"][0]["value"] == 6
+    assert len(merged["costs"]) == 2  # gleiche Positionen zählen einmal
+    assert merged["trade_total"] == 3817
+    assert merged["project_data"]["project_name"] == "MFH Test"
+    assert any("trade_total" in w for w in merged["warnings"])
+    assert visual_review.validate(merged) == []
@@ -0,0 +1,75 @@
+"""Berechnungsteil in Blöcken: nur auf Wunsch, parallel gerendert, in Reihenfolge nummeriert."""
+import io
+import re
+
+import pytest
+from pypdf import PdfReader
+
+from app.export import pdf
+from app.export.design import STANDARD
+from tests.test_export_formelsatz import _erdsonden_graph
+
+
+@pytest.fixture
+def kleine_bloecke(monkeypatch):
+    # Drei Bauteile genügen, wenn jeder Block nur eines trägt.
+    monkeypatch.setenv("PDF_BERECHNUNGEN_BLOECKE", "1")
+    monkeypatch.setattr(pdf, "MIN_ABSCHNITTE_PARALLEL", 2)
+    monkeypatch.setattr(pdf, "ABSCHNITTE_JE_BLOCK", 1)
+    yield
+    pdf._pool.verwerfen()
+
+
+def _texte(dokument: bytes) -> list:
+    return [seite.extract_text() for seite in PdfReader(io.BytesIO(dokument)).pages]
+
+
+def _seitenzahlen(texte: list) -> list:
+    return [re.search(r"Seite (\d+) von\s*(\d+)", t).groups() for t in texte]
+
+
+def test_fluss_traegt_seitenzahlen():
+    nodes, results = _erdsonden_graph()
+    texte = _texte(pdf.erzeuge_pdf("P", "S", "berechnungen", nodes, [], results, workers=1))[1:]
+    n = str(len(texte))
+    assert _seitenzahlen(texte) == [(str(i), n) for i in range(1, len(texte) + 1)]
+
+
+def test_ohne_einstellung_fliesst_es_unabhaengig_von_den_workern(monkeypatch):
+    monkeypatch.delenv("PDF_BERECHNUNGEN_BLOECKE", raising=False)
+    monkeypatch.setattr(pdf, "MIN_ABSCHNITTE_PARALLEL", 2)
+    monkeypatch.setattr(pdf, "ABSCHNITTE_JE_BLOCK", 1)
+    nodes, results = _erdsonden_graph()
+    fluss = _texte(pdf.erzeuge_pdf("P", "S", "berechnungen", nodes, [], results, workers=1))
+    assert _texte(pdf.erzeuge_pdf("P", "S", "berechnungen", nodes, [], results, workers=4)) == fluss
+    assert _texte(pdf.erzeuge_pdf("P", "S", "berechnungen", nodes, [], results,
+                                  workers=1, bloecke=True)) != fluss
+
+
+def test_bloecke_werden_in_reihenfolge_zusammengesetzt(kleine_bloecke):
+    nodes, results = _erdsonden_graph()
+    abschnitte = pdf.berechnungs_abschnitte(nodes, results)
+    einzeln = [_texte(pdf._berechnungs_block([a], "P", STANDARD)) for a in abschnitte]
+
+    texte = _texte(pdf.erzeuge_pdf("P", "S", "berechnungen", nodes, [], results, workers=2))[1:]
+
+    # Jeder Block beginnt auf einer neuen Seite, in der Reihenfolge der Bauteile.
+    assert len(texte) == sum(len(seiten) for seiten in einzeln)
+    erste = 0
+    for seiten in einzeln:
+        assert texte[erste].startswith(seiten[0][:40])
+        erste += len(seiten)
+    n = str(len(texte))
+    assert _seitenzahlen(texte) == [(str(i), n) for i in range(1, len(texte) + 1)]
+
+
+def test_ohne_pool_dieselben_bloecke(kleine_bloecke, monkeypatch):
+    nodes, results = _erdsonden_graph()
+    parallel = _texte(pdf.erzeuge_pdf("P", "S", "berechnungen", nodes, [], results, workers=2))
+
+    def kein_pool(workers):
+        raise OSError("keine Prozesse")
+
+    monkeypatch.setattr(pdf._pool, "hole", kein_pool)
+    assert _texte(pdf.erzeuge_pdf("P", "S", "berechnungen", nodes, [], results, workers=2)) == parallel
+    assert _texte(pdf.erzeuge_pdf("P", "S", "berechnungen", nodes, [], results, workers=1)) == parallel
@@ -0,0 +1,92 @@
+"""PDF-Export aus gecachten Abschnitten: gleicher Inhalt, nur Geändertes neu."""
+import io
+
+import pytest
+from pypdf import PdfReader
+
+from app.calculations.hydraulik import berechne_schema
+from app.export import pdf
+from app.export.design import SIREGO
+from app.services.pdf_export_cache import AbschnittCache
+from tests.test_export import _graph
+
+PLANKOPF = {"projektnummer": "P-17", "bauherr": "Muster AG", "revision": "3", "status": "Entwurf"}
+
+
+@pytest.fixture(scope="module")
+def daten():
+    nodes, edges = _graph()
+    return nodes, edges, berechne_schema(nodes, edges)
+
+
+@pytest.fixture
+def gerendert(monkeypatch):
+    """Zählt, welche Abschnitte tatsächlich gezeichnet werden."""
+    zaehler = {}
+    for name in ("_deckblatt", "_schema_plan", "_plankopf", "_legende_seiten", "_berechnungs_seiten"):
+        original = getattr(pdf, name)
+
+        def gezaehlt(*args, _original=original, _name=name, **kwargs):
+            zaehler[_name] = zaehler.get(_name, 0) + 1
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(pdf, name, gezaehlt)
+    return zaehler
+
+
+def _texte(dokument: bytes) -> list:
+    return [seite.extract_text() for seite in PdfReader(io.BytesIO(dokument)).pages]
+
+
+@pytest.mark.parametrize("inhalt", ["schema", "berechnungen", "beides"])
+def test_gecacht_ergibt_dieselben_seiten(daten, inhalt):
+    nodes, edges, results = daten
+    ohne = pdf.erzeuge_pdf("P", "S", inhalt, nodes, edges, results, PLANKOPF)
+    mit = pdf.erzeuge_pdf("P", "S", inhalt, nodes, edges, results, PLANKOPF, cache=AbschnittCache())
+    assert _texte(mit) == _texte(ohne)
+    assert PdfReader(io.BytesIO(mit)).metadata.title == "P — S"
+
+
+def test_neue_revision_rendert_nur_deckblatt_und_plankopf(daten, gerendert):
+    nodes, edges, results = daten
+    cache = AbschnittCache()
+    pdf.erzeuge_pdf("P", "S", "beides", nodes, edges, results, PLANKOPF, cache=cache)
+    assert set(gerendert) == {"_deckblatt", "_schema_plan", "_plankopf", "_legende_seiten", "_berechnungs_seiten"}
+
+    gerendert.clear()
+    neu = pdf.erzeuge_pdf("P", "S", "beides", nodes, edges, results,
+                          {**PLANKOPF, "revision": "4"}, cache=cache)
+    assert gerendert == {"_deckblatt": 1, "_plankopf": 1}
+    assert "Revision 4" in _texte(neu)[1]
+
+    gerendert.clear()
+    pdf.erzeuge_pdf("P", "S", "beides", nodes, edges, results,
+                    {**PLANKOPF, "revision": "4"}, cache=cache)
+    assert gerendert == {}
+
+
+def test_andere_marke_oder_geaenderter_graph_rendert_neu(daten, gerendert):
+    nodes, edges, results = daten
+    cache = AbschnittCache()
+    pdf.erzeuge_pdf("P", "S", "beides", nodes, edges, results, PLANKOPF, cache=cache)
+
+    gerendert.clear()
+    pdf.erzeuge_pdf("P", "S", "beides", nodes, edges, results, PLANKOPF, marke=SIREGO, cache=cache)
+    assert set(gerendert) == {"_deckblatt", "_legende_seiten", "_berechnungs_seiten"}
+
+    gerendert.clear()
+    verschoben = [{**n, "position": {"x": n["position"]["x"] + 40, "y": n["position"]["y"]}} for n in nodes]
+    pdf.erzeuge_pdf("P", "S", "beides", verschoben, edges, results, PLANKOPF, cache=cache)
+    assert "_schema_plan" in gerendert and "_deckblatt" not in gerendert
+
+
+def test_cache_bleibt_in_seiner_grenze(daten, monkeypatch):
+    nodes, edges, results = daten
+    monkeypatch.setenv("PDF_EXPORT_CACHE_MB", "0")
+    cache = AbschnittCache()
+    pdf.erzeuge_pdf("P", "S", "beides", nodes, edges, results, PLANKOPF, cache=cache)
+    assert len(cache) == 0
+
+    klein = AbschnittCache(max_bytes=40_000)
+    pdf.erzeuge_pdf("P", "S", "beides", nodes, edges, results, PLANKOPF, cache=klein)
+    assert 0 < len(klein) < 6
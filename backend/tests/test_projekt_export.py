@@ -0,0 +1,203 @@
+"""Projekt-Export: alle Schemas, Grobkostenschätzung und Journal als ein ZIP."""
+import io
+import json
+import os
+import time
+import zipfile
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+from pypdf import PdfReader
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import subscription  # noqa: F401 — FK-Ziel registrieren
+from app.models.auth import Firma, Role, User
+from app.models.heizungscockpit import HcProject, HcProjectNote, HcSchema, HcSchemaRevision
+from app.models.kv import Kostenschaetzung
+from app.routers.hc_export import _projekt_export_teile
+from app.services import projekt_export
+from app.services.projekt_export import JOURNAL, KOSTEN_PDF, Teil
+from tests.test_export import _graph
+from tests.test_grobkostenschaetzung_export import INPUTS, RESULT
+
+EINTRAEGE = [
+    {"kind": "sitzung", "titel": "Startsitzung", "text": "WP im UG\nSonden 4×", "autor_name": "Dominic",
+     "created_at": "2026-09-01T08:00:00"},
+    {"kind": "aufgabe", "titel": "Sondenbohrung offerieren", "faellig_am": "2026-10-30",
+     "created_at": "2026-09-02T08:00:00"},
+    {"kind": "aufgabe", "titel": "Kamin prüfen", "erledigt_at": "2026-09-10T10:00:00",
+     "created_at": "2026-09-03T08:00:00"},
+]
+
+
+def _frische_db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def _umgebung(db):
+    firma, andere = Firma(name="Planer AG"), Firma(name="Andere AG")
+    db.add_all([firma, andere])
+    db.flush()
+    user = User(tenant_id=firma.id, email="planer@example.com", password_hash="x",
+                name="Planer", role=Role.user, is_verified=True)
+    fremd = User(tenant_id=andere.id, email="fremd@example.com", password_hash="x",
+                 role=Role.user, is_verified=True)
+    db.add_all([user, fremd])
+    db.flush()
+    projekt = HcProject(tenant_id=firma.id, name="Heizzentrale Süd", erstellt_von=user.id)
+    db.add(projekt)
+    db.flush()
+    nodes, edges = _graph()
+    for name in ("Prinzip", "Prinzip", "Unterstation"):
+        db.add(HcSchema(tenant_id=firma.id, project_id=projekt.id, name=name,
+                        graph_json=json.dumps({"nodes": nodes, "edges": edges})))
+    db.flush()
+    erstes = db.query(HcSchema).order_by(HcSchema.id).first()
+    for nr in (1, 2):
+        db.add(HcSchemaRevision(tenant_id=firma.id, project_id=projekt.id, schema_id=erstes.id,
+                                version_nr=nr, graph_json="{}"))
+    workflow = {"status": "freigegeben", "variante": "netto"}
+    db.add(Kostenschaetzung(tenant_id=firma.id, project_id=projekt.id,
+                            inputs_json=json.dumps({**INPUTS, "_workflow": workflow}),
+                            result_json=json.dumps({"netto": RESULT})))
+    db.add(HcProjectNote(tenant_id=firma.id, project_id=projekt.id, kind="aufgabe",
+                         titel="Sondenbohrung offerieren", faellig_am=date(2026, 10, 30),
+                         created_at=datetime(2026, 9, 2, 8, 0)))
+    db.commit()
+    return user, fremd, projekt
+
+
+def _zip(stuecke) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(b"".join(stuecke)))
+
+
+@pytest.fixture(autouse=True)
+def _pool_aufraeumen():
+    yield
+    projekt_export._pool.verwerfen()
+
+
+def test_journal_zeigt_offene_pendenzen_zuerst():
+    text = projekt_export.journal_text("Heizzentrale", EINTRAEGE, stand=date(2026, 10, 18))
+    offen, alle = text.split("Alle Einträge (3)")
+    assert "Offene Pendenzen (1)" in offen
+    assert "Sondenbohrung offerieren — fällig 2026-10-30" in offen
+    assert "Kamin prüfen" not in offen
+    assert "2026-09-03 · aufgabe · Kamin prüfen [erledigt]" in alle
+    assert "    Sonden 4×" in alle
+
+
+def test_zip_fliesst_je_fertigem_teil():
+    kosten = {"projekt_name": "P", "inputs": INPUTS, "result": RESULT, "variante": "netto"}
+    teile = [
+        Teil("Grobkosten.pdf", KOSTEN_PDF, kosten),
+        Teil("Journal.txt", JOURNAL, {"projekt_name": "P", "eintraege": EINTRAEGE}),
+    ]
+    stuecke = list(projekt_export.zip_strom(teile, workers=1))
+    assert len(stuecke) == 3  # je Teil eines, dann das Inhaltsverzeichnis
+    zf = _zip(stuecke)
+    assert zf.testzip() is None
+    assert zf.namelist() == ["Grobkosten.pdf", "Journal.txt"]
+    assert zf.getinfo("Grobkosten.pdf").compress_type == zipfile.ZIP_STORED
+    assert zf.getinfo("Journal.txt").compress_type == zipfile.ZIP_DEFLATED
+    assert zf.read("Grobkosten.pdf").startswith(b"%PDF")
+
+
+def test_gescheiterter_teil_bricht_den_export_nicht_ab():
+    teile = [
+        Teil("Kaputt.pdf", "unbekannt", {}),
+        Teil("Journal.txt", JOURNAL, {"projekt_name": "P", "eintraege": []}),
+    ]
+    zf = _zip(projekt_export.zip_strom(teile, ["Grobkostenschätzung: nicht enthalten"], workers=1))
+    assert zf.namelist() == ["Journal.txt", "Hinweise.txt"]
+    hinweise = zf.read("Hinweise.txt").decode()
+    assert "Grobkostenschätzung: nicht enthalten" in hinweise
+    assert "Kaputt.pdf: nicht erzeugt (ValueError" in hinweise
+
+
+def _status(db) -> str:
+    db.expire_all()
+    return json.loads(db.query(Kostenschaetzung).one().inputs_json)["_workflow"]["status"]
+
+
+def test_teile_aus_dem_projekt_und_exportstatus():
+    db = _frische_db()
+    user, fremd, projekt = _umgebung(db)
+    dateiname, teile, hinweise, geschrieben = _projekt_export_teile(projekt.id, "netto", user, db)
+
+    assert dateiname == "Heizzentrale_S_d_Export.zip"
+    assert hinweise == []
+    namen = [t.name for t in teile]
+    zweites = db.query(HcSchema).order_by(HcSchema.id).all()[1]
+    assert namen[:3] == ["Schemas/Prinzip.pdf", f"Schemas/Prinzip_{zweites.id}.pdf", "Schemas/Unterstation.pdf"]
+    assert namen[3:] == ["Heizzentrale_S_d_Grobkostenschaetzung_netto.pdf",
+                         "Heizzentrale_S_d_Grobkostenschaetzung_netto.xlsx", "Journal.txt"]
+    assert [t.daten["plankopf"]["revision"] for t in teile[:3]] == ["2", "0", "0"]
+    # Exportiert ist die Schätzung erst, wenn ihre Dateien im ZIP stehen.
+    assert _status(db) == "freigegeben"
+    stuecke = projekt_export.zip_strom(teile, hinweise, workers=1, geschrieben=geschrieben)
+    next(stuecke)
+    assert _status(db) == "freigegeben"
+    list(stuecke)
+    assert _status(db) == "exportiert"
+
+    with pytest.raises(HTTPException) as fehler:
+        _projekt_export_teile(projekt.id, "netto", fremd, db)
+    assert fehler.value.status_code == 404
+
+
+def test_gescheiterte_kostendatei_laesst_den_status_stehen(monkeypatch):
+    db = _frische_db()
+    user, _, projekt = _umgebung(db)
+    _, teile, hinweise, geschrieben = _projekt_export_teile(projekt.id, "netto", user, db)
+
+    def kaputt(*args):
+        raise ValueError("Excel kaputt")
+
+    monkeypatch.setattr(projekt_export, "erzeuge_grobkostenschaetzung_excel", kaputt)
+    zf = _zip(projekt_export.zip_strom(teile, hinweise, workers=1, geschrieben=geschrieben))
+    assert "Excel kaputt" in zf.read("Hinweise.txt").decode()
+    assert _status(db) == "freigegeben"
+
+
+def test_fehlende_schaetzung_wird_als_hinweis_vermerkt():
+    db = _frische_db()
+    user, _, projekt = _umgebung(db)
+    db.query(Kostenschaetzung).delete()
+    db.commit()
+    _, teile, hinweise, geschrieben = _projekt_export_teile(projekt.id, "netto", user, db)
+    assert not any(t.art == KOSTEN_PDF for t in teile)
+    assert geschrieben is None
+    assert hinweise == ["Grobkostenschätzung: nicht enthalten (Noch keine Grobkostenschätzung gespeichert)"]
+
+
+def test_parallel_ergibt_dieselben_dateien():
+    db = _frische_db()
+    user, _, projekt = _umgebung(db)
+    _, teile, hinweise, _ = _projekt_export_teile(projekt.id, "netto", user, db)
+    zf = _zip(projekt_export.zip_strom(teile, hinweise, workers=2))
+    assert sorted(zf.namelist()) == sorted(t.name for t in teile)
+    plan = PdfReader(io.BytesIO(zf.read("Schemas/Unterstation.pdf")))
+    assert plan.metadata.title == "Heizzentrale Süd — Unterstation"
+
+
+def test_job_liefert_das_zip_nur_dem_eigenen_mandanten(monkeypatch):
+    teile = [Teil(f"Journal_{i}.txt", JOURNAL, {"projekt_name": "P", "eintraege": EINTRAEGE}) for i in range(3)]
+    job = projekt_export.starte_job(teile, tenant_id=1, dateiname="P_Export.zip", workers=1)
+    for _ in range(500):
+        if projekt_export.hole_job(job.id, 1).status != projekt_export.LAEUFT:
+            break
+        time.sleep(0.01)
+    status = projekt_export.hole_job(job.id, 1).als_dict()
+    assert status["status"] == "fertig" and status["fertig"] == status["gesamt"] == 3
+    assert projekt_export.hole_job(job.id, 2) is None
+    assert zipfile.ZipFile(job.pfad).namelist() == ["Journal_0.txt", "Journal_1.txt", "Journal_2.txt"]
+
+    monkeypatch.setenv("PROJEKT_EXPORT_JOB_TTL_SECONDS", "0")
+    assert projekt_export.hole_job(job.id, 1) is None
+    assert not os.path.exists(job.pfad)
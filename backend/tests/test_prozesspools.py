@@ -0,0 +1,30 @@
+"""Gemeinsame Prozesspools: Worker-Anzahl aus der Umgebung, Beenden beim Herunterfahren."""
+import pytest
+
+from app import prozesspools
+
+
+def test_worker_anzahl_argument_vor_umgebung_gedeckelt(monkeypatch):
+    monkeypatch.setenv("TEST_WORKERS", "3")
+    assert prozesspools.workers_aus_umgebung("TEST_WORKERS") == 3
+    assert prozesspools.workers_aus_umgebung("TEST_WORKERS", 2) == 2
+    assert prozesspools.workers_aus_umgebung("TEST_WORKERS", 99) == prozesspools.HARD_MAX_WORKERS
+    assert prozesspools.workers_aus_umgebung("TEST_WORKERS", -1) == 1
+    monkeypatch.setenv("TEST_WORKERS", "viele")
+    assert 1 <= prozesspools.workers_aus_umgebung("TEST_WORKERS") <= prozesspools.DEFAULT_WORKERS
+
+
+def test_pool_bleibt_bis_zum_beenden():
+    pool = prozesspools.Prozesspool("test")
+    erster = pool.hole(1)
+    assert pool.hole(1) is erster
+    zweiter = pool.hole(2)
+    assert zweiter is not erster
+    with pytest.raises(RuntimeError):
+        erster.submit(int)
+
+    prozesspools.alle_beenden()
+    with pytest.raises(RuntimeError):
+        zweiter.submit(int)
+    assert pool.hole(2) is not zweiter
+    pool.verwerfen()
@@ -0,0 +1,100 @@
+"""Referenz-Schnappschuss der Grobkostenschätzung: einmal laden, gezielt verwerfen."""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.grobkostenschaetzung import Korrekturfaktor
+from app.models.kv import BauindexEintrag, RefKostenzeile, RefProjekt, RefProjektGewerk
+from app.routers.hc_grobkostenschaetzung import _ref_to_calc_dict
+from app.services import referenz_snapshot
+
+
+@pytest.fixture()
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _referenz(db, name, tenant_id=1, **felder):
+    ref = RefProjekt(tenant_id=tenant_id, name=name, **{
+        "gebaeudetyp": "MFH", "projektart": "Neubau", "waermeerzeuger": ["Erdsonden-WP"],
+        "waermeabgabe": ["FBH"], "ebf_m2": 1200.0, "heizleistung_kw": 60.0,
+        "anzahl_einheiten": 12, "datum": date(2024, 3, 1), **felder,
+    })
+    ref.gewerke = [RefProjektGewerk(tenant_id=tenant_id, gewerk="heizung", rabatt_pct=10.0, skonto_pct=2.0)]
+    ref.kostenzeilen = [
+        RefKostenzeile(tenant_id=tenant_id, gewerk="heizung", bkp_nr="242.1", betrag_chf=50000.0),
+        RefKostenzeile(tenant_id=tenant_id, gewerk="heizung", bkp_nr="243.1", betrag_chf=30000.0),
+        RefKostenzeile(tenant_id=tenant_id, gewerk="heizung", bkp_nr="243.1", betrag_chf=1234.5),
+        RefKostenzeile(tenant_id=tenant_id, gewerk="lueftung", bkp_nr="244.1", betrag_chf=9999.0),
+    ]
+    db.add(ref)
+    db.commit()
+    return ref
+
+
+def _snapshot(db, tenant_id=1):
+    return referenz_snapshot.snapshot_fuer(db, tenant_id, _ref_to_calc_dict)
+
+
+def test_schnappschuss_gleich_dem_einzeladapter(db):
+    _referenz(db, "A")
+    _referenz(db, "B", gebaeudetyp="EFH", waermeerzeuger=["Luft/Wasser-WP"], ebf_m2=None)
+    snap = _snapshot(db)
+    erwartet = [_ref_to_calc_dict(r) for r in db.query(RefProjekt).all()]
+    assert snap.referenzen == erwartet
+    assert [r["positionen"] for r in snap.referenzen_je_variante["netto"]] == [
+        r["positionen_netto"] for r in erwartet]
+
+def test_ohne_aenderung_kein_neuaufbau(db, monkeypatch):
+    _referenz(db, "A")
+    erster = _snapshot(db)
+    monkeypatch.setattr(referenz_snapshot, "baue_snapshot", lambda *a: pytest.fail("neu gebaut"))
+    assert _snapshot(db) is erster
+
+
+def test_aenderungen_verwerfen_nur_die_eigene_firma(db):
+    ref = _referenz(db, "A")
+    _referenz(db, "Fremd", tenant_id=2)
+    erster, fremder = _snapshot(db), _snapshot(db, 2)
+    assert len(fremder) == 1 and fremder.referenzen[0]["name"] == "Fremd"
+
+    ref.kostenzeilen[0].betrag_chf = 60000.0
+    db.commit()
+    zweiter = _snapshot(db)
+    assert zweiter is not erster
+    assert zweiter.referenzen[0]["positionen_brutto"]["242.1"] == 60000.0
+    assert _snapshot(db, 2) is fremder
+
+    db.add(Korrekturfaktor(tenant_id=1, name="Sanierung", faktor=1.1, aktiv=True))
+    db.commit()
+    dritter = _snapshot(db)
+    assert dritter.faktoren == [{"name": "Sanierung", "faktor": 1.1, "aktiv": True}]
+
+    db.add(BauindexEintrag(tenant_id=1, periode=date(2025, 4, 1), wert=115.0))
+    db.commit()
+    assert _snapshot(db).bauindex == [{"periode": date(2025, 4, 1), "wert": 115.0}]
+
+    db.delete(ref)
+    db.commit()
+    assert len(_snapshot(db)) == 0
+
+
+def test_massenaenderung_und_lebensdauer(db, monkeypatch):
+    _referenz(db, "A")
+    erster = _snapshot(db)
+    db.query(RefProjekt).filter(RefProjekt.tenant_id == 1).update({"ebf_m2": 900.0})
+    db.commit()
+    zweiter = _snapshot(db)
+    assert zweiter.referenzen[0]["ebf_m2"] == 900.0
+    monkeypatch.setenv("KV_REFERENZ_SNAPSHOT_TTL_SECONDS", "0")
+    assert zweiter is not erster
+    assert _snapshot(db) is not zweiter
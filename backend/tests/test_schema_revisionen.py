@@ -0,0 +1,151 @@
+"""Schema-Stände als Vollstand/Delta, geteilte Berechnungen, Liste ohne Blobs."""
+import json
+
+import pytest
+from sqlalchemy import event
+
+from app.models import subscription  # noqa: F401 — FK-Ziel registrieren
+from app.models.heizungscockpit import HcRevisionBerechnung, HcSchema, HcSchemaRevision
+from app.routers.hc_schema import (
+    create_schema_revision,
+    get_schema_revision,
+    list_schema_revisions,
+    restore_schema_revision,
+)
+from app.schemas.hc_schemas import SchemaRevisionCreate
+from app.services import schema_revisionen
+from app.services.schema_revisionen import delta_anwenden, graph_delta
+from tests.test_schema_versionen import _frische_db, _umgebung
+
+
+@pytest.fixture(autouse=True)
+def _leerer_cache():
+    schema_revisionen.prozess_cache().leeren()
+    yield
+    schema_revisionen.prozess_cache().leeren()
+
+
+def _graph(anzahl, verschoben=0, extra=None):
+    nodes = [{"id": f"n{i}", "type": "ventil", "position": {"x": i * 40 + verschoben, "y": 0},
+              "data": {"label": f"Ventil {i}", "kv": 2.5}} for i in range(anzahl)]
+    edges = [{"id": f"e{i}", "source": f"n{i}", "target": f"n{i + 1}", "data": {"layer_id": "heizung_vl"}}
+             for i in range(anzahl - 1)]
+    graph = {"nodes": nodes, "edges": edges, "viewport": {"x": 0, "y": 0, "zoom": 1}}
+    graph.update(extra or {})
+    return graph
+
+
+def _bearbeitet(anzahl, nr):
+    """Graph nach Bearbeitungsschritt `nr`: ein Bauteil verschoben, ab und zu eines mehr."""
+    graph = _graph(anzahl + nr // 3)
+    graph["nodes"][nr % anzahl]["position"]["y"] = nr * 10
+    return graph
+
+
+def _text(graph):
+    return json.dumps(graph, separators=(",", ":"), ensure_ascii=False)
+
+
+@pytest.mark.parametrize("alt, neu", [
+    (_graph(5), _graph(6)),
+    (_graph(6), _graph(4, verschoben=10)),
+    (_graph(3), {**_graph(3), "nodes": list(reversed(_graph(3)["nodes"]))}),
+    (_graph(3), {"edges": _graph(3)["edges"], "nodes": _graph(3)["nodes"], "notiz": "neu"}),
+    (_graph(3, extra={"alt": 1}), _graph(3)),
+    (_graph(2), {**_graph(2), "nodes": [{"id": "x"}, {"id": "x"}]}),   # doppelte id: ganzer Wert
+])
+def test_delta_ergibt_genau_den_neuen_graphen(alt, neu):
+    delta = graph_delta(alt, neu)
+    assert _text(delta_anwenden(json.loads(_text(alt)), delta)) == _text(neu)
+
+
+def test_kleine_aenderung_speichert_nur_das_geaenderte_bauteil():
+    alt = _graph(50)
+    neu = _graph(50)
+    neu["nodes"][7]["position"]["x"] = 999
+    assert graph_delta(alt, neu) == {"listen": {"nodes": {"setzen": [neu["nodes"][7]]}}}
+
+
+def test_staende_werden_periodisch_voll_dazwischen_als_delta_abgelegt_und_exakt_gelesen():
+    db = _frische_db()
+    user, _, _, schema = _umgebung(db)
+    graphen = []
+    for nr in range(1, 24):
+        graph = _bearbeitet(30, nr)
+        graphen.append(graph)
+        create_schema_revision(schema.id, SchemaRevisionCreate(graph=graph), user, db)
+
+    staende = db.query(HcSchemaRevision).order_by(HcSchemaRevision.version_nr).all()
+    arten = [s.graph_art for s in staende]
+    assert arten[0] == arten[schema_revisionen.SNAPSHOT_ABSTAND] == "voll"
+    assert set(arten[1:schema_revisionen.SNAPSHOT_ABSTAND]) == {"delta"}
+    assert all(s.graph_json == "" and s.calculation_json is None for s in staende)
+    voll = len(staende[0].graph_daten)
+    assert all(len(s.graph_daten) < voll / 2 for s in staende if s.graph_art == "delta")
+
+    schema_revisionen.prozess_cache().leeren()
+    db.expire_all()
+    for stand, graph in zip(staende, graphen):
+        assert get_schema_revision(schema.id, stand.id, user, db).graph == graph
+    assert db.get(HcSchema, schema.id).graph_json == _text(graphen[-1])
+
+
+def test_verschieben_teilt_dieselbe_berechnung():
+    db = _frische_db()
+    user, _, _, schema = _umgebung(db)
+    erster = create_schema_revision(schema.id, SchemaRevisionCreate(graph=_graph(4)), user, db)
+    zweiter = create_schema_revision(schema.id, SchemaRevisionCreate(graph=_graph(4, verschoben=300)), user, db)
+    dritter = create_schema_revision(schema.id, SchemaRevisionCreate(graph=_graph(5)), user, db)
+
+    shas = [s.calculation_sha256 for s in db.query(HcSchemaRevision).order_by(HcSchemaRevision.version_nr)]
+    assert shas[0] == shas[1] != shas[2]
+    assert db.query(HcRevisionBerechnung).count() == 2
+    assert erster.calculation == zweiter.calculation != dritter.calculation
+    assert "leitung_results" in zweiter.calculation
+
+
+def test_liste_laedt_weder_graph_noch_berechnung():
+    db = _frische_db()
+    user, _, _, schema = _umgebung(db)
+    for nr in range(3):
+        create_schema_revision(schema.id, SchemaRevisionCreate(graph=_graph(3 + nr)), user, db)
+    db.expire_all()
+    abfragen = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, sql, *a: abfragen.append(sql))
+    liste = list_schema_revisions(schema.id, 50, user, db)
+    assert [s.version_nr for s in liste] == [3, 2, 1]
+    assert abfragen and not any(
+        spalte in sql for sql in abfragen
+        for spalte in ("hc_schema_revisions.graph_json", "graph_daten", "calculation_json",
+                       "hc_revision_berechnungen")
+    )
+
+
+def test_klartext_staende_bleiben_lesbar_und_werden_verdichtet():
+    db = _frische_db()
+    user, _, _, schema = _umgebung(db)
+    schema_id = schema.id
+    alt_graph = _graph(20)
+    db.add(HcSchemaRevision(
+        tenant_id=user.tenant_id, project_id=schema.project_id, schema_id=schema_id, version_nr=1,
+        graph_json=_text(alt_graph), calculation_json='{"leitung_results": []}',
+    ))
+    db.commit()
+
+    # Neuer Stand setzt als Delta auf den Klartext-Stand auf.
+    neu_graph = _bearbeitet(20, 1)
+    neu = create_schema_revision(schema_id, SchemaRevisionCreate(graph=neu_graph), user, db)
+    assert db.get(HcSchemaRevision, neu.id).graph_art == "delta"
+    assert neu.diff["zusammenfassung"]["bauteile_hinzugefuegt"] == 0
+
+    assert schema_revisionen.verdichten(db) == {"staende": 1, "berechnungen": 1}
+    assert schema_revisionen.verdichten(db) == {"staende": 0, "berechnungen": 0}
+    schema_revisionen.prozess_cache().leeren()
+    alt = db.query(HcSchemaRevision).filter_by(version_nr=1).one()
+    assert (alt.graph_art, alt.graph_json, alt.calculation_json) == ("voll", "", None)
+    assert get_schema_revision(schema_id, alt.id, user, db).calculation == {"leitung_results": []}
+
+    restore_schema_revision(schema_id, alt.id, user, db)
+    assert json.loads(db.get(HcSchema, schema_id).graph_json) == alt_graph
+    assert get_schema_revision(schema_id, neu.id, user, db).graph == neu_graph
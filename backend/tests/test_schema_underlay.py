@@ -3,12 +3,16 @@
 Firmenweit gespeichert, getrennt vom autospeichernden Graphen. Diese Tests
 sichern das Kernverhalten ab: setzen, laden, nur die Lage ändern (ohne das
 Bild erneut zu senden), löschen, Grössen-/Format-Grenzen und Mandantentrennung.
-Kein echtes Bild — nur eine winzige gültige Data-URL (§10).
+Kein echter Plan — nur ein winziges, hier erzeugtes PNG (§10). Die Antworten
+tragen nie die Bilddaten, nur Lage, Version und Kachel-Manifest.
 """
 
+import base64
+import io
 import unittest
 
 from fastapi import HTTPException
+from PIL import Image
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -23,7 +27,14 @@ from app.routers.hc_schema import (
 )
 from app.schemas.hc_schemas import UnderlayIn, UnderlayTransformIn
 
-_MINI_PNG = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAAAAAA="
+
+def _png_data_url(w=1, h=1) -> str:
+    puffer = io.BytesIO()
+    Image.new("RGB", (w, h), "white").save(puffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(puffer.getvalue()).decode()
+
+
+_MINI_PNG = _png_data_url()
 
 
 def _frische_db():
@@ -67,24 +78,26 @@ class UnderlayTest(unittest.TestCase):
         self.assertIsNone(get_schema_underlay(schema.id, user, db))
         out = set_schema_underlay(schema.id, _underlay_in(), user, db)
         self.assertEqual(out["mime"], "image/png")
-        self.assertEqual(out["w"], 1600)
+        self.assertEqual(out["w"], 1)           # echte Bildgrösse, nicht die Angabe
         self.assertEqual(out["name"], "Grundriss.pdf")
         geladen = get_schema_underlay(schema.id, user, db)
-        self.assertEqual(geladen["data"], _MINI_PNG)
+        self.assertNotIn("data", geladen)
+        self.assertEqual(geladen["sha256"], out["sha256"])
+        self.assertEqual(geladen["kacheln"], {"kante": 256, "stufen": [[1, 1]]})
         # Audit protokolliert (§9).
         self.assertTrue(db.query(HcAuditEvent).filter_by(action="underlay_gesetzt").count())
 
     def test_patch_aendert_nur_lage_ohne_bild(self):
         db = _frische_db()
         user, _, _, schema = _umgebung(db)
-        set_schema_underlay(schema.id, _underlay_in(), user, db)
+        gesetzt = set_schema_underlay(schema.id, _underlay_in(), user, db)
         out = patch_schema_underlay(
             schema.id, UnderlayTransformIn(x=99, opacity=0.3, locked=True), user, db)
         self.assertEqual(out["x"], 99)
         self.assertEqual(out["opacity"], 0.3)
         self.assertTrue(out["locked"])
         self.assertEqual(out["y"], 20)          # unverändert
-        self.assertEqual(out["data"], _MINI_PNG)  # Bild bleibt erhalten
+        self.assertEqual(out["sha256"], gesetzt["sha256"])  # Bild bleibt erhalten
 
     def test_opacity_und_scale_werden_geklemmt(self):
         db = _frische_db()
@@ -123,6 +136,14 @@ class UnderlayTest(unittest.TestCase):
             set_schema_underlay(schema.id, _underlay_in(data=riesig), user, db)
         self.assertEqual(ctx.exception.status_code, 413)
 
+    def test_unlesbares_bild_abgelehnt(self):
+        db = _frische_db()
+        user, _, _, schema = _umgebung(db)
+        kaputt = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAAAAAA="
+        with self.assertRaises(HTTPException) as ctx:
+            set_schema_underlay(schema.id, _underlay_in(data=kaputt), user, db)
+        self.assertEqual(ctx.exception.status_code, 422)
+
     def test_fremder_mandant_sieht_schema_nicht(self):
         db = _frische_db()
         user, fremd, _, schema = _umgebung(db)
@@ -16,6 +16,7 @@ from app.routers.hc_schema import (
     restore_schema_revision,
 )
 from app.schemas.hc_schemas import SchemaRevisionCreate
+from app.services import schema_revisionen
 
 
 def _frische_db():
@@ -90,7 +91,8 @@ class SchemaVersionenTest(unittest.TestCase):
         self.assertNotIn("darf_nicht", stand.calculation)
         self.assertEqual(stand.diff["zusammenfassung"]["bauteile_hinzugefuegt"], 2)
         self.assertEqual(stand.diff["zusammenfassung"]["leitungen_hinzugefuegt"], 1)
-        self.assertEqual(db.get(HcSchema, schema.id).graph_json, db.query(HcSchemaRevision).one().graph_json)
+        self.assertEqual(db.get(HcSchema, schema.id).graph_json,
+                         schema_revisionen.graph_text(db, db.query(HcSchemaRevision).one()))
 
         event = db.query(HcAuditEvent).one()
         self.assertEqual(event.action, "schema_stand_gespeichert")
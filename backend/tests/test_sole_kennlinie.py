@@ -0,0 +1,84 @@
+"""Anlagenkennlinie des Solekreises (NumPy) gegen den skalaren Rechenweg."""
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.calculations.hydraulik import berechne_schema
+from app.calculations.sole_druckverlust import sole_druckverlust
+from app.calculations.sole_kennlinie import Solekreis, betriebspunkt, pumpenkennlinie, sondenfeld_raster
+from app.routers.hc_hydraulik import SondenfeldInput, hydraulik_sondenfeld
+from tests.test_sole_druckverlust import REFERENZ
+from tests.test_solekreis_verknuepfung import _schema
+
+PUMPE = [{"v_m3h": 0, "h_mws": 14}, {"v_m3h": 4, "h_mws": 12.5},
+         {"v_m3h": 8, "h_mws": 8}, {"v_m3h": 11, "h_mws": 0}]
+
+
+@pytest.mark.parametrize("anzahl,tiefe", [(1, 80), (4, 220), (8, 150)])
+def test_kennlinie_trifft_den_skalaren_rechenweg(anzahl, tiefe):
+    volumenstroeme = np.linspace(0.5, 15, 30)
+    kreis = Solekreis.aus_ergebnis(sole_druckverlust(
+        **{**REFERENZ, "sonden_anzahl": anzahl, "sonden_tiefe_m": tiefe}))
+    kennlinie = kreis.foerderhoehe(volumenstroeme)["foerderhoehe_mws"]
+    for v, h in zip(volumenstroeme, kennlinie):
+        skalar = sole_druckverlust(**{**REFERENZ, "sonden_anzahl": anzahl,
+                                      "sonden_tiefe_m": tiefe, "volumenstrom_m3_h": float(v),
+                                      "druckverlust_wp_mws": REFERENZ["druckverlust_wp_mws"]
+                                      * (v / REFERENZ["volumenstrom_m3_h"]) ** 2})
+        # Skalarer Rechenweg rundet Zwischenwerte und Ergebnis auf 0.01 mWs.
+        assert h == pytest.approx(skalar["foerderhoehe_mws"], abs=0.01)
+    assert kreis.foerderhoehe(0.0)["foerderhoehe_mws"] == 0
+
+
+def test_betriebspunkt_liegt_auf_beiden_kennlinien():
+    kreis = Solekreis.aus_ergebnis(sole_druckverlust(**REFERENZ))
+    bp = betriebspunkt(kreis, PUMPE)
+    v = float(bp["v_m3h"])
+    assert 4 < v < 11
+    assert float(kreis.foerderhoehe(v)["foerderhoehe_mws"]) == pytest.approx(float(bp["h_mws"]), abs=0.01)
+
+    # Pumpe, die die Anlage im Datenblattbereich nicht erreicht: kein Schnitt.
+    stark = [{"v_m3h": 0, "h_mws": 40}, {"v_m3h": 2, "h_mws": 39}]
+    assert np.isnan(betriebspunkt(kreis, stark)["v_m3h"])
+    with pytest.raises(ValueError):
+        pumpenkennlinie([{"v_m3h": 1, "h_mws": 3}])
+
+
+def test_raster_wie_einzelrechnungen():
+    kreis = Solekreis.aus_ergebnis(sole_druckverlust(**REFERENZ))
+    raster = sondenfeld_raster(kreis, [2, 4, 6], [150, 220], PUMPE)
+    assert [(z["sonden_anzahl"], z["sonden_tiefe_m"]) for z in raster] == [
+        (2, 150), (2, 220), (4, 150), (4, 220), (6, 150), (6, 220)]
+    vier = raster[3]
+    assert vier["foerderhoehe_mws"] == pytest.approx(sole_druckverlust(**REFERENZ)["foerderhoehe_mws"], abs=0.01)
+    einzeln = betriebspunkt(Solekreis.aus_ergebnis(sole_druckverlust(
+        **{**REFERENZ, "sonden_anzahl": 6, "sonden_tiefe_m": 150})), PUMPE)
+    assert raster[4]["betriebspunkt"]["v_m3h"] == pytest.approx(float(einzeln["v_m3h"]), abs=0.001)
+    # Mehr Sonden → weniger Widerstand → mehr Volumenstrom am Betriebspunkt.
+    assert raster[0]["betriebspunkt"]["v_m3h"] < raster[2]["betriebspunkt"]["v_m3h"]
+    assert raster[0]["pumpe_reicht"] is False
+
+    with pytest.raises(ValueError):
+        sondenfeld_raster(kreis, [2.5], [100])
+
+
+def test_solepumpe_mit_kennlinie_und_sondenfeld_endpunkt():
+    nodes, edges = _schema()
+    next(n for n in nodes if n["id"] == "solepumpe")["data"]["kennlinie"] = PUMPE
+    pumpe = berechne_schema(nodes, edges)["pumpen_results"]["solepumpe"]
+    assert pumpe["betriebspunkt"]["v_m3h"] < pumpe["v"]
+    assert any("erreicht nur" in w for w in pumpe["warnings"])
+
+    antwort = hydraulik_sondenfeld(SondenfeldInput(
+        nodes=nodes, edges=edges, erdsonden_id="ews",
+        sonden_anzahlen=[4, 5, 6], sonden_tiefen_m=[180, 200]))
+    assert antwort["mit_kennlinie"] and len(antwort["raster"]) == 6
+    fuenf = next(z for z in antwort["raster"]
+                 if (z["sonden_anzahl"], z["sonden_tiefe_m"]) == (5, 180))
+    assert fuenf["betriebspunkt"] == pumpe["betriebspunkt"]
+
+    with pytest.raises(HTTPException) as fehler:
+        hydraulik_sondenfeld(SondenfeldInput(
+            nodes=nodes, edges=edges, erdsonden_id="gibt-es-nicht",
+            sonden_anzahlen=[4], sonden_tiefen_m=[180]))
+    assert fehler.value.status_code == 422
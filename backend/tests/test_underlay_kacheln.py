@@ -0,0 +1,163 @@
+"""Underlay-Kachelpyramide: einmal zerlegt, nur sichtbare Kacheln geladen."""
+import io
+import json
+
+import pytest
+from PIL import Image
+
+from app.models.heizungscockpit import HcSchema
+from app.routers import hc_schema
+from app.routers.hc_schema import patch_schema_underlay, set_schema_underlay
+from app.schemas.hc_schemas import UnderlayTransformIn
+from app.services import blob_ablage, blob_store, underlay_kacheln
+from tests.test_blob_store import _get
+from tests.test_lv_import_jobs import _session_factory
+from tests.test_schema_underlay import _png_data_url, _underlay_in, _umgebung
+
+
+@pytest.fixture(autouse=True)
+def _ohne_speicher(monkeypatch):
+    monkeypatch.setattr(blob_store, "_speicher", None)
+    monkeypatch.setattr(blob_store, "_speicher_geladen", True)
+    underlay_kacheln.prozess_cache().leeren()
+
+
+def _png(w, h) -> bytes:
+    puffer = io.BytesIO()
+    Image.new("RGB", (w, h), "white").save(puffer, format="PNG")
+    return puffer.getvalue()
+
+
+def test_stufen_halbieren_bis_eine_kachel():
+    assert underlay_kacheln.stufen(1000, 600) == [[1000, 600], [500, 300], [250, 150]]
+    assert underlay_kacheln.stufen(256, 10) == [[256, 10]]
+
+
+def test_pyramide_passt_zum_manifest():
+    pyramide = underlay_kacheln.baue(_png(600, 300))
+    assert (pyramide.w, pyramide.h) == (600, 300)
+    erwartet = {underlay_kacheln.VORSCHAU}
+    for nr, (w, h) in enumerate(underlay_kacheln.stufen(600, 300)):
+        spalten, zeilen = -(-w // 256), -(-h // 256)
+        erwartet |= {underlay_kacheln.schluessel(nr, x, y)
+                     for x in range(spalten) for y in range(zeilen)}
+        rand = Image.open(io.BytesIO(pyramide.dateien[underlay_kacheln.schluessel(nr, spalten - 1, zeilen - 1)]))
+        assert rand.size == (w - (spalten - 1) * 256, h - (zeilen - 1) * 256)
+    assert set(pyramide.dateien) == erwartet
+    vorschau = Image.open(io.BytesIO(pyramide.dateien[underlay_kacheln.VORSCHAU]))
+    assert vorschau.format == "WEBP" and vorschau.size == (512, 256)
+
+
+def test_zu_grosses_bild_wird_nicht_dekodiert(monkeypatch):
+    monkeypatch.setattr(underlay_kacheln, "MAX_PIXEL", 100)
+    with pytest.raises(ValueError):
+        underlay_kacheln.baue(_png(20, 20))
+
+
+def test_kacheln_sind_mit_version_unveraenderlich_und_werden_neu_gebaut():
+    db = _session_factory()()
+    user, fremd, _, schema = _umgebung(db)
+    out = set_schema_underlay(schema.id, _underlay_in(data=_png_data_url(600, 300)), user, db)
+    assert out["kacheln"]["stufen"] == [[600, 300], [300, 150], [150, 75]]
+    basis = f"/api/v1/schemas/{schema.id}/underlay"
+
+    kachel = _get(db, user, hc_schema.router, f"{basis}/kacheln/0/2/1?v={out['sha256']}")
+    assert kachel.status_code == 200 and kachel.headers["content-type"] == "image/webp"
+    assert "immutable" in kachel.headers["cache-control"]
+    assert Image.open(io.BytesIO(kachel.content)).size == (88, 44)
+    assert "immutable" not in _get(db, user, hc_schema.router, f"{basis}/kacheln/0/2/1").headers["cache-control"]
+    assert _get(db, user, hc_schema.router, f"{basis}/kacheln/0/2/1",
+                {"If-None-Match": kachel.headers["etag"]}).status_code == 304
+
+    # Prozess-Cache leer (Neustart): aus dem gespeicherten Bild neu gebaut.
+    underlay_kacheln.prozess_cache().leeren()
+    assert _get(db, user, hc_schema.router, f"{basis}/kacheln/0/2/1").content == kachel.content
+    assert _get(db, user, hc_schema.router, f"{basis}/vorschau").status_code == 200
+    assert _get(db, user, hc_schema.router, f"{basis}/kacheln/0/3/0").status_code == 404
+    assert _get(db, fremd, hc_schema.router, f"{basis}/vorschau").status_code == 404
+
+
+def test_mit_blob_speicher_liegen_kacheln_im_speicher(tmp_path, monkeypatch):
+    speicher = blob_store.DateiBlobSpeicher(tmp_path)
+    monkeypatch.setattr(blob_store, "_speicher", speicher)
+    db = _session_factory()()
+    user, _, _, schema = _umgebung(db)
+    out = set_schema_underlay(schema.id, _underlay_in(data=_png_data_url(300, 300)), user, db)
+    assert "dateien" not in out
+
+    underlay_kacheln.prozess_cache().leeren()
+    dateien = json.loads(db.get(HcSchema, schema.id).underlay_json)["dateien"]
+    assert len(dateien) == 4 + 1 + 1          # Stufe 0: 2×2, Stufe 1: 1, Vorschau
+    kachel = _get(db, user, hc_schema.router, f"/api/v1/schemas/{schema.id}/underlay/kacheln/1/0/0")
+    assert kachel.content == speicher.lese(dateien["1/0/0"])
+    assert underlay_kacheln.prozess_cache().hole(out["sha256"]) is None   # nicht neu gebaut
+
+
+def test_gleichzeitige_kacheln_bauen_die_pyramide_einmal(monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Grenze unter der Pyramidengrösse: der einzige Eintrag bleibt trotzdem.
+    monkeypatch.setenv("UNDERLAY_KACHEL_CACHE_MB", "0.0001")
+    daten = _png(600, 300)
+    gestartet, weiter = threading.Event(), threading.Event()
+    aufrufe = []
+
+    def lesen():
+        aufrufe.append(1)
+        gestartet.set()
+        weiter.wait(5)
+        return daten
+
+    underlay = {"kacheln": underlay_kacheln.manifest(600, 300)}
+    namen = ["0/0/0", "0/1/0", "1/0/0", underlay_kacheln.VORSCHAU]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(underlay_kacheln.datei, "h", n, lambda: underlay, lesen) for n in namen]
+        gestartet.wait(5)
+        weiter.set()
+        kacheln = [f.result() for f in futures]
+    assert all(kacheln) and aufrufe == [1]
+    assert underlay_kacheln.datei("h", "0/2/1", lambda: underlay, lesen) is not None
+    assert aufrufe == [1] and underlay_kacheln.prozess_cache().gebaut == 1
+
+
+def test_unlesbares_bild_wird_nicht_abgelegt():
+    with pytest.raises(ValueError):
+        underlay_kacheln.datei("kaputt", "0/0/0", dict, lambda: b"kein bild")
+    with pytest.raises(ValueError):
+        underlay_kacheln.datei("kaputt", "0/0/0", dict, lambda: b"kein bild")
+    assert underlay_kacheln.prozess_cache().gebaut == 0
+
+
+def test_kachelabruf_liest_bei_warmem_cache_nur_den_hash():
+    from sqlalchemy import event
+
+    db = _session_factory()()
+    user, _, _, schema = _umgebung(db)
+    set_schema_underlay(schema.id, _underlay_in(data=_png_data_url(600, 300)), user, db)
+    zeile = db.get(HcSchema, schema.id)
+    assert "data" not in json.loads(zeile.underlay_json) and zeile.underlay_bild.startswith("data:")
+
+    abfragen = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, sql, *args: abfragen.append(sql))
+    kachel = _get(db, user, hc_schema.router, f"/api/v1/schemas/{schema.id}/underlay/kacheln/0/1/0")
+    assert kachel.status_code == 200 and abfragen
+    assert not [sql for sql in abfragen if "underlay_json" in sql or "underlay_bild" in sql]
+
+
+def test_altbestand_mit_eingebetteter_data_url_bleibt_lesbar():
+    db = _session_factory()()
+    user, _, _, schema = _umgebung(db)
+    zeile = db.get(HcSchema, schema.id)
+    zeile.underlay_json = json.dumps({"mime": "image/png", "data": _png_data_url(300, 300),
+                                      "w": 300, "h": 300, "x": 0, "y": 0})
+    db.commit()
+    basis = f"/api/v1/schemas/{schema.id}/underlay"
+    assert _get(db, user, hc_schema.router, f"{basis}/kacheln/0/1/1").status_code == 200
+
+    patch_schema_underlay(schema.id, UnderlayTransformIn(x=5), user, db)
+    zeile = db.get(HcSchema, schema.id)
+    assert "data" not in json.loads(zeile.underlay_json)
+    assert zeile.underlay_sha256 == blob_store.pruefsumme(blob_ablage.data_url_bytes(zeile.underlay_bild))
+    assert _get(db, user, hc_schema.router, f"{basis}/bild").status_code == 200
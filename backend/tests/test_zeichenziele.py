@@ -0,0 +1,73 @@
+"""Zeichenziele: derselbe Plan als SVG-Text und direkt als ReportLab-Zeichnung.
+
+Das PDF zeichnet den Plan seit dem Umbau ohne svglib. Maßstab bleibt trotzdem
+svglib: die direkte Zeichnung muss Pixel für Pixel dasselbe Bild ergeben wie
+`svg2rlg(erzeuge_svg(...))`, sonst sieht der Plan im PDF anders aus als vorher.
+"""
+import io
+
+import numpy as np
+import pytest
+from reportlab.graphics import renderPDF
+from svglib.svglib import svg2rlg
+
+from app.calculations.hydraulik import berechne_schema
+from app.export.schema_svg import erzeuge_svg, erzeuge_zeichnung
+from app.export.zeichenziele import SvgZiel, ZeichnungsZiel
+from tests.test_export import _graph
+
+pdfium = pytest.importorskip("pypdfium2")
+
+
+def _bauteil(nid, typ, x, y, **daten):
+    return {"id": nid, "type": typ, "position": {"x": x, "y": y}, "data": daten}
+
+
+def _plaene():
+    nodes, edges = _graph()
+    yield nodes, edges, berechne_schema(nodes, edges)
+    # Symbole mit Vorlage-Fragmenten, Pfaden mit Bögen, Drehung und Spiegelung
+    bauteile = [
+        _bauteil("v2", "valve2", 0, 0, nr=1, label="Ventil", mirrored=True),
+        _bauteil("v3", "valve3", 160, 0, nr=2, rotation=90),
+        _bauteil("p", "pump", 320, 0, nr=3, rotation=180, mirrored=True),
+        _bauteil("gas", "erzeuger", 0, 200, nr=4, generator_type="gas"),
+        _bauteil("wp", "erzeuger", 260, 200, generator_type="co2_wp"),
+        _bauteil("sp", "speicher", 520, 0, nr=5, liter=800),
+        _bauteil("exp", "expansion", 700, 0, nr=6),
+        _bauteil("pwt", "pwt", 700, 220, mirrored=True),
+        _bauteil("ti", "interface_line", 0, 480, label="Systemgrenze", dashed=True),
+        _bauteil("hk", "heizkoerper", 420, 420, label="HK <Bad> & Küche"),
+        _bauteil("lh", "lufterhitzer_gruppe", 900, 0, nr=7, label="Lüftung", q_kw="12"),
+    ]
+    yield bauteile, [], berechne_schema(bauteile, [])
+
+
+def _pixel(zeichnung):
+    seite = pdfium.PdfDocument(renderPDF.drawToString(zeichnung))[0]
+    return np.asarray(seite.render(scale=2).to_pil().convert("L"), dtype=np.int16)
+
+
+@pytest.mark.parametrize("nodes, edges, results", list(_plaene()))
+def test_direkte_zeichnung_ist_pixelgleich_mit_svglib(nodes, edges, results):
+    alt = svg2rlg(io.StringIO(erzeuge_svg(nodes, edges, results)))
+    neu = erzeuge_zeichnung(nodes, edges, results)
+    assert (neu.width, neu.height) == (alt.width, alt.height)
+    assert np.array_equal(_pixel(neu), _pixel(alt))
+
+
+def test_leeres_schema_auf_beiden_zielen():
+    assert 'viewBox="0 0 400 200"' in erzeuge_svg([], [], {})
+    zeichnung = erzeuge_zeichnung([], [], {})
+    assert (zeichnung.width, zeichnung.height) == (300, 150)
+
+
+def test_svg_ziel_escapt_den_text_einmal():
+    ziel = SvgZiel()
+    ziel.element("text", "A & B <C>", x=1, y="2")
+    assert ziel.teile == ['<text x="1" y="2">A &amp; B &lt;C&gt;</text>']
+
+
+def test_unbekanntes_element_wird_nicht_still_verschluckt():
+    with pytest.raises(ValueError):
+        ZeichnungsZiel().element("ellipse", cx=0, cy=0)
@@ -85,9 +85,20 @@ export const deleteSchema = (schemaId) =>
   api.delete(`${BASE}/schemas/${schemaId}`);
 
 // --- Underlay: Hintergrund-Plan zum Nachzeichnen (§ Editor #5) ---
+// Nur Lage und Kachel-Manifest; das Bild kommt kachelweise (siehe unten).
 export const getSchemaUnderlay = (schemaId) =>
   api.get(`${BASE}/schemas/${schemaId}/underlay`).then(r => r.data);
 
+// Kacheln und Vorschau als Blob (Bearer-Token → kein <img src> möglich). Mit
+// `v` (= sha256 des Bilds) sind die URLs unveränderlich und bleiben im Cache.
+export const getSchemaUnderlayKachel = (schemaId, { stufe, x, y }, v) =>
+  api.get(`${BASE}/schemas/${schemaId}/underlay/kacheln/${stufe}/${x}/${y}`,
+    { params: { v }, responseType: "blob" }).then(r => r.data);
+
+export const getSchemaUnderlayVorschau = (schemaId, v) =>
+  api.get(`${BASE}/schemas/${schemaId}/underlay/vorschau`,
+    { params: { v }, responseType: "blob" }).then(r => r.data);
+
 export const setSchemaUnderlay = (schemaId, underlay) =>
   api.put(`${BASE}/schemas/${schemaId}/underlay`, underlay).then(r => r.data);
 
@@ -100,6 +111,29 @@ export const deleteSchemaUnderlay = (schemaId) =>
 // --- Hydraulik-Berechnung (Backend = einzige Rechen-Wahrheit) ---
 export const hydraulikBerechnen = (graph, config = {}) =>
   api.post(`${BASE}/hydraulik/berechnen`, graph, config).then(r => r.data);
+// Variantenvergleich: varianten = [{ name, aenderungen: { bauteilId: { feld: wert } } }]
+// → { basis, varianten: [{ name, …nur Abweichungen zur Basis }] }
+export const vergleicheHydraulikVarianten = (graph, varianten) =>
+  api.post(`${BASE}/hydraulik/varianten`, { ...graph, varianten }).then(r => r.data);
+// Sondenfeld-Raster: { erdsonden_id, sonden_anzahlen, sonden_tiefen_m, kennlinie? }
+// → { volumenstrom_m3_h, erforderlich_gesamt_m, raster: [{ sonden_anzahl, sonden_tiefe_m, … }] }
+export const sondenfeldRaster = (graph, raster) =>
+  api.post(`${BASE}/hydraulik/sondenfeld`, { ...graph, ...raster }).then(r => r.data);
+
+// --- Editor-Sitzung: Graph bleibt im Backend, der Editor schickt nur Patches ---
+// Antwort von patchSchemaSitzung: { version, gespeichert, konflikt,
+// eintraege, entfernt, werte } — nur die geänderten Resultate.
+export const openSchemaSitzung = (schemaId, graph = null) =>
+  api.post(`${BASE}/schemas/${schemaId}/sitzungen`, { graph }).then(r => r.data);
+
+export const patchSchemaSitzung = (sitzungId, version, ops) =>
+  api.patch(`${BASE}/schema-sitzungen/${sitzungId}`, { version, ops }).then(r => r.data);
+
+export const saveSchemaSitzung = (sitzungId) =>
+  api.post(`${BASE}/schema-sitzungen/${sitzungId}/speichern`).then(r => r.data);
+
+export const closeSchemaSitzung = (sitzungId) =>
+  api.delete(`${BASE}/schema-sitzungen/${sitzungId}`);
 
 // --- BKP-Kostenschätzung (Phase 3, Katalog steht ab Tag 1) ---
 export const getBkpPositionen = (params) =>
@@ -173,7 +207,16 @@ export const uploadLvImport = (file, projectId) => {
   // Content-Type explizit entfernen, damit der multipart-Boundary automatisch gesetzt wird.
   return api.post(`${BASE}/lv-imports`, fd, { headers: { "Content-Type": null } }).then(r => r.data);
 };
+// Der Upload antwortet sofort (202); die Extraktion läuft als Job weiter.
+export const getLvImportStatus = (id) => api.get(`${BASE}/lv-imports/${id}/status`).then(r => r.data);
 export const listLvImports = () => api.get(`${BASE}/lv-imports`).then(r => r.data);
+// Seitenweise (neueste zuerst): der Cursor der nächsten Seite kommt im Header.
+export const listLvImportsSeite = (cursor = null, limit = 50) =>
+  api.get(`${BASE}/lv-imports`, { params: { limit, ...(cursor ? { cursor } : {}) } })
+    .then(r => ({ items: r.data, nextCursor: r.headers["x-next-cursor"] || null }));
+// Original-PDF (authentifiziert als Blob; der Endpunkt kann auch Range).
+export const getLvImportOriginal = (id) =>
+  api.get(`${BASE}/lv-imports/${id}/original`, { responseType: "blob" }).then(r => r.data);
 export const getLvImport = (id) => api.get(`${BASE}/lv-imports/${id}`).then(r => r.data);
 export const updateLvFeature = (id, featureId, data) =>
   api.patch(`${BASE}/lv-imports/${id}/features/${featureId}`, data).then(r => r.data);
@@ -0,0 +1,91 @@
+import { useEffect, useMemo, useRef, useState } from 'react';
+import { useStore } from '@xyflow/react';
+import { getSchemaUnderlayKachel, getSchemaUnderlayVorschau } from '../../api/hcApi';
+import { sichtbareKacheln } from '../../pages/hc/schema/underlayKacheln';
+
+const kachelSchluessel = (k) => `${k.stufe}/${k.x}/${k.y}`;
+const KIND = { position:'absolute', pointerEvents:'none', userSelect:'none' };
+
+// Eine Datei holen und als Object-URL merken — nur, solange das Bild gilt.
+function laden(stand, aktuell, key, anfrage, setDateien) {
+  aktuell.angefragt.add(key);
+  anfrage().then(blob => {
+    if (stand.current !== aktuell) return;      // Bild inzwischen ersetzt
+    const url = URL.createObjectURL(blob);
+    aktuell.urls.push(url);
+    setDateien(alt => ({ ...alt, [key]: url }));
+  }).catch(() => aktuell.angefragt.delete(key));
+}
+
+/**
+ * Underlay als Kachelebene (§ Editor #5). Sofort steht die kleine Vorschau da;
+ * darüber lädt nur, was im Ausschnitt liegt, in der Stufe, die der Zoom
+ * braucht. Der Rahmen (`className`, `style`, `onPointerDown`) ist derselbe wie
+ * beim früheren Einzelbild — Ziehen, Sperren und Deckkraft bleiben unverändert.
+ */
+export default function UnderlayEbene({ schemaId, underlay, className, style, onPointerDown }) {
+  const [tx, ty, zoom] = useStore(state => state.transform);
+  const breite = useStore(state => state.width);
+  const hoehe = useStore(state => state.height);
+  const version = underlay.sha256;
+  const [dateien, setDateien] = useState({});
+  // Je Bild: angefragte Kacheln und erzeugte Object-URLs (zum Freigeben).
+  const stand = useRef({ angefragt: new Set(), urls: [] });
+
+  const kacheln = useMemo(
+    () => sichtbareKacheln(underlay, { tx, ty, zoom, breite, hoehe }),
+    [underlay, tx, ty, zoom, breite, hoehe],
+  );
+
+  // Neues Bild: Vorschau holen; beim Wechsel die alten Object-URLs freigeben.
+  useEffect(() => {
+    if (!schemaId || !version || !underlay.kacheln) return undefined;
+    const aktuell = { angefragt: new Set(), urls: [] };
+    stand.current = aktuell;
+    setDateien({});
+    laden(stand, aktuell, 'vorschau', () => getSchemaUnderlayVorschau(schemaId, version), setDateien);
+    return () => aktuell.urls.forEach(url => URL.revokeObjectURL(url));
+  }, [schemaId, version, underlay.kacheln]);
+
+  // Sichtbare Kacheln nachladen; jede wird nur einmal angefragt.
+  useEffect(() => {
+    if (!schemaId || !version) return;
+    const aktuell = stand.current;
+    for (const kachel of kacheln) {
+      const key = kachelSchluessel(kachel);
+      if (!aktuell.angefragt.has(key)) {
+        laden(stand, aktuell, key, () => getSchemaUnderlayKachel(schemaId, kachel, version), setDateien);
+      }
+    }
+  }, [schemaId, version, kacheln]);
+
+  const rahmen = {
+    ...style,
+    position:'absolute', left:underlay.x, top:underlay.y,
+    width:underlay.w * underlay.scale, height:underlay.h * underlay.scale,
+  };
+
+  // Ohne Manifest (nur lokal, noch nicht gespeichert): das Bild als Ganzes.
+  if (!underlay.kacheln) {
+    return underlay.data ? (
+      <img src={underlay.data} alt="" draggable={false} className={className}
+        onPointerDown={onPointerDown} style={rahmen} />
+    ) : null;
+  }
+
+  return (
+    <div className={className} onPointerDown={onPointerDown} style={rahmen}>
+      {dateien.vorschau && (
+        <img src={dateien.vorschau} alt="" draggable={false}
+          style={{ ...KIND, left:0, top:0, width:'100%', height:'100%' }} />
+      )}
+      {kacheln.map(kachel => {
+        const url = dateien[kachelSchluessel(kachel)];
+        return url ? (
+          <img key={kachelSchluessel(kachel)} src={url} alt="" draggable={false}
+            style={{ ...KIND, left:kachel.links, top:kachel.oben, width:kachel.breite, height:kachel.hoehe }} />
+        ) : null;
+      })}
+    </div>
+  );
+}
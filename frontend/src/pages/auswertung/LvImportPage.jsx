@@ -2,13 +2,13 @@ import { useEffect, useMemo, useRef, useState } from "react";
 import { Link, useNavigate, useParams } from "react-router-dom";
 import { Upload, FileText, Check, CheckCircle2, AlertTriangle, Trash2, Plus, ChevronDown, Loader2 } from "lucide-react";
 import {
-  uploadLvImport, listLvImports, getLvImport, getFachwerte, getNormLv,
+  uploadLvImport, getLvImportStatus, listLvImportsSeite, getLvImport, getFachwerte, getNormLv,
   updateLvFeature, updateLvCost, addLvCost, deleteLvCost, updateLvCommercial,
   updateLvImport, approveLvImport, addLvSystem, updateLvSystem, deleteLvSystem,
 } from "../../api/hcApi";
 import PageHeader from "../../components/ui/PageHeader";
 import { LEER, chf, zahl } from "../../lib/format";
-import { PROCESSING, processingSchritt } from "./lvImportProgress";
+import { PROCESSING, stufenSchritt } from "./lvImportProgress";
 
 // B9 — Review-Seite des LV-Imports. Ohne :id ist es die Upload-Ansicht.
 // Aus einem Unternehmer-LV entsteht ein geprüfter technischer Fingerprint +
@@ -75,13 +75,17 @@ const CONF_LABEL = { high: "hohe Sicherheit", medium: "prüfen", low: "unsicher"
 const STATUS_STYLE = {
   approved: "bg-slate-100 text-slate-700", review: "bg-slate-100 text-slate-700",
   extracted: "bg-slate-100 text-slate-700", uploaded: "bg-slate-100 text-slate-600",
-  failed: "bg-red-100 text-red-700",
+  processing: "bg-brand-50 text-brand-700", failed: "bg-red-100 text-red-700",
 };
 // Der Status ist im Backend ein englischer Enum-Wert; im UI steht immer Deutsch.
 const STATUS_LABEL = {
   approved: "Freigegeben", review: "Zu prüfen", extracted: "Erkannt – unsicher",
-  uploaded: "Hochgeladen", failed: "Fehlgeschlagen",
+  uploaded: "Hochgeladen", processing: "In Verarbeitung", failed: "Fehlgeschlagen",
 };
+// Abfrageintervall des Import-Jobs nach dem Upload. Nach JOB_POLL_MAX_MS
+// gibt die Seite auf; der Import bleibt in der Liste und läuft weiter.
+const JOB_POLL_MS = 1500;
+const JOB_POLL_MAX_MS = 15 * 60 * 1000;
 const statusText = (status) => STATUS_LABEL[status] || STATUS_LABEL.uploaded;
 
 // P0 #1 — Herkunft des Textes: aus digitaler Textebene oder per OCR erkannt.
@@ -399,25 +403,33 @@ function UploadAnsicht() {
   const [busy, setBusy] = useState(false);
   const [error, setError] = useState("");
   const [imports, setImports] = useState([]);
+  const [weitereCursor, setWeitereCursor] = useState(null);
   const [ueberZone, setUeberZone] = useState(false);
 
-  useEffect(() => {
-    listLvImports()
-      .then((data) => setImports(Array.isArray(data) ? data : []))
+  const ladeImports = (cursor = null) =>
+    listLvImportsSeite(cursor)
+      .then(({ items, nextCursor }) => {
+        const seite = Array.isArray(items) ? items : [];
+        setImports((bisher) => (cursor ? [...bisher, ...seite] : seite));
+        setWeitereCursor(nextCursor);
+      })
       .catch(() => setError("Bisherige LV-Importe konnten nicht geladen werden."));
-  }, []);
 
-  // Punkt 24 — der Upload arbeitet synchron; statt Fake-Prozenten laufen die
-  // Schritte optisch weiter, damit die Seite nicht eingefroren wirkt.
+  useEffect(() => { ladeImports(); }, []);
+
+  // Punkt 24 — die Extraktion läuft als Hintergrundjob; die gemeldete Stufe
+  // begrenzt den Schritt, dazwischen läuft die Zeitschätzung optisch weiter,
+  // damit die Seite nicht eingefroren wirkt.
   const [schritt, setSchritt] = useState(0);
   const [vergangen, setVergangen] = useState(0);
+  const stufeRef = useRef(null);
   useEffect(() => {
-    if (!busy) { setSchritt(0); setVergangen(0); return undefined; }
+    if (!busy) { setSchritt(0); setVergangen(0); stufeRef.current = null; return undefined; }
     const started = Date.now();
     const t = setInterval(() => {
       const seconds = Math.floor((Date.now() - started) / 1000);
       setVergangen(seconds);
-      setSchritt(processingSchritt(seconds));
+      setSchritt(stufenSchritt(stufeRef.current, seconds));
     }, 1000);
     return () => clearInterval(t);
   }, [busy]);
@@ -431,6 +443,20 @@ function UploadAnsicht() {
     setBusy(true); setError("");
     try {
       const imp = await uploadLvImport(file);
+      stufeRef.current = imp.processing_stage || imp.status;
+      // Job pollen, bis er fertig ist — erst dann hat das Review Zeilen.
+      const frist = Date.now() + JOB_POLL_MAX_MS;
+      let fertig = false;
+      while (Date.now() < frist) {
+        const job = await getLvImportStatus(imp.id);
+        stufeRef.current = job.stage || job.status;
+        if (job.done) { fertig = true; break; }
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+      }
+      if (!fertig) {
+        setError("Die Verarbeitung dauert ungewöhnlich lange. Der Import erscheint in der Liste, sobald er fertig oder abgebrochen ist.");
+        return;
+      }
       navigate(`/auswertung/import/${imp.id}`);
     } catch (err) {
       setError(apiFehlertext(err, "Upload fehlgeschlagen. Nur PDF wird unterstützt."));
@@ -515,6 +541,12 @@ function UploadAnsicht() {
               ))}
             </tbody>
           </table>
+          {weitereCursor && (
+            <button type="button" onClick={() => ladeImports(weitereCursor)}
+              className="w-full border-t border-slate-100 py-2 text-xs font-semibold text-brand-700 hover:bg-brand-50/60">
+              Weitere laden
+            </button>
+          )}
         </div>
       )}
       </div>
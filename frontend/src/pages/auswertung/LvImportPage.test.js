@@ -1,6 +1,6 @@
 import { describe, expect, it } from "vitest";
 
-import { processingSchritt } from "./lvImportProgress";
+import { processingSchritt, stufenSchritt } from "./lvImportProgress";
 import { costNeedsAttention, featureNeedsAttention } from "./LvImportPage";
 
 describe("LV-Import Ladefortschritt", () => {
@@ -15,6 +15,14 @@ describe("LV-Import Ladefortschritt", () => {
   ])("ordnet %i Sekunden dem Schritt %i zu", (seconds, expected) => {
     expect(processingSchritt(seconds)).toBe(expected);
   });
+
+  it("hält die Zeitschätzung innerhalb der gemeldeten Job-Stufe", () => {
+    expect(stufenSchritt("extraction", 60)).toBe(1);
+    expect(stufenSchritt("parsing", 3)).toBe(2);
+    expect(stufenSchritt("parsing", 20)).toBe(3);
+    expect(stufenSchritt("ai_review", 5)).toBe(4);
+    expect(stufenSchritt(null, 7)).toBe(2);
+  });
 });
 
 describe("LV-Review Hervorhebung", () => {
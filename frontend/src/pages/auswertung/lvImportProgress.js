@@ -1,10 +1,12 @@
 // Punkt 24 — sichtbarer Verarbeitungszustand statt scheinbar eingefrorener Seite.
+// `stufen` = Verarbeitungsstufen des Backend-Jobs (processing_stage), die zu
+// diesem Schritt gehören.
 export const PROCESSING = [
-  { ab: 0, titel: "PDF wird hochgeladen", detail: "Datei wird sicher an den Import übergeben." },
-  { ab: 2, titel: "Seiten werden gelesen und klassifiziert", detail: "Deckblatt, LV, Technik, Kosten und Konditionen werden getrennt." },
-  { ab: 7, titel: "Technische Kennwerte werden erkannt", detail: "Erzeuger, Erdsonden, Rohrmeter, Pumpen und Wärmemessungen." },
-  { ab: 18, titel: "Kosten und Abzüge werden geprüft", detail: "BKP-Positionen, Rabatt, Skonto, Abzüge und MWST werden nachgerechnet." },
-  { ab: 45, titel: "KI-Prüfung und Resultat werden abgeschlossen", detail: "Nur unsichere Seiten werden visuell geprüft und normalisiert." },
+  { ab: 0, stufen: ["uploaded"], titel: "PDF wird hochgeladen", detail: "Datei wird sicher an den Import übergeben." },
+  { ab: 2, stufen: ["extraction"], titel: "Seiten werden gelesen und klassifiziert", detail: "Deckblatt, LV, Technik, Kosten und Konditionen werden getrennt." },
+  { ab: 7, stufen: ["parsing"], titel: "Technische Kennwerte werden erkannt", detail: "Erzeuger, Erdsonden, Rohrmeter, Pumpen und Wärmemessungen." },
+  { ab: 18, stufen: ["parsing"], titel: "Kosten und Abzüge werden geprüft", detail: "BKP-Positionen, Rabatt, Skonto, Abzüge und MWST werden nachgerechnet." },
+  { ab: 45, stufen: ["ai_review", "mapping", "persisting"], titel: "KI-Prüfung und Resultat werden abgeschlossen", detail: "Nur unsichere Seiten werden visuell geprüft und normalisiert." },
 ];
 
 // Kein Array.findLastIndex(): ältere Safari-/WebView-Versionen unterstützen
@@ -18,3 +20,19 @@ export function processingSchritt(seconds) {
   }
   return index;
 }
+
+// Die gemeldete Job-Stufe setzt die Grenzen, die Zeit schätzt innerhalb davon
+// weiter (eine Stufe kann mehrere Schritte umfassen). Ohne bekannte Stufe
+// bleibt es bei der reinen Zeitschätzung.
+export function stufenSchritt(stufe, seconds) {
+  let von = -1;
+  let bis = -1;
+  for (let i = 0; i < PROCESSING.length; i += 1) {
+    if (!PROCESSING[i].stufen.includes(stufe)) continue;
+    if (von < 0) von = i;
+    bis = i;
+  }
+  const geschaetzt = processingSchritt(seconds);
+  if (von < 0) return geschaetzt;
+  return Math.min(bis, Math.max(von, geschaetzt));
+}
@@ -105,6 +105,7 @@ import {
 } from '../../api/hcApi';
 import { api } from '../../api';
 import { dateiZuUnderlay } from './schema/underlay';
+import UnderlayEbene from '../../components/hc/UnderlayEbene';
 import {
   branchAnschluss, inlineNodePosition, isBranchInsertable, isInlineInsertable,
 } from './schema/componentRegistry';
@@ -2826,7 +2827,7 @@ function EditorInner() {
       const gespeichert = await setSchemaUnderlay(schemaId, {
         ...basis, x:0, y:0, scale:1, opacity:0.6, locked:false,
       });
-      setUnderlay(gespeichert);
+      setUnderlay(gespeichert);                            // Lage + Kachel-Manifest
       setShowUnderlayPanel(true);
     } catch (e) {
       console.error('Underlay konnte nicht geladen werden', e);
@@ -8413,11 +8414,9 @@ function EditorInner() {
                 sonst rein visuell, damit es das Zeichnen nie blockiert. */}
             {underlay && (
               <ViewportPortal>
-                <img src={underlay.data} alt="" draggable={false} className="hc-underlay"
+                <UnderlayEbene schemaId={schemaId} underlay={underlay} className="hc-underlay"
                   onPointerDown={underlayDragStart}
                   style={{
-                    position:'absolute', left:underlay.x, top:underlay.y,
-                    width:underlay.w * underlay.scale, height:underlay.h * underlay.scale,
                     opacity:underlay.opacity, zIndex:-1, userSelect:'none',
                     pointerEvents:(!underlay.locked && !zeichenModus && !leitungsEntwurf) ? 'auto' : 'none',
                     cursor:(!underlay.locked && !zeichenModus && !leitungsEntwurf) ? 'move' : 'default',
@@ -0,0 +1,67 @@
+// Underlay-Kacheln (§ Editor #5): welche Kacheln der Pyramide sind sichtbar?
+//
+// Das Backend zerlegt den Plan einmal in Stufen (0 = volle Auflösung, jede
+// weitere halb so gross) und Kacheln von `kante` px. Gezeigt wird die Stufe,
+// deren Pixel auf dem Bildschirm gerade noch mindestens ein Pixel gross sind —
+// herausgezoomt lädt der Editor also wenige, kleine Kacheln, hineingezoomt nur
+// den sichtbaren Ausschnitt in voller Auflösung.
+
+export const MAX_KACHELN = 240; // Sicherheitsgrenze je Ansicht
+
+/** Stufe für `bildschirmProBildpixel` (= scale × zoom), geklemmt aufs Manifest. */
+export function kachelStufe(bildschirmProBildpixel, anzahlStufen) {
+  if (!(bildschirmProBildpixel > 0) || anzahlStufen < 1) return 0;
+  const stufe = Math.floor(Math.log2(1 / bildschirmProBildpixel));
+  return Math.max(0, Math.min(anzahlStufen - 1, stufe));
+}
+
+/**
+ * Sichtbare Kacheln eines Underlays.
+ *
+ * underlay: {x, y, w, h, scale, kacheln:{kante, stufen:[[w,h],…]}} (Flow-Koordinaten)
+ * sicht:    {tx, ty, zoom, breite, hoehe} — React-Flow-Transform und Canvasgrösse
+ *
+ * Liefert [{stufe, x, y, links, oben, breite, hoehe}], Lage in px relativ zur
+ * linken oberen Ecke des Underlays (bereits mit `scale` multipliziert).
+ */
+export function sichtbareKacheln(underlay, sicht) {
+  const manifest = underlay?.kacheln;
+  if (!manifest?.stufen?.length || !sicht?.zoom) return [];
+  const { kante, stufen } = manifest;
+  const scale = underlay.scale || 1;
+  const stufe = kachelStufe(scale * sicht.zoom, stufen.length);
+  const faktor = 2 ** stufe;                 // Bildpixel (Stufe 0) je Stufenpixel
+  const [stufeW, stufeH] = stufen[stufe];
+  const spalten = Math.ceil(stufeW / kante);
+  const zeilen = Math.ceil(stufeH / kante);
+
+  // Sichtbarer Flow-Ausschnitt → Stufenpixel des Underlays.
+  const zuStufe = (flow, ursprung) => (flow - ursprung) / scale / faktor;
+  const x0 = zuStufe(-sicht.tx / sicht.zoom, underlay.x);
+  const x1 = zuStufe((sicht.breite - sicht.tx) / sicht.zoom, underlay.x);
+  const y0 = zuStufe(-sicht.ty / sicht.zoom, underlay.y);
+  const y1 = zuStufe((sicht.hoehe - sicht.ty) / sicht.zoom, underlay.y);
+  const von = (wert, max) => Math.max(0, Math.min(max - 1, Math.floor(wert / kante)));
+  const [sx0, sx1] = [von(x0, spalten), von(x1, spalten)];
+  const [sy0, sy1] = [von(y0, zeilen), von(y1, zeilen)];
+  if (x1 < 0 || y1 < 0 || x0 >= stufeW || y0 >= stufeH) return [];
+
+  const w = underlay.w;
+  const h = underlay.h;
+  const out = [];
+  for (let y = sy0; y <= sy1; y += 1) {
+    for (let x = sx0; x <= sx1; x += 1) {
+      if (out.length >= MAX_KACHELN) return out;
+      const links = x * kante * faktor;
+      const oben = y * kante * faktor;
+      out.push({
+        stufe, x, y,
+        links: links * scale,
+        oben: oben * scale,
+        breite: (Math.min(w, links + kante * faktor) - links) * scale,
+        hoehe: (Math.min(h, oben + kante * faktor) - oben) * scale,
+      });
+    }
+  }
+  return out;
+}
@@ -0,0 +1,50 @@
+import { describe, expect, it } from 'vitest';
+import { MAX_KACHELN, kachelStufe, sichtbareKacheln } from './underlayKacheln';
+
+// 1000 × 600 px Plan: Stufen 1000×600, 500×300, 250×150.
+const plan = (over = {}) => ({
+  x: 0, y: 0, w: 1000, h: 600, scale: 1,
+  kacheln: { kante: 256, stufen: [[1000, 600], [500, 300], [250, 150]] },
+  ...over,
+});
+const sicht = (over = {}) => ({ tx: 0, ty: 0, zoom: 1, breite: 2000, hoehe: 2000, ...over });
+
+describe('kachelStufe', () => {
+  it('nimmt volle Auflösung ab Massstab 1 und halbiert beim Herauszoomen', () => {
+    expect(kachelStufe(2, 3)).toBe(0);
+    expect(kachelStufe(1, 3)).toBe(0);
+    expect(kachelStufe(0.5, 3)).toBe(1);
+    expect(kachelStufe(0.3, 3)).toBe(1);
+    expect(kachelStufe(0.01, 3)).toBe(2);   // nie über die kleinste Stufe hinaus
+  });
+});
+
+describe('sichtbareKacheln', () => {
+  it('lädt bei voller Ansicht alle Kacheln der Stufe 0, Randkacheln gekürzt', () => {
+    const kacheln = sichtbareKacheln(plan(), sicht());
+    expect(kacheln).toHaveLength(4 * 3);
+    const rand = kacheln.find(k => k.x === 3 && k.y === 2);
+    expect(rand).toMatchObject({ stufe: 0, links: 768, oben: 512, breite: 232, hoehe: 88 });
+  });
+
+  it('lädt hineingezoomt nur den sichtbaren Ausschnitt', () => {
+    // Zoom 4, Ausschnitt 400×300 Bildschirm-px ab Bildpixel (300, 300).
+    const kacheln = sichtbareKacheln(plan(), sicht({ zoom: 4, tx: -1200, ty: -1200, breite: 400, hoehe: 300 }));
+    expect(kacheln.map(k => `${k.x}/${k.y}`)).toEqual(['1/1']);
+  });
+
+  it('nimmt herausgezoomt die kleine Stufe und rechnet die Lage in Flow-px', () => {
+    const kacheln = sichtbareKacheln(plan({ scale: 2 }), sicht({ zoom: 0.1 }));
+    expect(kacheln).toEqual([{ stufe: 2, x: 0, y: 0, links: 0, oben: 0, breite: 2000, hoehe: 1200 }]);
+  });
+
+  it('liefert nichts ausserhalb der Ansicht und ohne Manifest', () => {
+    expect(sichtbareKacheln(plan({ x: 5000 }), sicht())).toEqual([]);
+    expect(sichtbareKacheln(plan({ kacheln: null }), sicht())).toEqual([]);
+  });
+
+  it('begrenzt die Anzahl je Ansicht', () => {
+    const riesig = plan({ w: 100000, h: 100000, kacheln: { kante: 256, stufen: [[100000, 100000]] } });
+    expect(sichtbareKacheln(riesig, sicht({ breite: 100000, hoehe: 100000 }))).toHaveLength(MAX_KACHELN);
+  });
+});